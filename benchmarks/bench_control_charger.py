@@ -0,0 +1,129 @@
+# File version: 2025-06-05 0.2.0
+"""Prestandamätning av kommandovalet i `_control_charger` för 1, 10 och 100 laddare.
+
+Varje runda styr alla laddare med ett beslut ur en fast följd som liknar en
+dag med solenergiladdning: strömmen justeras, samma ström begärs igen (och
+ska undertryckas av kommandocachen), laddaren pausas och startas igen.
+Tjänsteanropen går till en FakeServices som bara räknar dem, så det är
+valet av kommandon som mäts, inte Easee-integrationen.
+
+Körs från repots rot:
+
+    python -m benchmarks.bench_control_charger
+    python -m benchmarks.bench_control_charger --entries 1 10 100 --rounds 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from benchmarks.fake_hass import (
+    FakeHass,
+    create_coordinators,
+    measure,
+    run_sync,
+    set_shared_states,
+    shutdown_coordinators,
+)
+from custom_components.smart_ev_charging.const import (
+    CONTROL_MODE_SOLAR_SURPLUS,
+    EASEE_STATUS_AWAITING_START,
+    EASEE_STATUS_CHARGING,
+)
+from custom_components.smart_ev_charging.reasons import Reason, ReasonCode
+
+# (laddarens status, dynamisk gräns på laddaren, ska ladda, målström)
+_STEPS: tuple[tuple[str, float, bool, float], ...] = (
+    (EASEE_STATUS_CHARGING, 10.0, True, 10.0),
+    (EASEE_STATUS_CHARGING, 10.0, True, 12.0),
+    (EASEE_STATUS_CHARGING, 12.0, True, 12.0),
+    (EASEE_STATUS_CHARGING, 12.0, True, 12.0),
+    (EASEE_STATUS_CHARGING, 12.0, True, 8.0),
+    (EASEE_STATUS_CHARGING, 8.0, True, 8.0),
+    (EASEE_STATUS_CHARGING, 8.0, False, 0.0),
+    (EASEE_STATUS_AWAITING_START, 0.0, False, 0.0),
+    (EASEE_STATUS_AWAITING_START, 0.0, True, 6.0),
+    (EASEE_STATUS_AWAITING_START, 6.0, True, 6.0),
+    (EASEE_STATUS_CHARGING, 6.0, True, 6.0),
+)
+
+
+async def _async_run(entries: int, rounds: int) -> dict[str, float]:
+    hass = FakeHass()
+    set_shared_states(hass)
+    coordinators = create_coordinators(hass, entries)
+    # Ögonblicksbilderna byggs i förväg, så att bara styrningen mäts.
+    plans = []
+    for coordinator in coordinators:
+        coordinator.active_control_mode_internal = CONTROL_MODE_SOLAR_SURPLUS
+        snapshot = coordinator._build_input_snapshot()
+        plans.append(
+            [
+                (
+                    snapshot.replace(
+                        charger_status=status, dynamic_current_limit_a=limit_a
+                    ),
+                    should_charge,
+                    current_a,
+                    Reason(
+                        ReasonCode.SOLAR_ACTIVE
+                        if should_charge
+                        else ReasonCode.SOLAR_PAUSED,
+                        (current_a, 6.0, current_a) if should_charge else (0.0, 6.0),
+                    ),
+                )
+                for status, limit_a, should_charge, current_a in _STEPS
+            ]
+        )
+
+    def _round(index: int) -> None:
+        for coordinator, steps in zip(coordinators, plans):
+            snapshot, should_charge, current_a, reason = steps[index % len(steps)]
+            run_sync(
+                coordinator._control_charger(
+                    snapshot,
+                    should_charge,
+                    current_a,
+                    reason,
+                )
+            )
+
+    try:
+        result = measure(_round, rounds)
+    finally:
+        shutdown_coordinators(coordinators)
+    controls = result["calls"] * entries
+    result["controls_per_second"] = result["per_second"] * entries
+    result["us_per_control"] = result["us_per_call"] / entries
+    result["commands_per_control"] = hass.services.call_count / controls
+    result["suppressed_per_control"] = (
+        sum(c._command_cache.suppressed_count for c in coordinators) / controls
+    )
+    return result
+
+
+def run(entries: int, rounds: int) -> dict[str, float]:
+    """Kör mätningen för `entries` laddare och returnerar resultatet."""
+    return asyncio.run(_async_run(entries, rounds))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    for entries in args.entries:
+        result = run(entries, args.rounds)
+        print(
+            f"{entries:>4} laddare: {result['controls_per_second']:>9.0f} styrningar/s "
+            f"({result['us_per_control']:.1f} µs per styrning), "
+            f"{result['commands_per_control']:.2f} kommandon och "
+            f"{result['suppressed_per_control']:.2f} undertryckta per styrning, "
+            f"topp {result['peak_kib_per_call']:.1f} KiB per runda."
+        )
+
+
+if __name__ == "__main__":
+    main()
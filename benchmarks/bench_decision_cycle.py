@@ -0,0 +1,84 @@
+# File version: 2025-06-05 0.2.0
+"""Prestandamätning av beslutslogiken för 1, 10 och 100 laddare.
+
+Varje runda ändrar solproduktionen och nätets effekt, som alla laddare delar,
+och kör sedan för varje laddare det som beslutscykeln gör innan kommandon
+skickas: ögonblicksbilden av indata läses från `hass.states` och
+beslutsmotorn fattar beslutet. Mäter beslut per sekund, tid per beslut samt
+tillfälligt och kvarliggande minne per runda.
+
+Körs från repots rot:
+
+    python -m benchmarks.bench_decision_cycle
+    python -m benchmarks.bench_decision_cycle --entries 1 10 100 --rounds 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from benchmarks.fake_hass import (
+    GRID_SENSOR_ID,
+    SOLAR_SENSOR_ID,
+    FakeHass,
+    create_coordinators,
+    measure,
+    set_shared_states,
+    shutdown_coordinators,
+)
+from custom_components.smart_ev_charging.decision import DecisionState, evaluate
+
+
+async def _async_run(entries: int, rounds: int) -> dict[str, float]:
+    hass = FakeHass()
+    set_shared_states(hass)
+    coordinators = create_coordinators(hass, entries)
+    states = [DecisionState() for _ in coordinators]
+    set_state = hass.states.async_set
+
+    def _round(index: int) -> None:
+        # Molnigt: produktionen varierar mellan rundorna.
+        solar_w = 3000 + (index * 373) % 5000
+        set_state(SOLAR_SENSOR_ID, str(solar_w), {"unit_of_measurement": "W"})
+        set_state(GRID_SENSOR_ID, str(-solar_w + 1200), {"unit_of_measurement": "W"})
+        for position, coordinator in enumerate(coordinators):
+            _decision, states[position] = evaluate(
+                coordinator._build_input_snapshot(),
+                states[position],
+                coordinator._solar_controller,
+                coordinator._phase_switch,
+            )
+
+    try:
+        result = measure(_round, rounds)
+    finally:
+        shutdown_coordinators(coordinators)
+    result["decisions_per_second"] = result["per_second"] * entries
+    result["us_per_decision"] = result["us_per_call"] / entries
+    return result
+
+
+def run(entries: int, rounds: int) -> dict[str, float]:
+    """Kör mätningen för `entries` laddare och returnerar resultatet."""
+    return asyncio.run(_async_run(entries, rounds))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    for entries in args.entries:
+        result = run(entries, args.rounds)
+        print(
+            f"{entries:>4} laddare: {result['decisions_per_second']:>9.0f} beslut/s "
+            f"({result['us_per_decision']:.1f} µs per beslut), "
+            f"topp {result['peak_kib_per_call']:.1f} KiB per runda, "
+            f"kvar {result['retained_b_per_call']:.0f} B per runda."
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# File version: 2025-06-05 0.2.0
+"""Prestandamätning av `_handle_external_state_change` under en händelsestorm.
+
+Alla laddare delar nätets effekt och solproduktionen, som rapporteras i varje
+runda (som en P1/HAN-mätare och en växelriktare med hög takt). Elpriset
+ändras var tionde runda och varje laddare rapporterar ny dynamisk ström.
+Händelserna fördelas till koordinatorerna på samma sätt som den gemensamma
+hubben gör. Mäter hanterade händelser per sekund, tid per händelse, andelen
+händelser som begär en ny beslutscykel och minne per runda.
+
+Händelserna skapas i förväg och hanteras så fort som möjligt, så stormen
+motsvarar en skur där alla värden landar inom samma nedsamplingsfönster.
+
+Körs från repots rot:
+
+    python -m benchmarks.bench_event_storm
+    python -m benchmarks.bench_event_storm --entries 1 10 100 --rounds 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Callable
+
+from benchmarks.fake_hass import (
+    GRID_SENSOR_ID,
+    PRICE_SENSOR_ID,
+    SOLAR_SENSOR_ID,
+    WARMUP_ITERATIONS,
+    FakeHass,
+    create_coordinators,
+    measure,
+    set_shared_states,
+    shutdown_coordinators,
+)
+from custom_components.smart_ev_charging.const import (
+    CONF_CHARGER_DYNAMIC_CURRENT_SENSOR,
+)
+from homeassistant.core import Event
+
+# Antal olika rundor som spelas upp om och om igen.
+_DISTINCT_ROUNDS = 50
+
+
+async def _async_run(entries: int, rounds: int) -> dict[str, float]:
+    hass = FakeHass()
+    set_shared_states(hass)
+    coordinators = create_coordinators(hass, entries)
+    refresh_requests = [0]
+    subscribers: dict[str, list[Callable[[Event], None]]] = {}
+    for coordinator in coordinators:
+        # Som async_start(): dödbandet räknas från det aktuella priset.
+        coordinator._price_deadband.reference = coordinator._spot_price_from_state(
+            PRICE_SENSOR_ID, hass.states.get(PRICE_SENSOR_ID)
+        )
+        debouncer = coordinator._event_refresh_debouncer
+        schedule_call = debouncer.async_schedule_call
+
+        def _counting_schedule_call(schedule_call=schedule_call) -> None:
+            refresh_requests[0] += 1
+            schedule_call()
+
+        debouncer.async_schedule_call = _counting_schedule_call
+        for entity_id in (
+            GRID_SENSOR_ID,
+            SOLAR_SENSOR_ID,
+            PRICE_SENSOR_ID,
+            coordinator.config[CONF_CHARGER_DYNAMIC_CURRENT_SENSOR],
+        ):
+            subscribers.setdefault(entity_id, []).append(
+                coordinator._handle_external_state_change
+            )
+
+    set_state = hass.states.async_set
+    price_attributes = hass.states.get(PRICE_SENSOR_ID).attributes
+    storm: list[list[Event]] = []
+    for index in range(_DISTINCT_ROUNDS):
+        solar_w = 3000 + (index * 373) % 5000
+        events = [
+            set_state(
+                GRID_SENSOR_ID,
+                str(-solar_w + 1200 + (index % 3) * 40),
+                {"unit_of_measurement": "W"},
+            ),
+            set_state(SOLAR_SENSOR_ID, str(solar_w), {"unit_of_measurement": "W"}),
+        ]
+        if index % 10 == 0:
+            events.append(
+                set_state(
+                    PRICE_SENSOR_ID, f"{1.25 + index / 1000:.3f}", price_attributes
+                )
+            )
+        events.extend(
+            set_state(
+                coordinator.config[CONF_CHARGER_DYNAMIC_CURRENT_SENSOR],
+                str(6 + index % 11),
+                {"unit_of_measurement": "A"},
+            )
+            for coordinator in coordinators
+        )
+        storm.append(events)
+    handled_per_round = [
+        sum(len(subscribers[event.data["entity_id"]]) for event in events)
+        for events in storm
+    ]
+
+    def _round(index: int) -> None:
+        for event in storm[index % _DISTINCT_ROUNDS]:
+            for action in subscribers[event.data["entity_id"]]:
+                action(event)
+
+    try:
+        result = measure(_round, rounds)
+    finally:
+        shutdown_coordinators(coordinators)
+
+    def _handled(count: int) -> int:
+        return sum(handled_per_round[index % _DISTINCT_ROUNDS] for index in range(count))
+
+    handled = _handled(rounds)
+    result["events_per_second"] = handled * result["per_second"] / rounds
+    result["us_per_event"] = 1_000_000 / result["events_per_second"]
+    # measure() kör uppvärmningen och sedan alla rundor två gånger.
+    result["refresh_share"] = refresh_requests[0] / (
+        _handled(min(rounds, WARMUP_ITERATIONS)) + 2 * handled
+    )
+    return result
+
+
+def run(entries: int, rounds: int) -> dict[str, float]:
+    """Kör mätningen för `entries` laddare och returnerar resultatet."""
+    return asyncio.run(_async_run(entries, rounds))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    for entries in args.entries:
+        result = run(entries, args.rounds)
+        print(
+            f"{entries:>4} laddare: {result['events_per_second']:>9.0f} händelser/s "
+            f"({result['us_per_event']:.1f} µs per händelse), "
+            f"{100 * result['refresh_share']:.1f} % begär en beslutscykel, "
+            f"topp {result['peak_kib_per_call']:.1f} KiB per runda."
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# File version: 2025-06-05 0.2.0
+"""Prestandamätning av nedsamplingen av högfrekventa effektsensorer.
+
+Simulerar en P1/HAN-mätare som rapporterar nätets effekt med 1-10 Hz, med
+brus och enstaka steg (t.ex. när en spis slås på), och mäter CPU-tid per
+10 000 värden samt hur många värden som släpps vidare till beslutscykeln.
+
+Körs från repots rot:
+
+    python -m benchmarks.bench_power_signal
+    python -m benchmarks.bench_power_signal --rate-hz 1 --samples 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import UTC, datetime, timedelta
+import random
+import time
+
+from custom_components.smart_ev_charging.const import (
+    DEFAULT_POWER_DEADBAND_W,
+    POWER_SIGNAL_WINDOW_SECONDS,
+)
+from custom_components.smart_ev_charging.signals import Deadband, DownsampledSignal
+
+START = datetime(2025, 6, 5, 12, 0, tzinfo=UTC)
+
+
+def _meter_samples(count: int, rate_hz: float, seed: int) -> list[tuple[str, datetime]]:
+    """Tillståndssträngar och tidpunkter som en mätare skulle rapportera dem."""
+    rng = random.Random(seed)
+    level_w = -1500.0
+    samples: list[tuple[str, datetime]] = []
+    for index in range(count):
+        if rng.random() < 0.002:
+            # Ett steg i husets last, ungefär var 50:e sekund vid 10 Hz.
+            level_w += rng.choice((-2000.0, 2000.0))
+        value_w = level_w + rng.gauss(0.0, 60.0)
+        samples.append(
+            (f"{value_w:.0f}", START + timedelta(seconds=index / rate_hz))
+        )
+    return samples
+
+
+def run(samples: int, rate_hz: float, seed: int = 18) -> dict[str, float]:
+    """Kör mätningen och returnerar CPU-tid och antal skickade värden."""
+    stream = _meter_samples(samples, rate_hz, seed)
+    signal = DownsampledSignal(
+        timedelta(seconds=POWER_SIGNAL_WINDOW_SECONDS),
+        Deadband(absolute=DEFAULT_POWER_DEADBAND_W),
+    )
+    started = time.process_time()
+    for state, now in stream:
+        signal.add(float(state), now)
+    elapsed_s = time.process_time() - started
+    return {
+        "samples": signal.received_count,
+        "emitted": signal.emitted_count,
+        "cpu_ms_per_10k": elapsed_s * 1000 * 10_000 / samples,
+        "cpu_us_per_sample": elapsed_s * 1_000_000 / samples,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=100_000)
+    parser.add_argument("--rate-hz", type=float, default=10.0)
+    args = parser.parse_args()
+
+    result = run(args.samples, args.rate_hz)
+    print(
+        f"{result['samples']:.0f} värden vid {args.rate_hz:g} Hz: "
+        f"{result['cpu_ms_per_10k']:.2f} ms CPU per 10 000 värden "
+        f"({result['cpu_us_per_sample']:.2f} µs per värde)."
+    )
+    print(
+        f"Till beslutscykeln: {result['emitted']:.0f} värden "
+        f"({100 * result['emitted'] / result['samples']:.2f} %)."
+    )
+
+
+if __name__ == "__main__":
+    main()
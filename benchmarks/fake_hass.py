@@ -0,0 +1,299 @@
+# File version: 2025-06-05 0.2.0
+"""Minimal Home Assistant-miljö för prestandamätningarna.
+
+Koordinatorn läser tillstånd via `hass.states.get` och skickar kommandon via
+`hass.services.async_call`. Här finns bara just det, plus `hass.data` och
+event loopen, så att många koordinatorer kan skapas och köras utan
+Home Assistants testmiljö. Koden som mäts är integrationens riktiga kod.
+
+Alla entries delar elpris, solproduktion, nätets effekt och scheman, medan
+varje laddare har egna entiteter, precis som i en installation med flera
+laddare.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Coroutine, Mapping
+from datetime import datetime, timedelta
+import time
+import tracemalloc
+from typing import Any, TypeVar
+
+from custom_components.smart_ev_charging.const import (
+    CONF_CHARGER_DEVICE,
+    CONF_CHARGER_DYNAMIC_CURRENT_SENSOR,
+    CONF_CHARGER_ENABLED_SWITCH_ID,
+    CONF_CHARGER_MAX_CURRENT_LIMIT_SENSOR,
+    CONF_COMMAND_RATE_LIMIT,
+    CONF_EV_SOC_SENSOR,
+    CONF_EVENT_DRIVEN_UPDATES,
+    CONF_GRID_POWER_SENSOR,
+    CONF_PRICE_SENSOR,
+    CONF_SOLAR_PRODUCTION_SENSOR,
+    CONF_SOLAR_SCHEDULE_ENTITY,
+    CONF_STATUS_SENSOR,
+    CONF_TARGET_SOC_LIMIT,
+    CONF_TIME_SCHEDULE_ENTITY,
+    DOMAIN,
+    EASEE_STATUS_CHARGING,
+    ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH,
+    ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER,
+    ENTITY_ID_SUFFIX_MIN_SOLAR_CHARGE_CURRENT_A_NUMBER,
+    ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH,
+    ENTITY_ID_SUFFIX_SOLAR_BUFFER_NUMBER,
+)
+from custom_components.smart_ev_charging.coordinator import SmartEVChargingCoordinator
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import Event, State
+import homeassistant.util.dt as dt_util
+
+_T = TypeVar("_T")
+
+PRICE_SENSOR_ID = "sensor.nordpool_kwh_se3"
+SOLAR_SENSOR_ID = "sensor.solar_power"
+GRID_SENSOR_ID = "sensor.grid_power"
+TIME_SCHEDULE_ID = "schedule.cheap_hours"
+SOLAR_SCHEDULE_ID = "schedule.solar_hours"
+# Så hög takt att token bucket aldrig köar. Mätningarna gäller valet av
+# kommandon, inte hastighetsbegränsningen.
+UNLIMITED_COMMAND_RATE = 1_000_000_000
+# Anrop som körs innan tiden mäts, så att cacher och fönster hunnit fyllas.
+WARMUP_ITERATIONS = 100
+
+
+class FakeStates:
+    """Tillståndsmaskinen: senaste `State` per entitet."""
+
+    def __init__(self) -> None:
+        self._states: dict[str, State] = {}
+
+    def get(self, entity_id: str) -> State | None:
+        return self._states.get(entity_id)
+
+    def async_set(
+        self,
+        entity_id: str,
+        new_state: str,
+        attributes: Mapping[str, Any] | None = None,
+    ) -> Event:
+        """Sätter ett nytt tillstånd och returnerar händelsen för ändringen."""
+        old_state = self._states.get(entity_id)
+        state = self._states[entity_id] = State(
+            entity_id, new_state, attributes, validate_entity_id=False
+        )
+        return Event(
+            "state_changed",
+            {"entity_id": entity_id, "old_state": old_state, "new_state": state},
+        )
+
+
+class FakeServices:
+    """Tar emot tjänsteanrop och räknar dem per tjänst."""
+
+    def __init__(self) -> None:
+        self.calls: dict[str, int] = {}
+
+    @property
+    def call_count(self) -> int:
+        return sum(self.calls.values())
+
+    async def async_call(
+        self,
+        domain: str,
+        service: str,
+        service_data: dict[str, Any] | None = None,
+        blocking: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        key = f"{domain}.{service}"
+        self.calls[key] = self.calls.get(key, 0) + 1
+
+
+class FakeHass:
+    """Det koordinatorn använder av Home Assistant. Skapas i event loopen."""
+
+    def __init__(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.data: dict[str, Any] = {}
+        self.states = FakeStates()
+        self.services = FakeServices()
+
+    def async_create_task(self, target: Any, name: str | None = None) -> asyncio.Task:
+        return self.loop.create_task(target, name=name)
+
+
+class FakeConfigEntry:
+    """De fält från en config entry som koordinatorn läser."""
+
+    def __init__(
+        self, entry_id: str, data: dict[str, Any], options: dict[str, Any]
+    ) -> None:
+        self.entry_id = entry_id
+        self.title = entry_id
+        self.domain = DOMAIN
+        self.data = data
+        self.options = options
+
+
+def price_forecast(start: datetime) -> list[dict[str, Any]]:
+    """Ett dygns timpriser i samma format som Nord Pool-sensorns `raw_today`."""
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    return [
+        {
+            "start": (day + timedelta(hours=hour)).isoformat(),
+            "end": (day + timedelta(hours=hour + 1)).isoformat(),
+            "value": round(0.4 + 0.05 * ((hour * 7) % 24), 3),
+        }
+        for hour in range(24)
+    ]
+
+
+def set_shared_states(hass: FakeHass) -> None:
+    """Sätter de entiteter som alla laddare delar."""
+    hass.states.async_set(
+        PRICE_SENSOR_ID,
+        "1.25",
+        {
+            "unit_of_measurement": "SEK/kWh",
+            "raw_today": price_forecast(dt_util.utcnow()),
+        },
+    )
+    hass.states.async_set(SOLAR_SENSOR_ID, "6500", {"unit_of_measurement": "W"})
+    hass.states.async_set(GRID_SENSOR_ID, "-4200", {"unit_of_measurement": "W"})
+    hass.states.async_set(TIME_SCHEDULE_ID, STATE_OFF)
+    hass.states.async_set(SOLAR_SCHEDULE_ID, STATE_ON)
+
+
+def create_coordinators(
+    hass: FakeHass, entries: int, **options: Any
+) -> list[SmartEVChargingCoordinator]:
+    """Skapar `entries` koordinatorer med egna laddare och delade sensorer.
+
+    Integrationens egna brytare och nummer sätts direkt, som i testerna, så
+    att koordinatorn inte behöver entitetsregistret.
+    """
+    coordinators: list[SmartEVChargingCoordinator] = []
+    for index in range(entries):
+        entry_id = f"bench_{index}"
+        charger = f"charger_{index}"
+        data = {
+            CONF_CHARGER_DEVICE: f"device_{index}",
+            CONF_STATUS_SENSOR: f"sensor.{charger}_status",
+            CONF_CHARGER_ENABLED_SWITCH_ID: f"switch.{charger}_enabled",
+            CONF_CHARGER_DYNAMIC_CURRENT_SENSOR: f"sensor.{charger}_dynamic_current",
+            CONF_CHARGER_MAX_CURRENT_LIMIT_SENSOR: f"sensor.{charger}_max_current",
+            CONF_EV_SOC_SENSOR: f"sensor.ev_{index}_soc",
+            CONF_PRICE_SENSOR: PRICE_SENSOR_ID,
+            CONF_SOLAR_PRODUCTION_SENSOR: SOLAR_SENSOR_ID,
+            CONF_GRID_POWER_SENSOR: GRID_SENSOR_ID,
+            CONF_TIME_SCHEDULE_ENTITY: TIME_SCHEDULE_ID,
+            CONF_SOLAR_SCHEDULE_ENTITY: SOLAR_SCHEDULE_ID,
+            CONF_TARGET_SOC_LIMIT: 80,
+        }
+        entry = FakeConfigEntry(
+            entry_id,
+            data,
+            {
+                CONF_EVENT_DRIVEN_UPDATES: True,
+                CONF_COMMAND_RATE_LIMIT: UNLIMITED_COMMAND_RATE,
+                **options,
+            },
+        )
+        coordinator = SmartEVChargingCoordinator(hass, entry, 30)  # type: ignore[arg-type]
+        prefix = f"{DOMAIN}_{entry_id}"
+        coordinator.smart_enable_switch_entity_id = (
+            f"switch.{prefix}_{ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH}"
+        )
+        coordinator.solar_enable_switch_entity_id = (
+            f"switch.{prefix}_{ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH}"
+        )
+        coordinator.max_price_entity_id = (
+            f"number.{prefix}_{ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER}"
+        )
+        coordinator.solar_buffer_entity_id = (
+            f"number.{prefix}_{ENTITY_ID_SUFFIX_SOLAR_BUFFER_NUMBER}"
+        )
+        coordinator.min_solar_charge_current_entity_id = (
+            f"number.{prefix}_{ENTITY_ID_SUFFIX_MIN_SOLAR_CHARGE_CURRENT_A_NUMBER}"
+        )
+        coordinator._internal_entities_resolved = True
+
+        states = hass.states
+        states.async_set(data[CONF_STATUS_SENSOR], EASEE_STATUS_CHARGING)
+        states.async_set(data[CONF_CHARGER_ENABLED_SWITCH_ID], STATE_ON)
+        states.async_set(
+            data[CONF_CHARGER_DYNAMIC_CURRENT_SENSOR], "10", {"unit_of_measurement": "A"}
+        )
+        states.async_set(
+            data[CONF_CHARGER_MAX_CURRENT_LIMIT_SENSOR],
+            "16",
+            {"unit_of_measurement": "A"},
+        )
+        states.async_set(data[CONF_EV_SOC_SENSOR], "55", {"unit_of_measurement": "%"})
+        states.async_set(coordinator.smart_enable_switch_entity_id, STATE_ON)
+        states.async_set(coordinator.solar_enable_switch_entity_id, STATE_ON)
+        states.async_set(coordinator.max_price_entity_id, "1.0")
+        states.async_set(coordinator.solar_buffer_entity_id, "300")
+        states.async_set(coordinator.min_solar_charge_current_entity_id, "6")
+        coordinators.append(coordinator)
+    return coordinators
+
+
+def shutdown_coordinators(coordinators: list[SmartEVChargingCoordinator]) -> None:
+    """Avbryter debouncers och köer så att inga timers ligger kvar."""
+    for coordinator in coordinators:
+        coordinator._event_refresh_debouncer.async_shutdown()
+        coordinator._command_scheduler.async_shutdown()
+
+
+def run_sync(coro: Coroutine[Any, Any, _T]) -> _T:
+    """Kör en coroutine som aldrig behöver vänta, utan att gå via event loopen.
+
+    Tjänsteanropen i FakeServices väntar aldrig, så styrningen av laddaren
+    körs klart i ett svep. Då mäts koden och inte event loopens schemaläggning.
+    """
+    try:
+        coro.send(None)
+    except StopIteration as result:
+        return result.value
+    coro.close()
+    raise RuntimeError("Coroutinen väntade på något, kan inte köras synkront.")
+
+
+def measure(step: Callable[[int], Any], iterations: int) -> dict[str, float]:
+    """Mäter tid per anrop och minne för `step(i)`, i = 0..iterations-1.
+
+    Efter en kort uppvärmning mäts tiden i en körning utan tracemalloc.
+    Minnet mäts i en andra körning: största tillfälliga minnet under ett
+    enskilt anrop och minnet som ligger kvar efteråt, per anrop. Stegen ska
+    därför tåla att upprepas.
+    """
+    warmup = min(iterations, WARMUP_ITERATIONS)
+    for index in range(warmup):
+        step(index)
+    started = time.perf_counter()
+    for index in range(iterations):
+        step(index)
+    elapsed_s = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        baseline_b, _ = tracemalloc.get_traced_memory()
+        peak_b = 0
+        for index in range(iterations):
+            before_b, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            step(index)
+            peak_b = max(peak_b, tracemalloc.get_traced_memory()[1] - before_b)
+        retained_b = tracemalloc.get_traced_memory()[0] - baseline_b
+    finally:
+        tracemalloc.stop()
+    return {
+        # Antal anrop av step, med uppvärmningen.
+        "calls": warmup + 2 * iterations,
+        "per_second": iterations / elapsed_s,
+        "us_per_call": elapsed_s * 1_000_000 / iterations,
+        "peak_kib_per_call": peak_b / 1024,
+        "retained_b_per_call": retained_b / iterations,
+    }
@@ -6,12 +6,18 @@ from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import HomeAssistant
 
 from .const import (
+    CONF_CHARGER_DEVICE,
     CONF_DEBUG_LOGGING,
     CONF_SCAN_INTERVAL,
     DEFAULT_SCAN_INTERVAL_SECONDS,
     DOMAIN,
+    LEGACY_UNIQUE_ID,
 )
 from .coordinator import SmartEVChargingCoordinator
+from .helpers import charger_unique_id
+from .hub import release_fuse_hub
+from .inputs import release_input_hub
+from .profiling import async_setup_services, async_unload_services
 
 _LOGGER = logging.getLogger(__name__)
 _COMPONENT_LOGGER = logging.getLogger(f"custom_components.{DOMAIN}")
@@ -40,6 +46,55 @@ async def async_options_update_listener(
     await hass.config_entries.async_reload(entry.entry_id)
 
 
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migrerar en config entry från en äldre version.
+
+    Före version 2 hade integrationen ett enda unikt ID. Nu har varje laddare
+    ett eget, så att flera laddare kan läggas till. Finns redan en entry för
+    samma laddare migreras inte dubbletten.
+    """
+    if entry.version > 2:
+        _COMPONENT_LOGGER.error(
+            "Config entry %s har en nyare version (%s) än integrationen stöder.",
+            entry.entry_id,
+            entry.version,
+        )
+        return False
+    if entry.version == 1:
+        unique_id = entry.unique_id
+        if unique_id == LEGACY_UNIQUE_ID:
+            charger_device_id = {**entry.data, **entry.options}.get(
+                CONF_CHARGER_DEVICE
+            )
+            unique_id = charger_unique_id(str(charger_device_id))
+            duplicate = next(
+                (
+                    other
+                    for other in hass.config_entries.async_entries(DOMAIN)
+                    if other.entry_id != entry.entry_id
+                    and other.unique_id == unique_id
+                ),
+                None,
+            )
+            if duplicate is not None:
+                _COMPONENT_LOGGER.error(
+                    "Laddaren %s är redan konfigurerad i '%s' (entry_id %s). "
+                    "Ta bort den dubbla posten '%s'.",
+                    charger_device_id,
+                    duplicate.title,
+                    duplicate.entry_id,
+                    entry.title,
+                )
+                return False
+        hass.config_entries.async_update_entry(entry, unique_id=unique_id, version=2)
+        _COMPONENT_LOGGER.info(
+            "Config entry %s migrerad till version 2 (unikt ID: %s).",
+            entry.entry_id,
+            unique_id,
+        )
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Konfigurerar Smart EV Charging från en config entry."""
     _LOGGER.debug(
@@ -89,6 +144,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         scan_interval_seconds,
     )
 
+    coordinator: SmartEVChargingCoordinator | None = None
     try:
         coordinator = SmartEVChargingCoordinator(
             hass,
@@ -100,6 +156,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         )
 
         await coordinator.async_config_entry_first_refresh()
+        coordinator.async_start()
 
         hass.data[DOMAIN][entry.entry_id]["coordinator"] = coordinator
         _COMPONENT_LOGGER.debug("--- DEBUG INIT: Koordinator lagrad i hass.data ---")
@@ -110,6 +167,13 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             e,
             exc_info=True,
         )
+        # Koordinatorn registreras i hubbarna redan när den skapas. Utan
+        # uppstädning skulle den ligga kvar i säkringsfördelningen.
+        if coordinator is not None:
+            await coordinator.cleanup()
+        else:
+            release_fuse_hub(hass, entry.entry_id)
+            release_input_hub(hass, entry.entry_id)
         if entry.entry_id in hass.data[DOMAIN]:
             if listener_remover := hass.data[DOMAIN][entry.entry_id].get(
                 "options_listener"
@@ -133,6 +197,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         await async_unload_entry(hass, entry)
         return False
 
+    async_setup_services(hass)
+
     async def _shutdown_handler(event):
         _COMPONENT_LOGGER.debug(
             "Home Assistant stängs ner, anropar koordinatorns cleanup för %s.",
@@ -191,4 +257,5 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             )
 
         hass.data[DOMAIN].pop(entry.entry_id, None)
+        async_unload_services(hass)
     return all_unloaded_ok
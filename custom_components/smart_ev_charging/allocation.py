@@ -0,0 +1,108 @@
+# File version: 2025-06-05 0.2.0
+"""Fördelning av en gemensam säkringsbudget mellan flera laddare.
+
+Easee laddar inte under minsta ström, så först får så många laddare som
+ryms sin minsta ström, i viktordning. Resten fördelas med viktad
+max-min-rättvisa ("water filling"): varje laddare får sin vikts andel av det
+som återstår, men aldrig mer än den begär, och det som en laddare inte
+behöver går vidare till de övriga.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+import math
+from typing import NamedTuple
+
+
+class ChargerDemand(NamedTuple):
+    """En laddares önskemål inför fördelningen."""
+
+    # Önskad ström (A). 0 betyder att laddaren inte vill ladda.
+    requested_a: float
+    # Lägsta ström (A) som laddaren kan ladda med.
+    min_a: float
+    # Relativ vikt (> 0). Högre vikt ger större andel när budgeten inte räcker.
+    weight: float
+
+
+def demand_weight(
+    priority: float,
+    current_soc_percent: float | None,
+    target_soc_limit: float | None,
+) -> float:
+    """Vikt utifrån prioritet och hur långt bilen har kvar till sin SoC-gräns.
+
+    Utan SoC-värden används prioriteten som den är. Med SoC skalas den med
+    återstående andel (1-100 %), så att en nästan full bil får mindre.
+    """
+    weight = max(priority, 0.0)
+    if current_soc_percent is None or target_soc_limit is None:
+        return weight
+    deficit_percent = min(max(target_soc_limit - current_soc_percent, 1.0), 100.0)
+    return weight * deficit_percent / 100.0
+
+
+def _water_fill(
+    budget_a: float, demands: Mapping[str, ChargerDemand]
+) -> dict[str, float]:
+    """Viktad max-min-fördelning av budgeten upp till varje laddares begäran."""
+    allocation: dict[str, float] = {}
+    remaining = budget_a
+    weight_left = sum(demand.weight for demand in demands.values())
+    # Laddare vars begäran per viktenhet är minst blir mättade först.
+    ordered = sorted(
+        demands.items(), key=lambda item: item[1].requested_a / item[1].weight
+    )
+    for index, (key, demand) in enumerate(ordered):
+        share = remaining * demand.weight / weight_left
+        if demand.requested_a > share:
+            # Ingen av de återstående blir mättad: dela resten efter vikt.
+            for rest_key, rest_demand in ordered[index:]:
+                allocation[rest_key] = remaining * rest_demand.weight / weight_left
+            break
+        allocation[key] = demand.requested_a
+        remaining -= demand.requested_a
+        weight_left -= demand.weight
+    return allocation
+
+
+def allocate_fair_share(
+    budget_a: float, demands: Mapping[str, ChargerDemand]
+) -> dict[str, float]:
+    """Fördelar budgeten mellan laddarna. Returnerar tilldelad ström per nyckel.
+
+    Först får så många laddare som möjligt sin minsta ström, i viktordning.
+    Resten av budgeten fördelas sedan med viktad max-min-rättvisa upp till
+    varje laddares begäran. Tilldelningen avrundas nedåt till en decimal så
+    att summan aldrig överstiger budgeten.
+    """
+    allocation = dict.fromkeys(demands, 0.0)
+    candidates = sorted(
+        (
+            (key, demand)
+            for key, demand in demands.items()
+            if demand.requested_a > 0
+            and demand.requested_a >= demand.min_a
+            and demand.weight > 0
+        ),
+        key=lambda item: (-item[1].weight, item[0]),
+    )
+    remaining = max(budget_a, 0.0)
+    admitted: dict[str, ChargerDemand] = {}
+    for key, demand in candidates:
+        # Laddare som inte ryms med sin minsta ström får vänta (0 A).
+        if demand.min_a <= remaining:
+            admitted[key] = demand
+            remaining -= demand.min_a
+
+    extra = _water_fill(
+        remaining,
+        {
+            key: demand._replace(requested_a=demand.requested_a - demand.min_a)
+            for key, demand in admitted.items()
+        },
+    )
+    for key, demand in admitted.items():
+        allocation[key] = math.floor((demand.min_a + extra[key]) * 10) / 10
+    return allocation
@@ -0,0 +1,440 @@
+# File version: 2025-06-05 0.2.0
+"""Kommandolager för kommandon till Easee-laddaren.
+
+`CommandCache` håller reda på det senast skickade kommandot per enhet så att
+identiska kommandon inte skickas om varje cykel. Ett kommando skickas ändå om
+cachen har löpt ut (TTL) eller om laddarens rapporterade tillstånd motsäger
+det senast skickade kommandot: en annan rapporterad dynamisk strömgräns än
+den vi skickade, eller en ändrad laddarstatus sedan kommandot skickades.
+
+`CommandScheduler` hastighetsbegränsar de kommandon som faktiskt skickas, med
+en token bucket och en prioritetskö per laddarenhet. Ett kommando registreras
+i cachen först när tjänsteanropet har lyckats.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable
+from datetime import datetime, timedelta
+import heapq
+import itertools
+import logging
+import time
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(f"custom_components.{DOMAIN}")
+
+ACTION_START = "start"
+ACTION_PAUSE = "pause"
+
+
+class _DeviceCommands:
+    """Senast skickade ström och åtgärd samt senast sedd status för en enhet."""
+
+    __slots__ = (
+        "action",
+        "action_sent_at",
+        "charger_status",
+        "current_a",
+        "current_sent_at",
+    )
+
+    def __init__(self) -> None:
+        self.charger_status: str | None = None
+        self.current_a: float | None = None
+        self.current_sent_at: datetime | None = None
+        self.action: str | None = None
+        self.action_sent_at: datetime | None = None
+
+    def forget_commands(self) -> None:
+        self.current_a = None
+        self.current_sent_at = None
+        self.action = None
+        self.action_sent_at = None
+
+
+class CommandCache:
+    """Undertrycker redundanta kommandon per laddarenhet."""
+
+    def __init__(self, ttl: timedelta) -> None:
+        """Initialisera cachen med hur länge ett kommando anses gällande."""
+        self._ttl = ttl
+        self._devices: dict[str, _DeviceCommands] = {}
+        self.suppressed_count: int = 0
+
+    def _entry(self, device_id: str) -> _DeviceCommands:
+        entry = self._devices.get(device_id)
+        if entry is None:
+            entry = self._devices[device_id] = _DeviceCommands()
+        return entry
+
+    def observe_status(self, device_id: str, charger_status: str) -> None:
+        """Registrerar laddarens rapporterade status för cykeln.
+
+        Har statusen ändrats sedan förra cykeln har laddaren bytt tillstånd
+        (ansluten, pausad externt, börjat ladda ...) och tidigare skickade
+        kommandon kan inte längre antas gälla.
+        """
+        entry = self._entry(device_id)
+        if entry.charger_status != charger_status:
+            entry.forget_commands()
+            entry.charger_status = charger_status
+
+    def should_send_current(
+        self,
+        device_id: str,
+        current_a: float,
+        reported_current_a: float | None,
+        now: datetime,
+    ) -> bool:
+        """Avgör om en dynamisk strömgräns behöver skickas."""
+        entry = self._devices.get(device_id)
+        if (
+            entry is None
+            or entry.current_a is None
+            or entry.current_sent_at is None
+            or round(entry.current_a, 1) != round(current_a, 1)
+            or now - entry.current_sent_at >= self._ttl
+        ):
+            return True
+        if reported_current_a is not None and round(reported_current_a, 1) != round(
+            current_a, 1
+        ):
+            # Laddaren rapporterar något annat än det vi senast skickade.
+            return True
+        self.suppressed_count += 1
+        return False
+
+    def should_send_action(self, device_id: str, action: str, now: datetime) -> bool:
+        """Avgör om ett åtgärdskommando (start/pause) behöver skickas."""
+        entry = self._devices.get(device_id)
+        if (
+            entry is None
+            or entry.action != action
+            or entry.action_sent_at is None
+            or now - entry.action_sent_at >= self._ttl
+        ):
+            return True
+        self.suppressed_count += 1
+        return False
+
+    def record_current(self, device_id: str, current_a: float, now: datetime) -> None:
+        """Registrerar att en strömgräns har skickats."""
+        entry = self._entry(device_id)
+        entry.current_a = current_a
+        entry.current_sent_at = now
+
+    def record_action(self, device_id: str, action: str, now: datetime) -> None:
+        """Registrerar att ett åtgärdskommando har skickats."""
+        entry = self._entry(device_id)
+        entry.action = action
+        entry.action_sent_at = now
+
+    def last_sent_current(self, device_id: str) -> float | None:
+        """Senast skickade strömgräns som fortfarande antas gälla, eller None."""
+        entry = self._devices.get(device_id)
+        return entry.current_a if entry is not None else None
+
+    def invalidate(self, device_id: str | None = None) -> None:
+        """Glömmer skickade kommandon för en enhet, eller för alla enheter."""
+        if device_id is None:
+            self._devices.clear()
+        else:
+            self._devices.pop(device_id, None)
+
+
+PRIORITY_PAUSE = 0
+# Fasläget skickas före start och strömgräns, som gäller det nya fasläget.
+PRIORITY_PHASE_MODE = 1
+PRIORITY_START = 2
+PRIORITY_CURRENT = 3
+
+SERVICE_SET_DYNAMIC_LIMIT = "set_charger_dynamic_limit"
+SERVICE_SET_CIRCUIT_DYNAMIC_LIMIT = "set_charger_circuit_dynamic_limit"
+SERVICE_ACTION_COMMAND = "action_command"
+
+# Köade kommandon med samma nyckel för samma enhet slås ihop: en ny strömgräns
+# ersätter en köad strömgräns, och en ny åtgärd ersätter en köad åtgärd.
+_COLLAPSE_KEYS = {
+    SERVICE_SET_DYNAMIC_LIMIT: "current",
+    SERVICE_ACTION_COMMAND: "action",
+}
+
+
+def _monotonic() -> float:
+    """Monoton klocka, så att en ändrad systemtid varken tömmer eller fyller
+    hinken. Slås upp vid varje anrop så att den kan styras i tester.
+    """
+    return time.monotonic()
+
+
+class TokenBucket:
+    """Enkel token bucket: `capacity` kommandon i en skur, sedan `rate` per sekund."""
+
+    def __init__(
+        self, capacity: float, rate_per_second: float, clock: Callable[[], float]
+    ) -> None:
+        """Initialisera en full hink."""
+        self._capacity = capacity
+        self._rate = rate_per_second
+        self._clock = clock
+        self._tokens = capacity
+        self._updated_at = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated_at) * self._rate
+        )
+        self._updated_at = now
+
+    def try_take(self) -> bool:
+        """Tar en token om det finns en tillgänglig."""
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def seconds_until_available(self) -> float:
+        """Tid tills nästa token finns tillgänglig."""
+        self._refill()
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self._rate
+
+
+class _QueuedCommand:
+    """Ett köat kommando. `cancelled` sätts när det ersatts av ett nyare."""
+
+    __slots__ = ("cancelled", "collapse_key", "data", "priority", "seq", "service")
+
+    def __init__(
+        self,
+        priority: int,
+        seq: int,
+        collapse_key: str,
+        service: str,
+        data: dict[str, Any],
+    ) -> None:
+        self.priority = priority
+        self.seq = seq
+        self.collapse_key = collapse_key
+        self.service = service
+        self.data = data
+        self.cancelled = False
+
+    def __lt__(self, other: _QueuedCommand) -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _DeviceQueue:
+    """Kö och token bucket för en laddarenhet."""
+
+    __slots__ = ("bucket", "heap", "pending", "unsub_timer")
+
+    def __init__(self, bucket: TokenBucket) -> None:
+        self.bucket = bucket
+        self.heap: list[_QueuedCommand] = []
+        self.pending: dict[str, _QueuedCommand] = {}
+        self.unsub_timer: CALLBACK_TYPE | None = None
+
+
+class CommandScheduler:
+    """Hastighetsbegränsar utgående Easee-kommandon per laddarenhet.
+
+    Kommandon skickas direkt så länge enhetens token bucket har tokens kvar,
+    annars köas de i prioritetsordning (paus före start före strömgräns) och
+    skickas när nya tokens finns. Är kön full avvisas kommandot, såvida det
+    inte har högre prioritet än det sämsta köade kommandot som då trängs undan.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        rate_per_minute: float,
+        burst: int,
+        max_queue_depth: int,
+        clock: Callable[[], float] | None = None,
+        on_submit: Callable[[str, dict[str, Any]], None] | None = None,
+        on_sent: Callable[[str, dict[str, Any]], None] | None = None,
+    ) -> None:
+        """Initialisera schemaläggaren.
+
+        `on_submit` anropas med tjänst och data för varje accepterat kommando,
+        oavsett om det skickas direkt eller köas. `on_sent` anropas först när
+        tjänsteanropet har lyckats.
+        """
+        self._hass = hass
+        self._rate_per_second = rate_per_minute / 60
+        self._burst = burst
+        self._max_queue_depth = max_queue_depth
+        self._clock = clock or _monotonic
+        self._on_submit = on_submit
+        self._on_sent = on_sent
+        self._devices: dict[str, _DeviceQueue] = {}
+        self._seq = itertools.count()
+        self.sent_count: int = 0
+        self.rejected_count: int = 0
+        self.collapsed_count: int = 0
+        # Skickade kommandon per tjänst, och tidpunkterna för den senaste timmen.
+        self.sent_by_service: dict[str, int] = {}
+        self._sent_at: deque[float] = deque()
+
+    @property
+    def queue_depth(self) -> int:
+        """Antal köade kommandon för alla enheter."""
+        return sum(len(queue.pending) for queue in self._devices.values())
+
+    def sent_last_hour(self) -> int:
+        """Antal kommandon som skickats den senaste timmen."""
+        oldest_allowed = self._clock() - 3600
+        while self._sent_at and self._sent_at[0] < oldest_allowed:
+            self._sent_at.popleft()
+        return len(self._sent_at)
+
+    def _queue(self, device_id: str) -> _DeviceQueue:
+        queue = self._devices.get(device_id)
+        if queue is None:
+            queue = self._devices[device_id] = _DeviceQueue(
+                TokenBucket(self._burst, self._rate_per_second, self._clock)
+            )
+        return queue
+
+    async def async_submit(
+        self,
+        device_id: str,
+        service: str,
+        data: dict[str, Any],
+        priority: int,
+        urgent: bool = False,
+    ) -> bool:
+        """Lägger ett kommando i kön och skickar det som ryms i token bucket.
+
+        Ett brådskande kommando (`urgent`), t.ex. en sänkning för att skydda
+        huvudsäkringen, skickas alltid direkt och ersätter ett köat kommando
+        av samma slag. Det förbrukar en token om det finns någon.
+
+        Returnerar False om kommandot avvisades för att kön var full.
+        """
+        queue = self._queue(device_id)
+        collapse_key = _COLLAPSE_KEYS.get(service, service)
+        command = _QueuedCommand(priority, next(self._seq), collapse_key, service, data)
+
+        if urgent:
+            previous = queue.pending.pop(collapse_key, None)
+            if previous is not None:
+                previous.cancelled = True
+                self.collapsed_count += 1
+            queue.bucket.try_take()
+            if self._on_submit is not None:
+                self._on_submit(service, data)
+            self._send(command)
+            return True
+
+        previous = queue.pending.get(collapse_key)
+        if previous is not None:
+            previous.cancelled = True
+            self.collapsed_count += 1
+        elif len(queue.pending) >= self._max_queue_depth:
+            worst = max(queue.pending.values())
+            if not command < worst:
+                self.rejected_count += 1
+                _LOGGER.warning(
+                    "Kommandokön för laddare %s är full. Avvisar '%s' %s.",
+                    device_id,
+                    service,
+                    data,
+                )
+                return False
+            worst.cancelled = True
+            del queue.pending[worst.collapse_key]
+            self.rejected_count += 1
+            _LOGGER.warning(
+                "Kommandokön för laddare %s är full. Trängde undan '%s' %s.",
+                device_id,
+                worst.service,
+                worst.data,
+            )
+
+        queue.pending[collapse_key] = command
+        heapq.heappush(queue.heap, command)
+        if self._on_submit is not None:
+            self._on_submit(service, data)
+        await self._async_drain(device_id)
+        return True
+
+    async def _async_drain(self, device_id: str) -> None:
+        """Skickar köade kommandon så länge det finns tokens."""
+        queue = self._devices.get(device_id)
+        if queue is None:
+            return
+        while queue.heap:
+            command = queue.heap[0]
+            if command.cancelled:
+                heapq.heappop(queue.heap)
+                continue
+            if not queue.bucket.try_take():
+                self._schedule_drain(device_id, queue)
+                return
+            heapq.heappop(queue.heap)
+            del queue.pending[command.collapse_key]
+            self._send(command)
+
+    def _schedule_drain(self, device_id: str, queue: _DeviceQueue) -> None:
+        if queue.unsub_timer is not None:
+            return
+
+        @callback
+        def _timer_fired(_now: Any) -> None:
+            queue.unsub_timer = None
+            self._hass.async_create_task(self._async_drain(device_id))
+
+        queue.unsub_timer = async_call_later(
+            self._hass, queue.bucket.seconds_until_available(), _timer_fired
+        )
+
+    @callback
+    def _send(self, command: _QueuedCommand) -> None:
+        """Skickar kommandot i en bakgrundsuppgift.
+
+        Easee-anropet går via molnet och kan ta flera sekunder. Det får inte
+        hålla uppe koordinatorns cykel, så det väntas inte in här.
+        """
+        self.sent_count += 1
+        self.sent_by_service[command.service] = (
+            self.sent_by_service.get(command.service, 0) + 1
+        )
+        self._sent_at.append(self._clock())
+        self._hass.async_create_background_task(
+            self._async_call(command), f"{DOMAIN} easee.{command.service}"
+        )
+
+    async def _async_call(self, command: _QueuedCommand) -> None:
+        try:
+            # Anropet väntas in så att ett fel i Easee-integrationen syns här.
+            await self._hass.services.async_call(
+                "easee", command.service, command.data, blocking=True
+            )
+        except Exception:
+            _LOGGER.exception(
+                "Fel vid anrop av easee.%s %s", command.service, command.data
+            )
+            return
+        if self._on_sent is not None:
+            self._on_sent(command.service, command.data)
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Avbryter väntande timers och tömmer köerna."""
+        for queue in self._devices.values():
+            if queue.unsub_timer is not None:
+                queue.unsub_timer()
+                queue.unsub_timer = None
+        self._devices.clear()
@@ -24,24 +24,76 @@ from homeassistant.helpers.selector import (
 )
 
 from .const import (
+    CONF_BATTERY_CAPACITY_KWH,
+    CONF_CHARGE_DEADLINE_HOUR,
     CONF_CHARGER_DEVICE,
     CONF_CHARGER_DYNAMIC_CURRENT_SENSOR,
     CONF_CHARGER_ENABLED_SWITCH_ID,
     CONF_CHARGER_MAX_CURRENT_LIMIT_SENSOR,
+    CONF_CHARGER_POWER_SENSOR,
+    CONF_CHARGER_PRIORITY,
+    CONF_COMMAND_RATE_LIMIT,
     CONF_DEBUG_LOGGING,
     CONF_EV_SOC_SENSOR,
+    CONF_EVENT_DRIVEN_UPDATES,
+    CONF_GRID_POWER_SENSOR,
     CONF_HOUSE_POWER_SENSOR,
+    CONF_MAIN_FUSE_CURRENT,
+    CONF_MAIN_FUSE_MARGIN,
+    CONF_NET_SURPLUS_FROM_HOUSE_POWER,
+    CONF_PHASE_CURRENT_SENSOR_L1,
+    CONF_PHASE_CURRENT_SENSOR_L2,
+    CONF_PHASE_CURRENT_SENSOR_L3,
+    CONF_PHASE_SWITCH_HYSTERESIS_W,
+    CONF_PHASE_SWITCH_MIN_DWELL,
+    CONF_PHASE_SWITCHING_ENABLED,
+    CONF_POWER_DEADBAND_W,
+    CONF_PRICE_DEADBAND_PERCENT,
     CONF_PRICE_SENSOR,
     CONF_SCAN_INTERVAL,
+    CONF_SHARED_FUSE_CURRENT,
+    CONF_SOLAR_AVERAGE_WINDOW,
+    CONF_SOLAR_CONTROLLER_DEADBAND_A,
+    CONF_SOLAR_CONTROLLER_ENABLED,
+    CONF_SOLAR_CONTROLLER_INTEGRAL_TIME,
+    CONF_SOLAR_CONTROLLER_KP_PERCENT,
+    CONF_SOLAR_CONTROLLER_MIN_INTERVAL,
     CONF_SOLAR_PRODUCTION_SENSOR,
     CONF_SOLAR_SCHEDULE_ENTITY,
+    CONF_SOLAR_START_WINDOW,
+    CONF_SOLAR_STOP_WINDOW,
     CONF_STATUS_SENSOR,
+    CONF_SUSPEND_SOLAR_AT_NIGHT,
     CONF_TARGET_SOC_LIMIT,
     CONF_TIME_SCHEDULE_ENTITY,
+    DEFAULT_BATTERY_CAPACITY_KWH,
+    DEFAULT_CHARGE_DEADLINE_HOUR,
+    DEFAULT_CHARGER_PRIORITY,
+    DEFAULT_COMMAND_RATE_LIMIT_PER_MINUTE,
+    DEFAULT_EVENT_DRIVEN_UPDATES,
+    DEFAULT_MAIN_FUSE_CURRENT_A,
+    DEFAULT_MAIN_FUSE_MARGIN_A,
     DEFAULT_NAME,
+    DEFAULT_NET_SURPLUS_FROM_HOUSE_POWER,
+    DEFAULT_PHASE_SWITCH_HYSTERESIS_W,
+    DEFAULT_PHASE_SWITCH_MIN_DWELL_SECONDS,
+    DEFAULT_PHASE_SWITCHING_ENABLED,
+    DEFAULT_POWER_DEADBAND_W,
+    DEFAULT_PRICE_DEADBAND_PERCENT,
     DEFAULT_SCAN_INTERVAL_SECONDS,
+    DEFAULT_SHARED_FUSE_CURRENT_A,
+    DEFAULT_SOLAR_AVERAGE_WINDOW_SECONDS,
+    DEFAULT_SOLAR_CONTROLLER_DEADBAND_A,
+    DEFAULT_SOLAR_CONTROLLER_ENABLED,
+    DEFAULT_SOLAR_CONTROLLER_INTEGRAL_TIME_SECONDS,
+    DEFAULT_SOLAR_CONTROLLER_KP_PERCENT,
+    DEFAULT_SOLAR_CONTROLLER_MIN_INTERVAL_SECONDS,
+    DEFAULT_SOLAR_START_WINDOW_SECONDS,
+    DEFAULT_SOLAR_STOP_WINDOW_SECONDS,
+    DEFAULT_SUSPEND_SOLAR_AT_NIGHT,
     DOMAIN,
 )
+from .helpers import charger_unique_id
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -52,24 +104,174 @@ ALL_CONF_KEYS = [
     CONF_PRICE_SENSOR,
     CONF_TIME_SCHEDULE_ENTITY,
     CONF_HOUSE_POWER_SENSOR,
+    CONF_NET_SURPLUS_FROM_HOUSE_POWER,
+    CONF_GRID_POWER_SENSOR,
     CONF_SOLAR_PRODUCTION_SENSOR,
     CONF_SOLAR_SCHEDULE_ENTITY,
+    CONF_SUSPEND_SOLAR_AT_NIGHT,
+    CONF_SOLAR_CONTROLLER_ENABLED,
+    CONF_SOLAR_CONTROLLER_KP_PERCENT,
+    CONF_SOLAR_CONTROLLER_INTEGRAL_TIME,
+    CONF_SOLAR_CONTROLLER_DEADBAND_A,
+    CONF_SOLAR_CONTROLLER_MIN_INTERVAL,
+    CONF_SOLAR_AVERAGE_WINDOW,
+    CONF_SOLAR_START_WINDOW,
+    CONF_SOLAR_STOP_WINDOW,
+    CONF_PHASE_SWITCHING_ENABLED,
+    CONF_PHASE_SWITCH_HYSTERESIS_W,
+    CONF_PHASE_SWITCH_MIN_DWELL,
     CONF_CHARGER_MAX_CURRENT_LIMIT_SENSOR,
     CONF_CHARGER_DYNAMIC_CURRENT_SENSOR,
+    CONF_CHARGER_POWER_SENSOR,
     CONF_SCAN_INTERVAL,
     CONF_EV_SOC_SENSOR,
     CONF_TARGET_SOC_LIMIT,
+    CONF_BATTERY_CAPACITY_KWH,
+    CONF_CHARGE_DEADLINE_HOUR,
+    CONF_EVENT_DRIVEN_UPDATES,
+    CONF_POWER_DEADBAND_W,
+    CONF_PRICE_DEADBAND_PERCENT,
+    CONF_COMMAND_RATE_LIMIT,
+    CONF_SHARED_FUSE_CURRENT,
+    CONF_CHARGER_PRIORITY,
+    CONF_MAIN_FUSE_CURRENT,
+    CONF_MAIN_FUSE_MARGIN,
+    CONF_PHASE_CURRENT_SENSOR_L1,
+    CONF_PHASE_CURRENT_SENSOR_L2,
+    CONF_PHASE_CURRENT_SENSOR_L3,
     CONF_DEBUG_LOGGING,
 ]
 
+BOOLEAN_CONF_DEFAULTS = {
+    CONF_EVENT_DRIVEN_UPDATES: DEFAULT_EVENT_DRIVEN_UPDATES,
+    CONF_SUSPEND_SOLAR_AT_NIGHT: DEFAULT_SUSPEND_SOLAR_AT_NIGHT,
+    CONF_NET_SURPLUS_FROM_HOUSE_POWER: DEFAULT_NET_SURPLUS_FROM_HOUSE_POWER,
+    CONF_SOLAR_CONTROLLER_ENABLED: DEFAULT_SOLAR_CONTROLLER_ENABLED,
+    CONF_PHASE_SWITCHING_ENABLED: DEFAULT_PHASE_SWITCHING_ENABLED,
+    CONF_DEBUG_LOGGING: False,
+}
+
+# Heltalsalternativ: (min, max, standardvärde, felnyckel)
+INTEGER_CONF_RANGES = {
+    CONF_SCAN_INTERVAL: (10, 3600, DEFAULT_SCAN_INTERVAL_SECONDS, "invalid_scan_interval"),
+    CONF_COMMAND_RATE_LIMIT: (
+        1,
+        60,
+        DEFAULT_COMMAND_RATE_LIMIT_PER_MINUTE,
+        "invalid_command_rate_limit",
+    ),
+    CONF_SHARED_FUSE_CURRENT: (
+        0,
+        400,
+        DEFAULT_SHARED_FUSE_CURRENT_A,
+        "invalid_shared_fuse_current",
+    ),
+    CONF_CHARGER_PRIORITY: (1, 10, DEFAULT_CHARGER_PRIORITY, "invalid_charger_priority"),
+    CONF_PHASE_SWITCH_HYSTERESIS_W: (
+        0,
+        5000,
+        DEFAULT_PHASE_SWITCH_HYSTERESIS_W,
+        "invalid_phase_switch_hysteresis",
+    ),
+    CONF_PHASE_SWITCH_MIN_DWELL: (
+        60,
+        3600,
+        DEFAULT_PHASE_SWITCH_MIN_DWELL_SECONDS,
+        "invalid_phase_switch_min_dwell",
+    ),
+    CONF_POWER_DEADBAND_W: (
+        0,
+        5000,
+        DEFAULT_POWER_DEADBAND_W,
+        "invalid_power_deadband",
+    ),
+    CONF_PRICE_DEADBAND_PERCENT: (
+        0,
+        50,
+        DEFAULT_PRICE_DEADBAND_PERCENT,
+        "invalid_price_deadband",
+    ),
+    CONF_MAIN_FUSE_CURRENT: (
+        0,
+        400,
+        DEFAULT_MAIN_FUSE_CURRENT_A,
+        "invalid_main_fuse_current",
+    ),
+    CONF_MAIN_FUSE_MARGIN: (
+        0,
+        50,
+        DEFAULT_MAIN_FUSE_MARGIN_A,
+        "invalid_main_fuse_margin",
+    ),
+    CONF_BATTERY_CAPACITY_KWH: (
+        0,
+        200,
+        DEFAULT_BATTERY_CAPACITY_KWH,
+        "invalid_battery_capacity",
+    ),
+    CONF_CHARGE_DEADLINE_HOUR: (
+        0,
+        23,
+        DEFAULT_CHARGE_DEADLINE_HOUR,
+        "invalid_charge_deadline_hour",
+    ),
+    CONF_SOLAR_CONTROLLER_KP_PERCENT: (
+        1,
+        90,
+        DEFAULT_SOLAR_CONTROLLER_KP_PERCENT,
+        "invalid_solar_controller_kp",
+    ),
+    CONF_SOLAR_CONTROLLER_INTEGRAL_TIME: (
+        5,
+        3600,
+        DEFAULT_SOLAR_CONTROLLER_INTEGRAL_TIME_SECONDS,
+        "invalid_solar_controller_integral_time",
+    ),
+    CONF_SOLAR_CONTROLLER_DEADBAND_A: (
+        0,
+        10,
+        DEFAULT_SOLAR_CONTROLLER_DEADBAND_A,
+        "invalid_solar_controller_deadband",
+    ),
+    CONF_SOLAR_CONTROLLER_MIN_INTERVAL: (
+        0,
+        3600,
+        DEFAULT_SOLAR_CONTROLLER_MIN_INTERVAL_SECONDS,
+        "invalid_solar_controller_min_interval",
+    ),
+    CONF_SOLAR_AVERAGE_WINDOW: (
+        0,
+        1800,
+        DEFAULT_SOLAR_AVERAGE_WINDOW_SECONDS,
+        "invalid_solar_average_window",
+    ),
+    CONF_SOLAR_START_WINDOW: (
+        0,
+        3600,
+        DEFAULT_SOLAR_START_WINDOW_SECONDS,
+        "invalid_solar_start_window",
+    ),
+    CONF_SOLAR_STOP_WINDOW: (
+        0,
+        3600,
+        DEFAULT_SOLAR_STOP_WINDOW_SECONDS,
+        "invalid_solar_stop_window",
+    ),
+}
+
 OPTIONAL_ENTITY_CONF_KEYS = [
     CONF_TIME_SCHEDULE_ENTITY,
     CONF_HOUSE_POWER_SENSOR,
+    CONF_GRID_POWER_SENSOR,
     CONF_SOLAR_PRODUCTION_SENSOR,
     CONF_SOLAR_SCHEDULE_ENTITY,
     CONF_CHARGER_MAX_CURRENT_LIMIT_SENSOR,
     CONF_CHARGER_DYNAMIC_CURRENT_SENSOR,
+    CONF_CHARGER_POWER_SENSOR,
     CONF_EV_SOC_SENSOR,
+    CONF_PHASE_CURRENT_SENSOR_L1,
+    CONF_PHASE_CURRENT_SENSOR_L2,
+    CONF_PHASE_CURRENT_SENSOR_L3,
 ]
 MAYBE_SELECTOR_CONF_KEYS = OPTIONAL_ENTITY_CONF_KEYS + [CONF_TARGET_SOC_LIMIT]
 
@@ -92,6 +294,20 @@ def coerce_empty_string_to_none(value):
     return value
 
 
+def _parse_integer_option(conf_key: str, value: Any) -> tuple[int | None, str | None]:
+    """Tolkar ett heltalsalternativ. Returnerar (värde, None) eller (None, felnyckel)."""
+    min_val, max_val, default_val, error_key = INTEGER_CONF_RANGES[conf_key]
+    if value is None or value == "" or str(value).strip() == "":
+        return default_val, None
+    try:
+        int_val = int(value)
+    except (ValueError, TypeError):
+        return None, error_key
+    if not (min_val <= int_val <= max_val):
+        return None, error_key
+    return int_val, None
+
+
 def _build_common_schema(
     current_settings: dict[str, Any],
     user_input_for_repopulating: dict | None = None,
@@ -136,6 +352,20 @@ def _build_common_schema(
             )
         ),
     )
+    defined_fields_with_selectors[CONF_NET_SURPLUS_FROM_HOUSE_POWER] = (
+        _get_current_or_repop_value(
+            CONF_NET_SURPLUS_FROM_HOUSE_POWER, DEFAULT_NET_SURPLUS_FROM_HOUSE_POWER
+        ),
+        BooleanSelector(BooleanSelectorConfig()),
+    )
+    defined_fields_with_selectors[CONF_GRID_POWER_SENSOR] = (
+        _get_current_or_repop_value(CONF_GRID_POWER_SENSOR),
+        EntitySelector(
+            EntitySelectorConfig(
+                domain="sensor", device_class=SensorDeviceClass.POWER, multiple=False
+            )
+        ),
+    )
     defined_fields_with_selectors[CONF_SOLAR_PRODUCTION_SENSOR] = (
         _get_current_or_repop_value(CONF_SOLAR_PRODUCTION_SENSOR),
         EntitySelector(
@@ -148,6 +378,152 @@ def _build_common_schema(
         _get_current_or_repop_value(CONF_SOLAR_SCHEDULE_ENTITY),
         EntitySelector(EntitySelectorConfig(domain="schedule", multiple=False)),
     )
+    defined_fields_with_selectors[CONF_SUSPEND_SOLAR_AT_NIGHT] = (
+        _get_current_or_repop_value(
+            CONF_SUSPEND_SOLAR_AT_NIGHT, DEFAULT_SUSPEND_SOLAR_AT_NIGHT
+        ),
+        BooleanSelector(BooleanSelectorConfig()),
+    )
+    defined_fields_with_selectors[CONF_SOLAR_CONTROLLER_ENABLED] = (
+        _get_current_or_repop_value(
+            CONF_SOLAR_CONTROLLER_ENABLED, DEFAULT_SOLAR_CONTROLLER_ENABLED
+        ),
+        BooleanSelector(BooleanSelectorConfig()),
+    )
+    defined_fields_with_selectors[CONF_SOLAR_CONTROLLER_KP_PERCENT] = (
+        _get_current_or_repop_value(
+            CONF_SOLAR_CONTROLLER_KP_PERCENT, DEFAULT_SOLAR_CONTROLLER_KP_PERCENT
+        ),
+        NumberSelector(
+            NumberSelectorConfig(
+                min=1,
+                max=90,
+                step=1,
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement="%",
+            )
+        ),
+    )
+    defined_fields_with_selectors[CONF_SOLAR_CONTROLLER_INTEGRAL_TIME] = (
+        _get_current_or_repop_value(
+            CONF_SOLAR_CONTROLLER_INTEGRAL_TIME,
+            DEFAULT_SOLAR_CONTROLLER_INTEGRAL_TIME_SECONDS,
+        ),
+        NumberSelector(
+            NumberSelectorConfig(
+                min=5,
+                max=3600,
+                step=1,
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement="sekunder",
+            )
+        ),
+    )
+    defined_fields_with_selectors[CONF_SOLAR_CONTROLLER_DEADBAND_A] = (
+        _get_current_or_repop_value(
+            CONF_SOLAR_CONTROLLER_DEADBAND_A, DEFAULT_SOLAR_CONTROLLER_DEADBAND_A
+        ),
+        NumberSelector(
+            NumberSelectorConfig(
+                min=0,
+                max=10,
+                step=1,
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement="A",
+            )
+        ),
+    )
+    defined_fields_with_selectors[CONF_SOLAR_CONTROLLER_MIN_INTERVAL] = (
+        _get_current_or_repop_value(
+            CONF_SOLAR_CONTROLLER_MIN_INTERVAL,
+            DEFAULT_SOLAR_CONTROLLER_MIN_INTERVAL_SECONDS,
+        ),
+        NumberSelector(
+            NumberSelectorConfig(
+                min=0,
+                max=3600,
+                step=1,
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement="sekunder",
+            )
+        ),
+    )
+    defined_fields_with_selectors[CONF_SOLAR_AVERAGE_WINDOW] = (
+        _get_current_or_repop_value(
+            CONF_SOLAR_AVERAGE_WINDOW, DEFAULT_SOLAR_AVERAGE_WINDOW_SECONDS
+        ),
+        NumberSelector(
+            NumberSelectorConfig(
+                min=0,
+                max=1800,
+                step=1,
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement="sekunder",
+            )
+        ),
+    )
+    defined_fields_with_selectors[CONF_SOLAR_START_WINDOW] = (
+        _get_current_or_repop_value(
+            CONF_SOLAR_START_WINDOW, DEFAULT_SOLAR_START_WINDOW_SECONDS
+        ),
+        NumberSelector(
+            NumberSelectorConfig(
+                min=0,
+                max=3600,
+                step=1,
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement="sekunder",
+            )
+        ),
+    )
+    defined_fields_with_selectors[CONF_SOLAR_STOP_WINDOW] = (
+        _get_current_or_repop_value(
+            CONF_SOLAR_STOP_WINDOW, DEFAULT_SOLAR_STOP_WINDOW_SECONDS
+        ),
+        NumberSelector(
+            NumberSelectorConfig(
+                min=0,
+                max=3600,
+                step=1,
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement="sekunder",
+            )
+        ),
+    )
+    defined_fields_with_selectors[CONF_PHASE_SWITCHING_ENABLED] = (
+        _get_current_or_repop_value(
+            CONF_PHASE_SWITCHING_ENABLED, DEFAULT_PHASE_SWITCHING_ENABLED
+        ),
+        BooleanSelector(BooleanSelectorConfig()),
+    )
+    defined_fields_with_selectors[CONF_PHASE_SWITCH_HYSTERESIS_W] = (
+        _get_current_or_repop_value(
+            CONF_PHASE_SWITCH_HYSTERESIS_W, DEFAULT_PHASE_SWITCH_HYSTERESIS_W
+        ),
+        NumberSelector(
+            NumberSelectorConfig(
+                min=0,
+                max=5000,
+                step=10,
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement="W",
+            )
+        ),
+    )
+    defined_fields_with_selectors[CONF_PHASE_SWITCH_MIN_DWELL] = (
+        _get_current_or_repop_value(
+            CONF_PHASE_SWITCH_MIN_DWELL, DEFAULT_PHASE_SWITCH_MIN_DWELL_SECONDS
+        ),
+        NumberSelector(
+            NumberSelectorConfig(
+                min=60,
+                max=3600,
+                step=1,
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement="sekunder",
+            )
+        ),
+    )
     defined_fields_with_selectors[CONF_CHARGER_MAX_CURRENT_LIMIT_SENSOR] = (
         _get_current_or_repop_value(CONF_CHARGER_MAX_CURRENT_LIMIT_SENSOR),
         EntitySelector(EntitySelectorConfig(domain="sensor", multiple=False)),
@@ -156,6 +532,14 @@ def _build_common_schema(
         _get_current_or_repop_value(CONF_CHARGER_DYNAMIC_CURRENT_SENSOR),
         EntitySelector(EntitySelectorConfig(domain="sensor", multiple=False)),
     )
+    defined_fields_with_selectors[CONF_CHARGER_POWER_SENSOR] = (
+        _get_current_or_repop_value(CONF_CHARGER_POWER_SENSOR),
+        EntitySelector(
+            EntitySelectorConfig(
+                domain="sensor", device_class=SensorDeviceClass.POWER, multiple=False
+            )
+        ),
+    )
     defined_fields_with_selectors[CONF_EV_SOC_SENSOR] = (
         _get_current_or_repop_value(CONF_EV_SOC_SENSOR),
         EntitySelector(
@@ -176,6 +560,34 @@ def _build_common_schema(
             )
         ),
     )
+    defined_fields_with_selectors[CONF_BATTERY_CAPACITY_KWH] = (
+        _get_current_or_repop_value(
+            CONF_BATTERY_CAPACITY_KWH, DEFAULT_BATTERY_CAPACITY_KWH
+        ),
+        NumberSelector(
+            NumberSelectorConfig(
+                min=0,
+                max=200,
+                step=1,
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement="kWh",
+            )
+        ),
+    )
+    defined_fields_with_selectors[CONF_CHARGE_DEADLINE_HOUR] = (
+        _get_current_or_repop_value(
+            CONF_CHARGE_DEADLINE_HOUR, DEFAULT_CHARGE_DEADLINE_HOUR
+        ),
+        NumberSelector(
+            NumberSelectorConfig(
+                min=0,
+                max=23,
+                step=1,
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement="h",
+            )
+        ),
+    )
     defined_fields_with_selectors[CONF_SCAN_INTERVAL] = (
         _get_current_or_repop_value(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL_SECONDS),
         NumberSelector(
@@ -188,6 +600,116 @@ def _build_common_schema(
             )
         ),
     )
+    defined_fields_with_selectors[CONF_EVENT_DRIVEN_UPDATES] = (
+        _get_current_or_repop_value(
+            CONF_EVENT_DRIVEN_UPDATES, DEFAULT_EVENT_DRIVEN_UPDATES
+        ),
+        BooleanSelector(BooleanSelectorConfig()),
+    )
+    defined_fields_with_selectors[CONF_POWER_DEADBAND_W] = (
+        _get_current_or_repop_value(CONF_POWER_DEADBAND_W, DEFAULT_POWER_DEADBAND_W),
+        NumberSelector(
+            NumberSelectorConfig(
+                min=0,
+                max=5000,
+                step=10,
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement="W",
+            )
+        ),
+    )
+    defined_fields_with_selectors[CONF_PRICE_DEADBAND_PERCENT] = (
+        _get_current_or_repop_value(
+            CONF_PRICE_DEADBAND_PERCENT, DEFAULT_PRICE_DEADBAND_PERCENT
+        ),
+        NumberSelector(
+            NumberSelectorConfig(
+                min=0,
+                max=50,
+                step=1,
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement="%",
+            )
+        ),
+    )
+    defined_fields_with_selectors[CONF_COMMAND_RATE_LIMIT] = (
+        _get_current_or_repop_value(
+            CONF_COMMAND_RATE_LIMIT, DEFAULT_COMMAND_RATE_LIMIT_PER_MINUTE
+        ),
+        NumberSelector(
+            NumberSelectorConfig(
+                min=1,
+                max=60,
+                step=1,
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement="kommandon/min",
+            )
+        ),
+    )
+    defined_fields_with_selectors[CONF_SHARED_FUSE_CURRENT] = (
+        _get_current_or_repop_value(
+            CONF_SHARED_FUSE_CURRENT, DEFAULT_SHARED_FUSE_CURRENT_A
+        ),
+        NumberSelector(
+            NumberSelectorConfig(
+                min=0,
+                max=400,
+                step=1,
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement="A",
+            )
+        ),
+    )
+    defined_fields_with_selectors[CONF_CHARGER_PRIORITY] = (
+        _get_current_or_repop_value(CONF_CHARGER_PRIORITY, DEFAULT_CHARGER_PRIORITY),
+        NumberSelector(
+            NumberSelectorConfig(
+                min=1,
+                max=10,
+                step=1,
+                mode=NumberSelectorMode.BOX,
+            )
+        ),
+    )
+    defined_fields_with_selectors[CONF_MAIN_FUSE_CURRENT] = (
+        _get_current_or_repop_value(CONF_MAIN_FUSE_CURRENT, DEFAULT_MAIN_FUSE_CURRENT_A),
+        NumberSelector(
+            NumberSelectorConfig(
+                min=0,
+                max=400,
+                step=1,
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement="A",
+            )
+        ),
+    )
+    defined_fields_with_selectors[CONF_MAIN_FUSE_MARGIN] = (
+        _get_current_or_repop_value(CONF_MAIN_FUSE_MARGIN, DEFAULT_MAIN_FUSE_MARGIN_A),
+        NumberSelector(
+            NumberSelectorConfig(
+                min=0,
+                max=50,
+                step=1,
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement="A",
+            )
+        ),
+    )
+    for phase_conf_key in (
+        CONF_PHASE_CURRENT_SENSOR_L1,
+        CONF_PHASE_CURRENT_SENSOR_L2,
+        CONF_PHASE_CURRENT_SENSOR_L3,
+    ):
+        defined_fields_with_selectors[phase_conf_key] = (
+            _get_current_or_repop_value(phase_conf_key),
+            EntitySelector(
+                EntitySelectorConfig(
+                    domain="sensor",
+                    device_class=SensorDeviceClass.CURRENT,
+                    multiple=False,
+                )
+            ),
+        )
     defined_fields_with_selectors[CONF_DEBUG_LOGGING] = (
         _get_current_or_repop_value(CONF_DEBUG_LOGGING, False),
         BooleanSelector(BooleanSelectorConfig()),
@@ -215,16 +737,18 @@ def _build_common_schema(
                     else val_for_ui_default
                 )
 
-            if conf_key == CONF_DEBUG_LOGGING:
+            if conf_key in BOOLEAN_CONF_DEFAULTS:
                 final_schema_dict[
                     vol.Optional(conf_key, default=bool(val_for_ui_default))
                 ] = selector_instance_final
-            elif conf_key == CONF_SCAN_INTERVAL:
+            elif conf_key in INTEGER_CONF_RANGES:
                 final_schema_dict[
                     vol.Optional(
                         conf_key,
                         default=int(
-                            val_for_ui_default or DEFAULT_SCAN_INTERVAL_SECONDS
+                            val_for_ui_default
+                            if val_for_ui_default is not None
+                            else INTEGER_CONF_RANGES[conf_key][2]
                         ),
                     )
                 ] = selector_instance_final
@@ -244,14 +768,14 @@ def _build_common_schema(
                 final_schema_dict[vol.Optional(conf_key, default=None)] = vol.Maybe(
                     selector_instance_orig
                 )
-            elif conf_key == CONF_SCAN_INTERVAL:
+            elif conf_key in INTEGER_CONF_RANGES:
                 final_schema_dict[
-                    vol.Optional(conf_key, default=DEFAULT_SCAN_INTERVAL_SECONDS)
+                    vol.Optional(conf_key, default=INTEGER_CONF_RANGES[conf_key][2])
+                ] = selector_instance_orig
+            elif conf_key in BOOLEAN_CONF_DEFAULTS:
+                final_schema_dict[
+                    vol.Optional(conf_key, default=BOOLEAN_CONF_DEFAULTS[conf_key])
                 ] = selector_instance_orig
-            elif conf_key == CONF_DEBUG_LOGGING:
-                final_schema_dict[vol.Optional(conf_key, default=False)] = (
-                    selector_instance_orig
-                )
             else:
                 final_schema_dict[
                     vol.Optional(conf_key, default=val_for_ui_default)
@@ -293,9 +817,11 @@ class SmartEVChargingOptionsFlowHandler(OptionsFlow):
             for conf_key in ALL_CONF_KEYS:
                 value_from_form = user_input.get(conf_key)
 
-                if conf_key == CONF_DEBUG_LOGGING:
+                if conf_key in BOOLEAN_CONF_DEFAULTS:
                     options_to_save[conf_key] = (
-                        isinstance(value_from_form, bool) and value_from_form
+                        value_from_form
+                        if isinstance(value_from_form, bool)
+                        else BOOLEAN_CONF_DEFAULTS[conf_key]
                     )
                 elif conf_key in OPTIONAL_ENTITY_CONF_KEYS:
                     options_to_save[conf_key] = (
@@ -321,24 +847,15 @@ class SmartEVChargingOptionsFlowHandler(OptionsFlow):
                         except (ValueError, TypeError):
                             errors[conf_key] = "invalid_target_soc"
                             validation_ok = False
-                elif conf_key == CONF_SCAN_INTERVAL:
-                    if (
-                        value_from_form is None
-                        or value_from_form == ""
-                        or str(value_from_form).strip() == ""
-                    ):
-                        options_to_save[conf_key] = DEFAULT_SCAN_INTERVAL_SECONDS
+                elif conf_key in INTEGER_CONF_RANGES:
+                    int_val, error_key = _parse_integer_option(
+                        conf_key, value_from_form
+                    )
+                    if error_key:
+                        errors[conf_key] = error_key
+                        validation_ok = False
                     else:
-                        try:
-                            scan_val = int(value_from_form)
-                            if not (10 <= scan_val <= 3600):
-                                errors[conf_key] = "invalid_scan_interval"
-                                validation_ok = False
-                            else:
-                                options_to_save[conf_key] = scan_val
-                        except (ValueError, TypeError):
-                            errors[conf_key] = "invalid_scan_interval"
-                            validation_ok = False
+                        options_to_save[conf_key] = int_val
                 elif value_from_form is not None:
                     options_to_save[conf_key] = value_from_form
                 elif conf_key in REQUIRED_CONF_SETUP_KEYS:
@@ -371,7 +888,7 @@ class SmartEVChargingOptionsFlowHandler(OptionsFlow):
 class SmartEVChargingConfigFlow(ConfigFlow, domain=DOMAIN):
     """Hanterar konfigurationsflödet för Smart EV Charging."""
 
-    VERSION = 1
+    VERSION = 2
 
     async def is_matching(self, import_info: dict[str, Any]) -> bool:
         """Avgör om en upptäckt enhet matchar detta flöde."""
@@ -391,8 +908,12 @@ class SmartEVChargingConfigFlow(ConfigFlow, domain=DOMAIN):
             for conf_key in ALL_CONF_KEYS:
                 value = user_input.get(conf_key)
 
-                if conf_key == CONF_DEBUG_LOGGING:
-                    data_to_save[conf_key] = isinstance(value, bool) and value
+                if conf_key in BOOLEAN_CONF_DEFAULTS:
+                    data_to_save[conf_key] = (
+                        value
+                        if isinstance(value, bool)
+                        else BOOLEAN_CONF_DEFAULTS[conf_key]
+                    )
                 elif conf_key in OPTIONAL_ENTITY_CONF_KEYS:
                     data_to_save[conf_key] = (
                         None if value == "" or value is None else value
@@ -411,20 +932,13 @@ class SmartEVChargingConfigFlow(ConfigFlow, domain=DOMAIN):
                         except (ValueError, TypeError):
                             errors[conf_key] = "invalid_target_soc"
                             validation_ok = False
-                elif conf_key == CONF_SCAN_INTERVAL:
-                    if value is None or value == "" or str(value).strip() == "":
-                        data_to_save[conf_key] = DEFAULT_SCAN_INTERVAL_SECONDS
+                elif conf_key in INTEGER_CONF_RANGES:
+                    int_val, error_key = _parse_integer_option(conf_key, value)
+                    if error_key:
+                        errors[conf_key] = error_key
+                        validation_ok = False
                     else:
-                        try:
-                            scan_val = int(value)
-                            if not (10 <= scan_val <= 3600):
-                                errors[conf_key] = "invalid_scan_interval"
-                                validation_ok = False
-                            else:
-                                data_to_save[conf_key] = scan_val
-                        except (ValueError, TypeError):
-                            errors[conf_key] = "invalid_scan_interval"
-                            validation_ok = False
+                        data_to_save[conf_key] = int_val
                 elif value is not None:
                     data_to_save[conf_key] = value
                 elif conf_key in REQUIRED_CONF_SETUP_KEYS:
@@ -444,7 +958,10 @@ class SmartEVChargingConfigFlow(ConfigFlow, domain=DOMAIN):
                 )
 
             _LOGGER.debug("Initial konfigurationsdata att spara: %s", data_to_save)
-            await self.async_set_unique_id(f"{DOMAIN}_smart_charger_main_instance")
+            # En config entry per laddare, så att flera laddare kan dela huvudsäkring.
+            await self.async_set_unique_id(
+                charger_unique_id(data_to_save[CONF_CHARGER_DEVICE])
+            )
             self._abort_if_unique_id_configured()
 
             return self.async_create_entry(title=DEFAULT_NAME, data=data_to_save)
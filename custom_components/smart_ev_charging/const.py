@@ -9,6 +9,8 @@ CONF_STATUS_SENSOR = "status_sensor_id"
 CONF_PRICE_SENSOR = "price_sensor_id"
 CONF_TIME_SCHEDULE_ENTITY = "time_schedule_entity_id"
 CONF_HOUSE_POWER_SENSOR = "house_power_sensor_id"
+CONF_GRID_POWER_SENSOR = "grid_power_sensor_id"
+CONF_CHARGER_POWER_SENSOR = "charger_power_sensor_id"
 CONF_SOLAR_PRODUCTION_SENSOR = "solar_production_sensor_id"
 CONF_SOLAR_SCHEDULE_ENTITY = "solar_schedule_entity_id"
 CONF_CHARGER_MAX_CURRENT_LIMIT_SENSOR = "charger_max_current_limit_sensor_id"
@@ -20,9 +22,119 @@ CONF_EV_SOC_SENSOR = "ev_soc_sensor_id"
 CONF_TARGET_SOC_LIMIT = "target_soc_limit"
 
 CONF_DEBUG_LOGGING = "debug_logging_enabled"
+CONF_EVENT_DRIVEN_UPDATES = "event_driven_updates_enabled"
+CONF_COMMAND_RATE_LIMIT = "command_rate_limit_per_minute"
+CONF_SHARED_FUSE_CURRENT = "shared_fuse_current_a"
+CONF_CHARGER_PRIORITY = "charger_priority"
+CONF_BATTERY_CAPACITY_KWH = "battery_capacity_kwh"
+CONF_CHARGE_DEADLINE_HOUR = "charge_deadline_hour"
+CONF_SUSPEND_SOLAR_AT_NIGHT = "suspend_solar_at_night"
+CONF_NET_SURPLUS_FROM_HOUSE_POWER = "net_surplus_from_house_power"
+CONF_SOLAR_CONTROLLER_ENABLED = "solar_pi_controller_enabled"
+CONF_SOLAR_CONTROLLER_KP_PERCENT = "solar_pi_kp_percent"
+CONF_SOLAR_CONTROLLER_INTEGRAL_TIME = "solar_pi_integral_time_seconds"
+CONF_SOLAR_CONTROLLER_DEADBAND_A = "solar_pi_deadband_a"
+CONF_SOLAR_CONTROLLER_MIN_INTERVAL = "solar_pi_min_change_interval_seconds"
+CONF_SOLAR_AVERAGE_WINDOW = "solar_average_window_seconds"
+CONF_SOLAR_START_WINDOW = "solar_start_window_seconds"
+CONF_SOLAR_STOP_WINDOW = "solar_stop_window_seconds"
+CONF_PHASE_SWITCHING_ENABLED = "phase_switching_enabled"
+CONF_PHASE_SWITCH_HYSTERESIS_W = "phase_switch_hysteresis_w"
+CONF_PHASE_SWITCH_MIN_DWELL = "phase_switch_min_dwell_seconds"
+CONF_POWER_DEADBAND_W = "power_deadband_w"
+CONF_PRICE_DEADBAND_PERCENT = "price_deadband_percent"
+CONF_MAIN_FUSE_CURRENT = "main_fuse_current_a"
+CONF_MAIN_FUSE_MARGIN = "main_fuse_margin_a"
+CONF_PHASE_CURRENT_SENSOR_L1 = "phase_current_sensor_l1_id"
+CONF_PHASE_CURRENT_SENSOR_L2 = "phase_current_sensor_l2_id"
+CONF_PHASE_CURRENT_SENSOR_L3 = "phase_current_sensor_l3_id"
 
 DEFAULT_NAME = "Avancerad Elbilsladdning"
 DEFAULT_SCAN_INTERVAL_SECONDS = 30
+DEFAULT_EVENT_DRIVEN_UPDATES = True
+DEFAULT_COMMAND_RATE_LIMIT_PER_MINUTE = 6
+# 0 betyder att laddaren inte delar huvudsäkring med andra laddare
+DEFAULT_SHARED_FUSE_CURRENT_A = 0
+DEFAULT_CHARGER_PRIORITY = 1
+# 0 betyder att ingen laddplan görs (laddning sker så fort priset är acceptabelt)
+DEFAULT_BATTERY_CAPACITY_KWH = 0
+DEFAULT_CHARGE_DEADLINE_HOUR = 7
+DEFAULT_SUSPEND_SOLAR_AT_NIGHT = False
+DEFAULT_NET_SURPLUS_FROM_HOUSE_POWER = False
+# PI-regulator för solenergiladdningen. Förstärkningen anges i procent (20 = 0.2).
+DEFAULT_SOLAR_CONTROLLER_ENABLED = False
+DEFAULT_SOLAR_CONTROLLER_KP_PERCENT = 20
+DEFAULT_SOLAR_CONTROLLER_INTEGRAL_TIME_SECONDS = 20
+DEFAULT_SOLAR_CONTROLLER_DEADBAND_A = 1
+DEFAULT_SOLAR_CONTROLLER_MIN_INTERVAL_SECONDS = 60
+# Fönster (sekunder) för solöverskottets medelvärde, start- och stoppvillkor.
+# 0 = av.
+DEFAULT_SOLAR_AVERAGE_WINDOW_SECONDS = 0
+DEFAULT_SOLAR_START_WINDOW_SECONDS = 0
+DEFAULT_SOLAR_STOP_WINDOW_SECONDS = 0
+# Växling mellan 1-fas och 3-fas vid litet solöverskott. Hysteresen (W) läggs
+# på gränsen för att gå tillbaka till tre faser.
+DEFAULT_PHASE_SWITCHING_ENABLED = False
+DEFAULT_PHASE_SWITCH_HYSTERESIS_W = 460
+DEFAULT_PHASE_SWITCH_MIN_DWELL_SECONDS = 600
+# Livslängd (minuter) för kretsgränsen som väljer fasläge. Den skickas om efter
+# halva tiden och löper ut när fasväxlingen stängs av eller sessionen tar slut.
+PHASE_MODE_TTL_MINUTES = 15
+# Dödband för när en ändring av effekt (W, ett ampere-steg på tre faser) eller
+# elpris (% av föregående pris) väcker beslutscykeln.
+DEFAULT_POWER_DEADBAND_W = 690
+DEFAULT_PRICE_DEADBAND_PERCENT = 1
+# Huvudsäkringens storlek (A) för skyddet mot överbelastning. 0 = av.
+DEFAULT_MAIN_FUSE_CURRENT_A = 0
+DEFAULT_MAIN_FUSE_MARGIN_A = 1
+# Tid (sekunder) efter en sänkning innan fasströmmarna antas visa den nya laddströmmen
+MAIN_FUSE_SETTLE_SECONDS = 10
+# Tid (sekunder) som tillståndsförändringar samlas ihop innan en refresh körs
+EVENT_REFRESH_DEBOUNCE_SECONDS = 1.0
+# Adaptivt uppdateringsintervall (sekunder). Snabbt när solöverskottet varierar under
+# pågående solenergiladdning, långsamt när laddaren är frånkopplad eller inget händer.
+SCAN_INTERVAL_FAST_SECONDS = 10
+SCAN_INTERVAL_IDLE_SECONDS = 300
+# Efter en statusändring hos laddaren används det snabba intervallet så här länge
+# (sekunder), så att följden av ändringen (t.ex. att bilen börjar ladda) ses direkt.
+SCAN_INTERVAL_SETTLE_SECONDS = 60
+# Antal solproduktionsvärden som används för att bedöma om överskottet varierar
+SOLAR_VOLATILITY_SAMPLES = 5
+# Högsta uppdateringstakt (Hz) som signalfönstren dimensioneras för
+SIGNAL_WINDOW_MAX_RATE_HZ = 1
+# Högfrekventa effektsensorer (t.ex. P1/HAN) slås ihop i fönster (sekunder). De
+# väcker beslutscykeln bara när effekten ändrats mer än dödbandet.
+POWER_SIGNAL_WINDOW_SECONDS = 10
+# Tid (sekunder) som ett skickat kommando anses gällande innan det får skickas om
+COMMAND_CACHE_TTL_SECONDS = 300
+# Max tid (sekunder) att vänta på att huvudströmbrytaren och laddarens status bekräftas
+STATE_CONFIRM_TIMEOUT_SECONDS = 10.0
+# Antal kommandon per laddare som får skickas direkt i en skur innan takten begränsas
+COMMAND_BURST_SIZE = 6
+# Max antal köade kommandon per laddare
+COMMAND_QUEUE_MAX_DEPTH = 10
+# Antal beslut som sparas i spåret för diagnostiken
+DECISION_TRACE_SIZE = 100
+# Tjänsten som profilerar de nästa beslutscyklerna
+SERVICE_PROFILE = "profile"
+ATTR_CYCLES = "cycles"
+ATTR_TRACEMALLOC = "tracemalloc"
+DEFAULT_PROFILE_CYCLES = 5
+MAX_PROFILE_CYCLES = 100
+# Antal rader med störst minnesallokering som skrivs till sammanfattningen
+PROFILE_TOP_ALLOCATIONS = 25
+# Nyckel i hass.data[DOMAIN] för den pågående profileringen (högst en åt gången)
+PROFILER_DATA_KEY = "profiler"
+# Unikt ID för config entries före version 2, då integrationen bara hade en entry
+LEGACY_UNIQUE_ID = f"{DOMAIN}_smart_charger_main_instance"
+# Nyckel i hass.data[DOMAIN] för hubben som delar huvudsäkringen mellan laddare
+FUSE_HUB_DATA_KEY = "fuse_hub"
+# Nyckel i hass.data[DOMAIN] för hubben med gemensamma prenumerationer och sensorvärden
+INPUT_HUB_DATA_KEY = "input_hub"
+# Max antal laddare som begränsas samtidigt när säkringen fördelas om
+HUB_MAX_CONCURRENT_COMMANDS = 4
+# Solentiteten som används för att vila solenergiutvärderingen mellan skymning och gryning
+SUN_ENTITY_ID = "sun.sun"
 
 ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH = "smart_charging_enabled"
 ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER = "max_charging_price"
@@ -31,6 +143,14 @@ ENTITY_ID_SUFFIX_SOLAR_BUFFER_NUMBER = "solar_charging_buffer"
 ENTITY_ID_SUFFIX_MIN_SOLAR_CHARGE_CURRENT_A_NUMBER = "min_solar_charging_current"
 
 ENTITY_ID_SUFFIX_ACTIVE_CONTROL_MODE_SENSOR = "active_control_mode"
+ENTITY_ID_SUFFIX_COMMAND_QUEUE_DEPTH_SENSOR = "command_queue_depth"
+ENTITY_ID_SUFFIX_REJECTED_COMMANDS_SENSOR = "rejected_commands"
+ENTITY_ID_SUFFIX_CYCLE_DURATION_SENSOR = "cycle_duration"
+ENTITY_ID_SUFFIX_SERVICE_CALLS_SENSOR = "service_calls_last_hour"
+ENTITY_ID_SUFFIX_SUPPRESSED_COMMANDS_SENSOR = "suppressed_commands"
+ENTITY_ID_SUFFIX_STATE_READS_SENSOR = "state_reads"
+ENTITY_ID_SUFFIX_REFRESHES_SENSOR = "refreshes"
+ENTITY_ID_SUFFIX_REASON_CODE_SENSOR = "reason_code"
 
 # Exempel på statusvärden från Easee
 EASEE_STATUS_DISCONNECTED = ["disconnected", "car_disconnected"]
@@ -67,5 +187,6 @@ POWER_MARGIN_W = 300
 SOLAR_SURPLUS_DELAY_SECONDS = 60
 
 # Fysiska konstanter för beräkningar
-PHASES = 3  # Antal faser som normalt används för laddning (kan behöva justeras om 1-fas är vanligt)
+PHASES = 3  # Antal faser som normalt används för laddning
+SINGLE_PHASE = 1  # Antal faser vid 1-fasladdning (fasväxling vid litet solöverskott)
 VOLTAGE_PHASE_NEUTRAL = 230  # Standard fasspänning i Sverige
@@ -0,0 +1,103 @@
+# File version: 2025-06-05 0.2.0
+"""PI-regulator för solenergiladdningens strömgräns.
+
+Utan regulator räknas strömmen om från grunden varje cykel, vilket ger
+1 A-svängningar och ett nytt strömkommando nästan varje cykel när molnen
+passerar. Regulatorn reglerar i stället exporten till nätet (överskottet
+minus laddarens uppmätta ström) mot noll med en PI-lag. Integralen
+begränsas och växer inte medan utsignalen ligger mot en gräns. Den skickade
+strömgränsen ändras bara när utsignalen har flyttat sig mer än dödbandet och
+tidigast efter ett minsta intervall. Sänkningar väntar aldrig på intervallet,
+så att laddaren inte köper el från nätet.
+
+Regulatorn sparar inget mellan stegen. Tillståndet följer med beslutsmotorns
+tillstånd och nollställs när beslutet lämnar solenergiläget eller fasläget
+byts, så att regulatorn då startar stötfritt igen.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import math
+from typing import NamedTuple
+
+
+class SolarControllerSettings(NamedTuple):
+    """Regulatorns inställningar."""
+
+    kp: float
+    integral_time_s: float
+    deadband_a: float
+    min_change_interval: timedelta
+
+
+class SolarControllerState(NamedTuple):
+    """Regulatorns tillstånd mellan två cykler."""
+
+    integral_a: float
+    output_a: float
+    applied_a: float
+    changed_at: datetime
+    updated_at: datetime
+
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return max(low, min(value, high))
+
+
+def step_solar_controller(
+    settings: SolarControllerSettings,
+    state: SolarControllerState | None,
+    available_a: float,
+    hw_max_a: float,
+    now: datetime,
+    measured_a: float | None = None,
+) -> tuple[float, SolarControllerState]:
+    """Ett regulatorsteg. Returnerar strömgränsen (hel ampere) och nytt tillstånd.
+
+    `available_a` är överskottet i ampere inklusive laddarens egen ström (kan
+    vara negativt) och `measured_a` laddarens uppmätta ström. Felet är
+    skillnaden, det vill säga den ström som just nu exporteras till nätet.
+    Utan mätning antas laddaren dra den skickade gränsen. Integralen gör att
+    exporten regleras mot noll även när bilen drar mindre än gränsen. Första
+    steget startar stötfritt på det tillgängliga värdet.
+    """
+    if state is None:
+        output_a = _clamp(available_a, 0.0, hw_max_a)
+        applied_a = float(math.floor(output_a))
+        # Integralen startar på den skickade gränsen (stötfri start).
+        return applied_a, SolarControllerState(applied_a, output_a, applied_a, now, now)
+
+    dt = max((now - state.updated_at).total_seconds(), 0.0)
+    # Integrationssteget begränsas så att ett långt uppehåll mellan två
+    # cykler inte ger en översläng. Gränsen beror inte på Kp.
+    integral_gain = min(settings.kp * dt / settings.integral_time_s, 1.0)
+    error = available_a - (state.applied_a if measured_a is None else measured_a)
+    # Strömgränsen går bara i hela ampere. Bara den del av felet som ligger
+    # utanför dödbandet integreras, annars skulle gränsen pendla mellan två
+    # steg när överskottet ligger mellan dem.
+    integrated_error = math.copysign(max(abs(error) - settings.deadband_a, 0.0), error)
+    integral_a = state.integral_a + integral_gain * integrated_error
+    unsaturated_a = settings.kp * error + integral_a
+    if (unsaturated_a > hw_max_a and error > 0) or (unsaturated_a < 0 and error < 0):
+        # Anti-windup: integrera inte vidare mot en gräns som redan nåtts.
+        integral_a = state.integral_a
+    integral_a = _clamp(integral_a, 0.0, hw_max_a)
+    output_a = _clamp(settings.kp * error + integral_a, 0.0, hw_max_a)
+
+    applied_a = state.applied_a
+    changed_at = state.changed_at
+    candidate_a = float(math.floor(output_a))
+    if (
+        candidate_a != applied_a
+        and abs(output_a - applied_a) >= settings.deadband_a
+        and (
+            candidate_a < applied_a
+            or now - state.changed_at >= settings.min_change_interval
+        )
+    ):
+        applied_a = candidate_a
+        changed_at = now
+    return applied_a, SolarControllerState(
+        integral_a, output_a, applied_a, changed_at, now
+    )
@@ -1,19 +1,21 @@
 # File version: 2025-06-05 0.2.0 // ÄNDRA HÄR
 
 import logging
+import time
+from collections.abc import Callable
 from datetime import timedelta, datetime
-from typing import Any, cast
-import math
-import asyncio
+from typing import Any
 
-from homeassistant.core import HomeAssistant, Event, CALLBACK_TYPE, callback
+from homeassistant.core import HomeAssistant, Event, CALLBACK_TYPE, State, callback
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.helpers.sun import get_astral_event_next, is_up
 from homeassistant.helpers.entity_registry import (
     async_get as async_get_entity_registry,
     EntityRegistry,
 )
-from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.const import (
     STATE_ON,
     STATE_OFF,
@@ -21,7 +23,7 @@ from homeassistant.const import (
     STATE_UNKNOWN,
     SERVICE_TURN_ON,
     ATTR_ENTITY_ID,
-    UnitOfPower,
+    SUN_EVENT_SUNRISE,
 )
 import homeassistant.util.dt as dt_util
 
@@ -52,14 +54,142 @@ from .const import (
     EASEE_STATUS_COMPLETED,
     EASEE_STATUS_OFFLINE,
     CONTROL_MODE_PRICE_TIME,
-    CONTROL_MODE_SOLAR_SURPLUS,
     CONTROL_MODE_MANUAL,
     MIN_CHARGE_CURRENT_A,
     MAX_CHARGE_CURRENT_A_HW_DEFAULT,
     POWER_MARGIN_W,
+    CONF_DEBUG_LOGGING,
+    CONF_EVENT_DRIVEN_UPDATES,
+    DEFAULT_EVENT_DRIVEN_UPDATES,
+    EVENT_REFRESH_DEBOUNCE_SECONDS,
+    COMMAND_CACHE_TTL_SECONDS,
+    STATE_CONFIRM_TIMEOUT_SECONDS,
+    CONF_COMMAND_RATE_LIMIT,
+    DEFAULT_COMMAND_RATE_LIMIT_PER_MINUTE,
+    COMMAND_BURST_SIZE,
+    COMMAND_QUEUE_MAX_DEPTH,
+    DECISION_TRACE_SIZE,
+    SCAN_INTERVAL_FAST_SECONDS,
+    SCAN_INTERVAL_IDLE_SECONDS,
+    SCAN_INTERVAL_SETTLE_SECONDS,
+    SOLAR_VOLATILITY_SAMPLES,
+    PHASE_MODE_TTL_MINUTES,
     PHASES,
     VOLTAGE_PHASE_NEUTRAL,
-    CONF_DEBUG_LOGGING,
+    CONF_SHARED_FUSE_CURRENT,
+    DEFAULT_SHARED_FUSE_CURRENT_A,
+    CONF_CHARGER_PRIORITY,
+    DEFAULT_CHARGER_PRIORITY,
+    CONTROL_MODE_SOLAR_SURPLUS,
+    CONF_BATTERY_CAPACITY_KWH,
+    DEFAULT_BATTERY_CAPACITY_KWH,
+    CONF_CHARGE_DEADLINE_HOUR,
+    DEFAULT_CHARGE_DEADLINE_HOUR,
+    CONF_SUSPEND_SOLAR_AT_NIGHT,
+    DEFAULT_SUSPEND_SOLAR_AT_NIGHT,
+    SUN_ENTITY_ID,
+    CONF_GRID_POWER_SENSOR,
+    CONF_CHARGER_POWER_SENSOR,
+    CONF_NET_SURPLUS_FROM_HOUSE_POWER,
+    DEFAULT_NET_SURPLUS_FROM_HOUSE_POWER,
+    CONF_SOLAR_CONTROLLER_ENABLED,
+    DEFAULT_SOLAR_CONTROLLER_ENABLED,
+    CONF_SOLAR_CONTROLLER_KP_PERCENT,
+    DEFAULT_SOLAR_CONTROLLER_KP_PERCENT,
+    CONF_SOLAR_CONTROLLER_INTEGRAL_TIME,
+    DEFAULT_SOLAR_CONTROLLER_INTEGRAL_TIME_SECONDS,
+    CONF_SOLAR_CONTROLLER_DEADBAND_A,
+    DEFAULT_SOLAR_CONTROLLER_DEADBAND_A,
+    CONF_SOLAR_CONTROLLER_MIN_INTERVAL,
+    DEFAULT_SOLAR_CONTROLLER_MIN_INTERVAL_SECONDS,
+    CONF_SOLAR_AVERAGE_WINDOW,
+    DEFAULT_SOLAR_AVERAGE_WINDOW_SECONDS,
+    CONF_SOLAR_START_WINDOW,
+    CONF_SOLAR_STOP_WINDOW,
+    DEFAULT_SOLAR_START_WINDOW_SECONDS,
+    DEFAULT_SOLAR_STOP_WINDOW_SECONDS,
+    SIGNAL_WINDOW_MAX_RATE_HZ,
+    CONF_MAIN_FUSE_CURRENT,
+    DEFAULT_MAIN_FUSE_CURRENT_A,
+    CONF_MAIN_FUSE_MARGIN,
+    DEFAULT_MAIN_FUSE_MARGIN_A,
+    CONF_PHASE_CURRENT_SENSOR_L1,
+    CONF_PHASE_CURRENT_SENSOR_L2,
+    CONF_PHASE_CURRENT_SENSOR_L3,
+    MAIN_FUSE_SETTLE_SECONDS,
+    POWER_SIGNAL_WINDOW_SECONDS,
+    CONF_POWER_DEADBAND_W,
+    DEFAULT_POWER_DEADBAND_W,
+    CONF_PRICE_DEADBAND_PERCENT,
+    DEFAULT_PRICE_DEADBAND_PERCENT,
+    CONF_PHASE_SWITCHING_ENABLED,
+    DEFAULT_PHASE_SWITCHING_ENABLED,
+    CONF_PHASE_SWITCH_HYSTERESIS_W,
+    DEFAULT_PHASE_SWITCH_HYSTERESIS_W,
+    CONF_PHASE_SWITCH_MIN_DWELL,
+    DEFAULT_PHASE_SWITCH_MIN_DWELL_SECONDS,
+)
+from .allocation import ChargerDemand, demand_weight
+from .commands import (
+    ACTION_PAUSE,
+    ACTION_START,
+    PRIORITY_CURRENT,
+    PRIORITY_PAUSE,
+    PRIORITY_PHASE_MODE,
+    PRIORITY_START,
+    SERVICE_ACTION_COMMAND,
+    SERVICE_SET_CIRCUIT_DYNAMIC_LIMIT,
+    SERVICE_SET_DYNAMIC_LIMIT,
+    CommandCache,
+    CommandScheduler,
+)
+from .controller import SolarControllerSettings, SolarControllerState
+from .decision import (
+    DecisionState,
+    calculate_solar_surplus_w,
+    evaluate,
+    net_solar_surplus_w,
+)
+from .decision_trace import DecisionTrace, command_values
+from .fuse_guard import main_fuse_limit_a
+from .helpers import async_wait_for_state
+from .hub import FuseSharingHub, get_fuse_hub, release_fuse_hub
+from .inputs import get_input_hub, release_input_hub
+from .instrumentation import (
+    TRIGGER_EVENT,
+    TRIGGER_POLL,
+    TRIGGER_TIME_EDGE,
+    CycleInstrumentation,
+)
+from .phase_switch import PhaseSwitchSettings
+from .planner import (
+    FORECAST_ATTRIBUTES,
+    ChargePlan,
+    PriceSlot,
+    parse_price_slots,
+    plan_cheapest_slots,
+    required_energy_kwh,
+)
+from .profiling import CycleProfiler, async_finish_profiling
+from .reasons import Reason, ReasonCode
+from .signals import Deadband, DownsampledSignal, RollingWindow
+from .snapshot import InputSnapshot
+from .time_edges import (
+    ATTR_NEXT_RISING,
+    STATE_ABOVE_HORIZON,
+    STATE_BELOW_HORIZON,
+    attribute_datetime,
+    next_price_boundary,
+    next_time_edge,
+    schedule_next_event,
+)
+from .value_cache import (
+    ParsedValueCache,
+    UnitResolver,
+    resolve_current_unit,
+    resolve_number_unit,
+    resolve_power_unit,
+    resolve_price_unit,
 )
 
 _LOGGER = logging.getLogger(f"custom_components.{DOMAIN}")
@@ -76,6 +206,9 @@ class SmartEVChargingCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         self.entry = entry
         self.config = entry.data | entry.options
         self._debug_logging = entry.options.get(CONF_DEBUG_LOGGING, False)
+        self._event_driven_updates: bool = bool(
+            self.config.get(CONF_EVENT_DRIVEN_UPDATES, DEFAULT_EVENT_DRIVEN_UPDATES)
+        )
 
         super().__init__(
             hass,
@@ -89,6 +222,7 @@ class SmartEVChargingCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         )
 
         self.listeners: list[CALLBACK_TYPE] = []
+        self._listeners_started: bool = False
         self.active_control_mode: str = CONTROL_MODE_MANUAL
         self.should_charge_flag: bool = False
         self.target_charge_current_a: float = MIN_CHARGE_CURRENT_A
@@ -109,111 +243,240 @@ class SmartEVChargingCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         self.min_solar_charge_current_entity_id: str | None = None
         self._internal_entities_resolved: bool = False
 
-    # Lägg till denna nya metod i SmartEVChargingCoordinator-klassen i coordinator.py
-    # (t.ex. före _control_charger eller _async_update_data)
-    # Justerad version av _calculate_solar_charging_action i SmartEVChargingCoordinator
-    # Tar bort logiken för _solar_surplus_start_time och SOLAR_SURPLUS_DELAY_SECONDS vid start.
-
-    async def _calculate_solar_charging_action(
-        self,
-        calculated_solar_current_a: float,
-        available_solar_surplus_w: float,
-        min_solar_charge_current_a: float,  # Detta är starttröskeln från UI
-        charger_hw_max_amps: float,
-        price_time_conditions_met: bool,
-    ) -> str:
-        """
-        Bestämmer laddningsåtgärd baserat på solenergi.
-        Startar solenergiladdning omedelbart om villkoren är uppfyllda.
-        Uppdaterar self.should_charge_flag, self.target_charge_current_a, etc.
-        Returnerar reason_for_action.
-        """
-        reason_for_action = "Initialvärde för solenergilogik"
-
-        # Säkerställ att beräknad ström inte är negativ innan jämförelser
-        calculated_solar_current_a = max(0.0, calculated_solar_current_a)
-
-        if self._debug_logging:
-            _LOGGER.debug(
-                "Solkalkyl: Beräknad ström: %.1fA, Min start/fortsätt: %.1fA, Session aktiv: %s",
-                calculated_solar_current_a,
-                min_solar_charge_current_a,
-                self._solar_session_active,
+        # Adaptivt uppdateringsintervall. Det konfigurerade intervallet är
+        # utgångsläget. Efter en statusändring används det snabba intervallet
+        # under en kort tid.
+        self._base_update_interval: timedelta = timedelta(seconds=scan_interval_seconds)
+        self._last_charger_status: str | None = None
+        self._charger_status_changed_at: datetime | None = None
+        self._solar_volatility_window = RollingWindow(SOLAR_VOLATILITY_SAMPLES)
+        # Glidande fönster över solöverskottet: medelvärde för nivån, minimum
+        # för startvillkoret och maximum för stoppvillkoret. None när fönstret
+        # är avstängt. Fönstren matas av effektsensorernas händelser.
+        self._solar_average_window = self._signal_window(
+            CONF_SOLAR_AVERAGE_WINDOW, DEFAULT_SOLAR_AVERAGE_WINDOW_SECONDS
+        )
+        self._solar_start_window = self._signal_window(
+            CONF_SOLAR_START_WINDOW, DEFAULT_SOLAR_START_WINDOW_SECONDS
+        )
+        self._solar_stop_window = self._signal_window(
+            CONF_SOLAR_STOP_WINDOW, DEFAULT_SOLAR_STOP_WINDOW_SECONDS
+        )
+        self._solar_windows: tuple[RollingWindow, ...] = tuple(
+            window
+            for window in (
+                self._solar_average_window,
+                self._solar_start_window,
+                self._solar_stop_window,
             )
-
-        if calculated_solar_current_a >= min_solar_charge_current_a:
-            # Tillräcklig ström för att starta eller fortsätta ladda aktivt
-            self.active_control_mode_internal = CONTROL_MODE_SOLAR_SURPLUS
-            self.should_charge_flag = True
-            self.target_charge_current_a = min(
-                calculated_solar_current_a, charger_hw_max_amps
+            if window is not None
+        )
+        self._solar_window_fed_at: datetime | None = None
+        self._solar_window_listeners: list[CALLBACK_TYPE] = []
+        # Dödband per indata: en ändring inom dödbandet uppdaterar bara det
+        # tolkade värdet i cachen och väcker inte beslutscykeln. Övriga
+        # entiteter (status, scheman, brytare ...) väcker vid varje ändring.
+        power_deadband_w = self._float_option(
+            CONF_POWER_DEADBAND_W, DEFAULT_POWER_DEADBAND_W
+        )
+        self._price_deadband = Deadband(
+            relative=self._float_option(
+                CONF_PRICE_DEADBAND_PERCENT, DEFAULT_PRICE_DEADBAND_PERCENT
             )
-            reason_for_action = f"Solenergiladdning aktiv (Tillgängligt: {calculated_solar_current_a:.1f}A >= Min: {min_solar_charge_current_a:.1f}A. Sätter till {self.target_charge_current_a:.1f}A)."
+            / 100.0
+        )
+        # Effektsensorerna kan uppdateras flera gånger per sekund. Deras
+        # händelser slås ihop per fönster innan beslutscykeln väcks.
+        self._power_signals: dict[str, DownsampledSignal] = {
+            entity_id: DownsampledSignal(
+                timedelta(seconds=POWER_SIGNAL_WINDOW_SECONDS),
+                Deadband(absolute=power_deadband_w),
+            )
+            for entity_id in (
+                self.config.get(CONF_HOUSE_POWER_SENSOR),
+                self.config.get(CONF_GRID_POWER_SENSOR),
+                self.config.get(CONF_SOLAR_PRODUCTION_SENSOR),
+            )
+            if entity_id
+        }
 
-            if (
-                not self._solar_session_active
-            ):  # Om sessionen inte var aktiv, markera den som nystartad
-                _LOGGER.info(
-                    "Startar ny solenergiladdningssession. %s", reason_for_action
+        # Samlar ihop skurar av tillståndsförändringar till en enda refresh.
+        # immediate=False gör att alla ändringar inom fönstret hinner landa
+        # innan beslutet fattas (t.ex. status + dynamisk ström samtidigt).
+        self._event_refresh_debouncer: Debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=EVENT_REFRESH_DEBOUNCE_SECONDS,
+            immediate=False,
+            function=self._async_event_refresh,
+        )
+        # Cykeltider, tillståndsläsningar och vad som väckte cykeln. Nästa
+        # cykel räknas som pollning om inget annat har satts.
+        self._instrumentation = CycleInstrumentation()
+        self._refresh_trigger: str = TRIGGER_POLL
+        # Senast visade anledning och dess text.
+        self._last_reason: tuple[Reason, str] | None = None
+        # Minns senast skickade kommandon så att identiska kommandon inte
+        # skickas om varje cykel.
+        self._command_cache = CommandCache(
+            timedelta(seconds=COMMAND_CACHE_TTL_SECONDS)
+        )
+        # Prenumerationer och tolkade sensorvärden delas med andra entries som
+        # läser samma entiteter. Värdena återanvänds tills tillståndet ändras.
+        self._input_hub = get_input_hub(hass, entry.entry_id)
+        self._value_cache: ParsedValueCache = self._input_hub.value_cache
+        # Alla Easee-kommandon går via en hastighetsbegränsad kö per laddare.
+        try:
+            command_rate = float(
+                self.config.get(
+                    CONF_COMMAND_RATE_LIMIT, DEFAULT_COMMAND_RATE_LIMIT_PER_MINUTE
                 )
-                # Om en Pris/Tid session var berättigad, eller ingen session alls fanns, återställ sessionsdata
-                if (
-                    self.session_start_time_utc is None
-                    or self._price_time_eligible_for_charging
-                ):
-                    self._reset_session_data(
-                        reason_for_action
-                    )  # Återställer och sätter ny starttid i _control_charger
-
-            self._solar_session_active = True
-
-        elif (
-            self._solar_session_active
-            and calculated_solar_current_a < min_solar_charge_current_a
-        ):
-            # Solenergisession VAR aktiv, men strömmen har sjunkit under minimigränsen.
-            # Sätt ström till 0A men behåll sessionen som "aktiv" (dvs. pausad av sollogik).
-            self.active_control_mode_internal = (
-                CONTROL_MODE_MANUAL  # Fortfarande hanterad av solenergilogiken
             )
-            self.should_charge_flag = (
-                True  # Vi vill skicka ett kommando (för att sätta ström till 0)
+        except (ValueError, TypeError):
+            command_rate = DEFAULT_COMMAND_RATE_LIMIT_PER_MINUTE
+        self._command_scheduler = CommandScheduler(
+            hass,
+            rate_per_minute=command_rate,
+            burst=COMMAND_BURST_SIZE,
+            max_queue_depth=COMMAND_QUEUE_MAX_DEPTH,
+            on_submit=self._record_submitted_command,
+            on_sent=self._record_sent_command,
+        )
+        # De senaste besluten för diagnostiken, och kommandona i pågående cykel.
+        self.decision_trace = DecisionTrace(DECISION_TRACE_SIZE)
+        self._cycle_commands: list[tuple[str, tuple[Any, ...]]] | None = None
+        # Pågående profilering, startad av tjänsten smart_ev_charging.profile.
+        self._profiler: CycleProfiler | None = None
+        # Laddare som delar huvudsäkring får sin andel från en gemensam hubb.
+        self._charger_priority: float = self._float_option(
+            CONF_CHARGER_PRIORITY, DEFAULT_CHARGER_PRIORITY
+        )
+        self._shared_fuse_current_a: float = self._float_option(
+            CONF_SHARED_FUSE_CURRENT, DEFAULT_SHARED_FUSE_CURRENT_A
+        )
+        self._fuse_hub: FuseSharingHub | None = None
+        # Laddplan för de billigaste perioderna före deadline (0 kWh = av).
+        self._battery_capacity_kwh: float = self._float_option(
+            CONF_BATTERY_CAPACITY_KWH, DEFAULT_BATTERY_CAPACITY_KWH
+        )
+        self._charge_deadline_hour: int = int(
+            self._float_option(CONF_CHARGE_DEADLINE_HOUR, DEFAULT_CHARGE_DEADLINE_HOUR)
+        ) % 24
+        self._charge_plan: ChargePlan | None = None
+        self._charge_plan_key: tuple[Any, ...] | None = None
+        self._price_forecast: tuple[Any, ...] | None = None
+        self._price_slots_cache: list[PriceSlot] = []
+        # Väckning vid nästa prisperiod- eller schemagräns.
+        self._time_edge_at: datetime | None = None
+        self._unsub_time_edge: CALLBACK_TYPE | None = None
+        # Solenergiutvärderingen kan vila mellan skymning och gryning.
+        self._suspend_solar_at_night: bool = bool(
+            self.config.get(CONF_SUSPEND_SOLAR_AT_NIGHT, DEFAULT_SUSPEND_SOLAR_AT_NIGHT)
+        )
+        self._solar_suspended_until: datetime | None = None
+        # Solöverskottet kan beräknas som produktion minus husets last.
+        self._net_surplus_from_house_power: bool = bool(
+            self.config.get(
+                CONF_NET_SURPLUS_FROM_HOUSE_POWER, DEFAULT_NET_SURPLUS_FROM_HOUSE_POWER
             )
-            self.target_charge_current_a = 0.0
-            reason_for_action = f"Solenergiladdning pausad (Tillgängligt: {calculated_solar_current_a:.1f}A < Min: {min_solar_charge_current_a:.1f}A). Sätter ström till 0A."
-            _LOGGER.info(reason_for_action)
-            # self._solar_session_active förblir True, så vi vet att vi ska återuppta om förhållandena förbättras.
-            # Ingen återställning av session_start_time_utc här, sessionen är "pausad" av sollogiken.
-
-        else:  # Inte tillräckligt med ström för att starta en NY session, och ingen gammal session var aktiv.
-            # Eller, om self._solar_session_active var False och calculated_solar_current_a < min_solar_charge_current_a
-            self.active_control_mode_internal = CONTROL_MODE_MANUAL
-            self.should_charge_flag = False
-            # self.target_charge_current_a ärvs eller sätts till hw_max om ingen smart logik tar över (hanteras i _async_update_data)
-            reason_for_action = f"För lite solöverskott för att starta solenergiladdning ({calculated_solar_current_a:.1f}A < {min_solar_charge_current_a:.1f}A min-start)."
-
-            if self._solar_session_active:  # Detta block bör teoretiskt inte nås om logiken ovan är korrekt, men som en fallback.
-                _LOGGER.info(
-                    "Avslutar solenergiladdningssession p.g.a. för lite överskott. %s",
-                    reason_for_action,
+        )
+        # Valfri PI-regulator för solenergiladdningens ström.
+        self._solar_controller: SolarControllerSettings | None = None
+        self._solar_controller_state: SolarControllerState | None = None
+        if self.config.get(
+            CONF_SOLAR_CONTROLLER_ENABLED, DEFAULT_SOLAR_CONTROLLER_ENABLED
+        ):
+            self._solar_controller = SolarControllerSettings(
+                kp=self._float_option(
+                    CONF_SOLAR_CONTROLLER_KP_PERCENT,
+                    DEFAULT_SOLAR_CONTROLLER_KP_PERCENT,
                 )
-                if (
-                    self.session_start_time_utc is not None
-                    and not self._price_time_eligible_for_charging
-                ):
-                    self._reset_session_data(reason_for_action)
-            self._solar_session_active = (
-                False  # Säkerställ att sessionen markeras som inaktiv.
+                / 100.0,
+                integral_time_s=self._float_option(
+                    CONF_SOLAR_CONTROLLER_INTEGRAL_TIME,
+                    DEFAULT_SOLAR_CONTROLLER_INTEGRAL_TIME_SECONDS,
+                ),
+                deadband_a=self._float_option(
+                    CONF_SOLAR_CONTROLLER_DEADBAND_A,
+                    DEFAULT_SOLAR_CONTROLLER_DEADBAND_A,
+                ),
+                min_change_interval=timedelta(
+                    seconds=self._float_option(
+                        CONF_SOLAR_CONTROLLER_MIN_INTERVAL,
+                        DEFAULT_SOLAR_CONTROLLER_MIN_INTERVAL_SECONDS,
+                    )
+                ),
             )
-
-        # Hantera flaggan för Pris/Tid-berättigande
-        if self.active_control_mode_internal == CONTROL_MODE_SOLAR_SURPLUS or (
-            self.active_control_mode_internal == CONTROL_MODE_MANUAL
-            and not price_time_conditions_met
+        # Valfri växling till 1-fasladdning vid litet solöverskott. Fasläget
+        # antas vara tre faser tills det första fasläget har skickats.
+        self._phase_switch: PhaseSwitchSettings | None = None
+        if self.config.get(
+            CONF_PHASE_SWITCHING_ENABLED, DEFAULT_PHASE_SWITCHING_ENABLED
         ):
-            self._price_time_eligible_for_charging = False
+            self._phase_switch = PhaseSwitchSettings(
+                hysteresis_w=self._float_option(
+                    CONF_PHASE_SWITCH_HYSTERESIS_W, DEFAULT_PHASE_SWITCH_HYSTERESIS_W
+                ),
+                min_dwell=timedelta(
+                    seconds=self._float_option(
+                        CONF_PHASE_SWITCH_MIN_DWELL,
+                        DEFAULT_PHASE_SWITCH_MIN_DWELL_SECONDS,
+                    )
+                ),
+            )
+        self._charger_phases: int = PHASES
+        self._phases_changed_at: datetime | None = None
+        # Senast skickade fasläge: (faser, ström per fas, tidpunkt).
+        self._phase_mode_sent: tuple[int, float, datetime] | None = None
+        # Skydd av huvudsäkringen från fasströmssensorerna (P1/HAN). Körs
+        # direkt vid varje ny fasström, oberoende av uppdateringsintervallet.
+        self._main_fuse_current_a: float = self._float_option(
+            CONF_MAIN_FUSE_CURRENT, DEFAULT_MAIN_FUSE_CURRENT_A
+        )
+        self._main_fuse_margin_a: float = self._float_option(
+            CONF_MAIN_FUSE_MARGIN, DEFAULT_MAIN_FUSE_MARGIN_A
+        )
+        # Sensorerna i fasordning (L1-L3), None för en fas utan sensor.
+        self._phase_current_sensor_slots: tuple[str | None, ...] = (
+            self.config.get(CONF_PHASE_CURRENT_SENSOR_L1),
+            self.config.get(CONF_PHASE_CURRENT_SENSOR_L2),
+            self.config.get(CONF_PHASE_CURRENT_SENSOR_L3),
+        )
+        self._phase_current_sensors: list[str] = [
+            entity_id for entity_id in self._phase_current_sensor_slots if entity_id
+        ]
+        self._main_fuse_limit_a: float | None = None
+        # Begränsningen som senast tillämpades, None när säkringen inte begränsar.
+        self._main_fuse_applied_a: float | None = None
+        # Laddström före senaste snabbsänkningen och när den skickades.
+        self._main_fuse_reduced_from: tuple[float, datetime] | None = None
+        self._main_fuse_listeners: list[CALLBACK_TYPE] = []
+        self._fuse_share_starved: bool = False
+        if self._shared_fuse_current_a > 0:
+            self._fuse_hub = get_fuse_hub(hass)
+            self._fuse_hub.register(
+                entry.entry_id,
+                self._shared_fuse_current_a,
+                self._async_limit_to_fuse_share,
+                self._event_refresh_debouncer.async_schedule_call,
+            )
 
-        return reason_for_action
+    def _float_option(self, conf_key: str, default_value: float) -> float:
+        try:
+            return float(self.config.get(conf_key, default_value))
+        except (ValueError, TypeError):
+            return float(default_value)
+
+    def _signal_window(
+        self, conf_key: str, default_seconds: int
+    ) -> RollingWindow | None:
+        """Tidsfönster med fast storlek för en signal, eller None om det är av."""
+        seconds = self._float_option(conf_key, default_seconds)
+        if seconds <= 0:
+            return None
+        return RollingWindow(
+            int(seconds * SIGNAL_WINDOW_MAX_RATE_HZ) + 1, timedelta(seconds=seconds)
+        )
 
     async def _resolve_internal_entities(self) -> bool:
         if self._internal_entities_resolved:
@@ -268,11 +531,32 @@ class SmartEVChargingCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             if self._debug_logging:
                 _LOGGER.debug("Koordinator: Interna ID:n OK.")
             return True
-        except Exception as e:
-            _LOGGER.error("Fel i _resolve_internal_entities: %s", e, exc_info=True)
+        except Exception:
+            _LOGGER.exception("Fel i _resolve_internal_entities")
             self._internal_entities_resolved = False
             return False
 
+    @callback
+    def async_start(self) -> None:
+        """Startar säkringsskyddet, solfönstren och händelsestyrd uppdatering."""
+        self._setup_main_fuse_guard()
+        self._setup_solar_window_feed()
+        if not self._event_driven_updates:
+            _LOGGER.info(
+                "Händelsestyrd uppdatering är avstängd, förlitar sig på intervallet %s.",
+                self.update_interval,
+            )
+            return
+        self._listeners_started = True
+        price_sensor_id = self.config.get(CONF_PRICE_SENSOR)
+        if price_sensor_id and (price_state := self.hass.states.get(price_sensor_id)):
+            # Dödbandet räknas från det aktuella priset redan innan första
+            # beslutscykeln har läst det.
+            self._price_deadband.reference = self._spot_price_from_state(
+                price_sensor_id, price_state
+            )
+        self._setup_listeners()
+
     def _setup_listeners(self) -> None:
         if self._debug_logging:
             _LOGGER.debug("Sätter upp lyssnare...")
@@ -282,36 +566,261 @@ class SmartEVChargingCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             self.config.get(CONF_PRICE_SENSOR),
             self.config.get(CONF_TIME_SCHEDULE_ENTITY),
             self.config.get(CONF_HOUSE_POWER_SENSOR),
+            # Laddarens effektsensor lyssnas inte på, den ändras av våra egna kommandon.
+            self.config.get(CONF_GRID_POWER_SENSOR),
             self.config.get(CONF_SOLAR_PRODUCTION_SENSOR),
             self.config.get(CONF_SOLAR_SCHEDULE_ENTITY),
             self.config.get(CONF_CHARGER_MAX_CURRENT_LIMIT_SENSOR),
             self.config.get(CONF_CHARGER_DYNAMIC_CURRENT_SENSOR),
             self.config.get(CONF_CHARGER_ENABLED_SWITCH_ID),
             self.config.get(CONF_EV_SOC_SENSOR),
+            # Skymningen väcker koordinatorn så att solenergiutvärderingen vilar direkt.
+            SUN_ENTITY_ID if self._suspend_solar_at_night else None,
         ]
-        all_entities_to_listen = [
-            entity_id for entity_id in external_entities if entity_id
+        # Även integrationens egna entiteter (brytare och nummer) ska väcka
+        # koordinatorn, så att ett långt intervall aldrig fördröjer en ändring.
+        internal_entities = [
+            self.smart_enable_switch_entity_id,
+            self.max_price_entity_id,
+            self.solar_enable_switch_entity_id,
+            self.solar_buffer_entity_id,
+            self.min_solar_charge_current_entity_id,
         ]
+        all_entities_to_listen = list(
+            dict.fromkeys(
+                entity_id
+                for entity_id in external_entities + internal_entities
+                if entity_id
+            )
+        )
         if all_entities_to_listen:
             if self._debug_logging:
                 _LOGGER.debug(
                     "Lyssnar på tillståndsförändringar för externa entiteter: %s",
                     all_entities_to_listen,
                 )
-            self.listeners.append(
-                async_track_state_change_event(
-                    self.hass,
-                    all_entities_to_listen,
-                    self._handle_external_state_change,
+            # Prenumerationen delas med andra entries som lyssnar på samma entitet.
+            for entity_id in all_entities_to_listen:
+                self.listeners.append(
+                    self._input_hub.async_subscribe(
+                        entity_id, self._handle_external_state_change
+                    )
                 )
-            )
         else:
             _LOGGER.info("Inga externa entiteter konfigurerade för lyssning.")
 
+    def _setup_main_fuse_guard(self) -> None:
+        """Lyssnar på fasströmmarna om huvudsäkringen och fassensorer är konfigurerade.
+
+        Lyssnarna hålls separat från övriga lyssnare, så att skyddet är aktivt
+        även utan händelsestyrd uppdatering.
+        """
+        if self._main_fuse_current_a <= 0 or not self._phase_current_sensors:
+            return
+        _LOGGER.info(
+            "Skydd av huvudsäkringen (%.0fA, marginal %.1fA) aktivt för %s.",
+            self._main_fuse_current_a,
+            self._main_fuse_margin_a,
+            self._phase_current_sensors,
+        )
+        self._main_fuse_limit_a = self._main_fuse_limit_from_states(
+            self._main_fuse_charger_current_a(dt_util.utcnow())
+        )
+        for entity_id in self._phase_current_sensors:
+            self._main_fuse_listeners.append(
+                self._input_hub.async_subscribe(
+                    entity_id, self._handle_phase_current_change
+                )
+            )
+
+    def _setup_solar_window_feed(self) -> None:
+        """Matar solöverskottets fönster från effektsensorernas händelser.
+
+        Fönstren ska spegla överskottet mellan beslutscyklerna och inte bara
+        ett värde per cykel. Lyssnarna hålls separat från övriga lyssnare, så
+        att fönstren matas även utan händelsestyrd uppdatering.
+        """
+        if not self._solar_windows:
+            return
+        entity_ids = [
+            self.config.get(CONF_SOLAR_PRODUCTION_SENSOR),
+            self.config.get(CONF_HOUSE_POWER_SENSOR)
+            if self._net_surplus_from_house_power
+            else None,
+            self.config.get(CONF_GRID_POWER_SENSOR),
+            self.config.get(CONF_CHARGER_POWER_SENSOR),
+        ]
+        for entity_id in dict.fromkeys(filter(None, entity_ids)):
+            self._solar_window_listeners.append(
+                self._input_hub.async_subscribe(
+                    entity_id, self._handle_solar_signal_change
+                )
+            )
+
+    @callback
+    def _handle_solar_signal_change(self, event: Event) -> None:
+        """Lägger det aktuella solöverskottet i fönstren när en effekt ändras."""
+        now = dt_util.utcnow()
+        suspended_until = self._solar_suspended_until
+        if suspended_until is not None and now < suspended_until:
+            return
+        self._add_solar_surplus_sample(self._solar_surplus_from_states(), now)
+
+    def _solar_surplus_from_states(self) -> float:
+        """Nettoöverskottet av sol (W) utifrån de aktuella tillstånden."""
+        config = self.config
+        get_state = self.hass.states.get
+
+        def _power(entity_id: str | None) -> float | None:
+            return (
+                self._power_from_state(entity_id, get_state(entity_id))
+                if entity_id
+                else None
+            )
+
+        house_sensor_id = (
+            config.get(CONF_HOUSE_POWER_SENSOR)
+            if self._net_surplus_from_house_power
+            else None
+        )
+        grid_sensor_id = config.get(CONF_GRID_POWER_SENSOR)
+        charger_power_w = None
+        if house_sensor_id or grid_sensor_id:
+            charger_power_sensor_id = config.get(CONF_CHARGER_POWER_SENSOR)
+            status_sensor_id = config.get(CONF_STATUS_SENSOR)
+            if charger_power_sensor_id:
+                charger_power_w = _power(charger_power_sensor_id)
+            elif (
+                status_sensor_id
+                and self._status_from_state(get_state(status_sensor_id))
+                == EASEE_STATUS_CHARGING
+            ):
+                charger_power_w = self._estimated_charger_power_w()
+        return net_solar_surplus_w(
+            _power(config.get(CONF_SOLAR_PRODUCTION_SENSOR)) or 0.0,
+            _power(house_sensor_id),
+            _power(grid_sensor_id),
+            charger_power_w,
+        )
+
+    def _add_solar_surplus_sample(self, surplus_w: float, now: datetime) -> None:
+        """Lägger ett värde i solfönstren, högst en gång per sampelintervall.
+
+        Fönstren är dimensionerade för den takten. Tätare värden skulle tränga
+        ut de äldsta och korta av fönstret.
+        """
+        if self._solar_window_fed_at is not None and (
+            now - self._solar_window_fed_at
+        ) < timedelta(seconds=1 / SIGNAL_WINDOW_MAX_RATE_HZ):
+            return
+        self._solar_window_fed_at = now
+        for window in self._solar_windows:
+            window.add(surplus_w, now)
+
+    def _main_fuse_charger_current_a(self, now: datetime) -> float:
+        """Laddarens uppmätta andel av fasströmmarna.
+
+        Strömmen räknas fram från laddarens effektsensor. Utan den används
+        laddarens rapporterade dynamiska strömgräns, som laddaren inte drar
+        mer än. Den senast skickade gränsen används inte, eftersom bilen ofta
+        drar mindre. Okänd ström räknas som 0 A, vilket ger den försiktigaste
+        gränsen. Strax efter en snabbsänkning visar elmätaren ännu den
+        tidigare strömmen, som då används i stället.
+        """
+        get_state = self.hass.states.get
+        if (
+            self._status_from_state(get_state(self.config.get(CONF_STATUS_SENSOR)))
+            != EASEE_STATUS_CHARGING
+        ):
+            return 0.0
+        charger_current_a: float | None = None
+        power_sensor_id = self.config.get(CONF_CHARGER_POWER_SENSOR)
+        if power_sensor_id:
+            power_w = self._power_from_state(power_sensor_id, get_state(power_sensor_id))
+            if power_w is not None:
+                charger_current_a = max(power_w, 0.0) / (
+                    self._charger_phases * VOLTAGE_PHASE_NEUTRAL
+                )
+        if charger_current_a is None:
+            charger_current_a = self._charger_dynamic_limit_from_state()
+        charger_current_a = charger_current_a or 0.0
+        if self._main_fuse_reduced_from is not None:
+            reduced_from_a, reduced_at = self._main_fuse_reduced_from
+            if now - reduced_at < timedelta(seconds=MAIN_FUSE_SETTLE_SECONDS):
+                charger_current_a = max(charger_current_a, reduced_from_a)
+        return charger_current_a
+
+    def _charger_dynamic_limit_from_state(self) -> float | None:
+        """Laddarens rapporterade dynamiska strömgräns, None om den är okänd."""
+        sensor_id = self.config.get(CONF_CHARGER_DYNAMIC_CURRENT_SENSOR)
+        if not sensor_id:
+            return None
+        return self._number_from_state(
+            sensor_id, self.hass.states.get(sensor_id), resolver=resolve_current_unit
+        )
+
+    def _main_fuse_limit_from_states(self, charger_current_a: float) -> float | None:
+        """Högsta tillåtna laddström utifrån fasströmmarna just nu."""
+        get_state = self.hass.states.get
+        return main_fuse_limit_a(
+            (
+                self._number_from_state(
+                    entity_id, get_state(entity_id), resolver=resolve_current_unit
+                )
+                if entity_id
+                else None
+                for entity_id in self._phase_current_sensor_slots
+            ),
+            charger_current_a,
+            self._main_fuse_current_a,
+            self._main_fuse_margin_a,
+            self._charger_phases,
+        )
+
+    @callback
+    def _handle_phase_current_change(self, event: Event) -> None:
+        """Sänker laddströmmen direkt när en fas närmar sig huvudsäkringen.
+
+        Beslutscykeln körs inte. Den tar hänsyn till gränsen i nästa cykel
+        och väcks när det åter finns utrymme efter en begränsning.
+        """
+        now = dt_util.utcnow()
+        charger_current_a = self._main_fuse_charger_current_a(now)
+        limit_a = self._main_fuse_limit_from_states(charger_current_a)
+        self._main_fuse_limit_a = limit_a
+        if limit_a is None:
+            return
+        # Gränsen laddaren har just nu. Har den här instansen inte skickat
+        # någon används laddarens rapporterade gräns, och saknas även den
+        # den uppmätta strömmen.
+        allowed_now_a = self._command_cache.last_sent_current(
+            str(self.config.get(CONF_CHARGER_DEVICE))
+        )
+        if allowed_now_a is None:
+            allowed_now_a = self._charger_dynamic_limit_from_state()
+        if allowed_now_a is None:
+            allowed_now_a = charger_current_a
+        if (
+            (self.should_charge_flag or charger_current_a > 0)
+            and allowed_now_a > limit_a
+            and (
+                self._main_fuse_applied_a is None
+                or limit_a < self._main_fuse_applied_a
+            )
+        ):
+            self._main_fuse_applied_a = limit_a
+            self._main_fuse_reduced_from = (charger_current_a, now)
+            self.hass.async_create_task(self._async_limit_to_main_fuse(limit_a))
+        elif (
+            self._main_fuse_applied_a is not None
+            and limit_a >= self._main_fuse_applied_a + 1
+        ):
+            # Lasten har minskat. Låt beslutscykeln höja strömmen igen.
+            self._event_refresh_debouncer.async_schedule_call()
+
     def _remove_listeners(self) -> None:
-        if self.listeners:
-            if self._debug_logging:
-                _LOGGER.debug("Tar bort %s lyssnare.", len(self.listeners))
+        if self.listeners and self._debug_logging:
+            _LOGGER.debug("Tar bort %s lyssnare.", len(self.listeners))
         while self.listeners:
             unsub = self.listeners.pop()
             unsub()
@@ -327,116 +836,494 @@ class SmartEVChargingCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             CONF_STATUS_SENSOR
         ):
             return
+        if (
+            self._solar_suspended_until is not None
+            and entity_id == self.config.get(CONF_SOLAR_PRODUCTION_SENSOR)
+        ):
+            # Solproduktionen utvärderas inte under natten.
+            return
+        power_signal = self._power_signals.get(entity_id)
+        if power_signal is not None:
+            power_w = self._power_from_state(entity_id, new_state_obj)
+            if power_w is not None and not power_signal.add(
+                power_w, dt_util.utcnow()
+            ):
+                return
+            if self._debug_logging:
+                _LOGGER.debug(
+                    "Effekt från %s: %s W (fönster: medel %s W, max %s W). Begär refresh.",
+                    entity_id,
+                    power_w,
+                    power_signal.last_mean,
+                    power_signal.last_max,
+                )
+            self._event_refresh_debouncer.async_schedule_call()
+            return
+        if entity_id == self.config.get(CONF_PRICE_SENSOR):
+            price = self._spot_price_from_state(entity_id, new_state_obj)
+            if price is not None and not self._price_deadband.accept(price):
+                if self._debug_logging:
+                    _LOGGER.debug(
+                        "Elpriset %s ligger inom dödbandet kring %s. Ingen refresh.",
+                        price,
+                        self._price_deadband.reference,
+                    )
+                return
         _LOGGER.info(
             "Tillståndsförändring detekterad för %s: Gammalt=%s, Nytt=%s. Begär refresh.",
             entity_id,
             old_state_val,
             new_state_val,
         )
-        self.hass.async_create_task(self.async_request_refresh())
+        self._event_refresh_debouncer.async_schedule_call()
 
-    async def _get_number_value(
+    def _number_from_state(
         self,
-        entity_id_or_key: str | None,
+        entity_id: str | None,
+        state_obj: State | None,
         default_value: float | None = None,
-        is_config_key: bool = True,
+        resolver: UnitResolver = resolve_number_unit,
     ) -> float | None:
-        entity_id_to_check = entity_id_or_key
-        if is_config_key:
-            if not entity_id_or_key:
-                if self._debug_logging:
-                    _LOGGER.debug(
-                        "Konfigurationsnyckel (som var None) för nummer är inte satt."
-                    )
-                return default_value
-            entity_id_to_check = self.config.get(str(entity_id_or_key))
-
-        if not entity_id_to_check:
-            if is_config_key:
-                if self._debug_logging:
-                    _LOGGER.debug(
-                        "Konfigurationsnyckel %s för nummer är inte satt (resulterade i tomt entitets-ID).",
-                        entity_id_or_key,
-                    )
-            else:
-                if self._debug_logging:
-                    _LOGGER.debug(
-                        "Entitets-ID för nummer är inte satt (var None/tomt)."
-                    )
+        """Tolkar ett numeriskt tillstånd, eller returnerar default_value."""
+        if not entity_id:
+            if self._debug_logging:
+                _LOGGER.debug("Entitets-ID för nummer är inte satt (var None/tomt).")
             return default_value
-
-        state_obj = self.hass.states.get(str(entity_id_to_check))
         if state_obj is None or state_obj.state in [STATE_UNAVAILABLE, STATE_UNKNOWN]:
             _LOGGER.warning(
                 "Entitet %s är otillgänglig eller har okänt tillstånd.",
-                entity_id_to_check,
+                entity_id,
             )
             return default_value
-        try:
-            return float(state_obj.state)
-        except (ValueError, TypeError):
-            _LOGGER.warning(
-                "Kunde inte konvertera värde '%s' från %s till float.",
-                state_obj.state,
-                entity_id_to_check,
-            )
+        value, cached = self._value_cache.lookup(entity_id, state_obj, resolver)
+        if value is None:
+            if not cached:
+                _LOGGER.warning(
+                    "Kunde inte konvertera värde '%s' från %s till float.",
+                    state_obj.state,
+                    entity_id,
+                )
             return default_value
+        return value
 
-    async def _get_spot_price_in_kr(self) -> float | None:
-        entity_id = self.config.get(CONF_PRICE_SENSOR)
+    def _spot_price_from_state(
+        self, entity_id: str | None, state_obj: State | None
+    ) -> float | None:
+        """Tolkar elprissensorns tillstånd till kr/kWh."""
         if not entity_id:
             return None
-        state_obj = self.hass.states.get(str(entity_id))
         if state_obj is None or state_obj.state in [STATE_UNAVAILABLE, STATE_UNKNOWN]:
             _LOGGER.warning("Elprissensor %s är otillgänglig.", entity_id)
             return None
-        try:
-            price = float(state_obj.state)
-            unit = str(state_obj.attributes.get("unit_of_measurement", "")).lower()
-            if "öre" in unit or "/100kwh" in unit:
-                price /= 100
-            elif "mwh" in unit:
-                price /= 1000
-            return price
-        except (ValueError, TypeError):
+        price, cached = self._value_cache.lookup(
+            entity_id, state_obj, resolve_price_unit
+        )
+        if price is None and not cached:
             _LOGGER.warning(
                 "Kunde inte konvertera elprisvärde '%s' från %s.",
                 state_obj.state,
                 entity_id,
             )
-            return None
+        return price
 
-    async def _get_power_value(self, entity_id_key: str) -> float | None:
-        entity_id = self.config.get(entity_id_key)
+    def _power_from_state(
+        self, entity_id: str | None, state_obj: State | None
+    ) -> float | None:
+        """Tolkar en effektsensors tillstånd till Watt."""
         if not entity_id:
             return None
-        state_obj = self.hass.states.get(str(entity_id))
         if state_obj is None or state_obj.state in [STATE_UNAVAILABLE, STATE_UNKNOWN]:
             if self._debug_logging:
-                _LOGGER.debug(
-                    "Effektsensor %s (%s) otillgänglig.", entity_id_key, entity_id
-                )
+                _LOGGER.debug("Effektsensor %s otillgänglig.", entity_id)
             return None
-        try:
-            val = float(state_obj.state)
-            unit = cast(
-                str, state_obj.attributes.get("unit_of_measurement", "")
-            ).lower()
-            if unit in (UnitOfPower.KILO_WATT, "kw"):
-                return val * 1000.0
-            if unit in (UnitOfPower.WATT, "w"):
-                return val
-            _LOGGER.warning(
-                "Okänd enhet ('%s') för effektsensor %s. Antar Watt.", unit, entity_id
-            )
-            return val
-        except (ValueError, TypeError):
+        power, cached = self._value_cache.lookup(
+            entity_id, state_obj, resolve_power_unit
+        )
+        if power is None and not cached:
             _LOGGER.warning(
                 "Kunde inte konvertera effektvärde '%s' från %s.",
                 state_obj.state,
                 entity_id,
             )
+        return power
+
+    @staticmethod
+    def _status_from_state(state_obj: State | None) -> str:
+        """Returnerar laddarstatus i gemener, eller STATE_UNKNOWN."""
+        if state_obj is not None and isinstance(state_obj.state, str):
+            return state_obj.state.lower()
+        return STATE_UNKNOWN
+
+    def _build_input_snapshot(self) -> InputSnapshot:
+        """Läser alla konfigurerade entiteter en gång och bygger cykelns indata."""
+        config = self.config
+        get_state = self.hass.states.get
+
+        status_sensor_id = config.get(CONF_STATUS_SENSOR)
+        main_switch_id = config.get(CONF_CHARGER_ENABLED_SWITCH_ID)
+        price_sensor_id = config.get(CONF_PRICE_SENSOR)
+        time_schedule_id = config.get(CONF_TIME_SCHEDULE_ENTITY)
+        solar_schedule_id = config.get(CONF_SOLAR_SCHEDULE_ENTITY)
+        solar_sensor_id = config.get(CONF_SOLAR_PRODUCTION_SENSOR)
+        hw_max_sensor_id = config.get(CONF_CHARGER_MAX_CURRENT_LIMIT_SENSOR)
+        dyn_current_sensor_id = config.get(CONF_CHARGER_DYNAMIC_CURRENT_SENSOR)
+        soc_sensor_id = config.get(CONF_EV_SOC_SENSOR)
+
+        timestamp = dt_util.utcnow()
+        solar_suspended_until = self._solar_suspended_until_from(get_state, timestamp)
+        # Nätets och husets effekt behövs bara för solöverskottet.
+        house_sensor_id = grid_sensor_id = charger_power_sensor_id = None
+        if solar_suspended_until is None:
+            if self._net_surplus_from_house_power:
+                house_sensor_id = config.get(CONF_HOUSE_POWER_SENSOR)
+            grid_sensor_id = config.get(CONF_GRID_POWER_SENSOR)
+            if house_sensor_id or grid_sensor_id:
+                charger_power_sensor_id = config.get(CONF_CHARGER_POWER_SENSOR)
+
+        # Ett enda pass över alla entitets-ID:n. Varje tillstånd läses exakt en gång.
+        # Solproduktionen läses inte alls när solenergiutvärderingen vilar.
+        states: dict[str, State | None] = {
+            entity_id: get_state(entity_id)
+            for entity_id in (
+                status_sensor_id,
+                main_switch_id,
+                price_sensor_id,
+                time_schedule_id,
+                solar_schedule_id,
+                solar_sensor_id if solar_suspended_until is None else None,
+                house_sensor_id,
+                grid_sensor_id,
+                charger_power_sensor_id,
+                hw_max_sensor_id,
+                dyn_current_sensor_id,
+                soc_sensor_id,
+                self.smart_enable_switch_entity_id,
+                self.solar_enable_switch_entity_id,
+                self.max_price_entity_id,
+                self.min_solar_charge_current_entity_id,
+                self.solar_buffer_entity_id,
+            )
+            if entity_id
+        }
+        self._instrumentation.state_reads += len(states)
+
+        def _state(entity_id: str | None) -> State | None:
+            return states.get(entity_id) if entity_id else None
+
+        def _is_on(entity_id: str | None) -> bool:
+            state_obj = _state(entity_id)
+            return state_obj is not None and state_obj.state == STATE_ON
+
+        main_switch_state_obj = _state(main_switch_id)
+
+        # Om ingen maxpris-entitet kan läsas används 999.0 (laddning tillåts prismässigt).
+        max_accepted_price_kr = (
+            self._number_from_state(
+                self.max_price_entity_id, _state(self.max_price_entity_id), 999.0
+            )
+            or 999.0
+        )
+
+        charger_hw_max_amps: float = MAX_CHARGE_CURRENT_A_HW_DEFAULT
+        if hw_max_sensor_id:
+            val_from_sensor = self._number_from_state(
+                hw_max_sensor_id,
+                _state(hw_max_sensor_id),
+                MAX_CHARGE_CURRENT_A_HW_DEFAULT,
+                resolve_current_unit,
+            )
+            if val_from_sensor is not None:
+                charger_hw_max_amps = val_from_sensor
+
+        target_soc_limit_config = config.get(CONF_TARGET_SOC_LIMIT)
+        min_solar_current = self._number_from_state(
+            self.min_solar_charge_current_entity_id,
+            _state(self.min_solar_charge_current_entity_id),
+            resolver=resolve_current_unit,
+        )
+        solar_buffer = self._number_from_state(
+            self.solar_buffer_entity_id, _state(self.solar_buffer_entity_id)
+        )
+        current_soc_percent = (
+            self._number_from_state(soc_sensor_id, _state(soc_sensor_id))
+            if soc_sensor_id
+            else None
+        )
+        target_soc_limit = (
+            float(target_soc_limit_config)
+            if target_soc_limit_config is not None
+            else None
+        )
+        price_state = _state(price_sensor_id)
+        charger_status = self._status_from_state(_state(status_sensor_id))
+        charger_power_w = None
+        if charger_power_sensor_id:
+            charger_power_w = self._power_from_state(
+                charger_power_sensor_id, _state(charger_power_sensor_id)
+            )
+        elif (house_sensor_id or grid_sensor_id) and (
+            charger_status == EASEE_STATUS_CHARGING
+        ):
+            # Utan effektsensor uppskattas laddarens egen förbrukning.
+            charger_power_w = self._estimated_charger_power_w()
+        time_schedule_state = _state(time_schedule_id)
+        solar_schedule_state = _state(solar_schedule_id)
+        solar_production_w = (
+            self._power_from_state(solar_sensor_id, _state(solar_sensor_id)) or 0.0
+        )
+        house_power_w = self._power_from_state(house_sensor_id, _state(house_sensor_id))
+        grid_power_w = self._power_from_state(grid_sensor_id, _state(grid_sensor_id))
+        solar_surplus_average_w = solar_surplus_minimum_w = None
+        solar_surplus_maximum_w = None
+        solar_start_window_filled = True
+        if solar_suspended_until is not None:
+            # Nattens nollvärden ska inte påverka morgonens fönster.
+            for window in self._solar_windows:
+                window.clear()
+        elif self._solar_windows:
+            # Fönstren matas främst av händelser. Cykelns eget värde läggs till
+            # så att de hålls aktuella även när sensorerna inte ändras.
+            self._add_solar_surplus_sample(
+                net_solar_surplus_w(
+                    solar_production_w, house_power_w, grid_power_w, charger_power_w
+                ),
+                timestamp,
+            )
+            for window in self._solar_windows:
+                window.expire(timestamp)
+            if self._solar_average_window is not None:
+                solar_surplus_average_w = self._solar_average_window.mean()
+            if self._solar_start_window is not None:
+                solar_surplus_minimum_w = self._solar_start_window.minimum()
+                solar_start_window_filled = self._solar_start_window.is_filled(
+                    timestamp
+                )
+            if self._solar_stop_window is not None:
+                solar_surplus_maximum_w = self._solar_stop_window.maximum()
+
+        current_price_kr = self._spot_price_from_state(price_sensor_id, price_state)
+        if current_price_kr is not None:
+            # Dödbandet räknas från det pris som senaste beslutet byggde på.
+            self._price_deadband.reference = current_price_kr
+
+        return InputSnapshot(
+            timestamp=timestamp,
+            charger_status=charger_status,
+            main_switch_state=main_switch_state_obj.state
+            if main_switch_state_obj
+            else None,
+            # Om ingen strömbrytare är konfigurerad antas den vara PÅ.
+            charger_main_switch_on=main_switch_state_obj.state == STATE_ON
+            if main_switch_state_obj
+            else True,
+            smart_charging_enabled=_is_on(self.smart_enable_switch_entity_id),
+            solar_charging_enabled=_is_on(self.solar_enable_switch_entity_id),
+            current_price_kr=current_price_kr,
+            max_accepted_price_kr=max_accepted_price_kr,
+            # Om inget schema är konfigurerat antas det vara aktivt.
+            time_schedule_active=_is_on(time_schedule_id) if time_schedule_id else True,
+            solar_schedule_active=_is_on(solar_schedule_id)
+            if solar_schedule_id
+            else True,
+            solar_production_w=solar_production_w,
+            house_power_w=house_power_w,
+            grid_power_w=grid_power_w,
+            charger_power_w=charger_power_w,
+            solar_surplus_average_w=solar_surplus_average_w,
+            solar_surplus_minimum_w=solar_surplus_minimum_w,
+            solar_surplus_maximum_w=solar_surplus_maximum_w,
+            solar_start_window_filled=solar_start_window_filled,
+            charger_hw_max_amps=charger_hw_max_amps,
+            dynamic_current_limit_a=self._number_from_state(
+                dyn_current_sensor_id,
+                _state(dyn_current_sensor_id),
+                resolver=resolve_current_unit,
+            )
+            if dyn_current_sensor_id
+            else None,
+            current_soc_percent=current_soc_percent,
+            target_soc_limit=target_soc_limit,
+            min_solar_charge_current_a=min_solar_current
+            if min_solar_current is not None
+            else MIN_CHARGE_CURRENT_A,
+            solar_buffer_w=solar_buffer if solar_buffer is not None else POWER_MARGIN_W,
+            next_time_edge=next_time_edge(
+                timestamp,
+                (
+                    next_price_boundary(self._price_slots(price_state), timestamp),
+                    schedule_next_event(time_schedule_state.attributes)
+                    if time_schedule_state
+                    else None,
+                    schedule_next_event(solar_schedule_state.attributes)
+                    if solar_schedule_state
+                    else None,
+                    # Väcker solenergiutvärderingen igen vid soluppgång.
+                    solar_suspended_until,
+                ),
+            ),
+            solar_suspended_until=solar_suspended_until,
+            planned_slot_active=self._planned_slot_active(
+                price_state,
+                current_soc_percent,
+                target_soc_limit,
+                charger_hw_max_amps,
+                timestamp,
+            ),
+        )
+
+    def _estimated_charger_power_w(self) -> float | None:
+        """Laddarens effekt uppskattad från senast skickade strömgräns."""
+        current_a = self._command_cache.last_sent_current(
+            str(self.config.get(CONF_CHARGER_DEVICE))
+        )
+        if current_a is None:
+            return None
+        return current_a * self._charger_phases * VOLTAGE_PHASE_NEUTRAL
+
+    def _solar_suspended_until_from(
+        self, get_state: Callable[[str], State | None], now: datetime
+    ) -> datetime | None:
+        """Nästa soluppgång om solenergiutvärderingen ska vila (natt), annars None.
+
+        Solentiteten (sun.sun) används när den finns. Annars beräknas
+        soluppgången utifrån Home Assistants position.
+        """
+        if not self._suspend_solar_at_night:
+            return None
+        # Natten är redan känd, soluppgången ändras inte under natten.
+        if self._solar_suspended_until is not None and now < self._solar_suspended_until:
+            return self._solar_suspended_until
+        sun_state = get_state(SUN_ENTITY_ID)
+        self._instrumentation.state_reads += 1
+        if sun_state is not None:
+            if sun_state.state == STATE_ABOVE_HORIZON:
+                return None
+            if sun_state.state == STATE_BELOW_HORIZON:
+                sunrise = attribute_datetime(sun_state.attributes, ATTR_NEXT_RISING)
+                if sunrise is not None and sunrise > now:
+                    return sunrise
+        if is_up(self.hass, now):
+            return None
+        return get_astral_event_next(self.hass, SUN_EVENT_SUNRISE, now)
+
+    def _charge_deadline(self, now: datetime) -> datetime:
+        """Nästa tillfälle då klockan (lokal tid) når den konfigurerade deadline-timmen."""
+        deadline = dt_util.as_local(now).replace(
+            hour=self._charge_deadline_hour, minute=0, second=0, microsecond=0
+        )
+        if deadline <= now:
+            deadline += timedelta(days=1)
+        return deadline
+
+    def _price_slots(self, price_state: State | None) -> list[PriceSlot]:
+        """Prisprognosen ur prissensorns attribut. Tolkas bara när den ändras."""
+        if price_state is None:
+            return []
+        forecast = tuple(
+            price_state.attributes.get(attribute) for attribute in FORECAST_ATTRIBUTES
+        )
+        if forecast != self._price_forecast:
+            self._price_forecast = forecast
+            self._price_slots_cache = parse_price_slots(price_state.attributes)
+        return self._price_slots_cache
+
+    def _planned_slot_active(
+        self,
+        price_state: State | None,
+        current_soc_percent: float | None,
+        target_soc_limit: float | None,
+        charger_hw_max_amps: float,
+        now: datetime,
+    ) -> bool | None:
+        """Är nu en planerad billig period? None om ingen plan kan göras.
+
+        Planen beräknas om bara när prognosen, SoC, SoC-gränsen, deadline
+        eller laddeffekten ändras. Annars återanvänds den cachade planen.
+        """
+        if (
+            self._battery_capacity_kwh <= 0
+            or price_state is None
+            or current_soc_percent is None
+            or target_soc_limit is None
+        ):
+            self._charge_plan = None
+            return None
+
+        slots = self._price_slots(price_state)
+        if not slots:
+            self._charge_plan = None
+            self._charge_plan_key = None
             return None
+        deadline = self._charge_deadline(now)
+        charge_power_kw = (
+            charger_hw_max_amps * self._charger_phases * VOLTAGE_PHASE_NEUTRAL / 1000
+        )
+        plan_key = (
+            slots,
+            current_soc_percent,
+            target_soc_limit,
+            deadline,
+            charge_power_kw,
+        )
+        if self._charge_plan is None or plan_key != self._charge_plan_key:
+            self._charge_plan = plan_cheapest_slots(
+                slots,
+                now,
+                deadline,
+                required_energy_kwh(
+                    current_soc_percent, target_soc_limit, self._battery_capacity_kwh
+                ),
+                charge_power_kw,
+            )
+            self._charge_plan_key = plan_key
+            if self._debug_logging:
+                _LOGGER.debug(
+                    "Ny laddplan: %.1f kWh före %s i %s perioder (täcker behovet: %s).",
+                    self._charge_plan.energy_kwh,
+                    deadline,
+                    len(self._charge_plan.slots),
+                    self._charge_plan.covers_need,
+                )
+        return self._charge_plan.is_active(now)
+
+    async def _async_confirm_main_switch_on(
+        self, switch_entity_id: str, status_sensor_id: str | None
+    ) -> None:
+        """Väntar på att huvudströmbrytaren är PÅ och att laddaren rapporterar status.
+
+        Båda väntningarna delar på samma tidsbudget. Löper tiden ut fortsätter
+        styrningen med den status som då finns.
+        """
+        deadline = self.hass.loop.time() + STATE_CONFIRM_TIMEOUT_SECONDS
+        if (
+            await async_wait_for_state(
+                self.hass, switch_entity_id, STATE_ON, STATE_CONFIRM_TIMEOUT_SECONDS
+            )
+            is None
+        ):
+            _LOGGER.warning(
+                "Huvudströmbrytare %s bekräftades inte PÅ inom %.0f sekunder.",
+                switch_entity_id,
+                STATE_CONFIRM_TIMEOUT_SECONDS,
+            )
+            return
+        if status_sensor_id is None:
+            return
+        remaining = max(0.0, deadline - self.hass.loop.time())
+        if (
+            await async_wait_for_state(
+                self.hass,
+                status_sensor_id,
+                lambda state_obj: self._status_from_state(state_obj)
+                not in (EASEE_STATUS_OFFLINE, STATE_UNKNOWN, STATE_UNAVAILABLE),
+                remaining,
+            )
+            is None
+        ):
+            _LOGGER.warning(
+                "Laddaren rapporterade ingen giltig status inom %.0f sekunder efter att huvudströmbrytaren slagits PÅ.",
+                STATE_CONFIRM_TIMEOUT_SECONDS,
+            )
 
     def _reset_session_data(self, reason: str = "Okänd") -> None:
         _LOGGER.info("Återställer sessionsdata. Anledning: %s", reason)
@@ -444,15 +1331,20 @@ class SmartEVChargingCoordinator(DataUpdateCoordinator[dict[str, Any]]):
 
     # Definierar en asynkron metod (coroutine) som heter _control_charger.
     # Denna metod är en del av en klass (indikerat av 'self').
-    # Den tar emot tre argument utöver 'self':
+    # Den tar emot fyra argument utöver 'self':
+    #   snapshot: Cykelns ögonblicksbild av alla indata (samma som beslutet fattades på).
     #   should_charge: En boolean som indikerar om laddning ska ske eller inte.
     #   current_a: En float som representerar önskad laddström i Ampere.
     #   reason: En sträng som beskriver anledningen till det nuvarande laddningsbeslutet.
     # Metoden returnerar ingenting (None).
     async def _control_charger(
-        self, should_charge: bool, current_a: float, reason: str
+        self,
+        snapshot: InputSnapshot,
+        should_charge: bool,
+        current_a: float,
+        reason: Reason,
     ) -> None:
-        if not self.charger_main_switch_state:
+        if not snapshot.charger_main_switch_on:
             _LOGGER.info(
                 "Huvudströmbrytare är AV. Inga kommandon skickas till laddaren. (Ursprunglig anledning för åtgärd: '%s')",
                 reason,
@@ -464,57 +1356,18 @@ class SmartEVChargingCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         # Hämtar entity_id för huvudströmbrytaren från integrationens konfiguration.
         # CONF_CHARGER_ENABLED_SWITCH_ID är en konstant som innehåller nyckeln för detta värde.
         charger_master_switch_id = self.config.get(CONF_CHARGER_ENABLED_SWITCH_ID)
-        # Hämtar entity_id för laddarens statussensor från konfigurationen.
-        status_sensor_id = self.config.get(CONF_STATUS_SENSOR)
-        # Hämtar det aktuella tillståndsobjektet för statussensorn från Home Assistant.
-        # Om status_sensor_id inte är satt (None), blir charger_status_state också None.
-        charger_status_state = (
-            self.hass.states.get(str(status_sensor_id)) if status_sensor_id else None
-        )
-        # Extraherar det faktiska tillståndet (som en sträng) från tillståndsobjektet.
-        # Konverterar till gemener för enklare jämförelser.
-        # Om inget giltigt tillstånd finns, sätts charger_status till STATE_UNKNOWN (en konstant, oftast "unknown").
-        charger_status = (
-            charger_status_state.state.lower()
-            if charger_status_state and isinstance(charger_status_state.state, str)
-            else STATE_UNKNOWN
-        )
-
-        # Hämtar entity_id för sensorn som anger laddarens maximala hårdvarubegränsning för ström.
-        charger_hw_max_amps_entity_id = self.config.get(
-            CONF_CHARGER_MAX_CURRENT_LIMIT_SENSOR
-        )
-        # Sätter ett standardvärde för maximal hårdvaruström.
-        # MAX_CHARGE_CURRENT_A_HW_DEFAULT är en konstant, t.ex. 16A.
-        _charger_hw_max_amps = MAX_CHARGE_CURRENT_A_HW_DEFAULT
-        # Om en sensor för hårdvarumaximum är konfigurerad:
-        if charger_hw_max_amps_entity_id:
-            # Anropar en hjälpmetod (_get_number_value) för att hämta det numeriska värdet från sensorn.
-            # is_config_key=False indikerar att charger_hw_max_amps_entity_id redan är ett entity_id.
-            val_from_sensor = await self._get_number_value(
-                charger_hw_max_amps_entity_id,
-                default_value=MAX_CHARGE_CURRENT_A_HW_DEFAULT,  # Fallback-värde om sensorn inte ger ett giltigt nummer.
-                is_config_key=False,
-            )
-            # Om ett giltigt värde hämtades från sensorn:
-            if val_from_sensor is not None:
-                # Uppdatera _charger_hw_max_amps med sensorvärdet.
-                _charger_hw_max_amps = val_from_sensor
-
-        # Säkerställer att den önskade laddströmmen (current_a) är inom tillåtna gränser:
-        # Inte lägre än MIN_CHARGE_CURRENT_A (en konstant, t.ex. 6A).
+        charger_device_id = str(self.config.get(CONF_CHARGER_DEVICE))
+        # Laddarens status och strömgränser kommer från samma ögonblicksbild som beslutet.
+        charger_status = snapshot.charger_status
+        # Ändrad status sedan förra cykeln gör tidigare skickade kommandon inaktuella.
+        self._command_cache.observe_status(charger_device_id, charger_status)
+        _charger_hw_max_amps = snapshot.charger_hw_max_amps
+
+        # Säkerställer att den önskade laddströmmen (current_a) inte överstiger hårdvarumaximum.
         current_a = min(current_a, _charger_hw_max_amps)
 
-        # Hämtar entity_id för sensorn som rapporterar den *nuvarande* dynamiska strömgränsen på laddaren.
-        current_dynamic_limit_entity_id = self.config.get(
-            CONF_CHARGER_DYNAMIC_CURRENT_SENSOR
-        )
-        current_dynamic_limit_on_charger = None  # Byt namn för tydlighet
-        if current_dynamic_limit_entity_id:
-            current_dynamic_limit_on_charger = await self._get_number_value(
-                current_dynamic_limit_entity_id, is_config_key=False
-            )
-        # Initierar variabeln för nuvarande dynamisk gräns till None.
+        # Den *nuvarande* dynamiska strömgränsen på laddaren, eller None om okänd.
+        current_dynamic_limit_on_charger = snapshot.dynamic_current_limit_a
         # Loggar ett debug-meddelande med aktuella parametrar och tillstånd för styrningen.
         # Detta är användbart för felsökning för att se vilka beslut som fattas.
         if self._debug_logging:
@@ -532,12 +1385,9 @@ class SmartEVChargingCoordinator(DataUpdateCoordinator[dict[str, Any]]):
 
         # Startar ett try-block för felhantering vid tjänsteanrop etc.
         try:
-            # Hämtar tillståndsobjektet för huvudströmbrytaren.
-            current_master_switch_state = self.hass.states.get(charger_master_switch_id)
             # Kontrollerar om huvudströmbrytaren existerar, är AV, och om laddning begärs (should_charge är True).
             if (
-                current_master_switch_state  # Finns strömbrytaren?
-                and current_master_switch_state.state == STATE_OFF  # Är den AV?
+                snapshot.main_switch_state == STATE_OFF  # Finns strömbrytaren och är den AV?
                 and should_charge  # Begärs laddning?
             ):
                 # Om ja, logga att vi försöker slå PÅ den.
@@ -555,21 +1405,23 @@ class SmartEVChargingCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                     },  # Data: vilken entitet som ska slås på.
                     blocking=False,  # blocking=False innebär att vi inte väntar på att tjänsten ska slutföras.
                 )
-                # Pausar exekveringen i 2 sekunder för att ge strömbrytaren tid att slå på och laddaren att initialiseras.
-                await asyncio.sleep(2)
-                # Efter pausen, läs om laddarens status eftersom den kan ha ändrats.
-                charger_status_state = (
-                    self.hass.states.get(str(status_sensor_id))
-                    if status_sensor_id
-                    else None
+                # Vänta på att strömbrytaren bekräftas PÅ och att laddaren har
+                # rapporterat en giltig status, i stället för en fast paus.
+                status_sensor_id = self.config.get(CONF_STATUS_SENSOR)
+                await self._async_confirm_main_switch_on(
+                    str(charger_master_switch_id),
+                    str(status_sensor_id) if status_sensor_id else None,
                 )
-                # Tolka den nya statusen.
-                charger_status = (
-                    charger_status_state.state.lower()
-                    if charger_status_state
-                    and isinstance(charger_status_state.state, str)
-                    else STATE_UNKNOWN
+                # Efter väntan, läs om laddarens status eftersom den kan ha ändrats.
+                # Ögonblicksbilden ersätts så att resten av styrningen ser den nya statusen.
+                snapshot = snapshot.replace(
+                    charger_status=self._status_from_state(
+                        self.hass.states.get(str(status_sensor_id))
+                        if status_sensor_id
+                        else None
+                    )
                 )
+                charger_status = snapshot.charger_status
 
             # Huvudlogik: Om laddning ska ske (should_charge är True).
             if should_charge:
@@ -578,32 +1430,55 @@ class SmartEVChargingCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                     # Justering: Säkerställ att strömmen inte är negativ
                     current_to_send = max(0.0, effective_current)
 
+                    if not self._command_cache.should_send_current(
+                        charger_device_id,
+                        current_to_send,
+                        current_dynamic_limit_on_charger,
+                        snapshot.timestamp,
+                    ):
+                        if self._debug_logging:
+                            _LOGGER.debug(
+                                "Strömgränsen %.1fA är redan skickad till laddaren. Hoppar över.",
+                                current_to_send,
+                            )
+                        return
+
                     _LOGGER.info(
                         "Sätter dynamisk strömgräns på laddaren till %.1fA (ursprungligt begärt: %.1fA).",
                         current_to_send,
                         effective_current,  # Logga även det ursprungliga värdet för felsökning
                     )
 
-                    await self.hass.services.async_call(
-                        "easee",
-                        "set_charger_dynamic_limit",
+                    await self._command_scheduler.async_submit(
+                        charger_device_id,
+                        SERVICE_SET_DYNAMIC_LIMIT,
                         {
                             "device_id": self.config.get(CONF_CHARGER_DEVICE),
                             "current": current_to_send,
                         },
-                        blocking=False,
+                        PRIORITY_CURRENT,
                     )
 
                 async def send_start_command_to_charger():
+                    if not self._command_cache.should_send_action(
+                        charger_device_id,
+                        ACTION_START,
+                        snapshot.timestamp,
+                    ):
+                        if self._debug_logging:
+                            _LOGGER.debug(
+                                "'start'-kommandot är redan skickat till laddaren. Hoppar över."
+                            )
+                        return
                     _LOGGER.info("Skickar explicit 'start'-kommando till laddaren.")
-                    await self.hass.services.async_call(
-                        "easee",
-                        "action_command",
+                    await self._command_scheduler.async_submit(
+                        charger_device_id,
+                        SERVICE_ACTION_COMMAND,
                         {
                             "device_id": self.config.get(CONF_CHARGER_DEVICE),
-                            "action_command": "start",
+                            "action_command": ACTION_START,
                         },
-                        blocking=False,
+                        PRIORITY_START,
                     )
 
                 # Bestäm vilken ström som faktiskt ska sättas baserat på aktivt läge
@@ -633,7 +1508,11 @@ class SmartEVChargingCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                     != round(current_to_set_on_charger, 1)
                 )
 
-                is_paused_manually = await self._is_manually_paused()
+                is_paused_manually = snapshot.is_manually_paused
+                if is_paused_manually and self._debug_logging:
+                    _LOGGER.debug(
+                        "Laddaren är manuellt pausad (status: awaiting_start, dyn_current: 0A)."
+                    )
 
                 # # Definierar en inre asynkron funktion för att sätta strömmen om det behövs.
                 # # Detta görs för att undvika kodupprepning.
@@ -876,32 +1755,35 @@ class SmartEVChargingCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                     charger_status == EASEE_STATUS_PAUSED
                     and self.active_control_mode_internal != CONTROL_MODE_MANUAL
                 ):
-                    # Logga att vi stoppar/pausar laddningen.
-                    _LOGGER.info(
-                        "Stoppar/pausar laddning. Anledning: %s. Status: %s",
-                        reason,
-                        charger_status,
-                    )
-                    # Denna del är utkommenterad, representerar ett tidigare sätt att anropa tjänsten.
-                    # await self.hass.services.async_call(
-                    #     "easee",
-                    #     EASEE_SERVICE_PAUSE_CHARGING, # Konstant för paus-tjänsten.
-                    #     {"charger_id": self.config.get(CONF_CHARGER_DEVICE)},
-                    #     blocking=False,
-                    # )
-                    # Anropar Easee-tjänsten för att pausa laddningen.
-                    # Detta är den aktiva koden, baserat på användarens tidigare input.
-                    await self.hass.services.async_call(
-                        "easee",  # Domänen för Easee.
-                        "action_command",  # Tjänstenamn för generiska kommandon.
-                        {
-                            "device_id": self.config.get(
-                                CONF_CHARGER_DEVICE
-                            ),  # Enhets-ID.
-                            "action_command": "pause",  # Kommando för att pausa.
-                        },
-                        blocking=False,  # Kör asynkront.
-                    )
+                    # Ett identiskt pauskommando som redan är skickat skickas
+                    # inte igen så länge laddarens status är oförändrad.
+                    if self._command_cache.should_send_action(
+                        charger_device_id,
+                        ACTION_PAUSE,
+                        snapshot.timestamp,
+                    ):
+                        # Logga att vi stoppar/pausar laddningen.
+                        _LOGGER.info(
+                            "Stoppar/pausar laddning. Anledning: %s. Status: %s",
+                            reason,
+                            charger_status,
+                        )
+                        # Pauskommandot har högst prioritet i kommandokön.
+                        await self._command_scheduler.async_submit(
+                            charger_device_id,
+                            SERVICE_ACTION_COMMAND,
+                            {
+                                "device_id": self.config.get(
+                                    CONF_CHARGER_DEVICE
+                                ),  # Enhets-ID.
+                                "action_command": ACTION_PAUSE,  # Kommando för att pausa.
+                            },
+                            PRIORITY_PAUSE,
+                        )
+                    elif self._debug_logging:
+                        _LOGGER.debug(
+                            "'pause'-kommandot är redan skickat till laddaren. Hoppar över."
+                        )
                     # Om en session var aktiv, återställ sessionsdata.
                     if self.session_start_time_utc is not None:
                         self._reset_session_data(f"Laddning stoppad/pausad ({reason})")
@@ -929,15 +1811,75 @@ class SmartEVChargingCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                             f"Laddningssession avslutad (status: {charger_status}, Anledning: {reason})"
                         )
         # Fångar upp eventuella oväntade fel under styrningen av laddaren.
-        except Exception as e:
-            _LOGGER.error(
-                "Fel vid styrning av laddaren: %s", e, exc_info=True
-            )  # Logga felet med traceback.
+        except Exception:
+            # Logga felet med traceback.
+            _LOGGER.exception("Fel vid styrning av laddaren")
+
+    async def _async_event_refresh(self) -> None:
+        """Kör en uppdatering som väckts av en tillståndsförändring."""
+        self._refresh_trigger = TRIGGER_EVENT
+        await self.async_refresh()
+
+    @callback
+    def _record_submitted_command(self, service: str, data: dict[str, Any]) -> None:
+        """Sparar ett accepterat kommando till beslutsspåret för pågående cykel."""
+        if self._cycle_commands is not None:
+            self._cycle_commands.append((service, command_values(data)))
+
+    def _record_sent_command(self, service: str, data: dict[str, Any]) -> None:
+        """Registrerar ett lyckat kommando i kommandocachen.
+
+        Ett köat eller misslyckat kommando registreras inte, så att nästa
+        cykel skickar det igen.
+        """
+        charger_device_id = str(self.config.get(CONF_CHARGER_DEVICE))
+        if service == SERVICE_SET_DYNAMIC_LIMIT:
+            self._command_cache.record_current(
+                charger_device_id, data["current"], dt_util.utcnow()
+            )
+        elif service == SERVICE_ACTION_COMMAND:
+            self._command_cache.record_action(
+                charger_device_id, data["action_command"], dt_util.utcnow()
+            )
+
+    @callback
+    def async_start_profiling(self, profiler: CycleProfiler) -> None:
+        """Profilerar de nästa beslutscyklerna med en delad profilerare.
+
+        Den profilerande varianten läggs på instansen och skuggar
+        `_async_update_data` tills laddarens cykler är profilerade, så vanliga
+        cykler påverkas inte när ingen profilering pågår.
+        """
+        entry_id = self.entry.entry_id
+        update = type(self)._async_update_data.__get__(self)
+
+        async def _async_profiled_update_data() -> dict[str, Any]:
+            try:
+                return await profiler.async_run(entry_id, update)
+            finally:
+                if self._profiler is profiler and not profiler.is_profiling(entry_id):
+                    self._stop_profiling()
+
+        self._profiler = profiler
+        self._async_update_data = _async_profiled_update_data
+
+    def _stop_profiling(self) -> None:
+        """Återställer den vanliga cykeln och skriver resultatet om alla är klara."""
+        profiler = self._profiler
+        if profiler is None:
+            return
+        self._profiler = None
+        del self._async_update_data
+        profiler.release(self.entry.entry_id)
+        if profiler.done:
+            self.hass.async_create_task(async_finish_profiling(self.hass, profiler))
 
     # Definierar en asynkron metod (coroutine) med namnet _async_update_data.
     # Denna metod är en del av DataUpdateCoordinator och anropas periodiskt för att hämta och bearbeta data.
     # Den förväntas returnera en dictionary med data som kan användas av sensorer/entiteter.
     async def _async_update_data(self) -> dict[str, Any]:
+        cycle_started = time.perf_counter()
+        trigger, self._refresh_trigger = self._refresh_trigger, TRIGGER_POLL
         # Uppdaterar koordinatorns interna konfiguration (self.config) genom att slå samman
         # den ursprungliga konfigurationen (self.entry.data) med eventuella användarändrade alternativ (self.entry.options).
         # Options har företräde om samma nyckel finns i båda.
@@ -966,425 +1908,517 @@ class SmartEVChargingCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                         "should_charge_reason": "Väntar på interna entiteter.",  # Ange anledning.
                     }
                 )
-
-        # Hämtar den nuvarande tiden i UTC-format. Används för tidsbaserade jämförelser.
-        current_time = dt_util.utcnow()
-        # Hämtar entity_id för laddarens statussensor från konfigurationen.
-        charger_status_sensor_id = self.config.get(CONF_STATUS_SENSOR)
-        # Hämtar tillståndsobjektet för statussensorn från Home Assistant.
-        # Om ingen statussensor är konfigurerad (charger_status_sensor_id är None), blir charger_status_state None.
-        charger_status_state = (
-            self.hass.states.get(
-                str(charger_status_sensor_id)
-            )  # Hämta tillstånd om ID finns.
-            if charger_status_sensor_id  # Kontrollera om ID är satt.
-            else None  # Annars, sätt till None.
-        )
-        # Extraherar det faktiska statusvärdet (som en sträng) från tillståndsobjektet.
-        # Konverterar till gemener för konsekventa jämförelser.
-        # Om inget giltigt tillstånd finns (t.ex. sensorn är otillgänglig), sätts status till STATE_UNKNOWN.
-        charger_status = (
-            charger_status_state.state.lower()  # Hämta state och konvertera till gemener.
-            if charger_status_state
-            and isinstance(
-                charger_status_state.state, str
-            )  # Kontrollera att state-objekt och dess state-attribut finns och är en sträng.
-            else STATE_UNKNOWN  # Annars, använd STATE_UNKNOWN (oftast "unknown").
+            # De interna entiteterna fanns inte när lyssnarna sattes upp.
+            if self._listeners_started:
+                self._setup_listeners()
+
+        # Läser alla indata en gång. Resten av cykeln, inklusive styrningen av
+        # laddaren, använder enbart denna ögonblicksbild.
+        snapshot = self._build_input_snapshot()
+        current_time = snapshot.timestamp
+        self._cycle_commands = []
+        self.charger_main_switch_state = snapshot.charger_main_switch_on
+        if snapshot.solar_suspended_until != self._solar_suspended_until:
+            if snapshot.solar_suspended_until is not None:
+                _LOGGER.info(
+                    "Solenergiutvärderingen vilar till soluppgång (%s).",
+                    snapshot.solar_suspended_until,
+                )
+            elif self._debug_logging:
+                _LOGGER.debug("Soluppgång, solenergiutvärderingen återupptas.")
+            self._solar_suspended_until = snapshot.solar_suspended_until
+
+        # Beslutet fattas av den rena beslutsmotorn. Här tillämpas enbart dess
+        # sidoeffekter: loggning, sessionstid och koordinatorns tillstånd.
+        decision, new_state = evaluate(
+            snapshot,
+            DecisionState(
+                session_active=self.session_start_time_utc is not None,
+                solar_session_active=self._solar_session_active,
+                price_time_eligible=self._price_time_eligible_for_charging,
+                solar_controller=self._solar_controller_state,
+                phases=self._charger_phases,
+                phases_changed_at=self._phases_changed_at,
+            ),
+            self._solar_controller,
+            self._phase_switch,
         )
+        reason_for_action = decision.cause
+        if decision.log_reason:
+            _LOGGER.info(reason_for_action)
+        if decision.solar_session_started:
+            _LOGGER.info("Startar ny solenergiladdningssession. %s", reason_for_action)
+        if decision.reset_session_reason is not None:
+            self._reset_session_data(decision.reset_session_reason)
+        if decision.start_session:
+            _LOGGER.info("Startar ny Pris/Tid-session.")
+            self.session_start_time_utc = dt_util.utcnow()
+
+        self.active_control_mode_internal = decision.control_mode
+        self.should_charge_flag = decision.should_charge
+        self.target_charge_current_a = decision.target_current_a
+        self._solar_session_active = new_state.solar_session_active
+        self._price_time_eligible_for_charging = new_state.price_time_eligible
+        self._solar_controller_state = new_state.solar_controller
+        if decision.phases != self._charger_phases:
+            _LOGGER.info(
+                "Växlar laddaren från %d-fas till %d-fasladdning.",
+                self._charger_phases,
+                decision.phases,
+            )
+        self._charger_phases = decision.phases
+        self._phases_changed_at = new_state.phases_changed_at
 
-        # Hämtar entity_id för laddarens huvudströmbrytare från konfigurationen.
-        charger_main_switch_id = self.config.get(CONF_CHARGER_ENABLED_SWITCH_ID)
-        # Hämtar tillståndsobjektet för huvudströmbrytaren.
-        main_switch_state_obj = (
-            self.hass.states.get(
-                str(charger_main_switch_id)
-            )  # Hämta tillstånd om ID finns.
-            if charger_main_switch_id  # Kontrollera om ID är satt.
-            else None  # Annars, sätt till None.
+        if self._fuse_hub is not None:
+            snapshot, reason_for_action = await self._async_apply_fuse_share(
+                snapshot, reason_for_action
+            )
+        if self._main_fuse_limit_a is not None:
+            snapshot, reason_for_action = self._apply_main_fuse_limit(
+                snapshot, reason_for_action
+            )
+        if self._phase_switch is not None:
+            await self._async_apply_phase_mode(snapshot)
+
+        # Anropa metoden som faktiskt skickar kommandon till laddaren,
+        # baserat på de beslut som fattats ovan.
+        control_started = time.perf_counter()
+        await self._control_charger(
+            snapshot,
+            self.should_charge_flag,
+            self.target_charge_current_a,
+            reason_for_action,
         )
-        # Bestämmer om huvudströmbrytaren är PÅ.
-        # Om inget strömbrytarobjekt finns (dvs. ingen är konfigurerad), antas den vara PÅ (True) för att inte blockera logiken i onödan.
-        self.charger_main_switch_state = (
-            main_switch_state_obj.state == STATE_ON
-            if main_switch_state_obj
-            else True  # Är switchen PÅ? True om ej konfad.
+        self._instrumentation.control.add(
+            (time.perf_counter() - control_started) * 1000
         )
 
-        # Kontrollerar om switchen för smart laddning (Pris/Tid) är PÅ.
-        # self.smart_enable_switch_entity_id är ID:t för den switch som denna integration skapar.
-        smart_charging_enabled = self.hass.states.is_state(
-            self.smart_enable_switch_entity_id,
-            STATE_ON,  # Jämför tillståndet med STATE_ON ("on").
-        )
-        # Kontrollerar om switchen för solenergiladdning är PÅ.
-        # self.solar_enable_switch_entity_id är ID:t för den switch som denna integration skapar.
-        solar_charging_enabled = self.hass.states.is_state(
-            self.solar_enable_switch_entity_id,
-            STATE_ON,  # Jämför tillståndet med STATE_ON.
+        self._apply_update_interval(self._select_update_interval(snapshot))
+        self._schedule_time_edge(snapshot.next_time_edge)
+
+        # Sätter det "officiella" aktiva styrningsläget som exponeras utåt.
+        # Om self.active_control_mode_internal är None (vilket det inte borde vara här), fall tillbaka till MANUELL.
+        self.active_control_mode = (
+            self.active_control_mode_internal or CONTROL_MODE_MANUAL
         )
+        # Uppdaterar tidsstämpeln för den senaste uppdateringen.
+        self.last_update_time = current_time
 
-        # Hämtar det aktuella spotpriset i kr/kWh via en hjälpmetod.
-        current_price_kr = await self._get_spot_price_in_kr()
-        # Hämtar det maximalt accepterade priset från nummer-entiteten som skapats av denna integration.
-        # Om värdet inte kan hämtas, används 999.0 som ett högt defaultvärde (laddning tillåts prismässigt).
-        # is_config_key=False betyder att self.max_price_entity_id redan är ett fullständigt entity_id.
-        max_accepted_price_kr = (
-            await self._get_number_value(
-                self.max_price_entity_id,
-                999.0,
-                is_config_key=False,  # Standardvärde om inget kan läsas.
+        # Loggar en sammanfattning av uppdateringscykelns resultat.
+        if self._debug_logging:
+            _LOGGER.debug(
+                "Uppdateringscykel klar. Styrningsläge: %s. Ska ladda: %s. Ström: %.1fA. Anledning: %s. Laddarstatus: %s. Sol Aktiv: %s",  # LADE TILL Sol Aktiv
+                self.active_control_mode,
+                self.should_charge_flag,
+                self.target_charge_current_a,
+                reason_for_action,
+                snapshot.charger_status,
+                self._solar_session_active,  # LADE TILL DENNA VARIABEL
             )
-            or 999.0  # Säkerställer att det inte blir None om _get_number_value returnerar None (t.ex. om entiteten är ny).
-        )
 
-        # Hämtar entity_id för tidsschemat (för Pris/Tid-laddning) från konfigurationen.
-        time_schedule_entity_id = self.config.get(CONF_TIME_SCHEDULE_ENTITY)
-        # Kontrollerar om tidsschemat är aktivt (PÅ).
-        # Om inget tidsschema är konfigurerat, antas det vara aktivt (True).
-        time_schedule_active = (
-            self.hass.states.is_state(
-                str(time_schedule_entity_id), STATE_ON
-            )  # Är schemat PÅ?
-            if time_schedule_entity_id  # Om ett schema-ID finns.
-            else True  # Annars, antag att det är aktivt.
+        self.decision_trace.record(
+            snapshot,
+            trigger,
+            self.active_control_mode,
+            self.should_charge_flag,
+            self.target_charge_current_a,
+            reason_for_action,
+            self._cycle_commands,
         )
+        self._cycle_commands = None
+        self._instrumentation.record_trigger(trigger)
+        self._instrumentation.record_reason(reason_for_action.code)
+        self._instrumentation.cycle.add((time.perf_counter() - cycle_started) * 1000)
 
-        # Hämtar entity_id för solenergi-tidsschemat från konfigurationen.
-        solar_schedule_entity_id = self.config.get(CONF_SOLAR_SCHEDULE_ENTITY)
-        # Kontrollerar om solenergi-tidsschemat är aktivt (PÅ).
-        # Om inget schema är konfigurerat, antas det vara aktivt (True).
-        solar_schedule_active = (
-            self.hass.states.is_state(
-                str(solar_schedule_entity_id), STATE_ON
-            )  # Är schemat PÅ?
-            if solar_schedule_entity_id  # Om ett schema-ID finns.
-            else True  # Annars, antag att det är aktivt.
-        )
+        # Returnerar en dictionary med data som kan användas av sensorer kopplade till denna koordinator.
+        return self._current_coordinator_data(reason_for_action)
 
-        # Hämtar aktuell solproduktion i Watt. Om sensorn inte finns eller är otillgänglig, använd 0.0 W.
-        current_solar_production_w = (
-            await self._get_power_value(CONF_SOLAR_PRODUCTION_SENSOR)
-            or 0.0  # Default 0.0 om inget värde.
-        )
+    async def _async_apply_fuse_share(
+        self, snapshot: InputSnapshot, reason: Reason
+    ) -> tuple[InputSnapshot, Reason]:
+        """Begränsar cykelns beslut till laddarens andel av den delade säkringen.
 
-        # Hämtar entity_id för sensorn som anger laddarens maximala hårdvarubegränsning för ström.
-        charger_hw_max_amps_entity_id = self.config.get(
-            CONF_CHARGER_MAX_CURRENT_LIMIT_SENSOR
+        Returnerar en ögonblicksbild där HW-max är begränsad till andelen, så
+        att även Pris/Tid (som annars alltid sätter HW-max) håller sig inom den.
+        """
+        assert self._fuse_hub is not None
+        charger_status = snapshot.charger_status
+        hw_max = snapshot.charger_hw_max_amps
+        requested_a = 0.0
+        if (
+            self.should_charge_flag
+            and charger_status not in EASEE_STATUS_DISCONNECTED
+            and charger_status != EASEE_STATUS_OFFLINE
+        ):
+            if self.active_control_mode_internal == CONTROL_MODE_PRICE_TIME:
+                requested_a = hw_max
+            else:
+                requested_a = min(self.target_charge_current_a, hw_max)
+        min_a = (
+            snapshot.min_solar_charge_current_a
+            if self.active_control_mode_internal == CONTROL_MODE_SOLAR_SURPLUS
+            else MIN_CHARGE_CURRENT_A
+        )
+        allowed_a = await self._fuse_hub.async_update_demand(
+            self.entry.entry_id,
+            ChargerDemand(
+                requested_a=requested_a,
+                min_a=min_a,
+                weight=demand_weight(
+                    self._charger_priority,
+                    snapshot.current_soc_percent,
+                    snapshot.target_soc_limit,
+                ),
+            ),
         )
-        # Sätter ett standardvärde för maximal hårdvaruström.
-        charger_hw_max_amps = MAX_CHARGE_CURRENT_A_HW_DEFAULT
-        # Om en sensor för hårdvarumaximum är konfigurerad:
-        if charger_hw_max_amps_entity_id:
-            # Hämta värdet från sensorn.
-            val_from_sensor = await self._get_number_value(
-                charger_hw_max_amps_entity_id,
-                default_value=MAX_CHARGE_CURRENT_A_HW_DEFAULT,  # Fallback-värde.
-                is_config_key=False,  # Detta är redan ett entity_id.
+        if self._debug_logging:
+            _LOGGER.debug(
+                "Delad huvudsäkring (%.0fA): begärt %.1fA, tilldelat %.1fA.",
+                self._fuse_hub.budget_a,
+                requested_a,
+                allowed_a,
             )
-            # Om ett giltigt värde hämtades:
-            if val_from_sensor is not None:
-                # Uppdatera variabeln med sensorvärdet.
-                charger_hw_max_amps = val_from_sensor
+        if requested_a <= 0:
+            self._fuse_share_starved = False
+            return snapshot, reason
 
-        # Hämtar entity_id för sensorn som rapporterar bilens laddningsnivå (State of Charge, SoC).
-        ev_soc_sensor_entity_id = self.config.get(CONF_EV_SOC_SENSOR)
-        # Initierar variabeln för aktuell SoC till None.
-        current_soc_percent = None
-        # Om en SoC-sensor är konfigurerad:
-        if ev_soc_sensor_entity_id:
-            # Hämta dess numeriska värde.
-            current_soc_percent = await self._get_number_value(
-                ev_soc_sensor_entity_id, is_config_key=False
+        if allowed_a < min_a:
+            reason = Reason(
+                ReasonCode.SHARED_FUSE_INSUFFICIENT, (self._fuse_hub.budget_a, min_a)
             )
+            if not self._fuse_share_starved:
+                _LOGGER.info(reason)
+            self._fuse_share_starved = True
+            self.should_charge_flag = False
+            return snapshot, reason
 
-        # Hämtar den konfigurerade övre SoC-gränsen från konfigurationen.
-        target_soc_limit_config = self.config.get(CONF_TARGET_SOC_LIMIT)
-        # Konverterar SoC-gränsen till float om den är satt, annars None.
-        target_soc_limit = (
-            float(target_soc_limit_config)  # Försök konvertera till float.
-            if target_soc_limit_config is not None  # Om ett värde är satt.
-            else None  # Annars, sätt till None.
-        )
+        self._fuse_share_starved = False
+        if allowed_a < requested_a:
+            self.target_charge_current_a = min(self.target_charge_current_a, allowed_a)
+            snapshot = snapshot.replace(charger_hw_max_amps=min(hw_max, allowed_a))
+        return snapshot, reason
 
-        # Hämtar värdet från nummer-entiteten för minsta laddström vid solenergiladdning.
-        _min_solar_current_from_sensor = await self._get_number_value(
-            self.min_solar_charge_current_entity_id,  # ID för den interna nummer-entiteten.
-            default_value=None,  # Inget default här, hanteras nedan.
-            is_config_key=False,  # Detta är redan ett entity_id.
-        )
-        # Sätter minsta solenergiladdström. Använder värdet från nummer-entiteten om det finns,
-        # annars används en global konstant (MIN_CHARGE_CURRENT_A).
-        min_solar_charge_current_a = (
-            _min_solar_current_from_sensor  # Använd sensorvärdet om det finns.
-            if _min_solar_current_from_sensor
-            is not None  # Kontrollera om värdet är giltigt.
-            else MIN_CHARGE_CURRENT_A  # Annars, använd standardminimum.
-        )
+    async def _async_limit_to_fuse_share(self, allowed_a: float) -> None:
+        """Sänker laddarens ström direkt när en annan laddare tar en del av säkringen.
 
-        # Hämtar värdet från nummer-entiteten för solenergi-bufferten.
-        _solar_buffer_from_sensor = await self._get_number_value(
-            self.solar_buffer_entity_id, default_value=None, is_config_key=False
-        )
-        # Sätter solenergi-bufferten. Använder värdet från nummer-entiteten om det finns,
-        # annars används en global konstant (POWER_MARGIN_W).
-        solar_buffer_w = (
-            _solar_buffer_from_sensor  # Använd sensorvärdet.
-            if _solar_buffer_from_sensor is not None  # Om giltigt.
-            else POWER_MARGIN_W  # Annars, använd standardbuffert.
-        )
+        Anropas av hubben utanför den egna cykeln. Kommandot skickas förbi
+        hastighetsbegränsningen, annars kan de två laddarna tillsammans
+        överskrida säkringen tills det finns en token. Höjningar sker
+        däremot alltid i den egna cykeln.
+        """
+        charger_device_id = str(self.config.get(CONF_CHARGER_DEVICE))
+        sent_current_a = self._command_cache.last_sent_current(charger_device_id)
+        if sent_current_a is not None and sent_current_a <= allowed_a:
+            return
+        if allowed_a <= 0:
+            _LOGGER.info(
+                "Delad huvudsäkring: andelen för denna laddare är 0A. Pausar laddningen."
+            )
+            await self._async_pause_outside_cycle(urgent=True)
+        else:
+            _LOGGER.info(
+                "Delad huvudsäkring: sänker dynamisk strömgräns till %.1fA.", allowed_a
+            )
+            await self._async_set_current_outside_cycle(allowed_a, urgent=True)
+        # Låt den egna cykeln fatta ett nytt beslut med den nya andelen.
+        self._event_refresh_debouncer.async_schedule_call()
+
+    async def _async_limit_to_main_fuse(self, allowed_a: float) -> None:
+        """Sänker eller pausar laddningen direkt för att skydda huvudsäkringen.
 
-        # Initierar flaggan för om laddning ska ske till False (standard).
-        self.should_charge_flag = False
-        # Sätter målladdströmmen initialt till laddarens hårdvarumaximum.
-        # Detta värde kan justeras nedåt av solenergilogiken.
-        self.target_charge_current_a = charger_hw_max_amps
-        # Initierar en sträng som förklarar det aktuella beslutet eller anledningen till ingen laddning.
-        reason_for_action = "Ingen styrning aktiv."
-        # Sätter det interna styrningsläget initialt till manuellt (AV).
-        self.active_control_mode_internal = CONTROL_MODE_MANUAL
-
-        # Start på huvudlogiken för att avgöra om och hur laddning ska ske.
-        # Kontrollerar först blockerande tillstånd.
-        # Om laddaren är frånkopplad eller offline:
+        Kommandot skickas förbi hastighetsbegränsningen.
+        """
+        if allowed_a < MIN_CHARGE_CURRENT_A:
+            _LOGGER.warning(
+                "Huvudsäkringen (%.0fA) räcker inte till laddning just nu. Pausar laddningen.",
+                self._main_fuse_current_a,
+            )
+            await self._async_pause_outside_cycle(urgent=True)
+        else:
+            _LOGGER.warning(
+                "Huvudsäkringen (%.0fA) nära maxlast: sänker dynamisk strömgräns till %.1fA.",
+                self._main_fuse_current_a,
+                allowed_a,
+            )
+            await self._async_set_current_outside_cycle(allowed_a, urgent=True)
+
+    async def _async_apply_phase_mode(self, snapshot: InputSnapshot) -> None:
+        """Skickar fasläget till laddaren när det eller laddströmmen har ändrats.
+
+        Easee växlar fasläge (när laddarens fasläge är automatiskt) efter den
+        dynamiska kretsgränsen per fas: noll på L2 och L3 ger 1-fasladdning.
+        Kretsgränsen är samma ström som laddarens dynamiska strömgräns efter
+        säkringarnas begränsningar, så den släpper aldrig igenom mer. Den har
+        en livslängd och skickas om innan den löper ut. När sessionen tar slut
+        eller fasväxlingen stängs av skickas den inte om, och laddaren går
+        tillbaka till sin vanliga kretsgräns.
+        """
+        charger_status = snapshot.charger_status
         if (
-            charger_status
-            in EASEE_STATUS_DISCONNECTED  # Är statusen i listan över frånkopplade statusar?
-            or charger_status == EASEE_STATUS_OFFLINE  # Eller är statusen offline?
+            charger_status in EASEE_STATUS_DISCONNECTED
+            or charger_status == EASEE_STATUS_OFFLINE
         ):
-            # Sätt läget till manuellt och ingen laddning.
-            self.active_control_mode_internal = CONTROL_MODE_MANUAL
-            self.should_charge_flag = False
-            # Sätt anledningen.
-            reason_for_action = (
-                f"Laddaren är frånkopplad/offline (status: {charger_status})."
+            self._phase_mode_sent = None
+            return
+        if not self.should_charge_flag or not snapshot.charger_main_switch_on:
+            return
+        hw_max = snapshot.charger_hw_max_amps
+        phase_current_a = (
+            hw_max
+            if self.active_control_mode_internal == CONTROL_MODE_PRICE_TIME
+            else min(self.target_charge_current_a, hw_max)
+        )
+        now = dt_util.utcnow()
+        sent = self._phase_mode_sent
+        if (
+            sent is not None
+            and sent[:2] == (self._charger_phases, phase_current_a)
+            and now - sent[2] < timedelta(minutes=PHASE_MODE_TTL_MINUTES / 2)
+        ):
+            return
+        other_phases_a = phase_current_a if self._charger_phases == PHASES else 0.0
+        if sent is None or sent[0] != self._charger_phases:
+            _LOGGER.info(
+                "Sätter laddarens kretsgräns för %d-fasladdning (%.1fA/%.1fA/%.1fA).",
+                self._charger_phases,
+                phase_current_a,
+                other_phases_a,
+                other_phases_a,
             )
-            # Om en laddningssession pågick, återställ sessionsdata.
-            if self.session_start_time_utc is not None:
-                self._reset_session_data(reason_for_action)
-            # Återställ flagga för om Pris/Tid var det som senast initierade laddning.
-            self._price_time_eligible_for_charging = False
-        # Om huvudströmbrytaren för laddboxen är AV:
-        elif not self.charger_main_switch_state:
-            # Sätt läget till manuellt och ingen laddning.
-            self.active_control_mode_internal = CONTROL_MODE_MANUAL
-            self.should_charge_flag = False
-            reason_for_action = "Huvudströmbrytare för laddbox är AV."
-            if self.session_start_time_utc is not None:
-                self._reset_session_data(reason_for_action)
-            self._solar_surplus_start_time = None
-            self._solar_session_active = False
-            self._price_time_eligible_for_charging = False
-        # Om bilens laddningsnivå (SoC) har nått den inställda gränsen:
-        elif (
-            current_soc_percent is not None  # Finns ett SoC-värde?
-            and target_soc_limit is not None  # Finns en SoC-gräns?
-            and current_soc_percent >= target_soc_limit  # Är SoC >= gränsen?
+        elif self._debug_logging:
+            _LOGGER.debug(
+                "Förnyar laddarens kretsgräns för %d-fasladdning (%.1fA per fas).",
+                self._charger_phases,
+                phase_current_a,
+            )
+        charger_device_id = str(self.config.get(CONF_CHARGER_DEVICE))
+        if await self._command_scheduler.async_submit(
+            charger_device_id,
+            SERVICE_SET_CIRCUIT_DYNAMIC_LIMIT,
+            {
+                "device_id": self.config.get(CONF_CHARGER_DEVICE),
+                "current_p1": phase_current_a,
+                "current_p2": other_phases_a,
+                "current_p3": other_phases_a,
+                "time_to_live": PHASE_MODE_TTL_MINUTES,
+            },
+            PRIORITY_PHASE_MODE,
         ):
-            self.active_control_mode_internal = CONTROL_MODE_MANUAL
+            self._phase_mode_sent = (self._charger_phases, phase_current_a, now)
+
+    async def _async_pause_outside_cycle(self, urgent: bool = False) -> None:
+        await self._command_scheduler.async_submit(
+            str(self.config.get(CONF_CHARGER_DEVICE)),
+            SERVICE_ACTION_COMMAND,
+            {
+                "device_id": self.config.get(CONF_CHARGER_DEVICE),
+                "action_command": ACTION_PAUSE,
+            },
+            PRIORITY_PAUSE,
+            urgent=urgent,
+        )
+
+    async def _async_set_current_outside_cycle(
+        self, current_a: float, urgent: bool = False
+    ) -> None:
+        await self._command_scheduler.async_submit(
+            str(self.config.get(CONF_CHARGER_DEVICE)),
+            SERVICE_SET_DYNAMIC_LIMIT,
+            {
+                "device_id": self.config.get(CONF_CHARGER_DEVICE),
+                "current": current_a,
+            },
+            PRIORITY_CURRENT,
+            urgent=urgent,
+        )
+
+    def _apply_main_fuse_limit(
+        self, snapshot: InputSnapshot, reason: Reason
+    ) -> tuple[InputSnapshot, Reason]:
+        """Begränsar cykelns beslut till huvudsäkringens senast beräknade gräns."""
+        limit_a = self._main_fuse_limit_a
+        assert limit_a is not None
+        hw_max = snapshot.charger_hw_max_amps
+        if not self.should_charge_flag:
+            self._main_fuse_applied_a = None
+            return snapshot, reason
+        requested_a = (
+            hw_max
+            if self.active_control_mode_internal == CONTROL_MODE_PRICE_TIME
+            else min(self.target_charge_current_a, hw_max)
+        )
+        if limit_a >= requested_a:
+            self._main_fuse_applied_a = None
+            return snapshot, reason
+
+        self._main_fuse_applied_a = limit_a
+        min_a = (
+            snapshot.min_solar_charge_current_a
+            if self.active_control_mode_internal == CONTROL_MODE_SOLAR_SURPLUS
+            else MIN_CHARGE_CURRENT_A
+        )
+        if limit_a < min_a:
             self.should_charge_flag = False
-            reason_for_action = (
-                f"SoC ({current_soc_percent}%) har nått målet ({target_soc_limit}%)."
+            return snapshot, Reason(
+                ReasonCode.MAIN_FUSE_INSUFFICIENT,
+                (self._main_fuse_current_a, limit_a, min_a),
             )
-            # Logga meddelandet här på INFO-nivå
-            _LOGGER.info(reason_for_action)
+        self.target_charge_current_a = min(self.target_charge_current_a, limit_a)
+        return snapshot.replace(charger_hw_max_amps=min(hw_max, limit_a)), reason
 
-            if self.session_start_time_utc is not None:
-                self._reset_session_data(reason_for_action)
-            self._solar_surplus_start_time = None
-            self._solar_session_active = False
-            self._price_time_eligible_for_charging = False
-        # Om inga av ovanstående blockerande tillstånd är uppfyllda, utvärdera smarta laddningslägen:
-        else:
-            # Initiera flagga för om Pris/Tid-villkoren är uppfyllda.
-            price_time_conditions_met = False
-            # Om Pris/Tid-switchen är PÅ:
-            if smart_charging_enabled:
-                # Kontrollera om priset är OK (spotpris <= max accepterat pris).
-                price_ok = (
-                    current_price_kr is not None  # Finns ett aktuellt pris?
-                    and current_price_kr
-                    <= max_accepted_price_kr  # Är det lägre än eller lika med maxpriset?
-                )
-                # Om priset är OK och tidsschemat är aktivt:
-                if price_ok and time_schedule_active:
-                    # Då är alla villkor för Pris/Tid-laddning uppfyllda.
-                    price_time_conditions_met = True
-
-            # Om villkoren för Pris/Tid-laddning är uppfyllda:
-            if price_time_conditions_met:
-                # Sätt aktivt styrningsläge till Pris/Tid.
-                self.active_control_mode_internal = CONTROL_MODE_PRICE_TIME
-                # Sätt flaggan att laddning ska ske.
-                self.should_charge_flag = True
-                # Sätt målladdström till laddarens hårdvarumaximum.
-                self.target_charge_current_a = charger_hw_max_amps
-                # Sätt anledningen.
-                reason_for_action = f"Pris/Tid-laddning aktiv (Pris: {current_price_kr:.2f} <= {max_accepted_price_kr:.2f} kr, Tidsschema PÅ)."
-                # Återställ eventuell pågående solenergi-timer och session.
-                self._solar_surplus_start_time = None
-                self._solar_session_active = False
-                # Om ingen session pågår eller om den tidigare sessionen inte var en Pris/Tid-session:
-                if (
-                    self.session_start_time_utc is None  # Ingen session aktiv?
-                    or not self._price_time_eligible_for_charging  # Eller var föregående session inte Pris/Tid?
-                ):
-                    # Om en session faktiskt pågick (t.ex. solenergi):
-                    if self.session_start_time_utc is not None:
-                        # Logga att vi byter från den tidigare sessionstypen.
-                        _LOGGER.info(
-                            "Avslutar föregående session (%s) för att starta Pris/Tid.",
-                            self.active_control_mode_internal  # Detta kommer vara det gamla värdet innan det sätts till PRICE_TIME
-                            if self.active_control_mode_internal  # if-sats för att hantera om det är None
-                            != CONTROL_MODE_PRICE_TIME  # och inte redan PRICE_TIME
-                            else "annan",  # Fallback-text.
-                        )
-                        # Återställ sessionsdata.
-                        self._reset_session_data(
-                            f"Avslutar {self.active_control_mode_internal if self.active_control_mode_internal != CONTROL_MODE_PRICE_TIME else 'annan'} för Pris/Tid"
-                        )
-                    # Logga att en ny Pris/Tid-session startas.
-                    _LOGGER.info("Startar ny Pris/Tid-session.")
-                    # Sätt starttiden för sessionen.
-                    self.session_start_time_utc = dt_util.utcnow()
-                # Markera att den nuvarande sessionen (om den startas) är en Pris/Tid-session.
-                self._price_time_eligible_for_charging = True
-
-            # Om Pris/Tid-villkoren INTE är uppfyllda, OCH solenergiladdning är aktiverad (switch PÅ) OCH solenergi-schemat är aktivt:
-            elif solar_charging_enabled and solar_schedule_active:
-                # Beräkna tillgängligt solöverskott och potentiell ström
-                available_solar_surplus_w = current_solar_production_w - solar_buffer_w
-                calculated_solar_current_a = math.floor(
-                    available_solar_surplus_w / (PHASES * VOLTAGE_PHASE_NEUTRAL)
-                )
-                # Anropa den nya hjälpmetoden för solenergilogik
-                reason_for_action = await self._calculate_solar_charging_action(
-                    calculated_solar_current_a=calculated_solar_current_a,
-                    available_solar_surplus_w=available_solar_surplus_w,
-                    min_solar_charge_current_a=min_solar_charge_current_a,
-                    charger_hw_max_amps=charger_hw_max_amps,
-                    # current_time=current_time, # Tas bort om startfördröjningen tas bort
-                    price_time_conditions_met=price_time_conditions_met,
-                )
-                # Kontrollera om överskottet är tillräckligt för att starta laddning
-                # if calculated_solar_current_a >= min_solar_charge_current_a:
-                #     # Överskottet är tillräckligt, starta laddning omedelbart.
-                #     self.active_control_mode_internal = CONTROL_MODE_SOLAR_SURPLUS
-                #     self.should_charge_flag = True
-                #     self.target_charge_current_a = min(
-                #         calculated_solar_current_a, charger_hw_max_amps
-                #     )
-                #     reason_for_action = f"Solenergiladdning aktiv (Överskott: {available_solar_surplus_w:.0f}W -> {self.target_charge_current_a:.1f}A)."
+    def _select_update_interval(self, snapshot: InputSnapshot) -> timedelta:
+        """Väljer intervall till nästa pollning utifrån cykelns läge.
 
-                #     # Om en Pris/Tid-session var aktiv, återställ den för att markera övergången
-                #     if self._price_time_eligible_for_charging:
-                #         self._reset_session_data("Avslutar Pris/Tid för Solenergi")
+        Långa intervall används bara när händelsestyrd uppdatering är på,
+        eftersom det då är tillståndsförändringarna som väcker koordinatorn.
+        """
+        base = self._base_update_interval
+        charger_status = snapshot.charger_status
+        if (
+            self._last_charger_status is not None
+            and charger_status != self._last_charger_status
+        ):
+            self._charger_status_changed_at = snapshot.timestamp
+        self._last_charger_status = charger_status
+        self._solar_volatility_window.add(
+            calculate_solar_surplus_w(snapshot), snapshot.timestamp
+        )
 
-                #     # Starta en ny session om ingen redan pågår
-                #     if self.session_start_time_utc is None:
-                #         _LOGGER.info("Startar ny Solenergi-session.")
-                #         self.session_start_time_utc = dt_util.utcnow()
+        if self._charger_status_changed_at is not None:
+            if snapshot.timestamp - self._charger_status_changed_at < timedelta(
+                seconds=SCAN_INTERVAL_SETTLE_SECONDS
+            ):
+                # Följ upp statusändringen tätt, t.ex. att laddningen kommer igång.
+                return min(base, timedelta(seconds=SCAN_INTERVAL_FAST_SECONDS))
+            self._charger_status_changed_at = None
 
-                # else:
-                #     # Överskottet är för litet, ingen solenergiladdning.
-                #     self.active_control_mode_internal = CONTROL_MODE_MANUAL
-                #     self.should_charge_flag = False
-                #     reason_for_action = f"För lite solöverskott ({available_solar_surplus_w:.0f}W -> {calculated_solar_current_a:.1f}A < {min_solar_charge_current_a:.1f}A min)."
+        if self._solar_session_active:
+            window = self._solar_volatility_window
+            # Varierar överskottet mer än ett ampere-steg ändras målströmmen.
+            if (
+                window.maximum() - window.minimum()
+                >= self._charger_phases * VOLTAGE_PHASE_NEUTRAL
+            ):
+                return min(base, timedelta(seconds=SCAN_INTERVAL_FAST_SECONDS))
+            return base
 
-                #     # Återställ sessionen om den som avslutas var en solsession
-                #     if (
-                #         self.session_start_time_utc is not None
-                #         and not self._price_time_eligible_for_charging
-                #     ):
-                #         self._reset_session_data(reason_for_action)
-
-                # Markera att Pris/Tid inte är den aktiva logiken
-                # self._price_time_eligible_for_charging = False
-            ### KORRIGERING SLUTAR HÄR ###
-            # Om varken Pris/Tid eller Solenergi-villkoren är uppfyllda:
-            else:
-                self.active_control_mode_internal = (
-                    CONTROL_MODE_MANUAL  # Manuell/AV-läge.
-                )
-                self.should_charge_flag = False  # Ingen laddning.
-                reason_for_action = "Inga aktiva smarta laddningsvillkor uppfyllda."
-                # Om en session pågick, återställ den.
-                if self.session_start_time_utc is not None:
-                    self._reset_session_data(reason_for_action)
-                # Nollställ solenergi-specifika flaggor/timers.
-                self._solar_surplus_start_time = None
-                self._solar_session_active = False
-                self._price_time_eligible_for_charging = False
+        if not self._event_driven_updates:
+            return base
 
-        # Anropa metoden som faktiskt skickar kommandon till laddaren,
-        # baserat på de beslut som fattats ovan.
-        await self._control_charger(
-            self.should_charge_flag, self.target_charge_current_a, reason_for_action
-        )
+        if (
+            charger_status in EASEE_STATUS_DISCONNECTED
+            or charger_status == EASEE_STATUS_OFFLINE
+        ):
+            return max(base, timedelta(seconds=SCAN_INTERVAL_IDLE_SECONDS))
 
-        # Sätter det "officiella" aktiva styrningsläget som exponeras utåt.
-        # Om self.active_control_mode_internal är None (vilket det inte borde vara här), fall tillbaka till MANUELL.
-        self.active_control_mode = (
-            self.active_control_mode_internal or CONTROL_MODE_MANUAL
+        if (
+            not self.should_charge_flag
+            and charger_status != EASEE_STATUS_CHARGING
+            and snapshot.solar_production_w <= 0
+        ):
+            # Inget att styra och ingen solproduktion (t.ex. natt).
+            return max(base, timedelta(seconds=SCAN_INTERVAL_IDLE_SECONDS))
+
+        return base
+
+    def _schedule_time_edge(self, edge: datetime | None) -> None:
+        """Registrerar en väckning vid nästa prisperiod- eller schemagräns."""
+        if edge == self._time_edge_at:
+            return
+        self._cancel_time_edge()
+        if edge is None:
+            return
+        self._time_edge_at = edge
+        self._unsub_time_edge = async_track_point_in_time(
+            self.hass, self._handle_time_edge, edge
         )
-        # Uppdaterar tidsstämpeln för den senaste uppdateringen.
-        self.last_update_time = current_time
+        if self._debug_logging:
+            _LOGGER.debug("Nästa tidsgräns för omvärdering: %s.", edge)
 
-        # Loggar en sammanfattning av uppdateringscykelns resultat.
+    def _cancel_time_edge(self) -> None:
+        if self._unsub_time_edge is not None:
+            self._unsub_time_edge()
+            self._unsub_time_edge = None
+        self._time_edge_at = None
+
+    @callback
+    def _handle_time_edge(self, now: datetime) -> None:
+        """Kör en uppdatering exakt vid en prisperiod- eller schemagräns."""
+        self._unsub_time_edge = None
+        self._time_edge_at = None
+        if self._debug_logging:
+            _LOGGER.debug("Tidsgräns nådd (%s). Kör uppdatering.", now)
+        self._refresh_trigger = TRIGGER_TIME_EDGE
+        # Avbryter nästa pollning direkt. Annars kan en pollning som infaller
+        # samtidigt starta efter denna uppdatering och tappa bort den pollning
+        # som uppdateringen just schemalagt.
+        self._async_unsub_refresh()
+        self.hass.async_create_task(self.async_refresh())
+
+    def _apply_update_interval(self, interval: timedelta) -> None:
+        """Sätter intervallet som används när nästa pollning schemaläggs."""
+        if interval == self.update_interval:
+            return
         if self._debug_logging:
             _LOGGER.debug(
-                "Uppdateringscykel klar. Styrningsläge: %s. Ska ladda: %s. Ström: %.1fA. Anledning: %s. Laddarstatus: %s. Sol Aktiv: %s",  # LADE TILL Sol Aktiv
-                self.active_control_mode,
-                self.should_charge_flag,
-                self.target_charge_current_a,
-                reason_for_action,
-                charger_status,
-                self._solar_session_active,  # LADE TILL DENNA VARIABEL
+                "Ändrar uppdateringsintervall från %s till %s.",
+                self.update_interval,
+                interval,
             )
+        self.update_interval = interval
 
-        # Returnerar en dictionary med data som kan användas av sensorer kopplade till denna koordinator.
-        return self._current_coordinator_data(reason_for_action)
+    def _reason_text(self, reason: Reason) -> str:
+        """Anledningen som text. Formateras bara när anledningen har ändrats."""
+        if self._last_reason is None or self._last_reason[0] != reason:
+            self._last_reason = (reason, str(reason))
+        return self._last_reason[1]
 
-    def _current_coordinator_data(self, reason: str) -> dict[str, Any]:
+    def _current_coordinator_data(self, reason: Reason) -> dict[str, Any]:
+        cycle_summary = self._instrumentation.cycle.summary()
         return {
             "active_control_mode": self.active_control_mode
             if self.active_control_mode
             else CONTROL_MODE_MANUAL,
-            "should_charge_reason": reason,
+            "should_charge_reason": self._reason_text(reason),
+            "reason_code": reason.code,
+            "reason_counts": dict(self._instrumentation.reason_counts),
             "session_start_time_utc": self.session_start_time_utc.isoformat()
             if self.session_start_time_utc
             else None,
+            "command_queue_depth": self._command_scheduler.queue_depth,
+            "rejected_commands": self._command_scheduler.rejected_count,
+            "cycle_duration_p95_ms": cycle_summary["p95_ms"],
+            "cycle_duration": cycle_summary
+            | {
+                f"control_{key}": value
+                for key, value in self._instrumentation.control.summary().items()
+            },
+            "service_calls_last_hour": self._command_scheduler.sent_last_hour(),
+            "service_calls": dict(self._command_scheduler.sent_by_service),
+            "suppressed_commands": self._command_cache.suppressed_count,
+            "state_reads": self._instrumentation.state_reads,
+            "refreshes": sum(self._instrumentation.refresh_triggers.values()),
+            "refresh_triggers": dict(self._instrumentation.refresh_triggers),
+            "planned_charging_slots": [
+                slot.start.isoformat() for slot in self._charge_plan.slots
+            ]
+            if self._charge_plan
+            else None,
         }
 
     async def cleanup(self) -> None:
         _LOGGER.info("Rensar upp SmartEVChargingCoordinator...")
+        # Profileringen väntar inte på en laddare som avlastas.
+        self._stop_profiling()
         self._remove_listeners()
-
-    # Ny hjälpmetod i SmartEVChargingCoordinator
-    async def _is_manually_paused(self) -> bool:
-        """Kontrollerar om laddaren verkar vara manuellt pausad via appen."""
-        status_sensor_id = self.config.get(CONF_STATUS_SENSOR)
-        dyn_current_sensor_id = self.config.get(CONF_CHARGER_DYNAMIC_CURRENT_SENSOR)
-
-        if not status_sensor_id or not dyn_current_sensor_id:
-            return False  # Kan inte avgöra utan båda sensorerna
-
-        charger_status_state = self.hass.states.get(str(status_sensor_id))
-        charger_status = (
-            charger_status_state.state.lower()
-            if charger_status_state
-            else STATE_UNKNOWN
-        )
-
-        # Manuell paus kännetecknas av status awaiting_start OCH dynamisk ström satt till 0
-        if charger_status == EASEE_STATUS_AWAITING_START:
-            dyn_current = await self._get_number_value(
-                dyn_current_sensor_id, is_config_key=False
-            )
-            if dyn_current is not None and dyn_current == 0:
-                if self._debug_logging:
-                    _LOGGER.debug(
-                        "Laddaren är manuellt pausad (status: awaiting_start, dyn_current: 0A)."
-                    )
-                return True
-
-        return False
+        while self._main_fuse_listeners:
+            self._main_fuse_listeners.pop()()
+        while self._solar_window_listeners:
+            self._solar_window_listeners.pop()()
+        self._event_refresh_debouncer.async_shutdown()
+        self._command_scheduler.async_shutdown()
+        if self._fuse_hub is not None:
+            release_fuse_hub(self.hass, self.entry.entry_id)
+            self._fuse_hub = None
+        release_input_hub(self.hass, self.entry.entry_id)
+        self._cancel_time_edge()
@@ -0,0 +1,437 @@
+# File version: 2025-06-05 0.2.0
+"""Ren, synkron beslutsmotor för Smart EV Charging.
+
+Modulen har inga beroenden till Home Assistant. Den tar en ögonblicksbild av
+indata och föregående beslutstillstånd och returnerar ett beslut samt ett nytt
+tillstånd. Koordinatorn ansvarar för sidoeffekter (loggning, sessionstid och
+kommandon till laddaren). Det gör att logiken kan köras i simuleringar och
+backtester utan event loop.
+
+Prioritetsordning: frånkopplad -> huvudströmbrytare -> SoC -> Pris/Tid ->
+Solenergi -> manuellt.
+
+Med fasväxling väljs antalet faser efter beslutet. Byts fasläget fattas
+beslutet om med det nya antalet faser, så att solenergiladdningen kan starta
+på en fas i samma cykel.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+import math
+from typing import NamedTuple
+
+from .const import (
+    CONTROL_MODE_MANUAL,
+    CONTROL_MODE_PRICE_TIME,
+    CONTROL_MODE_SOLAR_SURPLUS,
+    EASEE_STATUS_CHARGING,
+    EASEE_STATUS_DISCONNECTED,
+    EASEE_STATUS_OFFLINE,
+    PHASES,
+    SINGLE_PHASE,
+    VOLTAGE_PHASE_NEUTRAL,
+)
+from .controller import (
+    SolarControllerSettings,
+    SolarControllerState,
+    step_solar_controller,
+)
+from .phase_switch import PhaseSwitchSettings, select_phases
+from .reasons import Reason, ReasonCode
+from .snapshot import InputSnapshot
+
+
+class DecisionState(NamedTuple):
+    """Tillstånd som förs vidare mellan två beslut."""
+
+    session_active: bool = False
+    solar_session_active: bool = False
+    price_time_eligible: bool = False
+    # PI-regulatorns tillstånd, None när regulatorn inte används eller ska starta om.
+    solar_controller: SolarControllerState | None = None
+    # Antal faser laddaren laddar på och när fasläget senast växlades.
+    phases: int = PHASES
+    phases_changed_at: datetime | None = None
+
+
+class Decision(NamedTuple):
+    """Resultatet av en beslutsomgång."""
+
+    control_mode: str
+    should_charge: bool
+    target_current_a: float
+    # Anledningens kod och parametrar. Texten byggs först när den behövs.
+    cause: Reason
+    # Anledning att återställa sessionen, eller None om sessionen ska lämnas orörd.
+    reset_session_reason: str | None = None
+    # En ny Pris/Tid-session ska startas (sessionstiden sätts till nu).
+    start_session: bool = False
+    # En ny solenergisession har påbörjats i denna omgång.
+    solar_session_started: bool = False
+    # Anledningen är intressant nog att loggas på INFO-nivå.
+    log_reason: bool = False
+    # Antal faser laddaren ska ladda på.
+    phases: int = PHASES
+
+    @property
+    def reason(self) -> str:
+        """Anledningen som text. Byggs vid varje anrop."""
+        return str(self.cause)
+
+
+def calculate_solar_current(
+    solar_production_w: float, solar_buffer_w: float, phases: int = PHASES
+) -> float:
+    """Returnerar hel ampere som solöverskottet räcker till (kan vara negativ)."""
+    return math.floor(
+        (solar_production_w - solar_buffer_w) / (phases * VOLTAGE_PHASE_NEUTRAL)
+    )
+
+
+def net_solar_surplus_w(
+    solar_production_w: float,
+    house_power_w: float | None,
+    grid_power_w: float | None,
+    charger_power_w: float | None,
+) -> float:
+    """Solöverskottet (W) som laddaren kan använda.
+
+    Med nätmätare är överskottet exporten plus laddarens egen effekt. Med
+    husets last är det produktionen minus lasten plus laddarens egen effekt
+    (lasten antas inkludera laddaren). Annars används hela solproduktionen.
+    Laddarens egen effekt läggs tillbaka så att regleringen inte jagar sin
+    egen förbrukning.
+    """
+    charger_power_w = charger_power_w or 0.0
+    if grid_power_w is not None:
+        return charger_power_w - grid_power_w
+    if house_power_w is not None:
+        return solar_production_w - house_power_w + charger_power_w
+    return solar_production_w
+
+
+def calculate_solar_surplus_w(snapshot: InputSnapshot) -> float:
+    """Cykelns momentana solöverskott (W)."""
+    return net_solar_surplus_w(
+        snapshot.solar_production_w,
+        snapshot.house_power_w,
+        snapshot.grid_power_w,
+        snapshot.charger_power_w,
+    )
+
+
+def _solar_surplus_w(snapshot: InputSnapshot) -> float:
+    """Överskottet som styr solenergiladdningen (medelvärdet om fönster finns)."""
+    if snapshot.solar_surplus_average_w is not None:
+        return snapshot.solar_surplus_average_w
+    return calculate_solar_surplus_w(snapshot)
+
+
+def _charger_available(snapshot: InputSnapshot) -> bool:
+    """Laddaren är ansluten, online och huvudströmbrytaren är PÅ."""
+    charger_status = snapshot.charger_status
+    return (
+        charger_status not in EASEE_STATUS_DISCONNECTED
+        and charger_status != EASEE_STATUS_OFFLINE
+        and snapshot.charger_main_switch_on
+    )
+
+
+def _soc_limit_reached(snapshot: InputSnapshot) -> bool:
+    soc = snapshot.current_soc_percent
+    soc_limit = snapshot.target_soc_limit
+    return soc is not None and soc_limit is not None and soc >= soc_limit
+
+
+def evaluate(
+    snapshot: InputSnapshot,
+    state: DecisionState,
+    solar_controller: SolarControllerSettings | None = None,
+    phase_switch: PhaseSwitchSettings | None = None,
+) -> tuple[Decision, DecisionState]:
+    """Fattar ett laddningsbeslut utifrån indata och föregående tillstånd.
+
+    Med `solar_controller` styrs solenergiladdningens ström av en PI-regulator
+    i stället för att räknas om från grunden varje cykel. Med `phase_switch`
+    växlar laddaren till en fas när solöverskottet inte räcker till tre.
+    """
+    decision, new_state = _evaluate(snapshot, state, solar_controller)
+    phases, phases_changed_at = state.phases, state.phases_changed_at
+    if (
+        phase_switch is not None
+        and _charger_available(snapshot)
+        and not _soc_limit_reached(snapshot)
+    ):
+        surplus_w: float | None = None
+        solar_mode = (
+            decision.control_mode != CONTROL_MODE_PRICE_TIME
+            and snapshot.solar_charging_enabled
+            and snapshot.solar_schedule_active
+            and snapshot.solar_suspended_until is None
+        )
+        if solar_mode:
+            surplus_w = _solar_surplus_w(snapshot) - snapshot.solar_buffer_w
+        if solar_mode or decision.control_mode == CONTROL_MODE_PRICE_TIME:
+            phases, phases_changed_at = select_phases(
+                phase_switch,
+                state.phases,
+                state.phases_changed_at,
+                surplus_w,
+                snapshot.min_solar_charge_current_a,
+                snapshot.timestamp,
+            )
+        if phases != state.phases:
+            # Regulatorn startar om, dess tillstånd gällde det gamla fasläget.
+            decision, new_state = _evaluate(
+                snapshot,
+                state._replace(phases=phases, solar_controller=None),
+                solar_controller,
+            )
+    return decision._replace(phases=phases), new_state._replace(
+        phases=phases, phases_changed_at=phases_changed_at
+    )
+
+
+def _evaluate(
+    snapshot: InputSnapshot,
+    state: DecisionState,
+    solar_controller: SolarControllerSettings | None,
+) -> tuple[Decision, DecisionState]:
+    """Beslutet för ett givet fasläge, i prioritetsordning."""
+    charger_status = snapshot.charger_status
+    hw_max = snapshot.charger_hw_max_amps
+    session_active = state.session_active
+
+    if charger_status in EASEE_STATUS_DISCONNECTED or charger_status == EASEE_STATUS_OFFLINE:
+        reason = Reason(ReasonCode.CHARGER_OFFLINE, (charger_status,))
+        return (
+            Decision(
+                CONTROL_MODE_MANUAL,
+                False,
+                hw_max,
+                reason,
+                reset_session_reason=str(reason) if session_active else None,
+            ),
+            DecisionState(False, state.solar_session_active, False),
+        )
+
+    if not snapshot.charger_main_switch_on:
+        reason = Reason(ReasonCode.MAIN_SWITCH_OFF)
+        return (
+            Decision(
+                CONTROL_MODE_MANUAL,
+                False,
+                hw_max,
+                reason,
+                reset_session_reason=str(reason) if session_active else None,
+            ),
+            DecisionState(False, False, False),
+        )
+
+    if _soc_limit_reached(snapshot):
+        reason = Reason(
+            ReasonCode.SOC_LIMIT_REACHED,
+            (snapshot.current_soc_percent, snapshot.target_soc_limit),
+        )
+        return (
+            Decision(
+                CONTROL_MODE_MANUAL,
+                False,
+                hw_max,
+                reason,
+                reset_session_reason=str(reason) if session_active else None,
+                log_reason=True,
+            ),
+            DecisionState(False, False, False),
+        )
+
+    price = snapshot.current_price_kr
+    max_price = snapshot.max_accepted_price_kr
+    price_time_conditions_met = (
+        snapshot.smart_charging_enabled
+        and price is not None
+        and price <= max_price
+        and snapshot.time_schedule_active
+        # Med en laddplan laddas bara under de planerade billigaste perioderna.
+        and snapshot.planned_slot_active is not False
+    )
+
+    if price_time_conditions_met:
+        reason = Reason(
+            ReasonCode.PRICE_TIME_PLANNED_SLOT
+            if snapshot.planned_slot_active
+            else ReasonCode.PRICE_TIME_ACTIVE,
+            (price, max_price),
+        )
+        # Ny session om ingen pågår eller om den pågående inte var en Pris/Tid-session.
+        start_session = not session_active or not state.price_time_eligible
+        return (
+            Decision(
+                CONTROL_MODE_PRICE_TIME,
+                True,
+                hw_max,
+                reason,
+                reset_session_reason="Avslutar föregående session för att starta Pris/Tid"
+                if start_session and session_active
+                else None,
+                start_session=start_session,
+            ),
+            DecisionState(True, False, True),
+        )
+
+    if snapshot.solar_charging_enabled and snapshot.solar_schedule_active:
+        if snapshot.solar_suspended_until is not None:
+            # Natt: solöverskottet utvärderas inte förrän vid soluppgång.
+            reason = Reason(ReasonCode.SOLAR_SUSPENDED)
+            return (
+                Decision(
+                    CONTROL_MODE_MANUAL,
+                    False,
+                    hw_max,
+                    reason,
+                    reset_session_reason=str(reason)
+                    if session_active and state.solar_session_active
+                    else None,
+                ),
+                DecisionState(
+                    session_active and not state.solar_session_active, False, False
+                ),
+            )
+        return _evaluate_solar(snapshot, state, solar_controller)
+
+    reason = Reason(ReasonCode.NO_ACTIVE_CONDITIONS)
+    if snapshot.smart_charging_enabled and snapshot.planned_slot_active is False:
+        reason = Reason(ReasonCode.WAITING_FOR_PLANNED_SLOT)
+    return (
+        Decision(
+            CONTROL_MODE_MANUAL,
+            False,
+            hw_max,
+            reason,
+            reset_session_reason=str(reason) if session_active else None,
+        ),
+        DecisionState(False, False, False),
+    )
+
+
+def _evaluate_solar(
+    snapshot: InputSnapshot,
+    state: DecisionState,
+    solar_controller: SolarControllerSettings | None,
+) -> tuple[Decision, DecisionState]:
+    """Solenergigrenen. Pris/Tid är per definition inte uppfyllt här."""
+    hw_max = snapshot.charger_hw_max_amps
+    min_current = snapshot.min_solar_charge_current_a
+    phases = state.phases
+    # Med ett medelvärdesfönster styrs nivån av det glidande medelvärdet.
+    surplus_w = _solar_surplus_w(snapshot)
+    controller_state: SolarControllerState | None = None
+    if solar_controller is not None:
+        # Laddarens uppmätta ström är regulatorns ärvärde när bilen laddar.
+        measured_a = (
+            snapshot.charger_power_w / (phases * VOLTAGE_PHASE_NEUTRAL)
+            if snapshot.charger_power_w is not None
+            and snapshot.charger_status == EASEE_STATUS_CHARGING
+            else None
+        )
+        solar_current, controller_state = step_solar_controller(
+            solar_controller,
+            state.solar_controller,
+            (surplus_w - snapshot.solar_buffer_w) / (phases * VOLTAGE_PHASE_NEUTRAL),
+            hw_max,
+            snapshot.timestamp,
+            measured_a,
+        )
+    else:
+        # Säkerställ att beräknad ström inte är negativ innan jämförelser
+        solar_current = max(
+            0.0, calculate_solar_current(surplus_w, snapshot.solar_buffer_w, phases)
+        )
+
+    # Med ett startfönster startar en ny session bara om även det lägsta
+    # överskottet i fönstret räcker till minimiströmmen.
+    start_current = (
+        max(
+            0.0,
+            calculate_solar_current(
+                snapshot.solar_surplus_minimum_w, snapshot.solar_buffer_w, phases
+            ),
+        )
+        if snapshot.solar_surplus_minimum_w is not None
+        else solar_current
+    )
+    # Med ett stoppfönster fortsätter en pågående session så länge det högsta
+    # överskottet i fönstret räcker, så att kortvariga dippar inte pausar.
+    stop_current = (
+        max(
+            0.0,
+            calculate_solar_current(
+                snapshot.solar_surplus_maximum_w, snapshot.solar_buffer_w, phases
+            ),
+        )
+        if snapshot.solar_surplus_maximum_w is not None
+        else solar_current
+    )
+    if state.solar_session_active:
+        charge = stop_current >= min_current
+    else:
+        charge = (
+            solar_current >= min_current
+            and start_current >= min_current
+            and snapshot.solar_start_window_filled
+        )
+    if charge:
+        # Tillräcklig ström för att starta eller fortsätta ladda aktivt
+        target = min(max(solar_current, min_current), hw_max)
+        reason = Reason(
+            ReasonCode.SOLAR_ACTIVE_SINGLE_PHASE
+            if phases == SINGLE_PHASE
+            else ReasonCode.SOLAR_ACTIVE,
+            (solar_current, min_current, target),
+        )
+        session_active = state.session_active
+        reset_reason = None
+        started = not state.solar_session_active
+        if started and (not session_active or state.price_time_eligible):
+            # Återställer; ny starttid sätts av styrningen av laddaren.
+            reset_reason = str(reason)
+            session_active = False
+        return (
+            Decision(
+                CONTROL_MODE_SOLAR_SURPLUS,
+                True,
+                target,
+                reason,
+                reset_session_reason=reset_reason,
+                solar_session_started=started,
+            ),
+            DecisionState(session_active, True, False, controller_state),
+        )
+
+    if state.solar_session_active:
+        # Sessionen VAR aktiv men strömmen har sjunkit under minimigränsen.
+        # Sätt ström till 0A men behåll sessionen som "aktiv" (pausad av sollogiken).
+        return (
+            Decision(
+                CONTROL_MODE_MANUAL,
+                True,
+                0.0,
+                Reason(ReasonCode.SOLAR_PAUSED, (solar_current, min_current)),
+                log_reason=True,
+            ),
+            DecisionState(state.session_active, True, False, controller_state),
+        )
+
+    if solar_current >= min_current and start_current < min_current:
+        reason = Reason(ReasonCode.SOLAR_WAITING_FOR_STABLE, (start_current, min_current))
+    elif solar_current >= min_current:
+        reason = Reason(
+            ReasonCode.SOLAR_START_WINDOW_FILLING, (start_current, min_current)
+        )
+    else:
+        reason = Reason(ReasonCode.SOLAR_INSUFFICIENT, (solar_current, min_current))
+    return (
+        Decision(CONTROL_MODE_MANUAL, False, hw_max, reason),
+        DecisionState(state.session_active, False, False, controller_state),
+    )
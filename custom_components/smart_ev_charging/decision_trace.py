@@ -0,0 +1,119 @@
+# File version: 2025-06-05 0.2.0
+"""Spår av de senaste besluten för diagnostik.
+
+Varje beslutscykel sparas som en kompakt post i en ringbuffert av fast
+storlek: tidpunkt, vad som väckte cykeln, valt läge, anledning (kod och
+parametrar), målström, indata och de kommandon som skickades. Indata sparas
+som en tupel i samma ordning som `TRACE_INPUT_FIELDS` och kommandon som
+(tjänst, värden) utan enhets-ID. Posterna packas upp till dictionaries först när
+diagnostiken laddas ned.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from datetime import datetime
+from operator import attrgetter
+from typing import Any, NamedTuple
+
+from .reasons import Reason
+from .snapshot import InputSnapshot
+
+# Fälten i ögonblicksbilden som sparas för varje beslut.
+TRACE_INPUT_FIELDS: tuple[str, ...] = (
+    "charger_status",
+    "charger_main_switch_on",
+    "smart_charging_enabled",
+    "solar_charging_enabled",
+    "current_price_kr",
+    "max_accepted_price_kr",
+    "time_schedule_active",
+    "solar_schedule_active",
+    "planned_slot_active",
+    "solar_production_w",
+    "house_power_w",
+    "grid_power_w",
+    "charger_power_w",
+    "solar_surplus_average_w",
+    "charger_hw_max_amps",
+    "dynamic_current_limit_a",
+    "current_soc_percent",
+    "target_soc_limit",
+)
+
+_input_values = attrgetter(*TRACE_INPUT_FIELDS)
+
+
+class DecisionRecord(NamedTuple):
+    """Ett beslut i spåret."""
+
+    timestamp: datetime
+    trigger: str
+    mode: str
+    should_charge: bool
+    target_current_a: float
+    reason: Reason
+    inputs: tuple[Any, ...]
+    commands: tuple[tuple[str, tuple[Any, ...]], ...]
+
+
+def command_values(data: dict[str, Any]) -> tuple[Any, ...]:
+    """Kommandots värden utan enhets-ID, t.ex. (16.0,) eller ("pause",)."""
+    return tuple(value for key, value in data.items() if key != "device_id")
+
+
+class DecisionTrace:
+    """Ringbuffert med de senaste besluten."""
+
+    __slots__ = ("_records",)
+
+    def __init__(self, capacity: int) -> None:
+        """Skapa ett tomt spår för högst `capacity` beslut."""
+        self._records: deque[DecisionRecord] = deque(maxlen=capacity)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def record(
+        self,
+        snapshot: InputSnapshot,
+        trigger: str,
+        mode: str,
+        should_charge: bool,
+        target_current_a: float,
+        reason: Reason,
+        commands: list[tuple[str, tuple[Any, ...]]],
+    ) -> None:
+        """Sparar ett beslut. Det äldsta beslutet släpps när spåret är fullt."""
+        self._records.append(
+            DecisionRecord(
+                snapshot.timestamp,
+                trigger,
+                mode,
+                should_charge,
+                target_current_a,
+                reason,
+                _input_values(snapshot),
+                tuple(commands),
+            )
+        )
+
+    def as_dicts(self) -> list[dict[str, Any]]:
+        """Besluten, äldst först, som dictionaries för nedladdning."""
+        return [
+            {
+                "timestamp": record.timestamp.isoformat(),
+                "trigger": record.trigger,
+                "mode": record.mode,
+                "should_charge": record.should_charge,
+                "target_current_a": record.target_current_a,
+                "reason_code": record.reason.code,
+                "reason": str(record.reason),
+                "inputs": dict(zip(TRACE_INPUT_FIELDS, record.inputs)),
+                "commands": [
+                    {"service": service, "values": list(values)}
+                    for service, values in record.commands
+                ],
+            }
+            for record in self._records
+        ]
@@ -0,0 +1,73 @@
+# File version: 2025-06-05 0.2.0
+"""Diagnostik för Smart EV Charging.
+
+Diagnostiken innehåller konfigurationen, koordinatorns senaste data och
+spåret med de senaste besluten. Laddarens enhets-ID och alla konfigurerade
+entitets-ID:n maskeras.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_CHARGER_DEVICE,
+    CONF_CHARGER_DYNAMIC_CURRENT_SENSOR,
+    CONF_CHARGER_ENABLED_SWITCH_ID,
+    CONF_CHARGER_MAX_CURRENT_LIMIT_SENSOR,
+    CONF_CHARGER_POWER_SENSOR,
+    CONF_EV_SOC_SENSOR,
+    CONF_GRID_POWER_SENSOR,
+    CONF_HOUSE_POWER_SENSOR,
+    CONF_PHASE_CURRENT_SENSOR_L1,
+    CONF_PHASE_CURRENT_SENSOR_L2,
+    CONF_PHASE_CURRENT_SENSOR_L3,
+    CONF_PRICE_SENSOR,
+    CONF_SOLAR_PRODUCTION_SENSOR,
+    CONF_SOLAR_SCHEDULE_ENTITY,
+    CONF_STATUS_SENSOR,
+    CONF_TIME_SCHEDULE_ENTITY,
+    DOMAIN,
+)
+from .coordinator import SmartEVChargingCoordinator
+
+TO_REDACT = {
+    CONF_CHARGER_DEVICE,
+    CONF_CHARGER_DYNAMIC_CURRENT_SENSOR,
+    CONF_CHARGER_ENABLED_SWITCH_ID,
+    CONF_CHARGER_MAX_CURRENT_LIMIT_SENSOR,
+    CONF_CHARGER_POWER_SENSOR,
+    CONF_EV_SOC_SENSOR,
+    CONF_GRID_POWER_SENSOR,
+    CONF_HOUSE_POWER_SENSOR,
+    CONF_PHASE_CURRENT_SENSOR_L1,
+    CONF_PHASE_CURRENT_SENSOR_L2,
+    CONF_PHASE_CURRENT_SENSOR_L3,
+    CONF_PRICE_SENSOR,
+    CONF_SOLAR_PRODUCTION_SENSOR,
+    CONF_SOLAR_SCHEDULE_ENTITY,
+    CONF_STATUS_SENSOR,
+    CONF_TIME_SCHEDULE_ENTITY,
+    "device_id",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Returnerar diagnostik för en config entry."""
+    coordinator: SmartEVChargingCoordinator = hass.data[DOMAIN][entry.entry_id][
+        "coordinator"
+    ]
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+        "coordinator_data": async_redact_data(coordinator.data or {}, TO_REDACT),
+        "decision_trace": coordinator.decision_trace.as_dicts(),
+    }
@@ -0,0 +1,47 @@
+# File version: 2025-06-05 0.2.0
+"""Skydd mot att huvudsäkringen löser ut.
+
+Fasströmmarna mäts vid elmätaren (P1/HAN) och inkluderar laddarens egen
+ström, som därför ska vara den uppmätta strömmen och inte strömgränsen. Bilen
+drar ofta mindre än gränsen. Laddaren antas dra samma ström på varje fas den
+laddar på, vid 1-fasladdning bara på L1. Den högsta tillåtna laddströmmen är därför
+säkringen minus marginalen minus husets övriga last på den mest belastade
+av laddarens faser.
+
+Gränsen avrundas nedåt, så att den aldrig ligger över det som ryms under
+säkringen minus marginalen, och blir aldrig negativ. Koordinatorn anropar
+vakten direkt från fassensorernas tillståndsförändringar, utan att köra hela
+beslutscykeln.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+import math
+
+from .const import PHASES
+
+
+def main_fuse_limit_a(
+    phase_currents_a: Iterable[float | None],
+    charger_current_a: float,
+    fuse_current_a: float,
+    margin_a: float,
+    charger_phases: int = PHASES,
+) -> float | None:
+    """Högsta laddström (A) som håller alla faser under säkringen minus marginalen.
+
+    Laddaren laddar på de första `charger_phases` faserna. Returnerar None om
+    ingen av dem har ett giltigt värde. Resultatet avrundas nedåt till en
+    decimal och blir aldrig negativt.
+    """
+    measured = [
+        current
+        for current in list(phase_currents_a)[:charger_phases]
+        if current is not None
+    ]
+    if not measured:
+        return None
+    house_peak_a = max(measured) - charger_current_a
+    limit_a = fuse_current_a - margin_a - house_peak_a
+    return max(math.floor(limit_a * 10) / 10, 0.0)
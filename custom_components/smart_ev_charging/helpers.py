@@ -0,0 +1,62 @@
+# File version: 2025-06-05 0.2.0
+"""Hjälpfunktioner för Smart EV Charging."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Collection
+
+from homeassistant.core import Event, HomeAssistant, State, callback
+from homeassistant.helpers.event import async_track_state_change_event
+
+from .const import DOMAIN
+
+StateCondition = Callable[[State | None], bool]
+
+
+def charger_unique_id(charger_device_id: str) -> str:
+    """Unikt ID för en config entry. Varje laddare har en egen entry."""
+    return f"{DOMAIN}_{charger_device_id}"
+
+
+def state_in(states: str | Collection[str]) -> StateCondition:
+    """Returnerar ett villkor som är uppfyllt när entiteten har något av tillstånden."""
+    wanted = {states} if isinstance(states, str) else set(states)
+    return lambda state_obj: state_obj is not None and state_obj.state in wanted
+
+
+async def async_wait_for_state(
+    hass: HomeAssistant,
+    entity_id: str,
+    condition: str | Collection[str] | StateCondition,
+    timeout: float,
+) -> State | None:
+    """Väntar tills en entitet uppfyller ett villkor, eller tills tiden löper ut.
+
+    Villkoret kan anges som ett tillstånd, en samling tillstånd eller en
+    funktion som tar entitetens State. Väntan drivs av tillståndsförändringar
+    och returnerar direkt om villkoret redan är uppfyllt. Returnerar det
+    State som uppfyllde villkoret, eller None om tiden löpte ut.
+    """
+    check = condition if callable(condition) else state_in(condition)
+
+    current = hass.states.get(entity_id)
+    if check(current):
+        return current
+
+    future: asyncio.Future[State | None] = hass.loop.create_future()
+
+    @callback
+    def _state_changed(event: Event) -> None:
+        new_state = event.data.get("new_state")
+        if not future.done() and check(new_state):
+            future.set_result(new_state)
+
+    unsub = async_track_state_change_event(hass, [entity_id], _state_changed)
+    try:
+        async with asyncio.timeout(timeout):
+            return await future
+    except TimeoutError:
+        return None
+    finally:
+        unsub()
@@ -0,0 +1,157 @@
+# File version: 2025-06-05 0.2.0
+"""Gemensam huvudsäkring för flera laddare.
+
+Varje config entry styr en laddare. Entries som har en gemensam huvudsäkring
+konfigurerad registreras i en gemensam hubb i `hass.data[DOMAIN]`. Varje
+koordinator rapporterar sin önskade ström i sin cykel och får tillbaka sin
+andel av säkringen (se `allocation.py`).
+
+Sänks andelen för en annan laddare begränsas den direkt, utan att vänta på
+dess nästa cykel. Begränsningarna skickas parallellt, men högst
+`max_concurrent_commands` åt gången. Ökar andelen väcks laddarens
+koordinator så att den kan ta ut den nya andelen.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+
+from homeassistant.core import HomeAssistant
+
+from .allocation import ChargerDemand, allocate_fair_share
+from .const import DOMAIN, FUSE_HUB_DATA_KEY, HUB_MAX_CONCURRENT_COMMANDS
+
+_LOGGER = logging.getLogger(f"custom_components.{DOMAIN}")
+
+# Tar emot ny tillåten ström (A). 0 betyder att laddaren måste pausa.
+CurrentLimiter = Callable[[float], Awaitable[None]]
+
+
+class _HubMember:
+    """En registrerad laddare i hubben."""
+
+    __slots__ = ("demand", "fuse_current_a", "limiter", "wake")
+
+    def __init__(
+        self,
+        fuse_current_a: float,
+        limiter: CurrentLimiter,
+        wake: Callable[[], None],
+    ) -> None:
+        self.fuse_current_a = fuse_current_a
+        self.limiter = limiter
+        self.wake = wake
+        self.demand: ChargerDemand | None = None
+
+
+class FuseSharingHub:
+    """Fördelar en gemensam säkringsbudget mellan registrerade laddare."""
+
+    def __init__(self, max_concurrent_commands: int) -> None:
+        """Initialisera en tom hubb."""
+        self._members: dict[str, _HubMember] = {}
+        self._allocation: dict[str, float] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrent_commands)
+
+    @property
+    def budget_a(self) -> float:
+        """Gemensam budget. Skiljer sig säkringarna åt används den minsta."""
+        if not self._members:
+            return 0.0
+        return min(member.fuse_current_a for member in self._members.values())
+
+    @property
+    def allocation(self) -> dict[str, float]:
+        """Senaste fördelningen per entry_id."""
+        return dict(self._allocation)
+
+    def register(
+        self,
+        entry_id: str,
+        fuse_current_a: float,
+        limiter: CurrentLimiter,
+        wake: Callable[[], None],
+    ) -> None:
+        """Lägger till en laddare i hubben."""
+        self._members[entry_id] = _HubMember(fuse_current_a, limiter, wake)
+
+    def unregister(self, entry_id: str) -> None:
+        """Tar bort en laddare. Övriga väcks så att dess andel kan fördelas om."""
+        if self._members.pop(entry_id, None) is None:
+            return
+        self._allocation.pop(entry_id, None)
+        for member in self._members.values():
+            member.wake()
+
+    @property
+    def is_empty(self) -> bool:
+        """Inga laddare är registrerade."""
+        return not self._members
+
+    async def async_update_demand(self, entry_id: str, demand: ChargerDemand) -> float:
+        """Registrerar en laddares önskemål och returnerar dess tilldelade ström."""
+        member = self._members.get(entry_id)
+        if member is None:
+            return demand.requested_a
+        member.demand = demand
+
+        new_allocation = allocate_fair_share(
+            self.budget_a,
+            {
+                key: other.demand
+                for key, other in self._members.items()
+                if other.demand is not None
+            },
+        )
+        previous = self._allocation
+        self._allocation = new_allocation
+
+        reduced: list[tuple[_HubMember, float]] = []
+        for key, allowed_a in new_allocation.items():
+            if key == entry_id:
+                continue
+            previous_a = previous.get(key)
+            if previous_a is None or allowed_a == previous_a:
+                continue
+            other = self._members[key]
+            if allowed_a < previous_a:
+                reduced.append((other, allowed_a))
+            else:
+                other.wake()
+
+        if reduced:
+            await asyncio.gather(
+                *(self._async_limit(other, allowed_a) for other, allowed_a in reduced)
+            )
+        return new_allocation.get(entry_id, 0.0)
+
+    async def _async_limit(self, member: _HubMember, allowed_a: float) -> None:
+        async with self._semaphore:
+            try:
+                await member.limiter(allowed_a)
+            except Exception:
+                _LOGGER.exception("Fel vid begränsning av laddare för delad säkring")
+
+
+def get_fuse_hub(hass: HomeAssistant) -> FuseSharingHub:
+    """Hämtar den gemensamma hubben, eller skapar den."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    hub = domain_data.get(FUSE_HUB_DATA_KEY)
+    if hub is None:
+        hub = domain_data[FUSE_HUB_DATA_KEY] = FuseSharingHub(
+            HUB_MAX_CONCURRENT_COMMANDS
+        )
+    return hub
+
+
+def release_fuse_hub(hass: HomeAssistant, entry_id: str) -> None:
+    """Avregistrerar en laddare och tar bort hubben när den är tom."""
+    domain_data = hass.data.get(DOMAIN, {})
+    hub: FuseSharingHub | None = domain_data.get(FUSE_HUB_DATA_KEY)
+    if hub is None:
+        return
+    hub.unregister(entry_id)
+    if hub.is_empty:
+        domain_data.pop(FUSE_HUB_DATA_KEY, None)
@@ -0,0 +1,100 @@
+# File version: 2025-06-05 0.2.0
+"""Gemensamma prenumerationer och tolkade värden för indataentiteter.
+
+Flera config entries pekar ofta på samma elprissensor, solproduktionssensor
+och husets effektsensor. Hubben i `hass.data[DOMAIN]` äger en enda
+prenumeration per entitet och fördelar varje tillståndsförändring till de
+koordinatorer som är intresserade. Tolkade och normaliserade sensorvärden
+delas via en gemensam `ParsedValueCache`, så att varje nytt tillstånd tolkas
+en gång oavsett hur många laddare som läser det.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import logging
+
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_state_change_event
+
+from .const import DOMAIN, INPUT_HUB_DATA_KEY
+from .value_cache import ParsedValueCache
+
+_LOGGER = logging.getLogger(f"custom_components.{DOMAIN}")
+
+StateChangeAction = Callable[[Event], None]
+
+
+class SharedInputHub:
+    """En prenumeration och ett tolkat värde per indataentitet, för alla entries."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialisera en tom hubb."""
+        self.hass = hass
+        self.value_cache = ParsedValueCache()
+        self._entries: set[str] = set()
+        self._subscribers: dict[str, list[StateChangeAction]] = {}
+        self._unsubscribers: dict[str, CALLBACK_TYPE] = {}
+
+    @property
+    def subscribed_entities(self) -> list[str]:
+        """Entiteter som hubben prenumererar på."""
+        return list(self._subscribers)
+
+    @callback
+    def async_subscribe(
+        self, entity_id: str, action: StateChangeAction
+    ) -> CALLBACK_TYPE:
+        """Anropar `action` vid varje tillståndsförändring för entiteten.
+
+        Returnerar en funktion som avslutar prenumerationen. Den underliggande
+        lyssnaren tas bort när den sista prenumeranten har avslutat.
+        """
+        subscribers = self._subscribers.get(entity_id)
+        if subscribers is None:
+            subscribers = self._subscribers[entity_id] = []
+            self._unsubscribers[entity_id] = async_track_state_change_event(
+                self.hass, [entity_id], self._handle_state_change
+            )
+        subscribers.append(action)
+
+        @callback
+        def _unsubscribe() -> None:
+            subscribers.remove(action)
+            if not subscribers and self._subscribers.get(entity_id) is subscribers:
+                del self._subscribers[entity_id]
+                self._unsubscribers.pop(entity_id)()
+
+        return _unsubscribe
+
+    @callback
+    def _handle_state_change(self, event: Event) -> None:
+        entity_id = event.data.get("entity_id")
+        for action in tuple(self._subscribers.get(entity_id, ())):
+            try:
+                action(event)
+            except Exception:
+                _LOGGER.exception(
+                    "Fel vid hantering av tillståndsförändring för %s", entity_id
+                )
+
+
+def get_input_hub(hass: HomeAssistant, entry_id: str) -> SharedInputHub:
+    """Hämtar den gemensamma hubben, eller skapar den, och registrerar entryn."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    hub: SharedInputHub | None = domain_data.get(INPUT_HUB_DATA_KEY)
+    if hub is None:
+        hub = domain_data[INPUT_HUB_DATA_KEY] = SharedInputHub(hass)
+    hub._entries.add(entry_id)
+    return hub
+
+
+def release_input_hub(hass: HomeAssistant, entry_id: str) -> None:
+    """Avregistrerar en entry och tar bort hubben när ingen entry använder den."""
+    domain_data = hass.data.get(DOMAIN, {})
+    hub: SharedInputHub | None = domain_data.get(INPUT_HUB_DATA_KEY)
+    if hub is None:
+        return
+    hub._entries.discard(entry_id)
+    if not hub._entries:
+        domain_data.pop(INPUT_HUB_DATA_KEY, None)
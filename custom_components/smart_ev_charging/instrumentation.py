@@ -0,0 +1,100 @@
+# File version: 2025-06-05 0.2.0
+"""Mätvärden för koordinatorns beslutscykler.
+
+Koordinatorn mäter hur lång tid varje beslutscykel och styrningen av
+laddaren tar, hur många tillstånd som läses, vad som väckte cykeln
+(pollning, tillståndsförändring eller tidsgräns) och anledningen till varje
+beslut. Antalet skickade och undertryckta Easee-kommandon räknas av
+kommandolagret.
+
+Cykeltiderna sparas för de senaste cyklerna i en ringbuffert av fast
+storlek, så att percentilerna speglar det aktuella beteendet och minnet inte
+växer över tid. Percentilerna räknas bara ut när sensorerna uppdateras.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+import math
+
+TRIGGER_POLL = "poll"
+TRIGGER_EVENT = "event"
+TRIGGER_TIME_EDGE = "time_edge"
+
+# Antal cykler som percentilerna räknas över.
+LATENCY_SAMPLES = 256
+
+
+class LatencyHistogram:
+    """Fördelningen av de senaste mätta tiderna (ms)."""
+
+    __slots__ = ("_samples", "count")
+
+    def __init__(self, capacity: int = LATENCY_SAMPLES) -> None:
+        """Skapa en tom fördelning för högst `capacity` tider."""
+        self._samples: deque[float] = deque(maxlen=capacity)
+        # Totalt antal mätningar, även de som fallit ur bufferten.
+        self.count = 0
+
+    def add(self, duration_ms: float) -> None:
+        """Lägger till en mätt tid."""
+        self._samples.append(duration_ms)
+        self.count += 1
+
+    def percentile(self, fraction: float) -> float | None:
+        """Percentilen (0-1, närmaste rang), eller None utan mätningar."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(math.ceil(fraction * len(ordered)), 1)
+        return ordered[rank - 1]
+
+    def maximum(self) -> float | None:
+        """Längsta tiden bland de senaste mätningarna, eller None."""
+        return max(self._samples) if self._samples else None
+
+    def summary(self) -> dict[str, float | int | None]:
+        """p50, p95 och max (ms, avrundade) samt antal mätningar."""
+        return {
+            "p50_ms": _round_ms(self.percentile(0.5)),
+            "p95_ms": _round_ms(self.percentile(0.95)),
+            "max_ms": _round_ms(self.maximum()),
+            "samples": self.count,
+        }
+
+
+def _round_ms(value: float | None) -> float | None:
+    return round(value, 2) if value is not None else None
+
+
+class CycleInstrumentation:
+    """Koordinatorns mätvärden för cykeltid, tillståndsläsningar och väckningar."""
+
+    __slots__ = (
+        "control",
+        "cycle",
+        "reason_counts",
+        "refresh_triggers",
+        "state_reads",
+    )
+
+    def __init__(self) -> None:
+        """Skapa nollställda mätvärden."""
+        self.cycle = LatencyHistogram()
+        self.control = LatencyHistogram()
+        self.state_reads = 0
+        self.refresh_triggers: dict[str, int] = {
+            TRIGGER_POLL: 0,
+            TRIGGER_EVENT: 0,
+            TRIGGER_TIME_EDGE: 0,
+        }
+        # Antal cykler per anledningskod, t.ex. hur många som stoppats av SoC.
+        self.reason_counts: dict[str, int] = {}
+
+    def record_trigger(self, trigger: str) -> None:
+        """Räknar vad som väckte en beslutscykel."""
+        self.refresh_triggers[trigger] = self.refresh_triggers.get(trigger, 0) + 1
+
+    def record_reason(self, code: str) -> None:
+        """Räknar anledningen till en cykels beslut."""
+        self.reason_counts[code] = self.reason_counts.get(code, 0) + 1
@@ -0,0 +1,63 @@
+# File version: 2025-06-05 0.2.0
+"""Växling mellan 1-fas- och 3-fasladdning vid litet solöverskott.
+
+På tre faser kräver minsta laddström (6 A) ungefär 4,1 kW överskott. På en
+fas räcker ungefär 1,4 kW. Laddaren växlas därför till en fas när
+överskottet ligger mellan de två gränserna och tillbaka till tre faser när
+överskottet räcker till minsta ström på tre faser med marginal
+(hysteres). Efter en växling hålls fasläget minst en viss tid, så att
+laddarens kontaktorer inte slår fram och tillbaka.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from .const import PHASES, SINGLE_PHASE, VOLTAGE_PHASE_NEUTRAL
+
+
+class PhaseSwitchSettings(NamedTuple):
+    """Inställningar för fasväxlingen."""
+
+    hysteresis_w: float
+    min_dwell: timedelta
+
+
+def select_phases(
+    settings: PhaseSwitchSettings,
+    phases: int,
+    changed_at: datetime | None,
+    surplus_w: float | None,
+    min_current_a: float,
+    now: datetime,
+) -> tuple[int, datetime | None]:
+    """Väljer antal faser. Returnerar (faser, tidpunkt för senaste växling).
+
+    `surplus_w` är solöverskottet efter bufferten, eller None när laddaren
+    ska ladda med full effekt (t.ex. Pris/Tid) och därför vill ha tre faser.
+    Under minsta ström på en fas behålls det aktuella fasläget.
+    """
+    if changed_at is not None and now - changed_at < settings.min_dwell:
+        return phases, changed_at
+
+    if surplus_w is None:
+        wanted = PHASES
+    else:
+        three_phase_min_w = min_current_a * PHASES * VOLTAGE_PHASE_NEUTRAL
+        if phases == SINGLE_PHASE:
+            wanted = (
+                PHASES
+                if surplus_w >= three_phase_min_w + settings.hysteresis_w
+                else SINGLE_PHASE
+            )
+        else:
+            one_phase_min_w = min_current_a * SINGLE_PHASE * VOLTAGE_PHASE_NEUTRAL
+            wanted = (
+                SINGLE_PHASE
+                if one_phase_min_w <= surplus_w < three_phase_min_w
+                else PHASES
+            )
+    if wanted == phases:
+        return phases, changed_at
+    return wanted, now
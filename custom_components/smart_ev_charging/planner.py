@@ -0,0 +1,105 @@
+# File version: 2025-06-05 0.2.0
+"""Planering av laddning till de billigaste prisperioderna före en deadline.
+
+Prisprognosen läses från attributen `raw_today` och `raw_tomorrow` som
+Nordpool-liknande prissensorer exponerar. Perioderna kan vara timmar eller
+kvartar, planen väljer de billigaste perioderna tills den energi som behövs
+för att nå SoC-gränsen är täckt.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from datetime import datetime
+from typing import Any, NamedTuple
+
+from .time_edges import attribute_datetime
+
+FORECAST_ATTRIBUTES = ("raw_today", "raw_tomorrow")
+
+
+class PriceSlot(NamedTuple):
+    """En prisperiod i prognosen."""
+
+    start: datetime
+    end: datetime
+    price: float
+
+
+class ChargePlan(NamedTuple):
+    """Valda perioder, sorterade i tidsordning."""
+
+    slots: tuple[PriceSlot, ...]
+    energy_kwh: float
+    # Räcker de valda perioderna till hela energibehovet före deadline?
+    covers_need: bool
+
+    def is_active(self, now: datetime) -> bool:
+        """Är `now` inom en planerad period?"""
+        return any(slot.start <= now < slot.end for slot in self.slots)
+
+
+def parse_price_slots(attributes: Mapping[str, Any]) -> list[PriceSlot]:
+    """Läser prognosen ur prissensorns attribut. Ogiltiga poster hoppas över."""
+    slots: list[PriceSlot] = []
+    for attribute in FORECAST_ATTRIBUTES:
+        entries = attributes.get(attribute)
+        if not isinstance(entries, Iterable) or isinstance(entries, str):
+            continue
+        for entry in entries:
+            if not isinstance(entry, Mapping):
+                continue
+            start = attribute_datetime(entry, "start")
+            end = attribute_datetime(entry, "end")
+            value = entry.get("value")
+            if start is None or end is None or end <= start or value is None:
+                continue
+            try:
+                slots.append(PriceSlot(start, end, float(value)))
+            except (ValueError, TypeError):
+                continue
+    return slots
+
+
+def required_energy_kwh(
+    current_soc_percent: float, target_soc_limit: float, battery_capacity_kwh: float
+) -> float:
+    """Energi (kWh) som behövs för att nå SoC-gränsen."""
+    missing_percent = max(target_soc_limit - current_soc_percent, 0.0)
+    return battery_capacity_kwh * missing_percent / 100.0
+
+
+def plan_cheapest_slots(
+    slots: Iterable[PriceSlot],
+    now: datetime,
+    deadline: datetime | None,
+    energy_kwh: float,
+    charge_power_kw: float,
+) -> ChargePlan:
+    """Väljer de billigaste perioderna mellan nu och deadline.
+
+    En pågående period räknas bara med den tid som återstår av den. Vid
+    lika pris väljs den tidigaste perioden.
+    """
+    if energy_kwh <= 0 or charge_power_kw <= 0:
+        return ChargePlan((), 0.0, True)
+
+    candidates: list[tuple[PriceSlot, float]] = []
+    for slot in slots:
+        usable_end = slot.end if deadline is None else min(slot.end, deadline)
+        usable_start = max(slot.start, now)
+        if usable_end <= usable_start:
+            continue
+        hours = (usable_end - usable_start).total_seconds() / 3600
+        candidates.append((slot, hours * charge_power_kw))
+    candidates.sort(key=lambda item: (item[0].price, item[0].start))
+
+    chosen: list[PriceSlot] = []
+    planned_kwh = 0.0
+    for slot, slot_kwh in candidates:
+        if planned_kwh >= energy_kwh:
+            break
+        chosen.append(slot)
+        planned_kwh += slot_kwh
+    chosen.sort(key=lambda slot: slot.start)
+    return ChargePlan(tuple(chosen), energy_kwh, planned_kwh >= energy_kwh)
@@ -0,0 +1,223 @@
+# File version: 2025-06-05 0.2.0
+"""Profilering av koordinatorns beslutscykler på begäran.
+
+Tjänsten `smart_ev_charging.profile` profilerar de nästa N beslutscyklerna
+med cProfile och kan samtidigt mäta minnesallokeringar med tracemalloc.
+Resultatet skrivs till Home Assistants konfigurationskatalog: en `.prof`-fil
+som kan öppnas med t.ex. `python -m pstats` eller snakeviz, och en
+textfil med de rader som allokerat mest minne.
+
+Ett tjänsteanrop ger en enda profilerare som delas av alla laddare det
+gäller: en cProfile-profil och högst en tracemalloc-session. Cykler från
+olika laddare överlappar när de väntar på Home Assistant, och två aktiva
+profiler samtidigt går inte (Python 3.12 och senare ger ValueError). Högst
+en profilering pågår därför åt gången.
+
+Under profileringen ersätts koordinatorns `_async_update_data` av en
+profilerande variant på instansen. Efter laddarens sista cykel tas den bort
+igen, så profileringen kostar ingenting när den inte används. Eftersom
+cykeln väntar på Home Assistant kan även andra uppgifter som körs under
+tiden synas i profilen.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable, Iterable
+import cProfile
+import logging
+import tracemalloc
+from typing import Any, TypeVar
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+import homeassistant.helpers.config_validation as cv
+import homeassistant.util.dt as dt_util
+
+from .const import (
+    ATTR_CYCLES,
+    ATTR_TRACEMALLOC,
+    DEFAULT_PROFILE_CYCLES,
+    DOMAIN,
+    MAX_PROFILE_CYCLES,
+    PROFILE_TOP_ALLOCATIONS,
+    PROFILER_DATA_KEY,
+    SERVICE_PROFILE,
+)
+
+_LOGGER = logging.getLogger(f"custom_components.{DOMAIN}")
+
+_T = TypeVar("_T")
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CYCLES, default=DEFAULT_PROFILE_CYCLES): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MAX_PROFILE_CYCLES)
+        ),
+        vol.Optional(ATTR_TRACEMALLOC, default=False): cv.boolean,
+        vol.Optional("entry_id"): cv.string,
+    }
+)
+
+
+class CycleProfiler:
+    """Profilerar ett bestämt antal beslutscykler för en eller flera laddare."""
+
+    def __init__(
+        self,
+        name: str,
+        entry_ids: Iterable[str],
+        cycles: int,
+        trace_allocations: bool,
+    ) -> None:
+        """Skapa en profilerare för `cycles` cykler per laddare."""
+        self.name = name
+        self.cycles = cycles
+        # Kvarvarande cykler per laddare. En laddare tas bort när den är klar.
+        self._remaining = dict.fromkeys(entry_ids, cycles)
+        self._profile = cProfile.Profile()
+        self._active = 0
+        # tracemalloc stoppas bara om profileraren själv startade den.
+        self._trace_allocations = trace_allocations
+        self._started_tracemalloc = False
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    @property
+    def done(self) -> bool:
+        """Alla laddares cykler är profilerade."""
+        return not self._remaining
+
+    def is_profiling(self, entry_id: str) -> bool:
+        """Laddaren har cykler kvar att profilera."""
+        return entry_id in self._remaining
+
+    async def async_run(
+        self, entry_id: str, update: Callable[[], Awaitable[_T]]
+    ) -> _T:
+        """Kör en cykel med profileringen påslagen.
+
+        Profilen slås på av den första pågående cykeln och av när den sista
+        är klar, oavsett vilken laddare cyklerna tillhör.
+        """
+        if self._active == 0:
+            self._profile.enable()
+        self._active += 1
+        try:
+            return await update()
+        finally:
+            self._active -= 1
+            if self._active == 0:
+                self._profile.disable()
+            remaining = self._remaining.get(entry_id)
+            if remaining is not None:
+                if remaining <= 1:
+                    del self._remaining[entry_id]
+                else:
+                    self._remaining[entry_id] = remaining - 1
+
+    def release(self, entry_id: str) -> None:
+        """Slutar vänta på en laddare som avlastas innan den är klar."""
+        self._remaining.pop(entry_id, None)
+
+    def finish(self, base_path: str) -> list[str]:
+        """Skriver resultatet och returnerar de skrivna filerna.
+
+        Gör filskrivning och sortering av allokeringar, så den ska köras i
+        en executor-tråd.
+        """
+        prof_path = f"{base_path}.prof"
+        self._profile.dump_stats(prof_path)
+        written = [prof_path]
+        if self._trace_allocations and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            alloc_path = f"{base_path}_allocations.txt"
+            with open(alloc_path, "w", encoding="utf-8") as file:
+                file.write(
+                    f"De {PROFILE_TOP_ALLOCATIONS} rader som allokerat mest minne "
+                    f"efter {self.cycles} beslutscykler per laddare:\n"
+                )
+                file.writelines(
+                    f"{stat}\n"
+                    for stat in snapshot.statistics("lineno")[:PROFILE_TOP_ALLOCATIONS]
+                )
+            written.append(alloc_path)
+        return written
+
+
+def profile_base_path(hass: HomeAssistant, name: str) -> str:
+    """Sökväg (utan filändelse) för en profilering i konfigurationskatalogen."""
+    stamp = dt_util.utcnow().strftime("%Y%m%d_%H%M%S")
+    return hass.config.path(f"{DOMAIN}_profile_{name}_{stamp}")
+
+
+async def async_finish_profiling(hass: HomeAssistant, profiler: CycleProfiler) -> None:
+    """Skriver profileringens resultat och släpper den pågående profileringen."""
+    domain_data = hass.data.get(DOMAIN, {})
+    if domain_data.get(PROFILER_DATA_KEY) is profiler:
+        domain_data.pop(PROFILER_DATA_KEY)
+    base_path = profile_base_path(hass, profiler.name)
+    try:
+        written = await hass.async_add_executor_job(profiler.finish, base_path)
+    except OSError as e:
+        _LOGGER.error("Kunde inte skriva profileringen: %s", e)
+        return
+    _LOGGER.info("Profileringen är klar: %s", ", ".join(written))
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Registrerar tjänsten för profilering, om den inte redan finns."""
+    if hass.services.has_service(DOMAIN, SERVICE_PROFILE):
+        return
+
+    async def _async_handle_profile(call: ServiceCall) -> None:
+        entry_id: str | None = call.data.get("entry_id")
+        domain_data = hass.data.get(DOMAIN, {})
+        if domain_data.get(PROFILER_DATA_KEY) is not None:
+            _LOGGER.warning("En profilering pågår redan, ignorerar ny begäran.")
+            return
+        coordinators: dict[str, Any] = {
+            key: entry_data["coordinator"]
+            for key, entry_data in domain_data.items()
+            if isinstance(entry_data, dict)
+            and entry_data.get("coordinator") is not None
+            and (entry_id is None or key == entry_id)
+        }
+        if not coordinators:
+            _LOGGER.warning(
+                "Ingen laddare att profilera (entry_id: %s).", entry_id or "alla"
+            )
+            return
+        profiler = domain_data[PROFILER_DATA_KEY] = CycleProfiler(
+            next(iter(coordinators)) if len(coordinators) == 1 else "alla",
+            coordinators,
+            call.data[ATTR_CYCLES],
+            call.data[ATTR_TRACEMALLOC],
+        )
+        for coordinator in coordinators.values():
+            coordinator.async_start_profiling(profiler)
+        _LOGGER.info(
+            "Profilerar de %s nästa beslutscyklerna för %s%s.",
+            profiler.cycles,
+            ", ".join(coordinators),
+            " med tracemalloc" if call.data[ATTR_TRACEMALLOC] else "",
+        )
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROFILE, _async_handle_profile, schema=PROFILE_SCHEMA
+    )
+
+
+@callback
+def async_unload_services(hass: HomeAssistant) -> None:
+    """Tar bort tjänsten när den sista laddaren avlastas."""
+    if any(
+        isinstance(entry_data, dict) and entry_data.get("coordinator") is not None
+        for entry_data in hass.data.get(DOMAIN, {}).values()
+    ):
+        return
+    hass.services.async_remove(DOMAIN, SERVICE_PROFILE)
@@ -0,0 +1,92 @@
+# File version: 2025-06-05 0.2.0
+"""Strukturerade anledningar till laddningsbeslut.
+
+Beslutsmotorn returnerar en kod och en tupel med parametrar i stället för en
+färdig text. Texten byggs först när anledningen loggas eller visas, så att
+en cykel där inget loggas inte behöver formatera något. Koderna kan räknas
+och jämföras utan att tolka texten.
+"""
+
+from __future__ import annotations
+
+from enum import StrEnum
+from typing import Any, NamedTuple
+
+
+class ReasonCode(StrEnum):
+    """Anledningar till ett laddningsbeslut."""
+
+    CHARGER_OFFLINE = "charger_offline"
+    MAIN_SWITCH_OFF = "main_switch_off"
+    SOC_LIMIT_REACHED = "soc_limit_reached"
+    PRICE_TIME_ACTIVE = "price_time_active"
+    PRICE_TIME_PLANNED_SLOT = "price_time_planned_slot"
+    SOLAR_SUSPENDED = "solar_suspended"
+    SOLAR_ACTIVE = "solar_active"
+    SOLAR_ACTIVE_SINGLE_PHASE = "solar_active_single_phase"
+    SOLAR_PAUSED = "solar_paused"
+    SOLAR_WAITING_FOR_STABLE = "solar_waiting_for_stable_surplus"
+    SOLAR_START_WINDOW_FILLING = "solar_start_window_filling"
+    SOLAR_INSUFFICIENT = "solar_insufficient_surplus"
+    WAITING_FOR_PLANNED_SLOT = "waiting_for_planned_slot"
+    NO_ACTIVE_CONDITIONS = "no_active_conditions"
+    SHARED_FUSE_INSUFFICIENT = "shared_fuse_insufficient"
+    MAIN_FUSE_INSUFFICIENT = "main_fuse_insufficient"
+
+
+_PRICE_TIME_ACTIVE = (
+    "Pris/Tid-laddning aktiv (Pris: {0:.2f} <= {1:.2f} kr, Tidsschema PÅ)."
+)
+_SOLAR_ACTIVE = (
+    "Solenergiladdning aktiv (Tillgängligt: {0:.1f}A >= Min: {1:.1f}A. "
+    "Sätter till {2:.1f}A)."
+)
+
+# Texten för varje kod. Parametrarna fylls i med str.format.
+_TEMPLATES: dict[ReasonCode, str] = {
+    ReasonCode.CHARGER_OFFLINE: "Laddaren är frånkopplad/offline (status: {0}).",
+    ReasonCode.MAIN_SWITCH_OFF: "Huvudströmbrytare för laddbox är AV.",
+    ReasonCode.SOC_LIMIT_REACHED: "SoC ({0}%) har nått målet ({1}%).",
+    ReasonCode.PRICE_TIME_ACTIVE: _PRICE_TIME_ACTIVE,
+    ReasonCode.PRICE_TIME_PLANNED_SLOT: _PRICE_TIME_ACTIVE
+    + " Planerad billig period.",
+    ReasonCode.SOLAR_SUSPENDED: "Solenergiutvärderingen vilar till soluppgång.",
+    ReasonCode.SOLAR_ACTIVE: _SOLAR_ACTIVE,
+    ReasonCode.SOLAR_ACTIVE_SINGLE_PHASE: _SOLAR_ACTIVE + " Laddar på en fas.",
+    ReasonCode.SOLAR_PAUSED: (
+        "Solenergiladdning pausad (Tillgängligt: {0:.1f}A < Min: {1:.1f}A). "
+        "Sätter ström till 0A."
+    ),
+    ReasonCode.SOLAR_WAITING_FOR_STABLE: (
+        "Väntar på stabilt solöverskott (Lägsta under fönstret: {0:.1f}A < "
+        "{1:.1f}A min-start)."
+    ),
+    ReasonCode.SOLAR_START_WINDOW_FILLING: (
+        "Väntar på att startfönstret för solöverskottet fylls ({0:.1f}A >= "
+        "{1:.1f}A min-start)."
+    ),
+    ReasonCode.SOLAR_INSUFFICIENT: (
+        "För lite solöverskott för att starta solenergiladdning ({0:.1f}A < "
+        "{1:.1f}A min-start)."
+    ),
+    ReasonCode.WAITING_FOR_PLANNED_SLOT: "Väntar på nästa planerade billiga period.",
+    ReasonCode.NO_ACTIVE_CONDITIONS: "Inga aktiva smarta laddningsvillkor uppfyllda.",
+    ReasonCode.SHARED_FUSE_INSUFFICIENT: (
+        "Delad huvudsäkring ({0:.0f}A) räcker inte till denna laddare just nu "
+        "(minst {1:.0f}A krävs)."
+    ),
+    ReasonCode.MAIN_FUSE_INSUFFICIENT: (
+        "Huvudsäkringen ({0:.0f}A) räcker inte till laddning just nu "
+        "({1:.1f}A < {2:.0f}A)."
+    ),
+}
+
+
+class Reason(NamedTuple):
+    """En anledning med sina parametrar. Texten byggs av `str()`."""
+
+    code: ReasonCode
+    params: tuple[Any, ...] = ()
+
+    def __str__(self) -> str:
+        return _TEMPLATES[self.code].format(*self.params)
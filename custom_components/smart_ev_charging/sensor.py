@@ -1,9 +1,10 @@
 # File version: 2025-06-05 0.2.0
 import logging
+from typing import Any
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import STATE_UNKNOWN
+from homeassistant.const import STATE_UNKNOWN, EntityCategory, UnitOfTime
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
@@ -16,6 +17,14 @@ from .const import (
     # ENTITY_ID_SUFFIX_SESSION_ENERGY_SENSOR, # Borttagen
     # ENTITY_ID_SUFFIX_SESSION_COST_SENSOR, # Borttagen
     ENTITY_ID_SUFFIX_ACTIVE_CONTROL_MODE_SENSOR,
+    ENTITY_ID_SUFFIX_COMMAND_QUEUE_DEPTH_SENSOR,
+    ENTITY_ID_SUFFIX_CYCLE_DURATION_SENSOR,
+    ENTITY_ID_SUFFIX_REASON_CODE_SENSOR,
+    ENTITY_ID_SUFFIX_REFRESHES_SENSOR,
+    ENTITY_ID_SUFFIX_REJECTED_COMMANDS_SENSOR,
+    ENTITY_ID_SUFFIX_SERVICE_CALLS_SENSOR,
+    ENTITY_ID_SUFFIX_STATE_READS_SENSOR,
+    ENTITY_ID_SUFFIX_SUPPRESSED_COMMANDS_SENSOR,
 )
 from .coordinator import SmartEVChargingCoordinator
 
@@ -40,6 +49,83 @@ async def async_setup_entry(
 
     entities_to_add = [
         ActiveControlModeSensor(config_entry, coordinator),
+        DiagnosticCounterSensor(
+            config_entry,
+            coordinator,
+            ENTITY_ID_SUFFIX_COMMAND_QUEUE_DEPTH_SENSOR,
+            "command_queue_depth",
+            "Köade Kommandon",
+            "mdi:tray-full",
+            SensorStateClass.MEASUREMENT,
+        ),
+        DiagnosticCounterSensor(
+            config_entry,
+            coordinator,
+            ENTITY_ID_SUFFIX_REJECTED_COMMANDS_SENSOR,
+            "rejected_commands",
+            "Avvisade Kommandon",
+            "mdi:cancel",
+            SensorStateClass.TOTAL_INCREASING,
+        ),
+        DiagnosticCounterSensor(
+            config_entry,
+            coordinator,
+            ENTITY_ID_SUFFIX_CYCLE_DURATION_SENSOR,
+            "cycle_duration_p95_ms",
+            "Cykeltid p95",
+            "mdi:timer-outline",
+            SensorStateClass.MEASUREMENT,
+            unit_of_measurement=UnitOfTime.MILLISECONDS,
+            attributes_key="cycle_duration",
+        ),
+        DiagnosticCounterSensor(
+            config_entry,
+            coordinator,
+            ENTITY_ID_SUFFIX_SERVICE_CALLS_SENSOR,
+            "service_calls_last_hour",
+            "Kommandon Senaste Timmen",
+            "mdi:send-clock-outline",
+            SensorStateClass.MEASUREMENT,
+            attributes_key="service_calls",
+        ),
+        DiagnosticCounterSensor(
+            config_entry,
+            coordinator,
+            ENTITY_ID_SUFFIX_SUPPRESSED_COMMANDS_SENSOR,
+            "suppressed_commands",
+            "Undertryckta Kommandon",
+            "mdi:content-save-check-outline",
+            SensorStateClass.TOTAL_INCREASING,
+        ),
+        DiagnosticCounterSensor(
+            config_entry,
+            coordinator,
+            ENTITY_ID_SUFFIX_STATE_READS_SENSOR,
+            "state_reads",
+            "Tillståndsläsningar",
+            "mdi:database-search-outline",
+            SensorStateClass.TOTAL_INCREASING,
+        ),
+        DiagnosticCounterSensor(
+            config_entry,
+            coordinator,
+            ENTITY_ID_SUFFIX_REFRESHES_SENSOR,
+            "refreshes",
+            "Beslutscykler",
+            "mdi:refresh",
+            SensorStateClass.TOTAL_INCREASING,
+            attributes_key="refresh_triggers",
+        ),
+        DiagnosticCounterSensor(
+            config_entry,
+            coordinator,
+            ENTITY_ID_SUFFIX_REASON_CODE_SENSOR,
+            "reason_code",
+            "Beslutsanledning",
+            "mdi:comment-question-outline",
+            None,
+            attributes_key="reason_counts",
+        ),
         # SessionEnergySensor och SessionCostSensor tas bort
     ]
     async_add_entities(entities_to_add)
@@ -119,3 +205,48 @@ class ActiveControlModeSensor(SmartChargingBaseSensor):
             _LOGGER.debug("%s uppdaterad: Data saknas, Värde=Okänd", self.name)
             if self.hass:
                 self.async_write_ha_state()
+
+
+class DiagnosticCounterSensor(SmartChargingBaseSensor):
+    """Diagnostiksensor som visar ett numeriskt värde ur koordinatorns data."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        config_entry: ConfigEntry,
+        coordinator: SmartEVChargingCoordinator,
+        entity_suffix: str,
+        data_key: str,
+        name: str,
+        icon: str,
+        state_class: SensorStateClass | None,
+        unit_of_measurement: str | None = None,
+        attributes_key: str | None = None,
+    ) -> None:
+        """Initialisera diagnostiksensorn.
+
+        `attributes_key` pekar ut en dictionary i koordinatorns data som
+        visas som sensorns attribut (t.ex. p50/p95/max för cykeltiden).
+        """
+        super().__init__(config_entry, coordinator, entity_suffix)
+        self._data_key = data_key
+        self._attributes_key = attributes_key
+        self._attr_name = f"{DEFAULT_NAME} {name}"
+        self._attr_icon = icon
+        self._attr_state_class = state_class
+        self._attr_native_unit_of_measurement = unit_of_measurement
+
+    @property
+    def native_value(self) -> int | float | str | None:
+        """Returnerar värdet från koordinatorns senaste data."""
+        if not self.coordinator.data:
+            return None
+        return self.coordinator.data.get(self._data_key)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Detaljerna bakom värdet, om sensorn har några."""
+        if self._attributes_key is None or not self.coordinator.data:
+            return None
+        return self.coordinator.data.get(self._attributes_key)
@@ -0,0 +1,242 @@
+# File version: 2025-06-05 0.2.0
+"""Rullande fönster för effektsignaler med fast minnesanvändning.
+
+Effektsensorer kan uppdateras varje sekund. Ett fönster lagrar värdena i en
+ringbuffert av fast storlek (`array`) och håller en löpande summa för
+medelvärdet samt monotona köer för minimum och maximum. Alla operationer är
+O(1) (amorterat), oavsett fönstrets längd.
+
+Fönstret kan begränsas i tid (t.ex. de senaste två minuterna) och alltid i
+antal värden. När bufferten är full skrivs det äldsta värdet över. Ett
+tidsfönster räknas som fyllt först när det har tagit emot värden under hela
+sin längd, så att t.ex. minimum inte bygger på ett enda värde.
+
+`Deadband` avgör om ett nytt värde skiljer sig tillräckligt (absolut eller
+relativt) från det senast skickade för att vara värt en ny beslutscykel.
+
+`DownsampledSignal` tar emot högfrekventa mätvärden (t.ex. 1-10 Hz från en
+P1/HAN-mätare), slår ihop dem till fasta fönster med medelvärde och maximum
+och talar om när ett värde är värt att skicka vidare till beslutsmotorn.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from datetime import datetime, timedelta
+
+
+class RollingWindow:
+    """Glidande medelvärde, minimum och maximum över de senaste värdena."""
+
+    def __init__(self, capacity: int, window: timedelta | None = None) -> None:
+        """Skapa ett fönster för högst `capacity` värden inom `window`."""
+        if capacity < 1:
+            raise ValueError("capacity måste vara minst 1")
+        self._capacity = capacity
+        self._window_s = window.total_seconds() if window is not None else None
+        self._values = array("d", bytes(8 * capacity))
+        self._times = array("d", bytes(8 * capacity))
+        # Sekvensnummer för äldsta värdet och för nästa värde som läggs till.
+        self._first = 0
+        self._next = 0
+        self._sum = 0.0
+        # Monotona köer med sekvensnummer: stigande värden för minimum,
+        # fallande för maximum. Längden kan aldrig överstiga kapaciteten.
+        self._min_queue: deque[int] = deque(maxlen=capacity)
+        self._max_queue: deque[int] = deque(maxlen=capacity)
+        # Tidpunkt för första värdet sedan fönstret skapades eller tömdes.
+        self._started_at: float | None = None
+
+    def __len__(self) -> int:
+        return self._next - self._first
+
+    @property
+    def capacity(self) -> int:
+        """Max antal värden i fönstret."""
+        return self._capacity
+
+    def clear(self) -> None:
+        """Tömmer fönstret."""
+        self._first = self._next
+        self._sum = 0.0
+        self._started_at = None
+        self._min_queue.clear()
+        self._max_queue.clear()
+
+    def add(self, value: float, now: datetime) -> None:
+        """Lägger till ett värde och släpper värden som fallit ur fönstret."""
+        self.expire(now)
+        if len(self) == self._capacity:
+            self._drop_oldest()
+        if self._started_at is None:
+            self._started_at = now.timestamp()
+        seq = self._next
+        slot = seq % self._capacity
+        self._values[slot] = value
+        self._times[slot] = now.timestamp()
+        self._next += 1
+        self._sum += value
+        while self._min_queue and self._value(self._min_queue[-1]) >= value:
+            self._min_queue.pop()
+        self._min_queue.append(seq)
+        while self._max_queue and self._value(self._max_queue[-1]) <= value:
+            self._max_queue.pop()
+        self._max_queue.append(seq)
+
+    def expire(self, now: datetime) -> None:
+        """Släpper värden som är äldre än fönstrets längd."""
+        if self._window_s is None:
+            return
+        oldest_allowed = now.timestamp() - self._window_s
+        while len(self) and self._times[self._first % self._capacity] < oldest_allowed:
+            self._drop_oldest()
+        if not len(self):
+            # Ett uppehåll längre än fönstret: fönstret fylls på nytt.
+            self._started_at = None
+
+    def is_filled(self, now: datetime) -> bool:
+        """Fönstret har tagit emot värden under hela sin längd.
+
+        Ett fönster utan tidsgräns är fyllt när bufferten är full.
+        """
+        if self._window_s is None:
+            return len(self) == self._capacity
+        return (
+            self._started_at is not None
+            and now.timestamp() - self._started_at >= self._window_s
+        )
+
+    def mean(self) -> float | None:
+        """Medelvärdet av värdena i fönstret, eller None om det är tomt."""
+        count = len(self)
+        return self._sum / count if count else None
+
+    def minimum(self) -> float | None:
+        """Minsta värdet i fönstret, eller None om det är tomt."""
+        return self._value(self._min_queue[0]) if self._min_queue else None
+
+    def maximum(self) -> float | None:
+        """Största värdet i fönstret, eller None om det är tomt."""
+        return self._value(self._max_queue[0]) if self._max_queue else None
+
+    def _value(self, seq: int) -> float:
+        return self._values[seq % self._capacity]
+
+    def _drop_oldest(self) -> None:
+        seq = self._first
+        self._first += 1
+        if self._first == self._next:
+            # Nollställ summan när fönstret blir tomt, så att avrundningsfel
+            # inte ackumuleras över tid.
+            self._sum = 0.0
+        else:
+            self._sum -= self._value(seq)
+        if self._min_queue and self._min_queue[0] == seq:
+            self._min_queue.popleft()
+        if self._max_queue and self._max_queue[0] == seq:
+            self._max_queue.popleft()
+
+
+class Deadband:
+    """Dödband runt det senast skickade värdet.
+
+    Ett värde är signifikant om det skiljer sig minst `absolute` eller minst
+    andelen `relative` av referensvärdet, det största av de två. Med båda
+    satta till 0 är varje ändring signifikant.
+    """
+
+    __slots__ = ("_absolute", "_relative", "reference")
+
+    def __init__(self, absolute: float = 0.0, relative: float = 0.0) -> None:
+        """Skapa ett dödband utan referensvärde."""
+        self._absolute = absolute
+        self._relative = relative
+        self.reference: float | None = None
+
+    def exceeded(self, value: float) -> bool:
+        """Värdet ligger utanför dödbandet (eller det finns inget referensvärde)."""
+        reference = self.reference
+        if reference is None:
+            return True
+        return abs(value - reference) >= max(
+            self._absolute, abs(reference) * self._relative
+        )
+
+    def accept(self, value: float) -> bool:
+        """Som `exceeded`, men gör ett signifikant värde till ny referens."""
+        if not self.exceeded(value):
+            return False
+        self.reference = value
+        return True
+
+
+class DownsampledSignal:
+    """Slår ihop högfrekventa värden till fasta fönster.
+
+    `add` returnerar True när värdet ska skickas vidare: för det första
+    värdet och när värdet ligger utanför dödbandet runt det senast skickade.
+    När fönstret löper ut sparas dess medelvärde och maximum, och värdet
+    skickas bara vidare om något av dem ligger utanför dödbandet. En sensor
+    som rapporterar samma nivå i långsam takt väcker alltså inte cykeln vid
+    varje värde.
+    """
+
+    __slots__ = (
+        "_count",
+        "_deadband",
+        "_max",
+        "_started_at",
+        "_sum",
+        "_window_s",
+        "emitted_count",
+        "last_max",
+        "last_mean",
+        "received_count",
+    )
+
+    def __init__(self, window: timedelta, deadband: Deadband) -> None:
+        """Skapa en signal med fönsterlängd och dödband."""
+        self._window_s = window.total_seconds()
+        self._deadband = deadband
+        self._started_at: float | None = None
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        # Medelvärde och maximum för det senast avslutade fönstret.
+        self.last_mean: float | None = None
+        self.last_max: float | None = None
+        self.received_count = 0
+        self.emitted_count = 0
+
+    def add(self, value: float, now: datetime) -> bool:
+        """Räknar in ett värde. Returnerar True om det ska skickas vidare."""
+        self.received_count += 1
+        timestamp = now.timestamp()
+        if self._started_at is None:
+            self._started_at = timestamp
+        if self._count == 0 or value > self._max:
+            self._max = value
+        self._count += 1
+        self._sum += value
+
+        if not self._deadband.exceeded(value):
+            if timestamp - self._started_at < self._window_s:
+                return False
+            mean, maximum = self._close_window(timestamp)
+            if not (self._deadband.exceeded(mean) or self._deadband.exceeded(maximum)):
+                return False
+        else:
+            self._close_window(timestamp)
+        self._deadband.reference = value
+        self.emitted_count += 1
+        return True
+
+    def _close_window(self, timestamp: float) -> tuple[float, float]:
+        """Sparar fönstrets medelvärde och maximum och startar ett nytt fönster."""
+        mean = self.last_mean = self._sum / self._count
+        maximum = self.last_max = self._max
+        self._started_at = timestamp
+        self._count = 0
+        self._sum = 0.0
+        return mean, maximum
@@ -0,0 +1,177 @@
+# File version: 2025-06-05 0.2.0
+"""Oföränderlig ögonblicksbild av alla indata för en uppdateringscykel."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from .const import EASEE_STATUS_AWAITING_START
+
+
+class InputSnapshot:
+    """Alla indata som en uppdateringscykel behöver, lästa en gång.
+
+    Byggs av koordinatorn i början av varje cykel. Beslutslogiken och
+    styrningen av laddaren läser enbart härifrån, så att båda garanterat
+    ser samma laddarstatus och samma sensorvärden.
+    """
+
+    __slots__ = (
+        "charger_hw_max_amps",
+        "charger_main_switch_on",
+        "charger_power_w",
+        "charger_status",
+        "current_price_kr",
+        "current_soc_percent",
+        "dynamic_current_limit_a",
+        "grid_power_w",
+        "house_power_w",
+        "main_switch_state",
+        "max_accepted_price_kr",
+        "min_solar_charge_current_a",
+        "next_time_edge",
+        "planned_slot_active",
+        "smart_charging_enabled",
+        "solar_buffer_w",
+        "solar_charging_enabled",
+        "solar_production_w",
+        "solar_schedule_active",
+        "solar_start_window_filled",
+        "solar_surplus_average_w",
+        "solar_surplus_maximum_w",
+        "solar_surplus_minimum_w",
+        "solar_suspended_until",
+        "target_soc_limit",
+        "time_schedule_active",
+        "timestamp",
+    )
+
+    timestamp: datetime
+    charger_status: str
+    main_switch_state: str | None
+    charger_main_switch_on: bool
+    smart_charging_enabled: bool
+    solar_charging_enabled: bool
+    current_price_kr: float | None
+    max_accepted_price_kr: float
+    time_schedule_active: bool
+    solar_schedule_active: bool
+    solar_production_w: float
+    # Husets last (W) när överskottet beräknas som produktion minus last, annars None.
+    house_power_w: float | None
+    # Nätets effekt (W), positivt vid köp och negativt vid export, eller None.
+    grid_power_w: float | None
+    # Laddarens egen effekt (W), uppmätt eller uppskattad, eller None.
+    charger_power_w: float | None
+    # Solöverskottets glidande medelvärde, minimum under startfönstret och
+    # maximum under stoppfönstret (W), None utan respektive fönster.
+    solar_surplus_average_w: float | None
+    solar_surplus_minimum_w: float | None
+    solar_surplus_maximum_w: float | None
+    # Startfönstret har fyllts (alltid True utan startfönster).
+    solar_start_window_filled: bool
+    charger_hw_max_amps: float
+    dynamic_current_limit_a: float | None
+    current_soc_percent: float | None
+    target_soc_limit: float | None
+    min_solar_charge_current_a: float
+    solar_buffer_w: float
+    # Är nu en planerad billig period? None när ingen laddplan finns.
+    planned_slot_active: bool | None
+    # Nästa prisperiod- eller schemagräns då beslutet kan ändras, eller None.
+    next_time_edge: datetime | None
+    # Nästa soluppgång när solenergiutvärderingen vilar över natten, annars None.
+    solar_suspended_until: datetime | None
+
+    def __init__(
+        self,
+        *,
+        timestamp: datetime,
+        charger_status: str,
+        main_switch_state: str | None,
+        charger_main_switch_on: bool,
+        smart_charging_enabled: bool,
+        solar_charging_enabled: bool,
+        current_price_kr: float | None,
+        max_accepted_price_kr: float,
+        time_schedule_active: bool,
+        solar_schedule_active: bool,
+        solar_production_w: float,
+        house_power_w: float | None,
+        grid_power_w: float | None,
+        charger_power_w: float | None,
+        solar_surplus_average_w: float | None,
+        solar_surplus_minimum_w: float | None,
+        solar_surplus_maximum_w: float | None,
+        solar_start_window_filled: bool,
+        charger_hw_max_amps: float,
+        dynamic_current_limit_a: float | None,
+        current_soc_percent: float | None,
+        target_soc_limit: float | None,
+        min_solar_charge_current_a: float,
+        solar_buffer_w: float,
+        planned_slot_active: bool | None,
+        next_time_edge: datetime | None,
+        solar_suspended_until: datetime | None,
+    ) -> None:
+        """Initialisera ögonblicksbilden. Alla fält är obligatoriska."""
+        _set = object.__setattr__
+        _set(self, "timestamp", timestamp)
+        _set(self, "charger_status", charger_status)
+        _set(self, "main_switch_state", main_switch_state)
+        _set(self, "charger_main_switch_on", charger_main_switch_on)
+        _set(self, "smart_charging_enabled", smart_charging_enabled)
+        _set(self, "solar_charging_enabled", solar_charging_enabled)
+        _set(self, "current_price_kr", current_price_kr)
+        _set(self, "max_accepted_price_kr", max_accepted_price_kr)
+        _set(self, "time_schedule_active", time_schedule_active)
+        _set(self, "solar_schedule_active", solar_schedule_active)
+        _set(self, "solar_production_w", solar_production_w)
+        _set(self, "house_power_w", house_power_w)
+        _set(self, "grid_power_w", grid_power_w)
+        _set(self, "charger_power_w", charger_power_w)
+        _set(self, "solar_surplus_average_w", solar_surplus_average_w)
+        _set(self, "solar_surplus_minimum_w", solar_surplus_minimum_w)
+        _set(self, "solar_surplus_maximum_w", solar_surplus_maximum_w)
+        _set(self, "solar_start_window_filled", solar_start_window_filled)
+        _set(self, "charger_hw_max_amps", charger_hw_max_amps)
+        _set(self, "dynamic_current_limit_a", dynamic_current_limit_a)
+        _set(self, "current_soc_percent", current_soc_percent)
+        _set(self, "target_soc_limit", target_soc_limit)
+        _set(self, "min_solar_charge_current_a", min_solar_charge_current_a)
+        _set(self, "solar_buffer_w", solar_buffer_w)
+        _set(self, "planned_slot_active", planned_slot_active)
+        _set(self, "next_time_edge", next_time_edge)
+        _set(self, "solar_suspended_until", solar_suspended_until)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Förhindrar ändringar efter att ögonblicksbilden skapats."""
+        raise AttributeError(f"InputSnapshot är oföränderlig (försökte sätta {name})")
+
+    def __delattr__(self, name: str) -> None:
+        """Förhindrar borttagning av fält."""
+        raise AttributeError(f"InputSnapshot är oföränderlig (försökte ta bort {name})")
+
+    def __repr__(self) -> str:
+        """Returnerar en läsbar representation för loggning."""
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"InputSnapshot({fields})"
+
+    def replace(self, **changes: Any) -> InputSnapshot:
+        """Returnerar en ny ögonblicksbild med de angivna fälten ändrade."""
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return InputSnapshot(**values)
+
+    @property
+    def is_manually_paused(self) -> bool:
+        """Laddaren verkar manuellt pausad via appen.
+
+        Manuell paus kännetecknas av status awaiting_start OCH dynamisk ström 0A.
+        """
+        return (
+            self.charger_status == EASEE_STATUS_AWAITING_START
+            and self.dynamic_current_limit_a is not None
+            and self.dynamic_current_limit_a == 0
+        )
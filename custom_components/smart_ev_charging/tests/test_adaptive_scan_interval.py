@@ -0,0 +1,154 @@
+# tests/test_adaptive_scan_interval.py
+"""Testar att koordinatorns uppdateringsintervall anpassas efter laddarens
+status och solproduktionen, och att det är snabbt en stund efter en statusändring.
+"""
+
+from datetime import UTC, datetime, timedelta
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_mock_service,
+)
+
+from custom_components.smart_ev_charging.const import (
+    CONF_CHARGER_DEVICE,
+    CONF_CHARGER_ENABLED_SWITCH_ID,
+    CONF_EVENT_DRIVEN_UPDATES,
+    CONF_PRICE_SENSOR,
+    CONF_SCAN_INTERVAL,
+    CONF_STATUS_SENSOR,
+    DOMAIN,
+    EASEE_STATUS_AWAITING_START,
+    EASEE_STATUS_CHARGING,
+    EASEE_STATUS_DISCONNECTED,
+    ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH,
+    ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER,
+    ENTITY_ID_SUFFIX_MIN_SOLAR_CHARGE_CURRENT_A_NUMBER,
+    ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH,
+    ENTITY_ID_SUFFIX_SOLAR_BUFFER_NUMBER,
+    SCAN_INTERVAL_FAST_SECONDS,
+    SCAN_INTERVAL_IDLE_SECONDS,
+    SCAN_INTERVAL_SETTLE_SECONDS,
+)
+from custom_components.smart_ev_charging.coordinator import SmartEVChargingCoordinator
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant
+
+MOCK_STATUS_SENSOR_ID = "sensor.test_charger_status_adaptive"
+MOCK_PRICE_SENSOR_ID = "sensor.test_price_adaptive"
+MOCK_MAIN_POWER_SWITCH_ID = "switch.mock_charger_power_adaptive"
+
+BASE_INTERVAL = timedelta(seconds=30)
+
+
+async def _setup_entry(hass: HomeAssistant, event_driven: bool):
+    entry_id = f"test_adaptive_{event_driven}"
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CHARGER_DEVICE: "mock_device_adaptive",
+            CONF_STATUS_SENSOR: MOCK_STATUS_SENSOR_ID,
+            CONF_CHARGER_ENABLED_SWITCH_ID: MOCK_MAIN_POWER_SWITCH_ID,
+            CONF_PRICE_SENSOR: MOCK_PRICE_SENSOR_ID,
+            CONF_SCAN_INTERVAL: BASE_INTERVAL.seconds,
+            CONF_EVENT_DRIVEN_UPDATES: event_driven,
+        },
+        entry_id=entry_id,
+    )
+    entry.add_to_hass(hass)
+
+    hass.states.async_set(MOCK_STATUS_SENSOR_ID, EASEE_STATUS_DISCONNECTED[0])
+    hass.states.async_set(MOCK_MAIN_POWER_SWITCH_ID, STATE_ON)
+    hass.states.async_set(MOCK_PRICE_SENSOR_ID, "2.0")
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator: SmartEVChargingCoordinator = hass.data[DOMAIN][entry_id]["coordinator"]
+    coordinator.smart_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH}"
+    )
+    coordinator.max_price_entity_id = (
+        f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER}"
+    )
+    coordinator.solar_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH}"
+    )
+    coordinator.solar_buffer_entity_id = (
+        f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_SOLAR_BUFFER_NUMBER}"
+    )
+    coordinator.min_solar_charge_current_entity_id = f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_MIN_SOLAR_CHARGE_CURRENT_A_NUMBER}"
+    coordinator._internal_entities_resolved = True
+
+    hass.states.async_set(coordinator.smart_enable_switch_entity_id, STATE_ON)
+    hass.states.async_set(coordinator.max_price_entity_id, "1.0")
+    hass.states.async_set(coordinator.solar_enable_switch_entity_id, STATE_OFF)
+    async_mock_service(hass, "easee", "action_command")
+    async_mock_service(hass, "easee", "set_charger_dynamic_limit")
+    return coordinator
+
+
+async def _refresh(hass: HomeAssistant, coordinator: SmartEVChargingCoordinator):
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+
+async def test_idle_while_disconnected_and_fast_after_status_change(
+    hass: HomeAssistant, freezer
+):
+    """SYFTE: Frånkopplad laddare ger långt intervall. En statusändring ger det
+    snabba intervallet under en kort tid, så att följden av ändringen ses
+    direkt, och därefter det intervall som läget ger.
+    """
+    start = datetime(2025, 6, 5, 12, 0, tzinfo=UTC)
+    freezer.move_to(start)
+    coordinator = await _setup_entry(hass, event_driven=True)
+
+    await _refresh(hass, coordinator)
+    assert coordinator.update_interval == timedelta(seconds=SCAN_INTERVAL_IDLE_SECONDS)
+
+    hass.states.async_set(MOCK_STATUS_SENSOR_ID, EASEE_STATUS_AWAITING_START)
+    await _refresh(hass, coordinator)
+    assert coordinator.update_interval == timedelta(seconds=SCAN_INTERVAL_FAST_SECONDS)
+
+    # Samma status under hela tiden efter ändringen: fortfarande snabbt.
+    freezer.move_to(start + timedelta(seconds=SCAN_INTERVAL_SETTLE_SECONDS - 1))
+    await _refresh(hass, coordinator)
+    assert coordinator.update_interval == timedelta(seconds=SCAN_INTERVAL_FAST_SECONDS)
+
+    # Därefter gäller läget igen: inget ska laddas och ingen solproduktion.
+    freezer.move_to(start + timedelta(seconds=SCAN_INTERVAL_SETTLE_SECONDS))
+    await _refresh(hass, coordinator)
+    assert coordinator.update_interval == timedelta(seconds=SCAN_INTERVAL_IDLE_SECONDS)
+
+
+async def test_no_idle_interval_without_event_driven_updates(hass: HomeAssistant):
+    """SYFTE: Utan händelsestyrd uppdatering är pollningen enda väckningen,
+    så intervallet får inte förlängas.
+    """
+    coordinator = await _setup_entry(hass, event_driven=False)
+
+    await _refresh(hass, coordinator)
+    await _refresh(hass, coordinator)
+    assert coordinator.update_interval == BASE_INTERVAL
+
+
+async def test_fast_interval_for_volatile_solar_surplus(hass: HomeAssistant):
+    """SYFTE: Under solenergiladdning med varierande produktion ska det
+    snabba intervallet användas, och vid jämn produktion det konfigurerade.
+    """
+    coordinator = await _setup_entry(hass, event_driven=True)
+    hass.states.async_set(MOCK_STATUS_SENSOR_ID, EASEE_STATUS_CHARGING)
+    snapshot = coordinator._build_input_snapshot()
+    coordinator._solar_session_active = True
+
+    for production_w in (5000.0, 5000.0, 5000.0):
+        interval = coordinator._select_update_interval(
+            snapshot.replace(solar_production_w=production_w)
+        )
+    assert interval == BASE_INTERVAL
+
+    interval = coordinator._select_update_interval(
+        snapshot.replace(solar_production_w=3500.0)
+    )
+    assert interval == timedelta(seconds=SCAN_INTERVAL_FAST_SECONDS)
@@ -0,0 +1,55 @@
+# tests/test_allocation.py
+"""Enhetstester för fördelningen av en gemensam huvudsäkring (`allocation.py`)."""
+
+from custom_components.smart_ev_charging.allocation import (
+    ChargerDemand,
+    allocate_fair_share,
+    demand_weight,
+)
+
+
+def test_max_min_fair_share_redistributes_unused_capacity():
+    """SYFTE: Det som en laddare inte behöver ska fördelas till de övriga,
+    och ingen laddare ska få mer än den begär.
+    """
+    allocation = allocate_fair_share(
+        35,
+        {
+            "a": ChargerDemand(requested_a=6, min_a=6, weight=1),
+            "b": ChargerDemand(requested_a=16, min_a=6, weight=1),
+            "c": ChargerDemand(requested_a=16, min_a=6, weight=1),
+            "d": ChargerDemand(requested_a=0, min_a=6, weight=1),
+        },
+    )
+    assert allocation == {"a": 6, "b": 14.5, "c": 14.5, "d": 0}
+
+
+def test_weights_and_minimum_current():
+    """SYFTE: Utöver minsta ström ger högre vikt större andel, och när
+    budgeten inte räcker till minsta ström för alla får den lägst viktade
+    laddaren vänta (0 A).
+    """
+    allocation = allocate_fair_share(
+        30,
+        {
+            "high": ChargerDemand(requested_a=32, min_a=6, weight=2),
+            "low": ChargerDemand(requested_a=32, min_a=6, weight=1),
+        },
+    )
+    assert allocation == {"high": 18, "low": 12}
+
+    six_boxes = {
+        f"box{index}": ChargerDemand(requested_a=16, min_a=6, weight=1 + index)
+        for index in range(6)
+    }
+    allocation = allocate_fair_share(35, six_boxes)
+    assert sum(allocation.values()) <= 35
+    assert allocation["box0"] == 0, "Lägst vikt ska vänta när 6 x 6A inte ryms."
+    assert all(allocation[f"box{index}"] >= 6 for index in range(1, 6))
+
+
+def test_demand_weight_uses_soc_deficit():
+    """SYFTE: Vikten skalas med återstående SoC, och utan SoC används prioriteten."""
+    assert demand_weight(2, None, 80) == 2
+    assert demand_weight(2, 20, 80) == 2 * 0.6
+    assert demand_weight(1, 85, 80) == 0.01
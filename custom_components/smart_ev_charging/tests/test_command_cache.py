@@ -0,0 +1,182 @@
+# tests/test_command_cache.py
+"""Testar att identiska kommandon till laddaren inte skickas om varje cykel,
+men att de skickas igen när laddarens rapporterade tillstånd motsäger dem
+eller när cachens TTL har löpt ut.
+"""
+
+from datetime import timedelta
+
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_mock_service,
+)
+
+from custom_components.smart_ev_charging.const import (
+    COMMAND_CACHE_TTL_SECONDS,
+    CONF_CHARGER_DEVICE,
+    CONF_CHARGER_DYNAMIC_CURRENT_SENSOR,
+    CONF_CHARGER_ENABLED_SWITCH_ID,
+    CONF_EVENT_DRIVEN_UPDATES,
+    CONF_PRICE_SENSOR,
+    CONF_SCAN_INTERVAL,
+    CONF_STATUS_SENSOR,
+    DOMAIN,
+    EASEE_STATUS_AWAITING_START,
+    EASEE_STATUS_CHARGING,
+    ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH,
+    ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER,
+    ENTITY_ID_SUFFIX_MIN_SOLAR_CHARGE_CURRENT_A_NUMBER,
+    ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH,
+    ENTITY_ID_SUFFIX_SOLAR_BUFFER_NUMBER,
+)
+from custom_components.smart_ev_charging.coordinator import SmartEVChargingCoordinator
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+
+MOCK_STATUS_SENSOR_ID = "sensor.test_charger_status_cmd_cache"
+MOCK_PRICE_SENSOR_ID = "sensor.test_price_cmd_cache"
+MOCK_MAIN_POWER_SWITCH_ID = "switch.mock_charger_power_cmd_cache"
+MOCK_DYN_CURRENT_SENSOR_ID = "sensor.test_dyn_current_cmd_cache"
+
+
+@pytest.fixture
+async def setup_coordinator(hass: HomeAssistant):
+    """Setup med Pris/Tid uppfyllt och en bil som väntar på start."""
+    entry_id = "test_cmd_cache_entry"
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CHARGER_DEVICE: "mock_device_cmd_cache",
+            CONF_STATUS_SENSOR: MOCK_STATUS_SENSOR_ID,
+            CONF_CHARGER_ENABLED_SWITCH_ID: MOCK_MAIN_POWER_SWITCH_ID,
+            CONF_PRICE_SENSOR: MOCK_PRICE_SENSOR_ID,
+            CONF_CHARGER_DYNAMIC_CURRENT_SENSOR: MOCK_DYN_CURRENT_SENSOR_ID,
+            CONF_SCAN_INTERVAL: 3600,
+            CONF_EVENT_DRIVEN_UPDATES: False,
+        },
+        entry_id=entry_id,
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator: SmartEVChargingCoordinator = hass.data[DOMAIN][entry_id]["coordinator"]
+    coordinator.smart_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH}"
+    )
+    coordinator.max_price_entity_id = (
+        f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER}"
+    )
+    coordinator.solar_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH}"
+    )
+    coordinator.solar_buffer_entity_id = (
+        f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_SOLAR_BUFFER_NUMBER}"
+    )
+    coordinator.min_solar_charge_current_entity_id = f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_MIN_SOLAR_CHARGE_CURRENT_A_NUMBER}"
+    coordinator._internal_entities_resolved = True
+
+    hass.states.async_set(coordinator.smart_enable_switch_entity_id, STATE_ON)
+    hass.states.async_set(coordinator.max_price_entity_id, "1.0")
+    hass.states.async_set(coordinator.solar_enable_switch_entity_id, STATE_OFF)
+    hass.states.async_set(MOCK_MAIN_POWER_SWITCH_ID, STATE_ON)
+    hass.states.async_set(MOCK_PRICE_SENSOR_ID, "0.5")
+    hass.states.async_set(MOCK_DYN_CURRENT_SENSOR_ID, "6")
+    hass.states.async_set(MOCK_STATUS_SENSOR_ID, EASEE_STATUS_AWAITING_START)
+    return coordinator
+
+
+async def _refresh(hass: HomeAssistant, coordinator: SmartEVChargingCoordinator):
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+
+async def test_identical_commands_are_suppressed(
+    hass: HomeAssistant, setup_coordinator: SmartEVChargingCoordinator, freezer
+):
+    """SYFTE: Start och strömgräns ska skickas en gång, inte varje cykel,
+    så länge laddaren rapporterar det vi har skickat.
+    """
+    coordinator = setup_coordinator
+    action_command_calls = async_mock_service(hass, "easee", "action_command")
+    set_current_calls = async_mock_service(hass, "easee", "set_charger_dynamic_limit")
+
+    await _refresh(hass, coordinator)
+    assert len(action_command_calls) == 1
+    assert len(set_current_calls) == 1
+    assert set_current_calls[0].data["current"] == 16.0
+
+    # Laddaren har tagit emot strömgränsen men bilen väntar fortfarande.
+    hass.states.async_set(MOCK_DYN_CURRENT_SENSOR_ID, "16")
+    for _ in range(3):
+        freezer.tick(timedelta(seconds=30))
+        await _refresh(hass, coordinator)
+
+    assert len(action_command_calls) == 1, "Startkommandot skickades om i onödan."
+    assert len(set_current_calls) == 1, "Strömgränsen skickades om i onödan."
+    assert coordinator._command_cache.suppressed_count == 6
+
+    # När TTL har löpt ut skickas kommandona igen.
+    freezer.tick(timedelta(seconds=COMMAND_CACHE_TTL_SECONDS))
+    await _refresh(hass, coordinator)
+    assert len(action_command_calls) == 2
+    assert len(set_current_calls) == 2
+
+
+async def test_contradicting_state_forces_resend(
+    hass: HomeAssistant, setup_coordinator: SmartEVChargingCoordinator
+):
+    """SYFTE: En rapporterad strömgräns eller status som motsäger det senast
+    skickade kommandot ska ge ett nytt kommando direkt, utan att vänta på TTL.
+    """
+    coordinator = setup_coordinator
+    action_command_calls = async_mock_service(hass, "easee", "action_command")
+    set_current_calls = async_mock_service(hass, "easee", "set_charger_dynamic_limit")
+
+    await _refresh(hass, coordinator)
+    assert len(action_command_calls) == 1
+    assert len(set_current_calls) == 1
+
+    # Någon annan har ändrat strömgränsen på laddaren.
+    hass.states.async_set(MOCK_DYN_CURRENT_SENSOR_ID, "10")
+    await _refresh(hass, coordinator)
+    assert len(set_current_calls) == 2
+    assert set_current_calls[1].data["current"] == 16.0
+    assert len(action_command_calls) == 1, "Start ska inte skickas om för en strömändring."
+
+    # Laddningen startar och pausas sedan externt: start ska skickas igen.
+    hass.states.async_set(MOCK_DYN_CURRENT_SENSOR_ID, "16")
+    hass.states.async_set(MOCK_STATUS_SENSOR_ID, EASEE_STATUS_CHARGING)
+    await _refresh(hass, coordinator)
+    hass.states.async_set(MOCK_STATUS_SENSOR_ID, EASEE_STATUS_AWAITING_START)
+    await _refresh(hass, coordinator)
+    assert len(action_command_calls) == 2
+    assert action_command_calls[1].data["action_command"] == "start"
+
+
+async def test_failed_command_is_not_recorded(
+    hass: HomeAssistant, setup_coordinator: SmartEVChargingCoordinator
+):
+    """SYFTE: Ett kommando som misslyckas ska inte registreras i cachen, så att
+    nästa cykel skickar det igen i stället för att tro att det redan gäller.
+    """
+    coordinator = setup_coordinator
+    async_mock_service(hass, "easee", "action_command")
+    attempts: list[ServiceCall] = []
+
+    async def _set_current(call: ServiceCall) -> None:
+        attempts.append(call)
+        if len(attempts) == 1:
+            raise HomeAssistantError("Easee svarar inte")
+
+    hass.services.async_register("easee", "set_charger_dynamic_limit", _set_current)
+
+    await _refresh(hass, coordinator)
+    assert len(attempts) == 1
+    assert coordinator._command_cache.last_sent_current("mock_device_cmd_cache") is None
+
+    await _refresh(hass, coordinator)
+    assert len(attempts) == 2
+    assert coordinator._command_cache.last_sent_current("mock_device_cmd_cache") == 16.0
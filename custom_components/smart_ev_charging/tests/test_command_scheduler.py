@@ -0,0 +1,161 @@
+# tests/test_command_scheduler.py
+"""Testar den hastighetsbegränsade kommandokön för Easee-kommandon."""
+
+import asyncio
+from datetime import timedelta
+
+from pytest_homeassistant_custom_component.common import (
+    async_fire_time_changed,
+    async_mock_service,
+)
+
+from custom_components.smart_ev_charging.commands import (
+    PRIORITY_CURRENT,
+    PRIORITY_PAUSE,
+    PRIORITY_START,
+    SERVICE_ACTION_COMMAND,
+    SERVICE_SET_DYNAMIC_LIMIT,
+    CommandScheduler,
+)
+from homeassistant.core import HomeAssistant, ServiceCall
+import homeassistant.util.dt as dt_util
+
+DEVICE_ID = "mock_device_scheduler"
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def test_burst_priority_and_collapse(hass: HomeAssistant):
+    """SYFTE: När token bucket är tom ska strömgränser slås ihop och en paus
+    skickas före köade strömgränser när nästa token blir tillgänglig.
+    """
+    clock = _FakeClock()
+    scheduler = CommandScheduler(
+        hass, rate_per_minute=6, burst=1, max_queue_depth=10, clock=clock
+    )
+    current_calls = async_mock_service(hass, "easee", SERVICE_SET_DYNAMIC_LIMIT)
+    action_calls = async_mock_service(hass, "easee", SERVICE_ACTION_COMMAND)
+
+    for current in (6, 7, 8):
+        assert await scheduler.async_submit(
+            DEVICE_ID,
+            SERVICE_SET_DYNAMIC_LIMIT,
+            {"device_id": DEVICE_ID, "current": current},
+            PRIORITY_CURRENT,
+        )
+    assert await scheduler.async_submit(
+        DEVICE_ID,
+        SERVICE_ACTION_COMMAND,
+        {"device_id": DEVICE_ID, "action_command": "pause"},
+        PRIORITY_PAUSE,
+    )
+    await hass.async_block_till_done()
+
+    assert [call.data["current"] for call in current_calls] == [6]
+    assert len(action_calls) == 0
+    assert scheduler.queue_depth == 2, "7A och 8A ska ha slagits ihop till en."
+    assert scheduler.collapsed_count == 1
+
+    # En token per 10 sekunder: pausen går först, sedan den senaste strömgränsen.
+    for _ in range(2):
+        clock.now += 10
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=11))
+        await hass.async_block_till_done()
+
+    assert [call.data["action_command"] for call in action_calls] == ["pause"]
+    assert [call.data["current"] for call in current_calls] == [6, 8]
+    assert scheduler.queue_depth == 0
+    assert scheduler.sent_count == 3
+
+
+async def test_full_queue_rejects_low_priority(hass: HomeAssistant):
+    """SYFTE: En full kö ska avvisa lägre prioriterade kommandon men låta
+    ett högre prioriterat kommando tränga undan det sämsta köade.
+    """
+    clock = _FakeClock()
+    scheduler = CommandScheduler(
+        hass, rate_per_minute=6, burst=1, max_queue_depth=1, clock=clock
+    )
+    async_mock_service(hass, "easee", SERVICE_SET_DYNAMIC_LIMIT)
+    async_mock_service(hass, "easee", SERVICE_ACTION_COMMAND)
+    async_mock_service(hass, "easee", "set_charger_max_limit")
+
+    await scheduler.async_submit(
+        DEVICE_ID,
+        SERVICE_ACTION_COMMAND,
+        {"device_id": DEVICE_ID, "action_command": "start"},
+        PRIORITY_START,
+    )
+    assert await scheduler.async_submit(
+        DEVICE_ID,
+        SERVICE_ACTION_COMMAND,
+        {"device_id": DEVICE_ID, "action_command": "start"},
+        PRIORITY_START,
+    )
+    assert not await scheduler.async_submit(
+        DEVICE_ID,
+        SERVICE_SET_DYNAMIC_LIMIT,
+        {"device_id": DEVICE_ID, "current": 10},
+        PRIORITY_CURRENT,
+    )
+    assert scheduler.rejected_count == 1
+
+    assert await scheduler.async_submit(
+        DEVICE_ID,
+        "set_charger_max_limit",
+        {"device_id": DEVICE_ID, "current": 16},
+        PRIORITY_PAUSE,
+    )
+    assert scheduler.rejected_count == 2
+    assert scheduler.queue_depth == 1
+
+    scheduler.async_shutdown()
+    assert scheduler.queue_depth == 0
+
+
+async def test_slow_service_call_does_not_block_submit(hass: HomeAssistant):
+    """SYFTE: Ett långsamt Easee-anrop ska inte hålla uppe den som skickar
+    kommandot. Kommandot räknas som skickat först när anropet har lyckats.
+    """
+    release = asyncio.Event()
+    sent: list[dict] = []
+
+    async def _slow_set_current(call: ServiceCall) -> None:
+        await release.wait()
+
+    hass.services.async_register(
+        "easee", SERVICE_SET_DYNAMIC_LIMIT, _slow_set_current
+    )
+    scheduler = CommandScheduler(
+        hass,
+        rate_per_minute=6,
+        burst=1,
+        max_queue_depth=10,
+        on_sent=lambda service, data: sent.append(data),
+    )
+
+    assert await asyncio.wait_for(
+        scheduler.async_submit(
+            DEVICE_ID,
+            SERVICE_SET_DYNAMIC_LIMIT,
+            {"device_id": DEVICE_ID, "current": 10},
+            PRIORITY_CURRENT,
+            urgent=True,
+        ),
+        timeout=1,
+    )
+    await asyncio.sleep(0)
+    assert scheduler.sent_count == 1
+    assert sent == []
+
+    release.set()
+    await hass.async_block_till_done()
+    for _ in range(3):
+        await asyncio.sleep(0)
+    assert sent == [{"device_id": DEVICE_ID, "current": 10}]
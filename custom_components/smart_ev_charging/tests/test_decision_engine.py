@@ -0,0 +1,346 @@
+# tests/test_decision_engine.py
+"""Testar den rena beslutsmotorn utan Home Assistant-instans.
+
+Varje test bygger en ögonblicksbild för hand och verifierar beslut och
+nytt tillstånd för en gren i prioritetsordningen.
+"""
+
+from datetime import UTC, datetime, timedelta
+
+from custom_components.smart_ev_charging.const import (
+    CONTROL_MODE_MANUAL,
+    CONTROL_MODE_PRICE_TIME,
+    CONTROL_MODE_SOLAR_SURPLUS,
+    EASEE_STATUS_CHARGING,
+    EASEE_STATUS_DISCONNECTED,
+    EASEE_STATUS_READY_TO_CHARGE,
+    PHASES,
+    SINGLE_PHASE,
+    VOLTAGE_PHASE_NEUTRAL,
+)
+from custom_components.smart_ev_charging.decision import (
+    DecisionState,
+    calculate_solar_surplus_w,
+    evaluate,
+)
+from custom_components.smart_ev_charging.phase_switch import PhaseSwitchSettings
+from custom_components.smart_ev_charging.reasons import Reason, ReasonCode
+from custom_components.smart_ev_charging.snapshot import InputSnapshot
+
+
+def _snapshot(**overrides) -> InputSnapshot:
+    values = {
+        "timestamp": datetime(2025, 6, 5, 12, 0, tzinfo=UTC),
+        "charger_status": EASEE_STATUS_READY_TO_CHARGE[0],
+        "main_switch_state": "on",
+        "charger_main_switch_on": True,
+        "smart_charging_enabled": True,
+        "solar_charging_enabled": True,
+        "current_price_kr": 2.0,
+        "max_accepted_price_kr": 1.0,
+        "time_schedule_active": True,
+        "solar_schedule_active": True,
+        "solar_production_w": 0.0,
+        "house_power_w": None,
+        "grid_power_w": None,
+        "charger_power_w": None,
+        "solar_surplus_average_w": None,
+        "solar_surplus_minimum_w": None,
+        "solar_surplus_maximum_w": None,
+        "solar_start_window_filled": True,
+        "charger_hw_max_amps": 16.0,
+        "dynamic_current_limit_a": None,
+        "current_soc_percent": None,
+        "target_soc_limit": None,
+        "min_solar_charge_current_a": 6.0,
+        "solar_buffer_w": 0.0,
+        "planned_slot_active": None,
+        "next_time_edge": None,
+        "solar_suspended_until": None,
+    }
+    values.update(overrides)
+    return InputSnapshot(**values)
+
+
+def _watts_for(amps: int) -> float:
+    return amps * PHASES * VOLTAGE_PHASE_NEUTRAL
+
+
+def test_disconnected_has_highest_priority():
+    """Frånkopplad laddare vinner över allt annat och återställer sessionen."""
+    decision, state = evaluate(
+        _snapshot(
+            charger_status=EASEE_STATUS_DISCONNECTED[0], current_price_kr=0.1
+        ),
+        DecisionState(session_active=True, price_time_eligible=True),
+    )
+    assert decision.control_mode == CONTROL_MODE_MANUAL
+    assert decision.should_charge is False
+    assert decision.reset_session_reason == decision.reason
+    assert state == DecisionState(False, False, False)
+
+
+def test_main_switch_off_blocks_charging():
+    """Huvudströmbrytare AV blockerar även när priset är lågt."""
+    decision, state = evaluate(
+        _snapshot(charger_main_switch_on=False, current_price_kr=0.1),
+        DecisionState(solar_session_active=True),
+    )
+    assert decision.should_charge is False
+    assert decision.reset_session_reason is None
+    assert state.solar_session_active is False
+
+
+def test_soc_limit_blocks_price_time():
+    """SoC-gränsen går före Pris/Tid och loggas på INFO-nivå."""
+    decision, _ = evaluate(
+        _snapshot(current_price_kr=0.1, current_soc_percent=85.0, target_soc_limit=80.0),
+        DecisionState(),
+    )
+    assert decision.should_charge is False
+    assert decision.log_reason is True
+    assert decision.cause == Reason(ReasonCode.SOC_LIMIT_REACHED, (85.0, 80.0))
+    assert decision.reason == "SoC (85.0%) har nått målet (80.0%)."
+
+
+def test_price_time_starts_new_session_once():
+    """Pris/Tid startar en session första gången och fortsätter den sedan."""
+    snapshot = _snapshot(current_price_kr=0.5)
+    decision, state = evaluate(snapshot, DecisionState())
+    assert decision.control_mode == CONTROL_MODE_PRICE_TIME
+    assert decision.target_current_a == 16.0
+    assert decision.start_session is True
+    assert decision.reset_session_reason is None
+    assert state == DecisionState(True, False, True)
+
+    decision, state = evaluate(snapshot, state)
+    assert decision.start_session is False
+    assert state == DecisionState(True, False, True)
+
+
+def test_price_time_takes_over_solar_session():
+    """En pågående solsession avslutas när Pris/Tid blir uppfyllt."""
+    decision, state = evaluate(
+        _snapshot(current_price_kr=0.5, solar_production_w=_watts_for(8)),
+        DecisionState(session_active=True, solar_session_active=True),
+    )
+    assert decision.control_mode == CONTROL_MODE_PRICE_TIME
+    assert decision.reset_session_reason is not None
+    assert decision.start_session is True
+    assert state.solar_session_active is False
+
+
+def test_solar_start_dip_and_stop():
+    """Solsessionen startar, pausas på 0A vid dipp och avslutas inte av dippen."""
+    decision, state = evaluate(
+        _snapshot(solar_production_w=_watts_for(7)), DecisionState()
+    )
+    assert decision.control_mode == CONTROL_MODE_SOLAR_SURPLUS
+    assert decision.target_current_a == 7
+    assert decision.solar_session_started is True
+    assert state.solar_session_active is True
+
+    decision, state = evaluate(
+        _snapshot(
+            charger_status=EASEE_STATUS_CHARGING, solar_production_w=_watts_for(5)
+        ),
+        state,
+    )
+    assert decision.control_mode == CONTROL_MODE_MANUAL
+    assert decision.should_charge is True
+    assert decision.target_current_a == 0.0
+    assert state.solar_session_active is True
+
+    decision, state = evaluate(
+        _snapshot(solar_production_w=_watts_for(20)), state
+    )
+    assert decision.target_current_a == 16.0, "Begränsas av hårdvarumaximum."
+    assert decision.solar_session_started is False
+
+
+def test_solar_surplus_uses_grid_meter_or_house_load():
+    """Nätmätaren går före husets last, och laddarens egen effekt läggs tillbaka."""
+    assert calculate_solar_surplus_w(_snapshot(solar_production_w=5000.0)) == 5000.0
+    assert (
+        calculate_solar_surplus_w(
+            _snapshot(
+                solar_production_w=5000.0, house_power_w=4000.0, charger_power_w=2000.0
+            )
+        )
+        == 3000.0
+    )
+    assert (
+        calculate_solar_surplus_w(
+            _snapshot(
+                solar_production_w=5000.0,
+                house_power_w=4000.0,
+                grid_power_w=-1500.0,
+                charger_power_w=2000.0,
+            )
+        )
+        == 3500.0
+    )
+
+
+def test_solar_start_window_and_average():
+    """Startfönstrets minimum styr starten, medelvärdet styr strömmen."""
+    snapshot = _snapshot(
+        solar_production_w=_watts_for(12),
+        solar_surplus_average_w=_watts_for(8),
+        solar_surplus_minimum_w=_watts_for(4),
+    )
+    decision, state = evaluate(snapshot, DecisionState(session_active=True))
+    assert decision.should_charge is False
+    assert decision.reason == (
+        "Väntar på stabilt solöverskott "
+        "(Lägsta under fönstret: 4.0A < 6.0A min-start)."
+    )
+    assert state.solar_session_active is False
+
+    # En pågående solsession fortsätter på medelvärdet trots en kort dipp.
+    decision, state = evaluate(
+        snapshot, DecisionState(session_active=True, solar_session_active=True)
+    )
+    assert decision.control_mode == CONTROL_MODE_SOLAR_SURPLUS
+    assert decision.target_current_a == 8.0
+    assert state.solar_session_active is True
+
+
+def test_solar_start_waits_for_filled_window_and_stop_window_holds():
+    """Starten väntar på ett fyllt startfönster, stoppfönstret håller sessionen."""
+    decision, state = evaluate(
+        _snapshot(
+            solar_production_w=_watts_for(8),
+            solar_surplus_minimum_w=_watts_for(8),
+            solar_start_window_filled=False,
+        ),
+        DecisionState(),
+    )
+    assert decision.should_charge is False
+    assert decision.reason == (
+        "Väntar på att startfönstret för solöverskottet fylls "
+        "(8.0A >= 6.0A min-start)."
+    )
+    assert state.solar_session_active is False
+
+    # Överskottet dippar under minimiströmmen, men inom stoppfönstret har det
+    # räckt: sessionen fortsätter på minimiströmmen.
+    running = DecisionState(session_active=True, solar_session_active=True)
+    snapshot = _snapshot(
+        solar_production_w=_watts_for(4), solar_surplus_maximum_w=_watts_for(9)
+    )
+    decision, state = evaluate(snapshot, running)
+    assert decision.control_mode == CONTROL_MODE_SOLAR_SURPLUS
+    assert decision.target_current_a == 6.0
+    assert state.solar_session_active is True
+
+    # Har överskottet saknats under hela stoppfönstret pausas laddningen.
+    decision, state = evaluate(
+        snapshot.replace(solar_surplus_maximum_w=_watts_for(5)), running
+    )
+    assert decision.should_charge is True
+    assert decision.target_current_a == 0.0
+    assert decision.cause.code == ReasonCode.SOLAR_PAUSED
+
+
+def test_phase_switching_with_hysteresis_and_dwell():
+    """Litet överskott laddar på en fas, tillbaka till tre faser med hysteres."""
+    settings = PhaseSwitchSettings(hysteresis_w=460.0, min_dwell=timedelta(minutes=10))
+    start = datetime(2025, 6, 5, 12, 0, tzinfo=UTC)
+
+    # 2,3 kW räcker inte till 6A på tre faser men till 10A på en fas.
+    decision, state = evaluate(
+        _snapshot(solar_production_w=2300.0), DecisionState(), phase_switch=settings
+    )
+    assert decision.phases == SINGLE_PHASE
+    assert decision.control_mode == CONTROL_MODE_SOLAR_SURPLUS
+    assert decision.target_current_a == 10.0
+    assert state.phases_changed_at == start
+
+    # Strax över 3-fasgränsen men inom hysteresen: kvar på en fas (16A).
+    decision, state = evaluate(
+        _snapshot(
+            timestamp=start + timedelta(minutes=20), solar_production_w=_watts_for(6)
+        ),
+        state,
+        phase_switch=settings,
+    )
+    assert decision.phases == SINGLE_PHASE
+    assert decision.target_current_a == 16.0
+
+    # Över hysteresen men inom minsta tid sedan växlingen: ingen ny växling.
+    decision, state = evaluate(
+        _snapshot(solar_production_w=_watts_for(8)),
+        state._replace(phases_changed_at=start),
+        phase_switch=settings,
+    )
+    assert decision.phases == SINGLE_PHASE
+
+    decision, state = evaluate(
+        _snapshot(
+            timestamp=start + timedelta(minutes=20), solar_production_w=_watts_for(8)
+        ),
+        state,
+        phase_switch=settings,
+    )
+    assert decision.phases == PHASES
+    assert decision.target_current_a == 8.0
+
+    # Pris/Tid laddar alltid på tre faser, under 1,4 kW behålls fasläget.
+    _, state = evaluate(
+        _snapshot(current_price_kr=0.5),
+        DecisionState(phases=SINGLE_PHASE),
+        phase_switch=settings,
+    )
+    assert state.phases == PHASES
+    _, state = evaluate(
+        _snapshot(solar_production_w=1000.0), DecisionState(), phase_switch=settings
+    )
+    assert state.phases == PHASES
+
+
+def test_solar_suspended_at_night_ends_solar_session():
+    """Under natten utvärderas inte solöverskottet och solsessionen avslutas."""
+    decision, state = evaluate(
+        _snapshot(
+            solar_production_w=_watts_for(10),
+            solar_suspended_until=datetime(2025, 6, 6, 3, 30, tzinfo=UTC),
+        ),
+        DecisionState(session_active=True, solar_session_active=True),
+    )
+    assert decision.control_mode == CONTROL_MODE_MANUAL
+    assert decision.should_charge is False
+    assert decision.reason == "Solenergiutvärderingen vilar till soluppgång."
+    assert decision.reset_session_reason == decision.reason
+    assert state == DecisionState(False, False, False)
+
+
+def test_no_conditions_met_is_manual():
+    """Utan uppfyllda villkor blir det manuellt läge utan laddning."""
+    decision, state = evaluate(
+        _snapshot(solar_charging_enabled=False),
+        DecisionState(session_active=True),
+    )
+    assert decision.control_mode == CONTROL_MODE_MANUAL
+    assert decision.should_charge is False
+    assert decision.reset_session_reason == decision.reason
+    assert state == DecisionState(False, False, False)
+
+
+def test_reason_codes_format_to_the_logged_texts():
+    """Koderna formateras till samma texter som loggas och visas."""
+    price_decision, _ = evaluate(
+        _snapshot(current_price_kr=0.5, planned_slot_active=True), DecisionState()
+    )
+    assert price_decision.cause.code == ReasonCode.PRICE_TIME_PLANNED_SLOT
+    assert price_decision.reason == (
+        "Pris/Tid-laddning aktiv (Pris: 0.50 <= 1.00 kr, Tidsschema PÅ). "
+        "Planerad billig period."
+    )
+    assert str(Reason(ReasonCode.SOLAR_PAUSED, (4.0, 6.0))) == (
+        "Solenergiladdning pausad (Tillgängligt: 4.0A < Min: 6.0A). "
+        "Sätter ström till 0A."
+    )
+    assert str(Reason(ReasonCode.MAIN_SWITCH_OFF)) == (
+        "Huvudströmbrytare för laddbox är AV."
+    )
@@ -0,0 +1,147 @@
+# tests/test_diagnostics.py
+"""Testar diagnostiken med spåret av de senaste besluten."""
+
+from datetime import timedelta
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_mock_service,
+)
+
+from custom_components.smart_ev_charging.commands import (
+    SERVICE_ACTION_COMMAND,
+    SERVICE_SET_DYNAMIC_LIMIT,
+)
+from custom_components.smart_ev_charging.const import (
+    CONF_CHARGER_DEVICE,
+    CONF_CHARGER_DYNAMIC_CURRENT_SENSOR,
+    CONF_CHARGER_ENABLED_SWITCH_ID,
+    CONF_EVENT_DRIVEN_UPDATES,
+    CONF_PRICE_SENSOR,
+    CONF_STATUS_SENSOR,
+    DOMAIN,
+    EASEE_STATUS_AWAITING_START,
+    ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH,
+    ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER,
+    ENTITY_ID_SUFFIX_MIN_SOLAR_CHARGE_CURRENT_A_NUMBER,
+    ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH,
+    ENTITY_ID_SUFFIX_SOLAR_BUFFER_NUMBER,
+)
+from custom_components.smart_ev_charging.coordinator import SmartEVChargingCoordinator
+from custom_components.smart_ev_charging.decision_trace import DecisionTrace
+from custom_components.smart_ev_charging.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from custom_components.smart_ev_charging.reasons import Reason, ReasonCode
+from homeassistant.components.diagnostics import REDACTED
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant
+
+DEVICE_ID = "device_diagnostics"
+STATUS_SENSOR_ID = "sensor.charger_status_diagnostics"
+PRICE_SENSOR_ID = "sensor.price_diagnostics"
+DYN_CURRENT_SENSOR_ID = "sensor.dynamic_current_diagnostics"
+
+
+async def test_diagnostics_contain_redacted_decision_trace(
+    hass: HomeAssistant, freezer
+):
+    """SYFTE: Diagnostiken ska innehålla de senaste besluten med indata, läge,
+    anledning, målström och skickade kommandon, utan enhets-ID eller
+    entitets-ID:n. Spåret ska inte växa över sin fasta storlek.
+    """
+    entry_id = "test_diagnostics"
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CHARGER_DEVICE: DEVICE_ID,
+            CONF_STATUS_SENSOR: STATUS_SENSOR_ID,
+            CONF_CHARGER_ENABLED_SWITCH_ID: "switch.charger_power_diagnostics",
+            CONF_PRICE_SENSOR: PRICE_SENSOR_ID,
+            CONF_CHARGER_DYNAMIC_CURRENT_SENSOR: DYN_CURRENT_SENSOR_ID,
+            CONF_EVENT_DRIVEN_UPDATES: False,
+        },
+        entry_id=entry_id,
+    )
+    entry.add_to_hass(hass)
+    async_mock_service(hass, "easee", SERVICE_ACTION_COMMAND)
+    async_mock_service(hass, "easee", SERVICE_SET_DYNAMIC_LIMIT)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator: SmartEVChargingCoordinator = hass.data[DOMAIN][entry_id]["coordinator"]
+    coordinator.smart_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH}"
+    )
+    coordinator.max_price_entity_id = (
+        f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER}"
+    )
+    coordinator.solar_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH}"
+    )
+    coordinator.solar_buffer_entity_id = (
+        f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_SOLAR_BUFFER_NUMBER}"
+    )
+    coordinator.min_solar_charge_current_entity_id = f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_MIN_SOLAR_CHARGE_CURRENT_A_NUMBER}"
+    coordinator._internal_entities_resolved = True
+    hass.states.async_set(coordinator.smart_enable_switch_entity_id, STATE_ON)
+    hass.states.async_set(coordinator.max_price_entity_id, "1.0")
+    hass.states.async_set(coordinator.solar_enable_switch_entity_id, STATE_OFF)
+    hass.states.async_set("switch.charger_power_diagnostics", STATE_ON)
+    hass.states.async_set(PRICE_SENSOR_ID, "0.5")
+    hass.states.async_set(DYN_CURRENT_SENSOR_ID, "6")
+    hass.states.async_set(STATUS_SENSOR_ID, EASEE_STATUS_AWAITING_START)
+
+    records_before = len(coordinator.decision_trace)
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    hass.states.async_set(DYN_CURRENT_SENSOR_ID, "16")
+    freezer.tick(timedelta(seconds=30))
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    assert diagnostics["entry"]["data"][CONF_CHARGER_DEVICE] == REDACTED
+    assert diagnostics["entry"]["data"][CONF_PRICE_SENSOR] == REDACTED
+    assert diagnostics["entry"]["data"][CONF_EVENT_DRIVEN_UPDATES] is False
+    assert DEVICE_ID not in str(diagnostics)
+    assert PRICE_SENSOR_ID not in str(diagnostics)
+
+    trace = diagnostics["decision_trace"]
+    assert len(trace) == records_before + 2
+    started, unchanged = trace[-2:]
+    assert started["should_charge"] is True
+    assert started["target_current_a"] == 16.0
+    assert started["trigger"] == "poll"
+    assert started["reason_code"] == ReasonCode.PRICE_TIME_ACTIVE
+    assert started["inputs"]["current_price_kr"] == 0.5
+    assert started["inputs"]["charger_status"] == EASEE_STATUS_AWAITING_START
+    assert {"service": SERVICE_ACTION_COMMAND, "values": ["start"]} in started[
+        "commands"
+    ]
+    assert {"service": SERVICE_SET_DYNAMIC_LIMIT, "values": [16.0]} in started[
+        "commands"
+    ]
+    # Identiska kommandon undertrycks och syns därför inte i nästa beslut.
+    assert unchanged["commands"] == []
+    assert unchanged["reason"] == started["reason"]
+
+    small_trace = DecisionTrace(2)
+    snapshot = coordinator._build_input_snapshot()
+    for current_a in (6.0, 10.0, 16.0):
+        small_trace.record(
+            snapshot,
+            "poll",
+            "Pris/Tid",
+            True,
+            current_a,
+            Reason(ReasonCode.PRICE_TIME_ACTIVE, (0.5, 1.0)),
+            [],
+        )
+    assert [record["target_current_a"] for record in small_trace.as_dicts()] == [
+        10.0,
+        16.0,
+    ]
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
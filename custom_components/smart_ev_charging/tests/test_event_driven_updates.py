@@ -0,0 +1,151 @@
+# tests/test_event_driven_updates.py
+"""Testar att koordinatorn reagerar på tillståndsförändringar hos externa
+entiteter utan att vänta på nästa pollning, och att skurar av förändringar
+slås ihop till en enda refresh.
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+    async_mock_service,
+)
+
+from custom_components.smart_ev_charging.const import (
+    CONF_CHARGER_DEVICE,
+    CONF_CHARGER_DYNAMIC_CURRENT_SENSOR,
+    CONF_CHARGER_ENABLED_SWITCH_ID,
+    CONF_EVENT_DRIVEN_UPDATES,
+    CONF_PRICE_SENSOR,
+    CONF_SCAN_INTERVAL,
+    CONF_STATUS_SENSOR,
+    DOMAIN,
+    EASEE_STATUS_AWAITING_START,
+    EASEE_STATUS_DISCONNECTED,
+    ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH,
+    ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER,
+    ENTITY_ID_SUFFIX_MIN_SOLAR_CHARGE_CURRENT_A_NUMBER,
+    ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH,
+    ENTITY_ID_SUFFIX_SOLAR_BUFFER_NUMBER,
+    EVENT_REFRESH_DEBOUNCE_SECONDS,
+)
+from custom_components.smart_ev_charging.coordinator import SmartEVChargingCoordinator
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+MOCK_STATUS_SENSOR_ID = "sensor.test_charger_status_event"
+MOCK_PRICE_SENSOR_ID = "sensor.test_price_event"
+MOCK_MAIN_POWER_SWITCH_ID = "switch.mock_charger_power_event"
+MOCK_DYN_CURRENT_SENSOR_ID = "sensor.test_dyn_current_event"
+
+
+async def _setup_entry(hass: HomeAssistant, event_driven: bool):
+    entry_id = f"test_event_driven_{event_driven}"
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CHARGER_DEVICE: "mock_device_event",
+            CONF_STATUS_SENSOR: MOCK_STATUS_SENSOR_ID,
+            CONF_CHARGER_ENABLED_SWITCH_ID: MOCK_MAIN_POWER_SWITCH_ID,
+            CONF_PRICE_SENSOR: MOCK_PRICE_SENSOR_ID,
+            CONF_CHARGER_DYNAMIC_CURRENT_SENSOR: MOCK_DYN_CURRENT_SENSOR_ID,
+            CONF_SCAN_INTERVAL: 3600,
+            CONF_EVENT_DRIVEN_UPDATES: event_driven,
+        },
+        entry_id=entry_id,
+    )
+    entry.add_to_hass(hass)
+
+    hass.states.async_set(MOCK_STATUS_SENSOR_ID, EASEE_STATUS_DISCONNECTED[0])
+    hass.states.async_set(MOCK_MAIN_POWER_SWITCH_ID, STATE_ON)
+    hass.states.async_set(MOCK_PRICE_SENSOR_ID, "0.5")
+    hass.states.async_set(MOCK_DYN_CURRENT_SENSOR_ID, "6")
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator: SmartEVChargingCoordinator = hass.data[DOMAIN][entry_id]["coordinator"]
+    coordinator.smart_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH}"
+    )
+    coordinator.max_price_entity_id = (
+        f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER}"
+    )
+    coordinator.solar_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH}"
+    )
+    coordinator.solar_buffer_entity_id = (
+        f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_SOLAR_BUFFER_NUMBER}"
+    )
+    coordinator.min_solar_charge_current_entity_id = f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_MIN_SOLAR_CHARGE_CURRENT_A_NUMBER}"
+    coordinator._internal_entities_resolved = True
+
+    hass.states.async_set(coordinator.smart_enable_switch_entity_id, STATE_ON)
+    hass.states.async_set(coordinator.max_price_entity_id, "1.0")
+    hass.states.async_set(coordinator.solar_enable_switch_entity_id, STATE_OFF)
+    return coordinator
+
+
+async def _advance_past_debounce(hass: HomeAssistant, freezer) -> None:
+    freezer.tick(timedelta(seconds=EVENT_REFRESH_DEBOUNCE_SECONDS + 0.1))
+    async_fire_time_changed(hass, dt_util.utcnow())
+    await hass.async_block_till_done()
+
+
+async def test_status_change_reaches_charger_without_poll(
+    hass: HomeAssistant, freezer
+):
+    """SYFTE: En statusändring till awaiting_start ska ge ett startkommando
+    inom debounce-fönstret, trots att scan-intervallet är en timme.
+    """
+    await _setup_entry(hass, event_driven=True)
+    action_command_calls = async_mock_service(hass, "easee", "action_command")
+    set_current_calls = async_mock_service(hass, "easee", "set_charger_dynamic_limit")
+
+    hass.states.async_set(MOCK_STATUS_SENSOR_ID, EASEE_STATUS_AWAITING_START)
+    await hass.async_block_till_done()
+    assert len(action_command_calls) == 0, "Refresh ska vänta på debounce-fönstret."
+
+    await _advance_past_debounce(hass, freezer)
+
+    assert len(set_current_calls) == 1
+    assert len(action_command_calls) == 1
+    assert action_command_calls[0].data["action_command"] == "start"
+
+
+async def test_burst_of_changes_is_coalesced_into_one_refresh(
+    hass: HomeAssistant, freezer
+):
+    """SYFTE: Flera förändringar inom fönstret ska ge exakt en refresh."""
+    coordinator = await _setup_entry(hass, event_driven=True)
+    async_mock_service(hass, "easee", "action_command")
+    async_mock_service(hass, "easee", "set_charger_dynamic_limit")
+
+    with patch.object(
+        coordinator, "_async_update_data", wraps=coordinator._async_update_data
+    ) as update_mock:
+        hass.states.async_set(MOCK_STATUS_SENSOR_ID, EASEE_STATUS_AWAITING_START)
+        hass.states.async_set(MOCK_PRICE_SENSOR_ID, "0.45")
+        hass.states.async_set(MOCK_DYN_CURRENT_SENSOR_ID, "0")
+        hass.states.async_set(MOCK_PRICE_SENSOR_ID, "0.40")
+        await hass.async_block_till_done()
+
+        await _advance_past_debounce(hass, freezer)
+
+        assert update_mock.call_count == 1
+
+
+async def test_no_listeners_when_event_driven_disabled(hass: HomeAssistant, freezer):
+    """SYFTE: Med läget avstängt ska inga lyssnare registreras."""
+    coordinator = await _setup_entry(hass, event_driven=False)
+    action_command_calls = async_mock_service(hass, "easee", "action_command")
+
+    assert coordinator.listeners == []
+
+    hass.states.async_set(MOCK_STATUS_SENSOR_ID, EASEE_STATUS_AWAITING_START)
+    await _advance_past_debounce(hass, freezer)
+
+    assert len(action_command_calls) == 0
@@ -0,0 +1,54 @@
+# tests/test_helpers.py
+"""Testar väntan på att en entitet når ett visst tillstånd."""
+
+import asyncio
+
+from custom_components.smart_ev_charging.helpers import async_wait_for_state
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant
+
+MOCK_SWITCH_ID = "switch.mock_charger_power_wait"
+MOCK_STATUS_SENSOR_ID = "sensor.test_charger_status_wait"
+
+
+async def test_returns_immediately_when_already_in_state(hass: HomeAssistant):
+    """SYFTE: Är villkoret redan uppfyllt ska ingen väntan ske alls."""
+    hass.states.async_set(MOCK_SWITCH_ID, STATE_ON)
+
+    state_obj = await async_wait_for_state(hass, MOCK_SWITCH_ID, STATE_ON, 0.01)
+
+    assert state_obj is not None
+    assert state_obj.state == STATE_ON
+
+
+async def test_wakes_up_on_state_change(hass: HomeAssistant):
+    """SYFTE: Väntan ska avslutas av tillståndsförändringen, inte av en timer."""
+    hass.states.async_set(MOCK_STATUS_SENSOR_ID, "offline")
+
+    task = hass.async_create_task(
+        async_wait_for_state(
+            hass,
+            MOCK_STATUS_SENSOR_ID,
+            lambda state_obj: state_obj is not None and state_obj.state != "offline",
+            60,
+        )
+    )
+    await asyncio.sleep(0)
+    assert not task.done()
+
+    hass.states.async_set(MOCK_STATUS_SENSOR_ID, "ready_to_charge")
+    state_obj = await asyncio.wait_for(task, 1)
+
+    assert state_obj is not None
+    assert state_obj.state == "ready_to_charge"
+
+
+async def test_returns_none_on_timeout(hass: HomeAssistant):
+    """SYFTE: Nås aldrig tillståndet ska None returneras efter timeout."""
+    hass.states.async_set(MOCK_SWITCH_ID, STATE_OFF)
+
+    state_obj = await async_wait_for_state(
+        hass, MOCK_SWITCH_ID, (STATE_ON, "unavailable"), 0.01
+    )
+
+    assert state_obj is None
@@ -0,0 +1,147 @@
+# tests/test_input_snapshot.py
+"""Testar att koordinatorn bygger en oföränderlig ögonblicksbild av alla
+indata en gång per cykel, och att varje entitet bara läses en gång.
+"""
+
+from collections import Counter
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_mock_service,
+)
+
+from custom_components.smart_ev_charging.const import (
+    CONF_CHARGER_DEVICE,
+    CONF_CHARGER_DYNAMIC_CURRENT_SENSOR,
+    CONF_CHARGER_ENABLED_SWITCH_ID,
+    CONF_CHARGER_MAX_CURRENT_LIMIT_SENSOR,
+    CONF_EVENT_DRIVEN_UPDATES,
+    CONF_PRICE_SENSOR,
+    CONF_STATUS_SENSOR,
+    DOMAIN,
+    EASEE_STATUS_AWAITING_START,
+    ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH,
+    ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER,
+    ENTITY_ID_SUFFIX_MIN_SOLAR_CHARGE_CURRENT_A_NUMBER,
+    ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH,
+    ENTITY_ID_SUFFIX_SOLAR_BUFFER_NUMBER,
+)
+from custom_components.smart_ev_charging.coordinator import SmartEVChargingCoordinator
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant, StateMachine
+
+MOCK_STATUS_SENSOR_ID = "sensor.test_charger_status_snapshot"
+MOCK_PRICE_SENSOR_ID = "sensor.test_price_snapshot"
+MOCK_MAIN_POWER_SWITCH_ID = "switch.mock_charger_power_snapshot"
+MOCK_MAX_CURRENT_SENSOR_ID = "sensor.test_max_current_snapshot"
+MOCK_DYN_CURRENT_SENSOR_ID = "sensor.test_dyn_current_snapshot"
+
+
+@pytest.fixture
+async def setup_coordinator(hass: HomeAssistant):
+    """Setup för tester av ögonblicksbilden."""
+    entry_id = "test_snapshot_entry"
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CHARGER_DEVICE: "mock_device_snapshot",
+            CONF_STATUS_SENSOR: MOCK_STATUS_SENSOR_ID,
+            CONF_CHARGER_ENABLED_SWITCH_ID: MOCK_MAIN_POWER_SWITCH_ID,
+            CONF_PRICE_SENSOR: MOCK_PRICE_SENSOR_ID,
+            CONF_CHARGER_MAX_CURRENT_LIMIT_SENSOR: MOCK_MAX_CURRENT_SENSOR_ID,
+            CONF_CHARGER_DYNAMIC_CURRENT_SENSOR: MOCK_DYN_CURRENT_SENSOR_ID,
+            CONF_EVENT_DRIVEN_UPDATES: False,
+        },
+        entry_id=entry_id,
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator: SmartEVChargingCoordinator = hass.data[DOMAIN][entry_id]["coordinator"]
+    coordinator.smart_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH}"
+    )
+    coordinator.max_price_entity_id = (
+        f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER}"
+    )
+    coordinator.solar_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH}"
+    )
+    coordinator.solar_buffer_entity_id = (
+        f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_SOLAR_BUFFER_NUMBER}"
+    )
+    coordinator.min_solar_charge_current_entity_id = f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_MIN_SOLAR_CHARGE_CURRENT_A_NUMBER}"
+    coordinator._internal_entities_resolved = True
+
+    hass.states.async_set(coordinator.smart_enable_switch_entity_id, STATE_ON)
+    hass.states.async_set(coordinator.max_price_entity_id, "1.0")
+    hass.states.async_set(coordinator.solar_enable_switch_entity_id, STATE_OFF)
+    hass.states.async_set(MOCK_MAIN_POWER_SWITCH_ID, STATE_ON)
+    hass.states.async_set(
+        MOCK_PRICE_SENSOR_ID, "45", {"unit_of_measurement": "öre/kWh"}
+    )
+    hass.states.async_set(MOCK_MAX_CURRENT_SENSOR_ID, "32")
+    hass.states.async_set(MOCK_DYN_CURRENT_SENSOR_ID, "0")
+    hass.states.async_set(MOCK_STATUS_SENSOR_ID, "AWAITING_START")
+    return coordinator
+
+
+async def test_snapshot_contains_normalized_values(
+    hass: HomeAssistant, setup_coordinator: SmartEVChargingCoordinator
+):
+    """SYFTE: Ögonblicksbilden ska innehålla tolkade och normaliserade värden."""
+    snapshot = setup_coordinator._build_input_snapshot()
+
+    assert snapshot.charger_status == EASEE_STATUS_AWAITING_START
+    assert snapshot.charger_main_switch_on is True
+    assert snapshot.smart_charging_enabled is True
+    assert snapshot.solar_charging_enabled is False
+    assert snapshot.current_price_kr == pytest.approx(0.45)
+    assert snapshot.max_accepted_price_kr == 1.0
+    assert snapshot.charger_hw_max_amps == 32.0
+    assert snapshot.dynamic_current_limit_a == 0.0
+    assert snapshot.is_manually_paused is True
+
+
+async def test_snapshot_is_immutable(
+    hass: HomeAssistant, setup_coordinator: SmartEVChargingCoordinator
+):
+    """SYFTE: Fält i ögonblicksbilden ska inte kunna ändras i efterhand."""
+    snapshot = setup_coordinator._build_input_snapshot()
+
+    with pytest.raises(AttributeError):
+        snapshot.charger_status = "charging"
+    with pytest.raises(AttributeError):
+        snapshot.some_new_field = 1
+
+    replaced = snapshot.replace(charger_status="charging")
+    assert replaced.charger_status == "charging"
+    assert snapshot.charger_status == EASEE_STATUS_AWAITING_START
+
+
+async def test_each_entity_is_read_once_per_cycle(
+    hass: HomeAssistant, setup_coordinator: SmartEVChargingCoordinator
+):
+    """SYFTE: En hel uppdateringscykel ska läsa varje entitet exakt en gång."""
+    coordinator = setup_coordinator
+    async_mock_service(hass, "easee", "action_command")
+    async_mock_service(hass, "easee", "set_charger_dynamic_limit")
+    hass.states.async_set(MOCK_STATUS_SENSOR_ID, "ready_to_charge")
+
+    reads: Counter[str] = Counter()
+    original_get = StateMachine.get
+
+    def counting_get(state_machine, entity_id):
+        reads[entity_id] += 1
+        return original_get(state_machine, entity_id)
+
+    with patch.object(StateMachine, "get", autospec=True, side_effect=counting_get):
+        await coordinator.async_refresh()
+
+    assert reads[MOCK_STATUS_SENSOR_ID] == 1
+    assert reads[MOCK_MAX_CURRENT_SENSOR_ID] == 1
+    assert reads[MOCK_DYN_CURRENT_SENSOR_ID] == 1
+    assert max(reads.values()) == 1
@@ -0,0 +1,169 @@
+# tests/test_instrumentation.py
+"""Testar mätvärdena för beslutscykler och skickade kommandon."""
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_mock_service,
+)
+
+from custom_components.smart_ev_charging.commands import (
+    PRIORITY_CURRENT,
+    PRIORITY_PAUSE,
+    SERVICE_ACTION_COMMAND,
+    SERVICE_SET_DYNAMIC_LIMIT,
+    CommandScheduler,
+)
+from custom_components.smart_ev_charging.const import (
+    CONF_CHARGER_DEVICE,
+    CONF_CHARGER_ENABLED_SWITCH_ID,
+    CONF_EVENT_DRIVEN_UPDATES,
+    CONF_PRICE_SENSOR,
+    CONF_STATUS_SENSOR,
+    DOMAIN,
+    EASEE_STATUS_DISCONNECTED,
+)
+from custom_components.smart_ev_charging.coordinator import SmartEVChargingCoordinator
+from custom_components.smart_ev_charging.instrumentation import (
+    TRIGGER_EVENT,
+    TRIGGER_POLL,
+    LatencyHistogram,
+)
+from custom_components.smart_ev_charging.reasons import ReasonCode
+from homeassistant.const import STATE_ON
+from homeassistant.core import HomeAssistant
+
+DEVICE_ID = "device_instrumentation"
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_latency_percentiles_over_recent_samples():
+    """SYFTE: Percentilerna ska räknas med närmaste rang över de senaste
+    mätningarna, medan antalet mätningar räknar alla.
+    """
+    histogram = LatencyHistogram(capacity=10)
+    assert histogram.summary() == {
+        "p50_ms": None,
+        "p95_ms": None,
+        "max_ms": None,
+        "samples": 0,
+    }
+    for duration_ms in range(1, 21):
+        histogram.add(float(duration_ms))
+    # Bara 11-20 ms finns kvar i bufferten.
+    assert histogram.percentile(0.5) == 15.0
+    assert histogram.percentile(0.95) == 20.0
+    assert histogram.percentile(0.0) == 11.0
+    assert histogram.summary() == {
+        "p50_ms": 15.0,
+        "p95_ms": 20.0,
+        "max_ms": 20.0,
+        "samples": 20,
+    }
+
+
+async def test_scheduler_counts_sent_commands_per_service(hass: HomeAssistant):
+    """SYFTE: Kommandolagret ska räkna skickade kommandon per tjänst och hur
+    många som skickats den senaste timmen.
+    """
+    clock = _FakeClock()
+    scheduler = CommandScheduler(
+        hass, rate_per_minute=60, burst=10, max_queue_depth=10, clock=clock
+    )
+    async_mock_service(hass, "easee", SERVICE_SET_DYNAMIC_LIMIT)
+    async_mock_service(hass, "easee", SERVICE_ACTION_COMMAND)
+
+    for current in (6, 10):
+        await scheduler.async_submit(
+            DEVICE_ID,
+            SERVICE_SET_DYNAMIC_LIMIT,
+            {"device_id": DEVICE_ID, "current": current},
+            PRIORITY_CURRENT,
+        )
+        await hass.async_block_till_done()
+    clock.now = 1800.0
+    await scheduler.async_submit(
+        DEVICE_ID,
+        SERVICE_ACTION_COMMAND,
+        {"device_id": DEVICE_ID, "action_command": "pause"},
+        PRIORITY_PAUSE,
+    )
+    await hass.async_block_till_done()
+
+    assert scheduler.sent_by_service == {
+        SERVICE_SET_DYNAMIC_LIMIT: 2,
+        SERVICE_ACTION_COMMAND: 1,
+    }
+    assert scheduler.sent_last_hour() == 3
+    clock.now = 3601.0
+    assert scheduler.sent_last_hour() == 1
+    scheduler.async_shutdown()
+
+
+async def test_coordinator_exposes_cycle_metrics(hass: HomeAssistant):
+    """SYFTE: Koordinatorn ska mäta cykeltiden, räkna tillståndsläsningar och
+    skilja på cykler som väckts av pollning och av tillståndsförändringar.
+    Varje beslut räknas per anledningskod. Diagnostiksensorerna ska visa värdena med detaljer som attribut.
+    """
+    entry_id = "test_instrumentation"
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CHARGER_DEVICE: DEVICE_ID,
+            CONF_STATUS_SENSOR: "sensor.charger_status_instrumentation",
+            CONF_CHARGER_ENABLED_SWITCH_ID: "switch.charger_power_instrumentation",
+            CONF_PRICE_SENSOR: "sensor.price_instrumentation",
+            CONF_EVENT_DRIVEN_UPDATES: False,
+        },
+        entry_id=entry_id,
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set(
+        "sensor.charger_status_instrumentation", EASEE_STATUS_DISCONNECTED[0]
+    )
+    hass.states.async_set("switch.charger_power_instrumentation", STATE_ON)
+    hass.states.async_set("sensor.price_instrumentation", "1.0")
+    async_mock_service(hass, "easee", SERVICE_ACTION_COMMAND)
+    async_mock_service(hass, "easee", SERVICE_SET_DYNAMIC_LIMIT)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator: SmartEVChargingCoordinator = hass.data[DOMAIN][entry_id]["coordinator"]
+    polls_before = coordinator._instrumentation.refresh_triggers[TRIGGER_POLL]
+    reads_before = coordinator._instrumentation.state_reads
+
+    await coordinator.async_refresh()
+    await coordinator._async_event_refresh()
+    await hass.async_block_till_done()
+
+    data = coordinator.data
+    assert data["refresh_triggers"][TRIGGER_POLL] == polls_before + 1
+    assert data["refresh_triggers"][TRIGGER_EVENT] == 1
+    assert data["refreshes"] == sum(data["refresh_triggers"].values())
+    assert data["state_reads"] > reads_before
+    assert data["cycle_duration"]["samples"] == data["refreshes"]
+    assert data["cycle_duration_p95_ms"] >= data["cycle_duration"]["p50_ms"]
+    assert data["cycle_duration"]["control_samples"] == data["refreshes"]
+    # Laddaren är frånkopplad i alla cykler.
+    assert data["reason_code"] == ReasonCode.CHARGER_OFFLINE
+    assert data["reason_counts"] == {ReasonCode.CHARGER_OFFLINE: data["refreshes"]}
+
+    cycle_state = hass.states.get("sensor.avancerad_elbilsladdning_cykeltid_p95")
+    assert cycle_state is not None
+    assert cycle_state.attributes["unit_of_measurement"] == "ms"
+    assert cycle_state.attributes["samples"] == data["refreshes"]
+    refreshes_state = hass.states.get("sensor.avancerad_elbilsladdning_beslutscykler")
+    assert int(refreshes_state.state) == data["refreshes"]
+    assert refreshes_state.attributes[TRIGGER_EVENT] == 1
+    reason_state = hass.states.get("sensor.avancerad_elbilsladdning_beslutsanledning")
+    assert reason_state.state == ReasonCode.CHARGER_OFFLINE
+    assert reason_state.attributes[ReasonCode.CHARGER_OFFLINE] == data["refreshes"]
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
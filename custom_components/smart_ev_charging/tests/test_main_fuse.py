@@ -0,0 +1,223 @@
+# tests/test_main_fuse.py
+"""Testar skyddet av huvudsäkringen från fasströmssensorerna."""
+
+from datetime import UTC, datetime, timedelta
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_mock_service,
+)
+
+from custom_components.smart_ev_charging.commands import SERVICE_SET_DYNAMIC_LIMIT
+from custom_components.smart_ev_charging.const import (
+    CONF_CHARGER_DEVICE,
+    CONF_CHARGER_DYNAMIC_CURRENT_SENSOR,
+    CONF_CHARGER_ENABLED_SWITCH_ID,
+    CONF_CHARGER_POWER_SENSOR,
+    CONF_EVENT_DRIVEN_UPDATES,
+    CONF_MAIN_FUSE_CURRENT,
+    CONF_MAIN_FUSE_MARGIN,
+    CONF_PHASE_CURRENT_SENSOR_L1,
+    CONF_PHASE_CURRENT_SENSOR_L2,
+    CONF_PHASE_CURRENT_SENSOR_L3,
+    CONF_PRICE_SENSOR,
+    CONF_STATUS_SENSOR,
+    CONF_TIME_SCHEDULE_ENTITY,
+    DOMAIN,
+    EASEE_STATUS_CHARGING,
+    ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH,
+    ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER,
+    ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH,
+)
+from custom_components.smart_ev_charging.coordinator import SmartEVChargingCoordinator
+from custom_components.smart_ev_charging.fuse_guard import main_fuse_limit_a
+from homeassistant.const import STATE_OFF, STATE_ON, STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+
+PHASE_SENSORS = [f"sensor.main_fuse_current_l{phase}" for phase in (1, 2, 3)]
+START = datetime(2025, 6, 5, 18, 0, tzinfo=UTC)
+
+
+def test_limit_uses_most_loaded_phase_excluding_charger():
+    """SYFTE: Gränsen ska vara säkringen minus marginalen minus husets last på
+    den mest belastade fasen, där laddarens egen ström räknas bort.
+    """
+    # L1: 27A varav 16A laddaren -> huset 11A. 20 - 1 - 11 = 8A.
+    assert main_fuse_limit_a((27.0, 20.0, None), 16.0, 20.0, 1.0) == 8.0
+    assert main_fuse_limit_a((10.0, 12.5, 9.0), 0.0, 20.0, 1.0) == 6.5
+    assert main_fuse_limit_a((40.0,), 0.0, 20.0, 1.0) == 0.0
+    assert main_fuse_limit_a((None, None), 16.0, 20.0, 1.0) is None
+    # 1-fasladdning: bara L1 bär laddarens ström, L2 begränsar inte laddaren.
+    assert main_fuse_limit_a((18.0, 17.0, 5.0), 10.0, 20.0, 1.0, 1) == 11.0
+    # Bilen drar 4A trots gränsen 32A: huset drar 24A per fas. 25 - 1 - 24 = 0A.
+    assert main_fuse_limit_a((28.0, 28.0, 28.0), 4.0, 25.0, 1.0) == 0.0
+
+
+async def test_phase_current_reduces_limit_without_decision_cycle(
+    hass: HomeAssistant, freezer
+):
+    """SYFTE: När en fasström stiger så att säkringen riskerar att lösa ut ska
+    strömgränsen sänkas direkt i samma händelse, utan att beslutscykeln körs.
+    Nästa cykel ska sedan hålla sig inom gränsen, även i Pris/Tid.
+    """
+    freezer.move_to(START)
+    entry_id = "test_main_fuse"
+    status_sensor_id = "sensor.charger_status_main_fuse"
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CHARGER_DEVICE: "device_main_fuse",
+            CONF_STATUS_SENSOR: status_sensor_id,
+            CONF_CHARGER_ENABLED_SWITCH_ID: "switch.charger_power_main_fuse",
+            CONF_PRICE_SENSOR: "sensor.price_main_fuse",
+            CONF_TIME_SCHEDULE_ENTITY: None,
+            CONF_CHARGER_POWER_SENSOR: "sensor.charger_power_main_fuse",
+            CONF_EVENT_DRIVEN_UPDATES: False,
+            CONF_MAIN_FUSE_CURRENT: 20,
+            CONF_MAIN_FUSE_MARGIN: 1,
+            CONF_PHASE_CURRENT_SENSOR_L1: PHASE_SENSORS[0],
+            CONF_PHASE_CURRENT_SENSOR_L2: PHASE_SENSORS[1],
+            CONF_PHASE_CURRENT_SENSOR_L3: PHASE_SENSORS[2],
+        },
+        entry_id=entry_id,
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set(status_sensor_id, EASEE_STATUS_CHARGING)
+    hass.states.async_set("switch.charger_power_main_fuse", STATE_ON)
+    hass.states.async_set("sensor.price_main_fuse", "1.0")
+    # Bilen drar hela laddarens gräns, 16A på tre faser.
+    hass.states.async_set(
+        "sensor.charger_power_main_fuse", "11040", {"unit_of_measurement": "W"}
+    )
+    for entity_id in PHASE_SENSORS:
+        hass.states.async_set(entity_id, "2.0", {"unit_of_measurement": "A"})
+    action_calls = async_mock_service(hass, "easee", "action_command")
+    current_calls = async_mock_service(hass, "easee", SERVICE_SET_DYNAMIC_LIMIT)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator: SmartEVChargingCoordinator = hass.data[DOMAIN][entry_id]["coordinator"]
+    coordinator.smart_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH}"
+    )
+    coordinator.max_price_entity_id = (
+        f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER}"
+    )
+    coordinator.solar_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH}"
+    )
+    coordinator._internal_entities_resolved = True
+    hass.states.async_set(coordinator.smart_enable_switch_entity_id, STATE_ON)
+    hass.states.async_set(coordinator.max_price_entity_id, "2.0")
+    hass.states.async_set(coordinator.solar_enable_switch_entity_id, STATE_OFF)
+
+    # Pris/Tid laddar med HW-max (16A), säkringen har gott om utrymme.
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert [call.data["current"] for call in current_calls] == [16]
+    updated_at = coordinator.last_update_time
+
+    # Huset drar 11A på L1 utöver laddarens 16A: 20 - 1 - 11 = 8A.
+    hass.states.async_set(PHASE_SENSORS[0], "27.0", {"unit_of_measurement": "A"})
+    await hass.async_block_till_done()
+    assert [call.data["current"] for call in current_calls] == [16, 8.0]
+    assert coordinator.last_update_time == updated_at
+
+    # Elmätaren visar fortfarande den gamla laddströmmen. Det ska inte tolkas
+    # som att huset drar mer, och en otillgänglig sensor ändrar inget.
+    hass.states.async_set(PHASE_SENSORS[1], STATE_UNAVAILABLE)
+    await hass.async_block_till_done()
+    assert len(current_calls) == 2
+
+    # Beslutscykeln håller sig inom gränsen och skickar inte om 16A.
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert coordinator.should_charge_flag
+    assert [call.data["current"] for call in current_calls] == [16, 8.0]
+
+    # Räcker säkringen inte till minsta ström pausas laddningen direkt.
+    # L3: huset 15A plus laddarens 8A. 20 - 1 - 15 = 4A.
+    freezer.move_to(START + timedelta(seconds=30))
+    hass.states.async_set(
+        "sensor.charger_power_main_fuse", "5520", {"unit_of_measurement": "W"}
+    )
+    hass.states.async_set(PHASE_SENSORS[0], "19.0", {"unit_of_measurement": "A"})
+    hass.states.async_set(PHASE_SENSORS[2], "23.0", {"unit_of_measurement": "A"})
+    await hass.async_block_till_done()
+    assert [call.data["action_command"] for call in action_calls] == ["pause"]
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert not coordinator.should_charge_flag
+    assert coordinator.data["should_charge_reason"] == (
+        "Huvudsäkringen (20A) räcker inte till laddning just nu (4.0A < 6A)."
+    )
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert coordinator._main_fuse_listeners == []
+
+
+async def test_guard_uses_measured_charger_current(hass: HomeAssistant):
+    """SYFTE: Husets last ska räknas fram från laddarens uppmätta ström, inte
+    från strömgränsen. En bil som drar långt under gränsen får annars husets
+    last att se för liten ut. Skyddet ska också gälla när den här instansen
+    ännu inte har skickat någon strömgräns.
+    """
+    entry_id = "test_main_fuse_measured"
+    status_sensor_id = "sensor.charger_status_measured"
+    power_sensor_id = "sensor.charger_power_measured"
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CHARGER_DEVICE: "device_main_fuse_measured",
+            CONF_STATUS_SENSOR: status_sensor_id,
+            CONF_CHARGER_ENABLED_SWITCH_ID: "switch.charger_power_measured",
+            CONF_CHARGER_DYNAMIC_CURRENT_SENSOR: "sensor.charger_dynamic_measured",
+            CONF_CHARGER_POWER_SENSOR: power_sensor_id,
+            CONF_PRICE_SENSOR: "sensor.price_measured",
+            CONF_TIME_SCHEDULE_ENTITY: None,
+            CONF_EVENT_DRIVEN_UPDATES: False,
+            CONF_MAIN_FUSE_CURRENT: 25,
+            CONF_MAIN_FUSE_MARGIN: 1,
+            CONF_PHASE_CURRENT_SENSOR_L1: PHASE_SENSORS[0],
+            CONF_PHASE_CURRENT_SENSOR_L2: PHASE_SENSORS[1],
+            CONF_PHASE_CURRENT_SENSOR_L3: PHASE_SENSORS[2],
+        },
+        entry_id=entry_id,
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set(status_sensor_id, EASEE_STATUS_CHARGING)
+    hass.states.async_set("switch.charger_power_measured", STATE_ON)
+    hass.states.async_set("sensor.price_measured", "1.0")
+    # Laddarens gräns är 16A, men bilen drar bara 4A på tre faser.
+    hass.states.async_set(
+        "sensor.charger_dynamic_measured", "16", {"unit_of_measurement": "A"}
+    )
+    hass.states.async_set(power_sensor_id, "2760", {"unit_of_measurement": "W"})
+    for entity_id in PHASE_SENSORS:
+        hass.states.async_set(entity_id, "10.0", {"unit_of_measurement": "A"})
+    action_calls = async_mock_service(hass, "easee", "action_command")
+    current_calls = async_mock_service(hass, "easee", SERVICE_SET_DYNAMIC_LIMIT)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator: SmartEVChargingCoordinator = hass.data[DOMAIN][entry_id]["coordinator"]
+    assert current_calls == []
+
+    # Huset drar 20 - 4 = 16A per fas: 25 - 1 - 16 = 8A. Räknat från gränsen
+    # (16A) hade huset sett ut att dra 4A och gränsen blivit 20A.
+    for entity_id in PHASE_SENSORS:
+        hass.states.async_set(entity_id, "20.0", {"unit_of_measurement": "A"})
+    await hass.async_block_till_done()
+    assert [call.data["current"] for call in current_calls] == [8.0]
+    assert action_calls == []
+
+    # Alla faser 3A över säkringen: laddningen pausas direkt.
+    for entity_id in PHASE_SENSORS:
+        hass.states.async_set(entity_id, "28.0", {"unit_of_measurement": "A"})
+    await hass.async_block_till_done()
+    assert [call.data["action_command"] for call in action_calls] == ["pause"]
+    assert coordinator._main_fuse_limit_a == 0.0
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,139 @@
+# tests/test_net_surplus.py
+"""Testar solenergiladdning med nettoöverskott från husets last eller nätmätaren."""
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_mock_service,
+)
+
+from custom_components.smart_ev_charging.const import (
+    CONF_CHARGER_DEVICE,
+    CONF_CHARGER_ENABLED_SWITCH_ID,
+    CONF_CHARGER_POWER_SENSOR,
+    CONF_EVENT_DRIVEN_UPDATES,
+    CONF_GRID_POWER_SENSOR,
+    CONF_HOUSE_POWER_SENSOR,
+    CONF_NET_SURPLUS_FROM_HOUSE_POWER,
+    CONF_PRICE_SENSOR,
+    CONF_SOLAR_PRODUCTION_SENSOR,
+    CONF_STATUS_SENSOR,
+    DOMAIN,
+    EASEE_STATUS_CHARGING,
+    EASEE_STATUS_READY_TO_CHARGE,
+    ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH,
+    ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER,
+    ENTITY_ID_SUFFIX_MIN_SOLAR_CHARGE_CURRENT_A_NUMBER,
+    ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH,
+    ENTITY_ID_SUFFIX_SOLAR_BUFFER_NUMBER,
+)
+from custom_components.smart_ev_charging.coordinator import SmartEVChargingCoordinator
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant
+
+# 3 faser * 230 V: effekt per ampere
+WATTS_PER_AMPERE = 690
+
+
+async def _setup_entry(
+    hass: HomeAssistant, name: str, extra_config: dict
+) -> tuple[SmartEVChargingCoordinator, list]:
+    entry_id = f"test_net_surplus_{name}"
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CHARGER_DEVICE: f"device_{name}",
+            CONF_STATUS_SENSOR: f"sensor.charger_status_{name}",
+            CONF_CHARGER_ENABLED_SWITCH_ID: f"switch.charger_power_{name}",
+            CONF_PRICE_SENSOR: f"sensor.price_{name}",
+            CONF_SOLAR_PRODUCTION_SENSOR: f"sensor.solar_{name}",
+            CONF_EVENT_DRIVEN_UPDATES: False,
+            **extra_config,
+        },
+        entry_id=entry_id,
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set(f"sensor.charger_status_{name}", EASEE_STATUS_READY_TO_CHARGE[0])
+    hass.states.async_set(f"switch.charger_power_{name}", STATE_ON)
+    hass.states.async_set(f"sensor.price_{name}", "5.0")
+    async_mock_service(hass, "easee", "action_command")
+    current_calls = async_mock_service(hass, "easee", "set_charger_dynamic_limit")
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator: SmartEVChargingCoordinator = hass.data[DOMAIN][entry_id]["coordinator"]
+    coordinator.smart_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH}"
+    )
+    coordinator.max_price_entity_id = (
+        f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER}"
+    )
+    coordinator.solar_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH}"
+    )
+    coordinator.solar_buffer_entity_id = (
+        f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_SOLAR_BUFFER_NUMBER}"
+    )
+    coordinator.min_solar_charge_current_entity_id = f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_MIN_SOLAR_CHARGE_CURRENT_A_NUMBER}"
+    coordinator._internal_entities_resolved = True
+    hass.states.async_set(coordinator.smart_enable_switch_entity_id, STATE_OFF)
+    hass.states.async_set(coordinator.max_price_entity_id, "1.0")
+    hass.states.async_set(coordinator.solar_enable_switch_entity_id, STATE_ON)
+    hass.states.async_set(coordinator.solar_buffer_entity_id, "0")
+    hass.states.async_set(coordinator.min_solar_charge_current_entity_id, "6")
+    return coordinator, current_calls
+
+
+async def test_house_load_reduces_solar_current(hass: HomeAssistant):
+    """SYFTE: Med nettoöverskott från husets last ska en diskmaskin sänka
+    laddströmmen, medan laddarens egen effekt (uppmätt av effektsensorn) inte
+    ska räknas som husets last.
+    """
+    coordinator, current_calls = await _setup_entry(
+        hass,
+        "house",
+        {
+            CONF_HOUSE_POWER_SENSOR: "sensor.house_house",
+            CONF_NET_SURPLUS_FROM_HOUSE_POWER: True,
+            CONF_CHARGER_POWER_SENSOR: "sensor.charger_power_house",
+        },
+    )
+    hass.states.async_set("sensor.solar_house", "7000")
+    hass.states.async_set("sensor.house_house", "500")
+    hass.states.async_set("sensor.charger_power_house", "0")
+
+    # 7000 - 500 = 6500 W -> 9 A.
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert current_calls[-1].data["current"] == 9
+
+    # Laddaren drar 9 A och diskmaskinen 2000 W: husets last blir 500 + 2000 + 6210 W.
+    # Överskott: 7000 - 8710 + 6210 = 4500 W -> 6 A.
+    hass.states.async_set("sensor.charger_status_house", EASEE_STATUS_CHARGING)
+    hass.states.async_set("sensor.charger_power_house", str(9 * WATTS_PER_AMPERE))
+    hass.states.async_set("sensor.house_house", str(2500 + 9 * WATTS_PER_AMPERE))
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert current_calls[-1].data["current"] == 6
+
+
+async def test_grid_export_drives_solar_current(hass: HomeAssistant):
+    """SYFTE: Med nätmätare ska överskottet vara exporten plus laddarens egen
+    effekt, uppskattad från senast skickade strömgräns när effektsensor saknas.
+    """
+    coordinator, current_calls = await _setup_entry(
+        hass, "grid", {CONF_GRID_POWER_SENSOR: "sensor.grid_grid"}
+    )
+    hass.states.async_set("sensor.solar_grid", "7000")
+    hass.states.async_set("sensor.grid_grid", "-4500")
+
+    # Export 4500 W -> 6 A.
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert current_calls[-1].data["current"] == 6
+
+    # Laddaren drar 6 A (4140 W) och exporten sjunker till 1000 W: 5140 W -> 7 A.
+    hass.states.async_set("sensor.charger_status_grid", EASEE_STATUS_CHARGING)
+    hass.states.async_set("sensor.grid_grid", "-1000")
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert current_calls[-1].data["current"] == 7
@@ -0,0 +1,160 @@
+# tests/test_phase_switching.py
+"""Testar växlingen mellan 1-fas- och 3-fasladdning vid litet solöverskott."""
+
+from datetime import UTC, datetime, timedelta
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_mock_service,
+)
+
+from custom_components.smart_ev_charging.commands import (
+    SERVICE_SET_CIRCUIT_DYNAMIC_LIMIT,
+    SERVICE_SET_DYNAMIC_LIMIT,
+)
+from custom_components.smart_ev_charging.const import (
+    CONF_CHARGER_DEVICE,
+    CONF_CHARGER_ENABLED_SWITCH_ID,
+    CONF_EVENT_DRIVEN_UPDATES,
+    CONF_PHASE_SWITCH_MIN_DWELL,
+    CONF_PHASE_SWITCHING_ENABLED,
+    CONF_PRICE_SENSOR,
+    CONF_SOLAR_PRODUCTION_SENSOR,
+    CONF_STATUS_SENSOR,
+    DOMAIN,
+    EASEE_STATUS_DISCONNECTED,
+    EASEE_STATUS_READY_TO_CHARGE,
+    ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH,
+    ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER,
+    ENTITY_ID_SUFFIX_MIN_SOLAR_CHARGE_CURRENT_A_NUMBER,
+    ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH,
+    ENTITY_ID_SUFFIX_SOLAR_BUFFER_NUMBER,
+    PHASE_MODE_TTL_MINUTES,
+)
+from custom_components.smart_ev_charging.coordinator import SmartEVChargingCoordinator
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant
+
+START = datetime(2025, 6, 5, 9, 0, tzinfo=UTC)
+SOLAR_SENSOR_ID = "sensor.solar_phase_switching"
+
+
+async def test_low_surplus_charges_on_one_phase(hass: HomeAssistant, freezer):
+    """SYFTE: Ett solöverskott mellan 1,4 och 4,1 kW ska växla laddaren till en
+    fas via kretsgränsen och ladda direkt. Kretsgränsen skickas när fasläget
+    eller den begränsade laddströmmen ändras, tillbaka till tre faser först
+    efter minsta tiden, och förnyas inte när sessionen har tagit slut.
+    """
+    freezer.move_to(START)
+    entry_id = "test_phase_switching"
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CHARGER_DEVICE: "device_phase_switching",
+            CONF_STATUS_SENSOR: "sensor.charger_status_phase_switching",
+            CONF_CHARGER_ENABLED_SWITCH_ID: "switch.charger_power_phase_switching",
+            CONF_PRICE_SENSOR: "sensor.price_phase_switching",
+            CONF_SOLAR_PRODUCTION_SENSOR: SOLAR_SENSOR_ID,
+            CONF_PHASE_SWITCHING_ENABLED: True,
+            CONF_PHASE_SWITCH_MIN_DWELL: 600,
+            CONF_EVENT_DRIVEN_UPDATES: False,
+        },
+        entry_id=entry_id,
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set(
+        "sensor.charger_status_phase_switching", EASEE_STATUS_READY_TO_CHARGE[0]
+    )
+    hass.states.async_set("switch.charger_power_phase_switching", STATE_ON)
+    hass.states.async_set("sensor.price_phase_switching", "5.0")
+    async_mock_service(hass, "easee", "action_command")
+    current_calls = async_mock_service(hass, "easee", SERVICE_SET_DYNAMIC_LIMIT)
+    phase_calls = async_mock_service(hass, "easee", SERVICE_SET_CIRCUIT_DYNAMIC_LIMIT)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator: SmartEVChargingCoordinator = hass.data[DOMAIN][entry_id]["coordinator"]
+    coordinator.smart_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH}"
+    )
+    coordinator.max_price_entity_id = (
+        f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER}"
+    )
+    coordinator.solar_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH}"
+    )
+    coordinator.solar_buffer_entity_id = (
+        f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_SOLAR_BUFFER_NUMBER}"
+    )
+    coordinator.min_solar_charge_current_entity_id = f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_MIN_SOLAR_CHARGE_CURRENT_A_NUMBER}"
+    coordinator._internal_entities_resolved = True
+    hass.states.async_set(coordinator.smart_enable_switch_entity_id, STATE_OFF)
+    hass.states.async_set(coordinator.max_price_entity_id, "1.0")
+    hass.states.async_set(coordinator.solar_enable_switch_entity_id, STATE_ON)
+    hass.states.async_set(coordinator.solar_buffer_entity_id, "0")
+    hass.states.async_set(coordinator.min_solar_charge_current_entity_id, "6")
+
+    # 2,3 kW: 10A på en fas.
+    hass.states.async_set(SOLAR_SENSOR_ID, "2300", {"unit_of_measurement": "W"})
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert [call.data for call in phase_calls] == [
+        {
+            "device_id": "device_phase_switching",
+            "current_p1": 10.0,
+            "current_p2": 0.0,
+            "current_p3": 0.0,
+            "time_to_live": PHASE_MODE_TTL_MINUTES,
+        }
+    ]
+    assert [call.data["current"] for call in current_calls] == [10.0]
+    assert coordinator.should_charge_flag
+
+    # Överskottet räcker till tre faser, men minsta tiden har inte gått.
+    # Kretsgränsen följer laddströmmen, så laddaren kan dra 16A på en fas.
+    freezer.move_to(START + timedelta(minutes=5))
+    hass.states.async_set(SOLAR_SENSOR_ID, "6000", {"unit_of_measurement": "W"})
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert [
+        (call.data["current_p1"], call.data["current_p2"]) for call in phase_calls
+    ] == [(10.0, 0.0), (16.0, 0.0)]
+    assert [call.data["current"] for call in current_calls] == [10.0, 16.0]
+
+    freezer.move_to(START + timedelta(minutes=11))
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert [
+        (call.data["current_p1"], call.data["current_p2"]) for call in phase_calls
+    ] == [(10.0, 0.0), (16.0, 0.0), (8.0, 8.0)]
+    assert [call.data["current"] for call in current_calls] == [10.0, 16.0, 8.0]
+
+    # Kretsgränsen skickas efter säkringens begränsning, inte med laddarens
+    # maxström, och förnyas först när halva livslängden har gått.
+    coordinator._main_fuse_limit_a = 7.0
+    freezer.move_to(START + timedelta(minutes=12))
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert phase_calls[-1].data["current_p3"] == 7.0
+    assert current_calls[-1].data["current"] == 7.0
+    freezer.move_to(START + timedelta(minutes=15))
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert len(phase_calls) == 4
+    freezer.move_to(START + timedelta(minutes=20))
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert len(phase_calls) == 5
+
+    # Sessionen tar slut: kretsgränsen förnyas inte och löper ut.
+    hass.states.async_set(
+        "sensor.charger_status_phase_switching", EASEE_STATUS_DISCONNECTED[0]
+    )
+    freezer.move_to(START + timedelta(minutes=30))
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert len(phase_calls) == 5
+    assert coordinator._phase_mode_sent is None
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,184 @@
+# tests/test_planner.py
+"""Testar planeringen av laddning till de billigaste prisperioderna."""
+
+from datetime import UTC, datetime, timedelta
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_mock_service,
+)
+
+from custom_components.smart_ev_charging.const import (
+    CONF_BATTERY_CAPACITY_KWH,
+    CONF_CHARGE_DEADLINE_HOUR,
+    CONF_CHARGER_DEVICE,
+    CONF_CHARGER_ENABLED_SWITCH_ID,
+    CONF_EV_SOC_SENSOR,
+    CONF_EVENT_DRIVEN_UPDATES,
+    CONF_PRICE_SENSOR,
+    CONF_STATUS_SENSOR,
+    CONF_TARGET_SOC_LIMIT,
+    CONF_TIME_SCHEDULE_ENTITY,
+    DOMAIN,
+    EASEE_STATUS_READY_TO_CHARGE,
+    ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH,
+    ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER,
+    ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH,
+)
+from custom_components.smart_ev_charging.coordinator import SmartEVChargingCoordinator
+from custom_components.smart_ev_charging.planner import (
+    PriceSlot,
+    parse_price_slots,
+    plan_cheapest_slots,
+    required_energy_kwh,
+)
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant
+
+START = datetime(2025, 6, 5, 0, 0, tzinfo=UTC)
+
+
+def _forecast(prices: list[float], minutes: int) -> list[dict]:
+    return [
+        {
+            "start": START + timedelta(minutes=minutes * index),
+            "end": START + timedelta(minutes=minutes * (index + 1)),
+            "value": price,
+        }
+        for index, price in enumerate(prices)
+    ]
+
+
+def test_plan_picks_cheapest_quarter_hours_before_deadline():
+    """SYFTE: Planen ska välja de billigaste kvartarna före deadline, i tidsordning."""
+    slots = parse_price_slots(
+        {"raw_today": _forecast([3.0, 1.0, 2.0, 0.5, 4.0, 0.1], 15), "raw_tomorrow": []}
+    )
+    assert len(slots) == 6
+
+    # 11 kW i 15 minuter = 2.75 kWh per kvart, 5 kWh kräver två kvartar.
+    plan = plan_cheapest_slots(
+        slots,
+        now=START,
+        deadline=START + timedelta(hours=1),
+        energy_kwh=5.0,
+        charge_power_kw=11.0,
+    )
+    assert [slot.price for slot in plan.slots] == [1.0, 0.5]
+    assert plan.covers_need
+    assert plan.is_active(START + timedelta(minutes=50))
+    assert not plan.is_active(START + timedelta(minutes=40))
+
+
+def test_plan_counts_only_remaining_part_of_current_slot():
+    """SYFTE: En pågående period räknas bara med den tid som återstår."""
+    slots = [
+        PriceSlot(START, START + timedelta(hours=1), 0.1),
+        PriceSlot(START + timedelta(hours=1), START + timedelta(hours=2), 0.2),
+    ]
+    plan = plan_cheapest_slots(
+        slots,
+        now=START + timedelta(minutes=45),
+        deadline=None,
+        energy_kwh=required_energy_kwh(50, 80, 20),
+        charge_power_kw=10.0,
+    )
+    assert [slot.price for slot in plan.slots] == [0.1, 0.2]
+    assert plan.energy_kwh == 6.0
+
+    plan = plan_cheapest_slots(
+        slots,
+        now=START,
+        deadline=START + timedelta(hours=1),
+        energy_kwh=20.0,
+        charge_power_kw=10.0,
+    )
+    assert not plan.covers_need
+
+
+async def test_coordinator_waits_for_planned_slot(hass: HomeAssistant, freezer):
+    """SYFTE: Med laddplan ska koordinatorn inte ladda i en dyr timme även om
+    priset är under maxpris, men ladda när den planerade billiga timmen börjar.
+    """
+    freezer.move_to(START)
+    entry_id = "test_planner"
+    status_sensor_id = "sensor.charger_status_planner"
+    price_sensor_id = "sensor.price_planner"
+    soc_sensor_id = "sensor.ev_soc_planner"
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CHARGER_DEVICE: "device_planner",
+            CONF_STATUS_SENSOR: status_sensor_id,
+            CONF_CHARGER_ENABLED_SWITCH_ID: "switch.charger_power_planner",
+            CONF_PRICE_SENSOR: price_sensor_id,
+            CONF_TIME_SCHEDULE_ENTITY: None,
+            CONF_EV_SOC_SENSOR: soc_sensor_id,
+            CONF_TARGET_SOC_LIMIT: 80.0,
+            CONF_BATTERY_CAPACITY_KWH: 20,
+            CONF_CHARGE_DEADLINE_HOUR: 4,
+            CONF_EVENT_DRIVEN_UPDATES: False,
+        },
+        entry_id=entry_id,
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set(status_sensor_id, EASEE_STATUS_READY_TO_CHARGE[0])
+    hass.states.async_set("switch.charger_power_planner", STATE_ON)
+    hass.states.async_set(soc_sensor_id, "60")
+    hass.states.async_set(
+        price_sensor_id,
+        "0.9",
+        {"raw_today": _forecast([0.9, 0.2, 0.8, 0.7], 60), "raw_tomorrow": None},
+    )
+    async_mock_service(hass, "easee", "action_command")
+    current_calls = async_mock_service(hass, "easee", "set_charger_dynamic_limit")
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator: SmartEVChargingCoordinator = hass.data[DOMAIN][entry_id]["coordinator"]
+    coordinator.smart_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH}"
+    )
+    coordinator.max_price_entity_id = (
+        f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER}"
+    )
+    coordinator.solar_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH}"
+    )
+    coordinator._internal_entities_resolved = True
+    hass.states.async_set(coordinator.smart_enable_switch_entity_id, STATE_ON)
+    hass.states.async_set(coordinator.max_price_entity_id, "1.0")
+    hass.states.async_set(coordinator.solar_enable_switch_entity_id, STATE_OFF)
+
+    # 4 kWh behövs (20 % av 20 kWh), en timme med 11 kW räcker: 01-02 (0.2 kr).
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert not coordinator.should_charge_flag
+    assert coordinator.data["should_charge_reason"] == (
+        "Väntar på nästa planerade billiga period."
+    )
+    assert coordinator.data["planned_charging_slots"] == [
+        (START + timedelta(hours=1)).isoformat()
+    ]
+    assert len(current_calls) == 0
+
+    freezer.move_to(START + timedelta(hours=1, minutes=5))
+    hass.states.async_set(
+        price_sensor_id,
+        "0.2",
+        {"raw_today": _forecast([0.9, 0.2, 0.8, 0.7], 60), "raw_tomorrow": None},
+    )
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert coordinator.should_charge_flag
+    assert len(current_calls) == 1
+
+    # På en fas ger 16 A bara 3,7 kW. Då behövs även 03-04 (0.7 kr) före deadline.
+    coordinator._charger_phases = 1
+    assert not coordinator._planned_slot_active(
+        hass.states.get(price_sensor_id), 60.0, 80.0, 16.0, START
+    )
+    assert [slot.start for slot in coordinator._charge_plan.slots] == [
+        START + timedelta(hours=1),
+        START + timedelta(hours=3),
+    ]
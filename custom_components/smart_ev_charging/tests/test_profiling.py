@@ -0,0 +1,168 @@
+# tests/test_profiling.py
+"""Testar tjänsten som profilerar beslutscykler."""
+
+import asyncio
+from pathlib import Path
+import tracemalloc
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_mock_service,
+)
+
+from custom_components.smart_ev_charging.commands import (
+    SERVICE_ACTION_COMMAND,
+    SERVICE_SET_DYNAMIC_LIMIT,
+)
+from custom_components.smart_ev_charging.const import (
+    ATTR_CYCLES,
+    ATTR_TRACEMALLOC,
+    CONF_CHARGER_DEVICE,
+    CONF_CHARGER_ENABLED_SWITCH_ID,
+    CONF_EVENT_DRIVEN_UPDATES,
+    CONF_PRICE_SENSOR,
+    CONF_STATUS_SENSOR,
+    DOMAIN,
+    EASEE_STATUS_DISCONNECTED,
+    PROFILER_DATA_KEY,
+    SERVICE_PROFILE,
+)
+from custom_components.smart_ev_charging.coordinator import SmartEVChargingCoordinator
+from homeassistant.const import STATE_ON
+from homeassistant.core import HomeAssistant
+
+
+async def test_profile_service_writes_results_and_restores_cycle(
+    hass: HomeAssistant, tmp_path: Path
+):
+    """SYFTE: Tjänsten ska profilera exakt det begärda antalet cykler, skriva
+    .prof-filen och allokeringssammanfattningen till konfigurationskatalogen och
+    sedan återställa den vanliga cykeln. Tjänsten tas bort med sista laddaren.
+    """
+    hass.config.config_dir = str(tmp_path)
+    entry_id = "test_profiling"
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CHARGER_DEVICE: "device_profiling",
+            CONF_STATUS_SENSOR: "sensor.charger_status_profiling",
+            CONF_CHARGER_ENABLED_SWITCH_ID: "switch.charger_power_profiling",
+            CONF_PRICE_SENSOR: "sensor.price_profiling",
+            CONF_EVENT_DRIVEN_UPDATES: False,
+        },
+        entry_id=entry_id,
+    )
+    entry.add_to_hass(hass)
+    async_mock_service(hass, "easee", SERVICE_ACTION_COMMAND)
+    async_mock_service(hass, "easee", SERVICE_SET_DYNAMIC_LIMIT)
+    hass.states.async_set("sensor.charger_status_profiling", EASEE_STATUS_DISCONNECTED)
+    hass.states.async_set("switch.charger_power_profiling", STATE_ON)
+    hass.states.async_set("sensor.price_profiling", "0.5")
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator: SmartEVChargingCoordinator = hass.data[DOMAIN][entry_id]["coordinator"]
+    assert hass.services.has_service(DOMAIN, SERVICE_PROFILE)
+    assert "_async_update_data" not in coordinator.__dict__
+
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_PROFILE,
+        {ATTR_CYCLES: 2, ATTR_TRACEMALLOC: True},
+        blocking=True,
+    )
+    assert "_async_update_data" in coordinator.__dict__
+
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert "_async_update_data" in coordinator.__dict__
+    assert not list(tmp_path.glob("*.prof"))
+
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert "_async_update_data" not in coordinator.__dict__
+
+    (prof_file,) = tmp_path.glob(f"{DOMAIN}_profile_{entry_id}_*.prof")
+    assert prof_file.stat().st_size > 0
+    (alloc_file,) = tmp_path.glob(f"{DOMAIN}_profile_{entry_id}_*_allocations.txt")
+    assert "efter 2 beslutscykler" in alloc_file.read_text(encoding="utf-8")
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert not hass.services.has_service(DOMAIN, SERVICE_PROFILE)
+
+
+async def test_profile_service_shares_one_profiler_between_chargers(
+    hass: HomeAssistant, tmp_path: Path
+):
+    """SYFTE: Ett tjänsteanrop ska ge en enda profilerare och tracemalloc-session
+    för alla laddare, även när deras cykler överlappar. En ny begäran medan
+    profileringen pågår ska ignoreras, och resultatet skrivs en gång.
+    """
+    hass.config.config_dir = str(tmp_path)
+    async_mock_service(hass, "easee", SERVICE_ACTION_COMMAND)
+    async_mock_service(hass, "easee", SERVICE_SET_DYNAMIC_LIMIT)
+    hass.states.async_set("sensor.price_profiling", "0.5")
+    entries = []
+    for index in (1, 2):
+        main_switch_id = f"switch.charger_power_profiling_{index}"
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={
+                CONF_CHARGER_DEVICE: f"device_profiling_{index}",
+                CONF_STATUS_SENSOR: f"sensor.charger_status_profiling_{index}",
+                CONF_CHARGER_ENABLED_SWITCH_ID: main_switch_id,
+                CONF_PRICE_SENSOR: "sensor.price_profiling",
+                CONF_EVENT_DRIVEN_UPDATES: False,
+            },
+            entry_id=f"test_profiling_{index}",
+        )
+        entry.add_to_hass(hass)
+        hass.states.async_set(
+            f"sensor.charger_status_profiling_{index}", EASEE_STATUS_DISCONNECTED
+        )
+        hass.states.async_set(main_switch_id, STATE_ON)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        entries.append(entry)
+    coordinators: list[SmartEVChargingCoordinator] = [
+        hass.data[DOMAIN][entry.entry_id]["coordinator"] for entry in entries
+    ]
+
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_PROFILE,
+        {ATTR_CYCLES: 1, ATTR_TRACEMALLOC: True},
+        blocking=True,
+    )
+    profiler = hass.data[DOMAIN][PROFILER_DATA_KEY]
+    assert [coordinator._profiler for coordinator in coordinators] == [
+        profiler,
+        profiler,
+    ]
+    assert tracemalloc.is_tracing()
+
+    await hass.services.async_call(
+        DOMAIN, SERVICE_PROFILE, {ATTR_CYCLES: 3}, blocking=True
+    )
+    assert hass.data[DOMAIN][PROFILER_DATA_KEY] is profiler
+    assert profiler.cycles == 1
+
+    await asyncio.gather(
+        *(coordinator.async_refresh() for coordinator in coordinators)
+    )
+    await hass.async_block_till_done()
+    assert profiler.done
+    assert PROFILER_DATA_KEY not in hass.data[DOMAIN]
+    assert not tracemalloc.is_tracing()
+    assert all(
+        "_async_update_data" not in coordinator.__dict__
+        for coordinator in coordinators
+    )
+    (prof_file,) = tmp_path.glob(f"{DOMAIN}_profile_alla_*.prof")
+    assert prof_file.stat().st_size > 0
+    assert len(list(tmp_path.glob("*_allocations.txt"))) == 1
+
+    for entry in entries:
+        await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,218 @@
+# tests/test_shared_fuse.py
+"""Testar att två laddare med gemensam huvudsäkring delar på strömmen."""
+
+from typing import Any
+from unittest.mock import patch
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_mock_service,
+)
+
+from custom_components.smart_ev_charging.commands import SERVICE_SET_DYNAMIC_LIMIT
+from custom_components.smart_ev_charging.const import (
+    CONF_CHARGER_DEVICE,
+    CONF_CHARGER_ENABLED_SWITCH_ID,
+    CONF_EVENT_DRIVEN_UPDATES,
+    CONF_PRICE_SENSOR,
+    CONF_SHARED_FUSE_CURRENT,
+    CONF_STATUS_SENSOR,
+    CONF_TIME_SCHEDULE_ENTITY,
+    DOMAIN,
+    EASEE_STATUS_CHARGING,
+    ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH,
+    ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER,
+    ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH,
+    FUSE_HUB_DATA_KEY,
+    LEGACY_UNIQUE_ID,
+)
+from custom_components.smart_ev_charging.coordinator import SmartEVChargingCoordinator
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant
+
+MOCK_PRICE_SENSOR_ID = "sensor.test_price_shared_fuse"
+SHARED_FUSE_A = 16
+
+
+async def _setup_charger(
+    hass: HomeAssistant, name: str, **options: Any
+) -> SmartEVChargingCoordinator:
+    entry_id = f"test_shared_fuse_{name}"
+    status_sensor_id = f"sensor.charger_status_{name}"
+    main_switch_id = f"switch.charger_power_{name}"
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CHARGER_DEVICE: f"device_{name}",
+            CONF_STATUS_SENSOR: status_sensor_id,
+            CONF_CHARGER_ENABLED_SWITCH_ID: main_switch_id,
+            CONF_PRICE_SENSOR: MOCK_PRICE_SENSOR_ID,
+            CONF_TIME_SCHEDULE_ENTITY: None,
+            CONF_EVENT_DRIVEN_UPDATES: False,
+            CONF_SHARED_FUSE_CURRENT: SHARED_FUSE_A,
+            **options,
+        },
+        entry_id=entry_id,
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set(status_sensor_id, EASEE_STATUS_CHARGING)
+    hass.states.async_set(main_switch_id, STATE_ON)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator: SmartEVChargingCoordinator = hass.data[DOMAIN][entry_id]["coordinator"]
+    coordinator.smart_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH}"
+    )
+    coordinator.max_price_entity_id = (
+        f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER}"
+    )
+    coordinator.solar_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH}"
+    )
+    coordinator._internal_entities_resolved = True
+    hass.states.async_set(coordinator.smart_enable_switch_entity_id, STATE_ON)
+    hass.states.async_set(coordinator.max_price_entity_id, "2.0")
+    hass.states.async_set(coordinator.solar_enable_switch_entity_id, STATE_OFF)
+    return coordinator
+
+
+async def test_two_chargers_share_fuse_in_price_mode(hass: HomeAssistant):
+    """SYFTE: Pris/Tid sätter normalt HW-max (16A). Med en gemensam säkring
+    på 16A ska den första laddaren sänkas direkt till 8A när den andra
+    börjar ladda, och båda ska sluta på 8A.
+    """
+    hass.states.async_set(MOCK_PRICE_SENSOR_ID, "1.0")
+    action_calls = async_mock_service(hass, "easee", "action_command")
+    current_calls = async_mock_service(hass, "easee", SERVICE_SET_DYNAMIC_LIMIT)
+
+    first = await _setup_charger(hass, "a")
+    second = await _setup_charger(hass, "b")
+    assert hass.data[DOMAIN][FUSE_HUB_DATA_KEY] is first._fuse_hub
+    assert first._fuse_hub is second._fuse_hub
+
+    await first.async_refresh()
+    await hass.async_block_till_done()
+    assert [
+        (call.data["device_id"], call.data["current"]) for call in current_calls
+    ] == [("device_a", 16)]
+
+    await second.async_refresh()
+    await hass.async_block_till_done()
+    sent = [(call.data["device_id"], call.data["current"]) for call in current_calls]
+    assert sorted(sent[1:]) == [("device_a", 8), ("device_b", 8)]
+    assert len(action_calls) == 0
+
+    await hass.config_entries.async_unload(first.entry.entry_id)
+    await hass.config_entries.async_unload(second.entry.entry_id)
+    await hass.async_block_till_done()
+    assert FUSE_HUB_DATA_KEY not in hass.data[DOMAIN]
+
+
+async def test_fuse_share_reduction_bypasses_rate_limit(hass: HomeAssistant):
+    """SYFTE: När hubben sänker en annan laddares andel ska sänkningen skickas
+    direkt, även när laddarens hastighetsbegränsning inte har någon token kvar.
+    """
+    hass.states.async_set(MOCK_PRICE_SENSOR_ID, "1.0")
+    async_mock_service(hass, "easee", "action_command")
+    current_calls = async_mock_service(hass, "easee", SERVICE_SET_DYNAMIC_LIMIT)
+
+    first = await _setup_charger(hass, "a")
+    second = await _setup_charger(hass, "b")
+    await first.async_refresh()
+    await hass.async_block_till_done()
+    bucket = first._command_scheduler._queue("device_a").bucket
+    while bucket.try_take():
+        pass
+
+    await second.async_refresh()
+    await hass.async_block_till_done()
+    sent = [(call.data["device_id"], call.data["current"]) for call in current_calls]
+    assert ("device_a", 8) in sent[1:]
+
+    await hass.config_entries.async_unload(first.entry.entry_id)
+    await hass.config_entries.async_unload(second.entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_failed_setup_leaves_no_member_in_hub(hass: HomeAssistant):
+    """SYFTE: Misslyckas uppsättningen av en laddare ska den inte ligga kvar i
+    säkringsfördelningen och ta en andel från de andra laddarna.
+    """
+    hass.states.async_set(MOCK_PRICE_SENSOR_ID, "1.0")
+    async_mock_service(hass, "easee", "action_command")
+    async_mock_service(hass, "easee", SERVICE_SET_DYNAMIC_LIMIT)
+    first = await _setup_charger(hass, "a")
+
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CHARGER_DEVICE: "device_broken",
+            CONF_STATUS_SENSOR: "sensor.charger_status_broken",
+            CONF_CHARGER_ENABLED_SWITCH_ID: "switch.charger_power_broken",
+            CONF_PRICE_SENSOR: MOCK_PRICE_SENSOR_ID,
+            CONF_EVENT_DRIVEN_UPDATES: False,
+            CONF_SHARED_FUSE_CURRENT: SHARED_FUSE_A,
+        },
+        entry_id="test_shared_fuse_broken",
+    )
+    entry.add_to_hass(hass)
+    with patch.object(
+        SmartEVChargingCoordinator,
+        "async_config_entry_first_refresh",
+        side_effect=RuntimeError("första uppdateringen misslyckades"),
+    ):
+        assert not await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    assert set(first._fuse_hub._members) == {first.entry.entry_id}
+
+    await hass.config_entries.async_unload(first.entry.entry_id)
+    await hass.async_block_till_done()
+    assert FUSE_HUB_DATA_KEY not in hass.data[DOMAIN]
+
+
+async def test_legacy_unique_id_is_migrated_per_charger(hass: HomeAssistant):
+    """SYFTE: En entry med det gamla gemensamma unika ID:t ska få laddarens
+    eget ID, så att fler laddare kan läggas till. En dubblett för samma
+    laddare ska inte migreras.
+    """
+    hass.states.async_set(MOCK_PRICE_SENSOR_ID, "1.0")
+    async_mock_service(hass, "easee", "action_command")
+    async_mock_service(hass, "easee", SERVICE_SET_DYNAMIC_LIMIT)
+    data = {
+        CONF_CHARGER_DEVICE: "device_legacy",
+        CONF_STATUS_SENSOR: "sensor.charger_status_legacy",
+        CONF_CHARGER_ENABLED_SWITCH_ID: "switch.charger_power_legacy",
+        CONF_PRICE_SENSOR: MOCK_PRICE_SENSOR_ID,
+        CONF_EVENT_DRIVEN_UPDATES: False,
+    }
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=data,
+        entry_id="test_legacy",
+        unique_id=LEGACY_UNIQUE_ID,
+        version=1,
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    assert entry.version == 2
+    assert entry.unique_id == f"{DOMAIN}_device_legacy"
+
+    duplicate = MockConfigEntry(
+        domain=DOMAIN,
+        data=data,
+        entry_id="test_legacy_duplicate",
+        unique_id=LEGACY_UNIQUE_ID,
+        version=1,
+    )
+    duplicate.add_to_hass(hass)
+    assert not await hass.config_entries.async_setup(duplicate.entry_id)
+    await hass.async_block_till_done()
+    assert duplicate.state is ConfigEntryState.MIGRATION_ERROR
+    assert duplicate.unique_id == LEGACY_UNIQUE_ID
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
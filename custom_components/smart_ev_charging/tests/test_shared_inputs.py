@@ -0,0 +1,89 @@
+# tests/test_shared_inputs.py
+"""Testar att flera entries delar prenumeration och tolkat värde för samma elprissensor."""
+
+from unittest.mock import patch
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.smart_ev_charging.const import (
+    CONF_CHARGER_DEVICE,
+    CONF_CHARGER_ENABLED_SWITCH_ID,
+    CONF_EVENT_DRIVEN_UPDATES,
+    CONF_PRICE_SENSOR,
+    CONF_STATUS_SENSOR,
+    DOMAIN,
+    EASEE_STATUS_DISCONNECTED,
+    INPUT_HUB_DATA_KEY,
+)
+from custom_components.smart_ev_charging.coordinator import SmartEVChargingCoordinator
+from homeassistant.const import STATE_ON
+from homeassistant.core import HomeAssistant
+
+MOCK_PRICE_SENSOR_ID = "sensor.test_price_shared_inputs"
+
+
+async def _setup_charger(hass: HomeAssistant, name: str) -> SmartEVChargingCoordinator:
+    entry_id = f"test_shared_inputs_{name}"
+    status_sensor_id = f"sensor.charger_status_{name}"
+    main_switch_id = f"switch.charger_power_{name}"
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CHARGER_DEVICE: f"device_{name}",
+            CONF_STATUS_SENSOR: status_sensor_id,
+            CONF_CHARGER_ENABLED_SWITCH_ID: main_switch_id,
+            CONF_PRICE_SENSOR: MOCK_PRICE_SENSOR_ID,
+            CONF_EVENT_DRIVEN_UPDATES: True,
+        },
+        entry_id=entry_id,
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set(status_sensor_id, EASEE_STATUS_DISCONNECTED[0])
+    hass.states.async_set(main_switch_id, STATE_ON)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return hass.data[DOMAIN][entry_id]["coordinator"]
+
+
+async def test_price_sensor_is_subscribed_and_parsed_once(hass: HomeAssistant):
+    """SYFTE: Två entries med samma elprissensor ska dela en prenumeration och
+    ett tolkat värde, och båda ska väckas när priset ändras.
+    """
+    hass.states.async_set(MOCK_PRICE_SENSOR_ID, "1.0")
+    first = await _setup_charger(hass, "a")
+    second = await _setup_charger(hass, "b")
+
+    hub = hass.data[DOMAIN][INPUT_HUB_DATA_KEY]
+    assert first._input_hub is second._input_hub is hub
+    assert hub.subscribed_entities.count(MOCK_PRICE_SENSOR_ID) == 1
+    assert first._value_cache is second._value_cache is hub.value_cache
+
+    # Det nya priset tolkas redan när ändringen tas emot (dödbandet).
+    misses_before = hub.value_cache.misses
+    hass.states.async_set(MOCK_PRICE_SENSOR_ID, "1.5")
+    await hass.async_block_till_done()
+    price_state = hass.states.get(MOCK_PRICE_SENSOR_ID)
+    assert first._spot_price_from_state(MOCK_PRICE_SENSOR_ID, price_state) == 1.5
+    assert second._spot_price_from_state(MOCK_PRICE_SENSOR_ID, price_state) == 1.5
+    assert hub.value_cache.misses == misses_before + 1
+
+    with (
+        patch.object(first._event_refresh_debouncer, "async_schedule_call") as first_wake,
+        patch.object(
+            second._event_refresh_debouncer, "async_schedule_call"
+        ) as second_wake,
+    ):
+        hass.states.async_set(MOCK_PRICE_SENSOR_ID, "2.0")
+        await hass.async_block_till_done()
+    assert first_wake.call_count == 1
+    assert second_wake.call_count == 1
+
+    await hass.config_entries.async_unload(first.entry.entry_id)
+    await hass.async_block_till_done()
+    assert MOCK_PRICE_SENSOR_ID in hub.subscribed_entities
+
+    await hass.config_entries.async_unload(second.entry.entry_id)
+    await hass.async_block_till_done()
+    assert hub.subscribed_entities == []
+    assert INPUT_HUB_DATA_KEY not in hass.data[DOMAIN]
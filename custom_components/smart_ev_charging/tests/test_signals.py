@@ -0,0 +1,322 @@
+# tests/test_signals.py
+"""Testar de rullande fönstren och nedsamplingen av effektsignaler."""
+
+from datetime import UTC, datetime, timedelta
+import random
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.smart_ev_charging.const import (
+    CONF_CHARGER_DEVICE,
+    CONF_CHARGER_ENABLED_SWITCH_ID,
+    CONF_EVENT_DRIVEN_UPDATES,
+    CONF_GRID_POWER_SENSOR,
+    CONF_PRICE_DEADBAND_PERCENT,
+    CONF_PRICE_SENSOR,
+    CONF_SOLAR_PRODUCTION_SENSOR,
+    CONF_SOLAR_START_WINDOW,
+    CONF_SOLAR_STOP_WINDOW,
+    CONF_STATUS_SENSOR,
+    CONF_TIME_SCHEDULE_ENTITY,
+    DOMAIN,
+    EASEE_STATUS_DISCONNECTED,
+)
+from custom_components.smart_ev_charging.coordinator import SmartEVChargingCoordinator
+from custom_components.smart_ev_charging.signals import (
+    Deadband,
+    DownsampledSignal,
+    RollingWindow,
+)
+from custom_components.smart_ev_charging.value_cache import resolve_price_unit
+from homeassistant.const import STATE_ON
+from homeassistant.core import HomeAssistant
+
+START = datetime(2025, 6, 5, 12, 0, tzinfo=UTC)
+
+
+def test_window_matches_brute_force_over_fixed_capacity():
+    """SYFTE: Medelvärde, minimum och maximum ska stämma med en naiv beräkning
+    över de senaste värdena, även när bufferten skrivs över många varv.
+    """
+    rng = random.Random(16)
+    window = RollingWindow(7)
+    values: list[float] = []
+    assert window.mean() is None
+    assert window.minimum() is None
+    assert window.maximum() is None
+
+    for index in range(200):
+        value = rng.uniform(-5000.0, 8000.0)
+        values.append(value)
+        window.add(value, START + timedelta(seconds=index))
+        recent = values[-7:]
+        assert len(window) == len(recent)
+        assert window.mean() == pytest.approx(sum(recent) / len(recent))
+        assert window.minimum() == min(recent)
+        assert window.maximum() == max(recent)
+
+
+def test_window_expires_values_older_than_its_length():
+    """SYFTE: Ett tidsbegränsat fönster ska släppa värden som är äldre än
+    fönstrets längd och bli tomt när alla värden har fallit ur.
+    """
+    window = RollingWindow(100, timedelta(seconds=60))
+    window.add(1000.0, START)
+    window.add(3000.0, START + timedelta(seconds=30))
+    window.add(2000.0, START + timedelta(seconds=45))
+    assert window.minimum() == 1000.0
+    assert window.mean() == 2000.0
+
+    window.add(4000.0, START + timedelta(seconds=61))
+    assert len(window) == 3
+    assert window.minimum() == 2000.0
+    assert window.maximum() == 4000.0
+    assert window.mean() == 3000.0
+
+    window.expire(START + timedelta(seconds=200))
+    assert len(window) == 0
+    assert window.mean() is None
+    window.add(500.0, START + timedelta(seconds=201))
+    assert window.mean() == 500.0
+
+    window.clear()
+    assert window.maximum() is None
+    with pytest.raises(ValueError):
+        RollingWindow(0)
+
+
+def test_window_is_filled_after_its_full_length():
+    """SYFTE: Ett tidsfönster ska räknas som fyllt först när det har tagit emot
+    värden under hela sin längd, och fyllas på nytt efter clear() eller ett
+    uppehåll längre än fönstret.
+    """
+    window = RollingWindow(61, timedelta(seconds=60))
+    assert not window.is_filled(START)
+    window.add(1000.0, START)
+    assert not window.is_filled(START + timedelta(seconds=59))
+    window.add(1000.0, START + timedelta(seconds=59))
+    assert window.is_filled(START + timedelta(seconds=60))
+
+    window.clear()
+    window.add(1000.0, START + timedelta(seconds=61))
+    assert not window.is_filled(START + timedelta(seconds=90))
+
+    window.expire(START + timedelta(seconds=200))
+    window.add(1000.0, START + timedelta(seconds=200))
+    assert not window.is_filled(START + timedelta(seconds=230))
+
+    counted = RollingWindow(3)
+    counted.add(1.0, START)
+    counted.add(2.0, START)
+    assert not counted.is_filled(START)
+    counted.add(3.0, START)
+    assert counted.is_filled(START)
+
+
+def test_downsampled_signal_emits_on_significant_change():
+    """SYFTE: Högfrekventa värden ska bara skickas vidare vid första värdet och
+    vid en signifikant ändring. När fönstret löper ut sparas dess medelvärde
+    och maximum, men värdet skickas inte vidare om de ligger inom dödbandet.
+    """
+    signal = DownsampledSignal(timedelta(seconds=10), Deadband(absolute=690.0))
+    emitted = [
+        signal.add(1000.0 + (index % 3) * 50, START + timedelta(seconds=index * 0.5))
+        for index in range(20)
+    ]
+    # Första värdet skickas, övriga inom 10 s och under 690 W skillnad inte.
+    assert emitted == [True] + [False] * 19
+
+    # Fönstret löper ut: medelvärde och maximum sparas men ligger inom
+    # dödbandet, så värdet skickas inte vidare.
+    assert not signal.add(1000.0, START + timedelta(seconds=10))
+    assert signal.last_max == 1100.0
+    assert signal.last_mean == pytest.approx(
+        (sum(1000.0 + (index % 3) * 50 for index in range(1, 20)) + 1000.0) / 20
+    )
+
+    # En signifikant ändring skickas direkt.
+    assert signal.add(1800.0, START + timedelta(seconds=10.5))
+    assert signal.received_count == 22
+    assert signal.emitted_count == 2
+
+
+def test_downsampled_signal_ignores_slow_updates_within_deadband():
+    """SYFTE: En sensor som uppdateras mer sällan än fönstret ska inte skickas
+    vidare vid varje värde bara för att fönstret har löpt ut. Endast första
+    värdet och en verklig ändring ska väcka beslutscykeln.
+    """
+    signal = DownsampledSignal(timedelta(seconds=10), Deadband(absolute=690.0))
+    emitted = [
+        signal.add(
+            4213.0 if index % 2 == 0 else 4219.0,
+            START + timedelta(seconds=15 * index),
+        )
+        for index in range(8)
+    ]
+    assert emitted == [True] + [False] * 7
+    assert signal.emitted_count == 1
+
+    assert signal.add(5000.0, START + timedelta(seconds=120))
+    assert signal.emitted_count == 2
+
+
+def test_deadband_absolute_and_relative():
+    """SYFTE: Dödbandet ska vara det största av det absoluta och det relativa
+    bandet kring det senast accepterade värdet. Utan band räknas varje ändring.
+    """
+    price = Deadband(relative=0.01)
+    assert price.accept(1.0)
+    assert not price.accept(1.005)
+    assert price.accept(0.99)
+    assert price.reference == 0.99
+
+    power = Deadband(absolute=690.0, relative=0.1)
+    assert power.accept(4213.0)
+    assert not power.accept(4219.0)
+    # 10 % av 8000 W är större än 690 W.
+    assert power.accept(8000.0)
+    assert not power.accept(8700.0)
+
+    any_change = Deadband()
+    assert any_change.accept(5.0)
+    assert any_change.accept(5.001)
+
+
+async def test_power_sensor_event_storm_is_downsampled(hass: HomeAssistant, freezer):
+    """SYFTE: En nätmätare som uppdateras flera gånger per sekund ska inte väcka
+    beslutscykeln för varje värde, bara vid signifikanta ändringar, inte heller
+    när fönstret löper ut. Elpriset väcker bara cykeln vid ändringar utanför dödbandet.
+    """
+    freezer.move_to(START)
+    entry_id = "test_power_signal_storm"
+    grid_sensor_id = "sensor.grid_power_storm"
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CHARGER_DEVICE: "device_storm",
+            CONF_STATUS_SENSOR: "sensor.charger_status_storm",
+            CONF_CHARGER_ENABLED_SWITCH_ID: "switch.charger_power_storm",
+            CONF_PRICE_SENSOR: "sensor.price_storm",
+            CONF_TIME_SCHEDULE_ENTITY: None,
+            CONF_GRID_POWER_SENSOR: grid_sensor_id,
+            CONF_PRICE_DEADBAND_PERCENT: 2,
+            CONF_EVENT_DRIVEN_UPDATES: True,
+        },
+        entry_id=entry_id,
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.charger_status_storm", EASEE_STATUS_DISCONNECTED[0])
+    hass.states.async_set("switch.charger_power_storm", STATE_ON)
+    hass.states.async_set("sensor.price_storm", "1.0")
+    hass.states.async_set(grid_sensor_id, "0", {"unit_of_measurement": "W"})
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator: SmartEVChargingCoordinator = hass.data[DOMAIN][entry_id]["coordinator"]
+
+    with patch.object(
+        coordinator._event_refresh_debouncer, "async_schedule_call"
+    ) as schedule_refresh:
+        # 5 Hz i 8 sekunder med brus kring -1500 W.
+        for index in range(40):
+            freezer.move_to(START + timedelta(seconds=index * 0.2))
+            hass.states.async_set(
+                grid_sensor_id,
+                str(-1500 + (index % 4) * 40),
+                {"unit_of_measurement": "W"},
+            )
+            await hass.async_block_till_done()
+        assert schedule_refresh.call_count == 1
+
+        # Exporten minskar med mer än ett ampere-steg: väcks direkt.
+        hass.states.async_set(grid_sensor_id, "-500", {"unit_of_measurement": "W"})
+        await hass.async_block_till_done()
+        assert schedule_refresh.call_count == 2
+
+        # Fönstret löper ut med en liten ändring: väcks inte.
+        freezer.move_to(START + timedelta(seconds=20))
+        hass.states.async_set(grid_sensor_id, "-520", {"unit_of_measurement": "W"})
+        await hass.async_block_till_done()
+        assert schedule_refresh.call_count == 2
+
+        # Elpriset ändras inom dödbandet (2 %): värdet tolkas och cachas men
+        # beslutscykeln väcks inte. En större ändring väcker den.
+        hass.states.async_set("sensor.price_storm", "1.01")
+        await hass.async_block_till_done()
+        assert schedule_refresh.call_count == 2
+        assert coordinator._value_cache.lookup(
+            "sensor.price_storm",
+            hass.states.get("sensor.price_storm"),
+            resolve_price_unit,
+        ) == (1.01, True)
+        hass.states.async_set("sensor.price_storm", "1.05")
+        await hass.async_block_till_done()
+        assert schedule_refresh.call_count == 3
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_solar_windows_are_fed_by_sensor_events(hass: HomeAssistant, freezer):
+    """SYFTE: Solöverskottets fönster ska matas av solsensorns händelser mellan
+    beslutscyklerna, så att en kort dipp syns i startfönstrets minimum och
+    stoppfönstrets maximum minns toppen. Startfönstret ska räknas som fyllt
+    först efter hela sin längd.
+    """
+    freezer.move_to(START)
+    entry_id = "test_solar_window_feed"
+    solar_sensor_id = "sensor.solar_window_feed"
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CHARGER_DEVICE: "device_window_feed",
+            CONF_STATUS_SENSOR: "sensor.charger_status_window_feed",
+            CONF_CHARGER_ENABLED_SWITCH_ID: "switch.charger_power_window_feed",
+            CONF_PRICE_SENSOR: "sensor.price_window_feed",
+            CONF_SOLAR_PRODUCTION_SENSOR: solar_sensor_id,
+            CONF_SOLAR_START_WINDOW: 60,
+            CONF_SOLAR_STOP_WINDOW: 60,
+            CONF_EVENT_DRIVEN_UPDATES: False,
+        },
+        entry_id=entry_id,
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set(
+        "sensor.charger_status_window_feed", EASEE_STATUS_DISCONNECTED[0]
+    )
+    hass.states.async_set("switch.charger_power_window_feed", STATE_ON)
+    hass.states.async_set("sensor.price_window_feed", "1.0")
+    hass.states.async_set(solar_sensor_id, "5000", {"unit_of_measurement": "W"})
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator: SmartEVChargingCoordinator = hass.data[DOMAIN][entry_id]["coordinator"]
+    start_window = coordinator._solar_start_window
+    stop_window = coordinator._solar_stop_window
+    # Laddaren är frånkopplad, så beslutscykeln lägger inget i fönstren.
+    assert len(start_window) == 0
+
+    # 1 Hz i en minut utan någon beslutscykel, med en kort dipp och en topp.
+    for second in range(1, 61):
+        freezer.move_to(START + timedelta(seconds=second))
+        value = {20: 1000, 40: 9000}.get(second, 5000 + second % 2)
+        hass.states.async_set(
+            solar_sensor_id, str(value), {"unit_of_measurement": "W"}
+        )
+        await hass.async_block_till_done()
+    assert len(start_window) == 60
+    assert start_window.minimum() == 1000.0
+    assert stop_window.maximum() == 9000.0
+    assert not start_window.is_filled(START + timedelta(seconds=60))
+    assert start_window.is_filled(START + timedelta(seconds=61))
+
+    # Tätare värden än fönstren är dimensionerade för läggs inte till.
+    hass.states.async_set(solar_sensor_id, "5100", {"unit_of_measurement": "W"})
+    await hass.async_block_till_done()
+    assert len(start_window) == 60
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert not coordinator._solar_window_listeners
@@ -0,0 +1,199 @@
+# tests/test_solar_controller.py
+"""Testar PI-regulatorn för solenergiladdningens ström."""
+
+from datetime import UTC, datetime, timedelta
+from itertools import pairwise
+import math
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_mock_service,
+)
+
+from custom_components.smart_ev_charging.const import (
+    CONF_CHARGER_DEVICE,
+    CONF_CHARGER_ENABLED_SWITCH_ID,
+    CONF_EVENT_DRIVEN_UPDATES,
+    CONF_PRICE_SENSOR,
+    CONF_SOLAR_CONTROLLER_ENABLED,
+    CONF_SOLAR_PRODUCTION_SENSOR,
+    CONF_STATUS_SENSOR,
+    DOMAIN,
+    EASEE_STATUS_READY_TO_CHARGE,
+    ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH,
+    ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER,
+    ENTITY_ID_SUFFIX_MIN_SOLAR_CHARGE_CURRENT_A_NUMBER,
+    ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH,
+    ENTITY_ID_SUFFIX_SOLAR_BUFFER_NUMBER,
+)
+from custom_components.smart_ev_charging.controller import (
+    SolarControllerSettings,
+    step_solar_controller,
+)
+from custom_components.smart_ev_charging.coordinator import SmartEVChargingCoordinator
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant
+
+START = datetime(2025, 6, 5, 12, 0, tzinfo=UTC)
+CYCLE = timedelta(seconds=30)
+SETTINGS = SolarControllerSettings(
+    kp=0.2,
+    integral_time_s=20.0,
+    deadband_a=1.0,
+    min_change_interval=timedelta(seconds=60),
+)
+# Överskott (A) som växlar när moln passerar, runt 8.5 A.
+CLOUDY_SURPLUS_A = [8.9, 8.1, 9.2, 7.9, 8.8, 8.2, 9.1, 8.0] * 3
+
+
+def test_controller_tracks_surplus_and_recovers_from_saturation():
+    """SYFTE: Regulatorn ska starta stötfritt, följa ett nytt överskott och inte
+    fastna vid hårdvarumaximum (anti-windup) när överskottet sedan sjunker.
+    """
+    applied, state = step_solar_controller(SETTINGS, None, 8.4, 16.0, START)
+    assert applied == 8.0
+
+    now = START
+    for _ in range(20):
+        now += CYCLE
+        applied, state = step_solar_controller(SETTINGS, state, 12.3, 16.0, now)
+    assert applied == 12.0
+    # Exporten (12.3 A - 12 A) ligger inom dödbandet och integreras inte vidare.
+    assert math.isclose(state.output_a, 12.0, abs_tol=0.3)
+
+    # Långt över maximum i en timme: utsignalen ligger på 16 A utan att integralen växer.
+    for _ in range(120):
+        now += CYCLE
+        applied, state = step_solar_controller(SETTINGS, state, 40.0, 16.0, now)
+    assert applied == 16.0
+    integral_at_limit = state.integral_a
+    assert integral_at_limit <= 16.0, "Integralen ska inte växa mot gränsen."
+
+    now += CYCLE
+    applied, state = step_solar_controller(SETTINGS, state, 6.0, 16.0, now)
+    assert state.integral_a < integral_at_limit
+    assert applied < 16.0, "Sänkningen ska ske direkt, utan att vänta på intervallet."
+
+
+def test_controller_drives_export_to_zero_when_car_draws_less():
+    """SYFTE: Drar bilen mindre än strömgränsen ska integralen höja gränsen tills
+    exporten (överskottet minus uppmätt ström) är noll, inte stanna på en
+    kvarstående export som en ren P-regulator eller ett filter skulle göra.
+    """
+    settings = SETTINGS._replace(deadband_a=0.0)
+    available_a = 10.0
+    applied, state = step_solar_controller(settings, None, available_a, 16.0, START)
+    assert applied == 10.0
+
+    now = START
+    exports = []
+    for _ in range(40):
+        now += CYCLE
+        # Bilen drar 2 A mindre än gränsen.
+        measured_a = applied - 2.0
+        exports.append(available_a - measured_a)
+        applied, state = step_solar_controller(
+            settings, state, available_a, 16.0, now, measured_a
+        )
+    assert exports[0] == 2.0
+    assert exports[-5:] == [0.0] * 5
+    assert applied == 12.0
+
+
+def test_integral_moves_toward_surplus_for_high_kp():
+    """SYFTE: Integralen ska röra sig mot överskottet även med en hög
+    förstärkning (Kp >= 1), inte åt fel håll.
+    """
+    settings = SETTINGS._replace(kp=1.5, deadband_a=0.0)
+    _, state = step_solar_controller(settings, None, 8.0, 16.0, START)
+    _, state = step_solar_controller(settings, state, 10.0, 16.0, START + CYCLE)
+    assert state.integral_a > 8.0
+
+
+def test_controller_sends_fewer_changes_than_open_loop():
+    """SYFTE: Vid passerande moln ska regulatorn ändra strömgränsen betydligt
+    mer sällan än den direkta omräkningen (floor av överskottet).
+    """
+    open_loop = [math.floor(value) for value in CLOUDY_SURPLUS_A]
+    open_loop_changes = sum(
+        1 for before, after in pairwise(open_loop) if before != after
+    )
+
+    applied, state = step_solar_controller(
+        SETTINGS, None, CLOUDY_SURPLUS_A[0], 16.0, START
+    )
+    controller_changes = 0
+    now = START
+    for value in CLOUDY_SURPLUS_A[1:]:
+        now += CYCLE
+        previous = applied
+        applied, state = step_solar_controller(SETTINGS, state, value, 16.0, now)
+        controller_changes += applied != previous
+    assert open_loop_changes >= 15
+    assert controller_changes <= 3
+
+
+async def test_coordinator_uses_controller_for_solar_current(
+    hass: HomeAssistant, freezer
+):
+    """SYFTE: Med PI-regulatorn aktiverad ska koordinatorn skicka få
+    strömkommandon trots att solproduktionen växlar varje cykel.
+    """
+    freezer.move_to(START)
+    entry_id = "test_solar_controller"
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CHARGER_DEVICE: "device_solar_controller",
+            CONF_STATUS_SENSOR: "sensor.charger_status_solar_controller",
+            CONF_CHARGER_ENABLED_SWITCH_ID: "switch.charger_power_solar_controller",
+            CONF_PRICE_SENSOR: "sensor.price_solar_controller",
+            CONF_SOLAR_PRODUCTION_SENSOR: "sensor.solar_solar_controller",
+            CONF_SOLAR_CONTROLLER_ENABLED: True,
+            CONF_EVENT_DRIVEN_UPDATES: False,
+        },
+        entry_id=entry_id,
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set(
+        "sensor.charger_status_solar_controller", EASEE_STATUS_READY_TO_CHARGE[0]
+    )
+    hass.states.async_set("switch.charger_power_solar_controller", STATE_ON)
+    hass.states.async_set("sensor.price_solar_controller", "5.0")
+    async_mock_service(hass, "easee", "action_command")
+    current_calls = async_mock_service(hass, "easee", "set_charger_dynamic_limit")
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator: SmartEVChargingCoordinator = hass.data[DOMAIN][entry_id]["coordinator"]
+    coordinator.smart_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH}"
+    )
+    coordinator.max_price_entity_id = (
+        f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER}"
+    )
+    coordinator.solar_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH}"
+    )
+    coordinator.solar_buffer_entity_id = (
+        f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_SOLAR_BUFFER_NUMBER}"
+    )
+    coordinator.min_solar_charge_current_entity_id = f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_MIN_SOLAR_CHARGE_CURRENT_A_NUMBER}"
+    coordinator._internal_entities_resolved = True
+    hass.states.async_set(coordinator.smart_enable_switch_entity_id, STATE_OFF)
+    hass.states.async_set(coordinator.max_price_entity_id, "1.0")
+    hass.states.async_set(coordinator.solar_enable_switch_entity_id, STATE_ON)
+    hass.states.async_set(coordinator.solar_buffer_entity_id, "0")
+    hass.states.async_set(coordinator.min_solar_charge_current_entity_id, "6")
+
+    now = START
+    for value in CLOUDY_SURPLUS_A:
+        hass.states.async_set("sensor.solar_solar_controller", str(value * 690))
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        now += CYCLE
+        freezer.move_to(now)
+
+    assert coordinator.should_charge_flag
+    assert coordinator._solar_controller_state is not None
+    assert 1 <= len(current_calls) <= 4
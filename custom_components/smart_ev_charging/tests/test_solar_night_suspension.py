@@ -0,0 +1,133 @@
+# tests/test_solar_night_suspension.py
+"""Testar att solenergiutvärderingen vilar mellan skymning och gryning."""
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+    async_mock_service,
+)
+
+from custom_components.smart_ev_charging.const import (
+    CONF_CHARGER_DEVICE,
+    CONF_CHARGER_ENABLED_SWITCH_ID,
+    CONF_EVENT_DRIVEN_UPDATES,
+    CONF_PRICE_SENSOR,
+    CONF_SOLAR_PRODUCTION_SENSOR,
+    CONF_STATUS_SENSOR,
+    CONF_SUSPEND_SOLAR_AT_NIGHT,
+    CONTROL_MODE_SOLAR_SURPLUS,
+    DOMAIN,
+    EASEE_STATUS_READY_TO_CHARGE,
+    ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH,
+    ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER,
+    ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH,
+    SUN_ENTITY_ID,
+)
+from custom_components.smart_ev_charging.coordinator import SmartEVChargingCoordinator
+from homeassistant.const import STATE_ON
+from homeassistant.core import HomeAssistant, StateMachine
+
+NIGHT = datetime(2025, 6, 5, 22, 0, tzinfo=UTC)
+SUNRISE = datetime(2025, 6, 6, 2, 30, tzinfo=UTC)
+SOLAR_SENSOR_ID = "sensor.solar_night"
+
+
+async def test_solar_is_not_evaluated_between_dusk_and_dawn(
+    hass: HomeAssistant, freezer
+):
+    """SYFTE: När sun.sun är under horisonten ska solproduktionen inte läsas
+    eller utvärderas, och en väckning ska registreras vid soluppgång. Vid
+    soluppgången ska solenergiladdningen starta utan att vänta på pollning.
+    """
+    freezer.move_to(NIGHT)
+    entry_id = "test_solar_night"
+    status_sensor_id = "sensor.charger_status_solar_night"
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CHARGER_DEVICE: "device_solar_night",
+            CONF_STATUS_SENSOR: status_sensor_id,
+            CONF_CHARGER_ENABLED_SWITCH_ID: "switch.charger_power_solar_night",
+            CONF_PRICE_SENSOR: "sensor.price_solar_night",
+            CONF_SOLAR_PRODUCTION_SENSOR: SOLAR_SENSOR_ID,
+            CONF_SUSPEND_SOLAR_AT_NIGHT: True,
+            CONF_EVENT_DRIVEN_UPDATES: False,
+        },
+        entry_id=entry_id,
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set(status_sensor_id, EASEE_STATUS_READY_TO_CHARGE[0])
+    hass.states.async_set("switch.charger_power_solar_night", STATE_ON)
+    hass.states.async_set("sensor.price_solar_night", "5.0")
+    hass.states.async_set(SOLAR_SENSOR_ID, "8000")
+    hass.states.async_set(
+        SUN_ENTITY_ID, "below_horizon", {"next_rising": SUNRISE.isoformat()}
+    )
+    async_mock_service(hass, "easee", "action_command")
+    async_mock_service(hass, "easee", "set_charger_dynamic_limit")
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator: SmartEVChargingCoordinator = hass.data[DOMAIN][entry_id]["coordinator"]
+    coordinator.smart_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_SMART_ENABLE_SWITCH}"
+    )
+    coordinator.max_price_entity_id = (
+        f"number.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_MAX_PRICE_NUMBER}"
+    )
+    coordinator.solar_enable_switch_entity_id = (
+        f"switch.{DOMAIN}_{entry_id}_{ENTITY_ID_SUFFIX_ENABLE_SOLAR_CHARGING_SWITCH}"
+    )
+    coordinator._internal_entities_resolved = True
+    hass.states.async_set(coordinator.smart_enable_switch_entity_id, STATE_ON)
+    hass.states.async_set(coordinator.max_price_entity_id, "1.0")
+    hass.states.async_set(coordinator.solar_enable_switch_entity_id, STATE_ON)
+    await hass.async_block_till_done()
+
+    original_get = StateMachine.get
+    read_entities: list[str] = []
+
+    def _counting_get(self, entity_id):
+        read_entities.append(entity_id)
+        return original_get(self, entity_id)
+
+    reads_before = coordinator._instrumentation.state_reads
+    with patch.object(StateMachine, "get", _counting_get):
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+    assert SOLAR_SENSOR_ID not in read_entities
+    assert coordinator._instrumentation.state_reads - reads_before == len(
+        read_entities
+    )
+
+    # Under natten används den kända soluppgången, sun.sun läses inte och
+    # räknas inte heller som läst.
+    read_entities.clear()
+    reads_before = coordinator._instrumentation.state_reads
+    with patch.object(StateMachine, "get", _counting_get):
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+    assert SUN_ENTITY_ID not in read_entities
+    assert coordinator._instrumentation.state_reads - reads_before == len(
+        read_entities
+    )
+    assert not coordinator.should_charge_flag
+    assert coordinator.data["should_charge_reason"] == (
+        "Solenergiutvärderingen vilar till soluppgång."
+    )
+    assert coordinator._time_edge_at == SUNRISE
+
+    freezer.move_to(SUNRISE)
+    hass.states.async_set(
+        SUN_ENTITY_ID,
+        "above_horizon",
+        {"next_rising": (SUNRISE + timedelta(days=1)).isoformat()},
+    )
+    async_fire_time_changed(hass, SUNRISE)
+    await hass.async_block_till_done()
+    assert coordinator._solar_suspended_until is None
+    assert coordinator.should_charge_flag
+    assert coordinator.active_control_mode == CONTROL_MODE_SOLAR_SURPLUS
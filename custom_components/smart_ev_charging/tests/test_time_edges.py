@@ -0,0 +1,139 @@
+# tests/test_time_edges.py
+"""Testar väckningen exakt vid prisperiod- och schemagränser."""
+
+from datetime import UTC, datetime, timedelta
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.smart_ev_charging.const import (
+    CONF_CHARGER_DEVICE,
+    CONF_CHARGER_ENABLED_SWITCH_ID,
+    CONF_EVENT_DRIVEN_UPDATES,
+    CONF_PRICE_SENSOR,
+    CONF_STATUS_SENSOR,
+    CONF_TIME_SCHEDULE_ENTITY,
+    DOMAIN,
+    EASEE_STATUS_DISCONNECTED,
+)
+from custom_components.smart_ev_charging.coordinator import SmartEVChargingCoordinator
+from custom_components.smart_ev_charging.planner import PriceSlot, parse_price_slots
+from custom_components.smart_ev_charging.time_edges import (
+    attribute_datetime,
+    next_price_boundary,
+    next_time_edge,
+    schedule_next_event,
+)
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+START = datetime(2025, 6, 5, 0, 0, tzinfo=UTC)
+
+
+def test_next_edge_is_earliest_future_boundary():
+    """SYFTE: Nästa gräns ska vara den tidigaste prisperiod- eller schemagränsen
+    efter nu. Passerade gränser och ogiltiga värden ignoreras.
+    """
+    slots = [
+        PriceSlot(START, START + timedelta(minutes=15), 1.0),
+        PriceSlot(START + timedelta(minutes=15), START + timedelta(minutes=30), 2.0),
+    ]
+    now = START + timedelta(minutes=5)
+    assert next_price_boundary(slots, now) == START + timedelta(minutes=15)
+    assert next_price_boundary([], now) is None
+
+    schedule_edge = schedule_next_event(
+        {"next_event": (START + timedelta(minutes=10)).isoformat()}
+    )
+    assert schedule_edge == START + timedelta(minutes=10)
+    assert schedule_next_event({"next_event": "ogiltig"}) is None
+    assert schedule_next_event({}) is None
+
+    assert next_time_edge(
+        now, (next_price_boundary(slots, now), schedule_edge, START, None)
+    ) == START + timedelta(minutes=10)
+    assert next_time_edge(now, (None,)) is None
+
+
+def test_naive_timestamps_use_local_time_zone():
+    """SYFTE: En ISO-sträng utan tidszon ska tolkas i den lokala tidszonen så
+    att den kan jämföras med den tidszonsmedvetna aktuella tiden.
+    """
+    local = dt_util.DEFAULT_TIME_ZONE
+    edge = attribute_datetime({"next_rising": "2025-06-05T04:00:00"}, "next_rising")
+    assert edge == datetime(2025, 6, 5, 4, 0, tzinfo=local)
+    assert next_time_edge(START, (edge,)) == edge
+
+    slots = parse_price_slots(
+        {
+            "raw_today": [
+                {
+                    "start": "2025-06-05T10:00:00",
+                    "end": "2025-06-05T10:15:00",
+                    "value": 1.0,
+                }
+            ]
+        }
+    )
+    assert slots == [
+        PriceSlot(
+            datetime(2025, 6, 5, 10, 0, tzinfo=local),
+            datetime(2025, 6, 5, 10, 15, tzinfo=local),
+            1.0,
+        )
+    ]
+    assert next_price_boundary(slots, START) == slots[0].start
+
+
+async def test_coordinator_refreshes_at_schedule_edge(hass: HomeAssistant, freezer):
+    """SYFTE: Koordinatorn ska registrera en väckning vid schemats `next_event`
+    och köra en uppdatering exakt då, utan att vänta på nästa pollning.
+    """
+    freezer.move_to(START)
+    entry_id = "test_time_edges"
+    status_sensor_id = "sensor.charger_status_time_edges"
+    schedule_id = "schedule.charging_time_edges"
+    edge = START + timedelta(minutes=7)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CHARGER_DEVICE: "device_time_edges",
+            CONF_STATUS_SENSOR: status_sensor_id,
+            CONF_CHARGER_ENABLED_SWITCH_ID: "switch.charger_power_time_edges",
+            CONF_PRICE_SENSOR: "sensor.price_time_edges",
+            CONF_TIME_SCHEDULE_ENTITY: schedule_id,
+            CONF_EVENT_DRIVEN_UPDATES: False,
+        },
+        entry_id=entry_id,
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set(status_sensor_id, EASEE_STATUS_DISCONNECTED[0])
+    hass.states.async_set("switch.charger_power_time_edges", STATE_ON)
+    hass.states.async_set("sensor.price_time_edges", "1.0")
+    hass.states.async_set(schedule_id, STATE_OFF, {"next_event": edge.isoformat()})
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator: SmartEVChargingCoordinator = hass.data[DOMAIN][entry_id]["coordinator"]
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert coordinator._time_edge_at == edge
+
+    updates_before = coordinator.last_update_time
+    freezer.move_to(edge)
+    hass.states.async_set(
+        schedule_id,
+        STATE_ON,
+        {"next_event": (edge + timedelta(hours=1)).isoformat()},
+    )
+    async_fire_time_changed(hass, edge)
+    await hass.async_block_till_done()
+    assert coordinator.last_update_time != updates_before
+    assert coordinator._time_edge_at == edge + timedelta(hours=1)
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert coordinator._unsub_time_edge is None
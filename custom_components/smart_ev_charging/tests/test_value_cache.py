@@ -0,0 +1,59 @@
+# tests/test_value_cache.py
+"""Testar cachen för tolkade sensorvärden och enhetskonverteringen."""
+
+import pytest
+
+from custom_components.smart_ev_charging.value_cache import (
+    ParsedValueCache,
+    resolve_current_unit,
+    resolve_power_unit,
+    resolve_price_unit,
+)
+from homeassistant.core import State
+
+SENSOR_ID = "sensor.test_value_cache"
+
+
+def test_value_is_reused_until_state_changes():
+    """SYFTE: Samma State-objekt ska ge en cacheträff, ett nytt State en ny tolkning."""
+    cache = ParsedValueCache()
+    state_obj = State(SENSOR_ID, "2.5", {"unit_of_measurement": "kW"})
+
+    assert cache.lookup(SENSOR_ID, state_obj, resolve_power_unit) == (2500.0, False)
+    assert cache.lookup(SENSOR_ID, state_obj, resolve_power_unit) == (2500.0, True)
+
+    new_state = State(SENSOR_ID, "3", {"unit_of_measurement": "kW"})
+    assert cache.lookup(SENSOR_ID, new_state, resolve_power_unit) == (3000.0, False)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_unit_is_resolved_once_per_attribute_change():
+    """SYFTE: Enheten ska bara översättas när unit_of_measurement ändras."""
+    resolved_units: list[str] = []
+
+    def counting_resolver(entity_id: str, unit: str):
+        resolved_units.append(unit)
+        return resolve_price_unit(entity_id, unit)
+
+    cache = ParsedValueCache()
+    for value in ("45", "50", "55"):
+        state_obj = State(SENSOR_ID, value, {"unit_of_measurement": "öre/kWh"})
+        price, _ = cache.lookup(SENSOR_ID, state_obj, counting_resolver)
+    assert price == pytest.approx(0.55)
+
+    state_obj = State(SENSOR_ID, "550", {"unit_of_measurement": "SEK/MWh"})
+    price, _ = cache.lookup(SENSOR_ID, state_obj, counting_resolver)
+    assert price == pytest.approx(0.55)
+    assert resolved_units == ["öre/kwh", "sek/mwh"]
+
+
+def test_current_and_invalid_values():
+    """SYFTE: Ström normaliseras till A och icke-numeriska värden ger None."""
+    cache = ParsedValueCache()
+
+    state_obj = State(SENSOR_ID, "6000", {"unit_of_measurement": "mA"})
+    assert cache.lookup(SENSOR_ID, state_obj, resolve_current_unit) == (6.0, False)
+
+    state_obj = State(SENSOR_ID, "not_a_number")
+    assert cache.lookup(SENSOR_ID, state_obj, resolve_current_unit) == (None, False)
+    assert cache.lookup(SENSOR_ID, state_obj, resolve_current_unit) == (None, True)
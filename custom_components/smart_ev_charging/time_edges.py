@@ -0,0 +1,68 @@
+# File version: 2025-06-05 0.2.0
+"""Beräkning av nästa tidsgräns då laddbeslutet kan ändras.
+
+Beslutet kan ändras när en prisperiod börjar eller slutar och när ett
+tidsschema slår om. Koordinatorn registrerar en väckning exakt vid nästa
+sådan gräns, i stället för att upptäcka den först vid nästa pollning.
+Soluppgången är också en sådan gräns när solenergiutvärderingen vilar över
+natten.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+import homeassistant.util.dt as dt_util
+
+if TYPE_CHECKING:
+    from .planner import PriceSlot
+
+ATTR_NEXT_EVENT = "next_event"
+# Attribut och tillstånd hos solentiteten (sun.sun)
+ATTR_NEXT_RISING = "next_rising"
+STATE_ABOVE_HORIZON = "above_horizon"
+STATE_BELOW_HORIZON = "below_horizon"
+
+
+def next_price_boundary(slots: Iterable[PriceSlot], now: datetime) -> datetime | None:
+    """Första start eller slut på en prisperiod efter `now`."""
+    boundaries = [
+        boundary
+        for slot in slots
+        for boundary in (slot.start, slot.end)
+        if boundary > now
+    ]
+    return min(boundaries, default=None)
+
+
+def attribute_datetime(attributes: Mapping[str, Any], name: str) -> datetime | None:
+    """Tidpunkt ur ett attribut (datetime eller ISO-sträng), eller None.
+
+    En tidpunkt utan tidszon tolkas i Home Assistants lokala tidszon, så att
+    den alltid kan jämföras med den tidszonsmedvetna aktuella tiden.
+    """
+    value = attributes.get(name)
+    if isinstance(value, str):
+        value = dt_util.parse_datetime(value)
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    return value
+
+
+def schedule_next_event(attributes: Mapping[str, Any]) -> datetime | None:
+    """Schemaentitetens nästa omslag (`next_event`), eller None."""
+    return attribute_datetime(attributes, ATTR_NEXT_EVENT)
+
+
+def next_time_edge(
+    now: datetime, candidates: Iterable[datetime | None]
+) -> datetime | None:
+    """Tidigaste kandidaten efter `now`, eller None."""
+    return min(
+        (candidate for candidate in candidates if candidate and candidate > now),
+        default=None,
+    )
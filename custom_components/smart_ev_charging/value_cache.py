@@ -0,0 +1,143 @@
+# File version: 2025-06-05 0.2.0
+"""Cache för tolkade och normaliserade sensorvärden.
+
+Ett sensorvärde tolkas (float + enhetskonvertering) bara när entitetens State
+har ändrats. Enheten översätts till en konverteringsfunktion bara när
+attributet `unit_of_measurement` har ändrats, inte vid varje läsning.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import logging
+
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT, UnitOfPower
+from homeassistant.core import State
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(f"custom_components.{DOMAIN}")
+
+Converter = Callable[[float], float]
+# Tar entitets-ID och enhet i gemener, returnerar en konverteringsfunktion.
+UnitResolver = Callable[[str, str], Converter]
+
+
+def _identity(value: float) -> float:
+    return value
+
+
+def _divide_by(divisor: float) -> Converter:
+    return lambda value: value / divisor
+
+
+def _multiply_by(factor: float) -> Converter:
+    return lambda value: value * factor
+
+
+def resolve_number_unit(entity_id: str, unit: str) -> Converter:
+    """Vanliga numeriska värden används som de är."""
+    return _identity
+
+
+def resolve_power_unit(entity_id: str, unit: str) -> Converter:
+    """Konverterar effekt till W."""
+    if unit in (UnitOfPower.KILO_WATT.lower(), "kw"):
+        return _multiply_by(1000.0)
+    if unit in (UnitOfPower.WATT.lower(), "w"):
+        return _identity
+    _LOGGER.warning(
+        "Okänd enhet ('%s') för effektsensor %s. Antar Watt.", unit, entity_id
+    )
+    return _identity
+
+
+def resolve_price_unit(entity_id: str, unit: str) -> Converter:
+    """Konverterar elpris till kr/kWh."""
+    if "öre" in unit or "/100kwh" in unit:
+        return _divide_by(100)
+    if "mwh" in unit:
+        return _divide_by(1000)
+    return _identity
+
+
+def resolve_current_unit(entity_id: str, unit: str) -> Converter:
+    """Konverterar ström till A."""
+    if unit == "ma":
+        return _divide_by(1000)
+    return _identity
+
+
+class _CachedValue:
+    """Senast tolkade värde för en entitet."""
+
+    __slots__ = ("converter", "raw_unit", "resolver", "state", "value")
+
+    def __init__(
+        self,
+        state: State,
+        resolver: UnitResolver,
+        raw_unit: object,
+        converter: Converter,
+        value: float | None,
+    ) -> None:
+        self.state = state
+        self.resolver = resolver
+        self.raw_unit = raw_unit
+        self.converter = converter
+        self.value = value
+
+
+class ParsedValueCache:
+    """Håller normaliserade värden per entitet tills entitetens State ändras.
+
+    Home Assistant skapar ett nytt State-objekt vid varje ändring av tillstånd
+    eller attribut, så objektets identitet används som nyckel. Det är
+    säkrare än `last_updated`, som kan vara identisk för två ändringar.
+    """
+
+    def __init__(self) -> None:
+        """Initialisera en tom cache."""
+        self._entries: dict[str, _CachedValue] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def lookup(
+        self, entity_id: str, state_obj: State, resolver: UnitResolver
+    ) -> tuple[float | None, bool]:
+        """Returnerar (normaliserat värde, träff i cachen).
+
+        Värdet är None om tillståndet inte är numeriskt.
+        """
+        entry = self._entries.get(entity_id)
+        if (
+            entry is not None
+            and entry.state is state_obj
+            and entry.resolver is resolver
+        ):
+            self.hits += 1
+            return entry.value, True
+
+        self.misses += 1
+        raw_unit = state_obj.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
+        if (
+            entry is not None
+            and entry.resolver is resolver
+            and entry.raw_unit == raw_unit
+        ):
+            converter = entry.converter
+        else:
+            converter = resolver(entity_id, str(raw_unit or "").lower())
+
+        try:
+            value: float | None = converter(float(state_obj.state))
+        except (ValueError, TypeError):
+            value = None
+        self._entries[entity_id] = _CachedValue(
+            state_obj, resolver, raw_unit, converter, value
+        )
+        return value, False
+
+    def clear(self) -> None:
+        """Tömmer cachen."""
+        self._entries.clear()